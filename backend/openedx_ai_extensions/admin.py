@@ -6,6 +6,7 @@ import json
 import logging
 
 from django import forms
+from django.conf import settings
 from django.contrib import admin
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.http import JsonResponse
@@ -14,8 +15,15 @@ from django.urls import path, reverse
 from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
 
+from openedx_ai_extensions import codec
+from openedx_ai_extensions.metrics import get_prompt_cache_report, get_window_hours
 from openedx_ai_extensions.models import PromptTemplate
+from openedx_ai_extensions.processors.llm.circuit_breaker import get_circuit_states
+from openedx_ai_extensions.processors.llm.client_pool import get_http_pool_stats
+from openedx_ai_extensions.processors.llm.rate_limiter import get_rate_limit_usage
+from openedx_ai_extensions.processors.llm.routing import get_provider_health_stats
 from openedx_ai_extensions.workflows.models import AIWorkflowProfile, AIWorkflowScope, AIWorkflowSession
+from openedx_ai_extensions.workflows.session_lease import get_session_lease_report
 from openedx_ai_extensions.workflows.template_utils import (
     discover_templates,
     get_effective_config,
@@ -342,6 +350,44 @@ class AIWorkflowProfileAdmin(admin.ModelAdmin):
 
     validation_status.short_description = "Validation Status"
 
+    def get_urls(self):
+        """Return custom admin URLs for the metrics view."""
+        custom_urls = [
+            path(
+                "metrics/",
+                self.admin_site.admin_view(self.metrics_view),
+                name="aiworkflowprofile_metrics",
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def metrics_view(self, request):
+        """Render rolling per-profile operational metrics."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        slugs = list(AIWorkflowProfile.objects.order_by("slug").values_list("slug", flat=True))
+        metrics = {
+            "window_hours": get_window_hours(),
+            "prompt_cache": get_prompt_cache_report(slugs),
+            "session_leases": get_session_lease_report(slugs),
+            "http_pool": get_http_pool_stats(),
+            "provider_health": get_provider_health_stats(),
+            "circuit_breakers": get_circuit_states(sorted(getattr(settings, "AI_EXTENSIONS", {}))),
+            "rate_limits": get_rate_limit_usage(sorted(getattr(settings, "AI_EXTENSIONS", {}))),
+        }
+
+        if request.GET.get("format") == "json":
+            return JsonResponse(metrics, json_dumps_params={"indent": 2})
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "AI Workflow Profile Metrics",
+            "opts": self.model._meta,  # pylint: disable=protected-access
+            **metrics,
+        }
+        return TemplateResponse(request, "admin/ai_metrics.html", context)
+
     class Media:
         """Admin media assets."""
 
@@ -422,8 +468,9 @@ class AIWorkflowSessionAdmin(admin.ModelAdmin):
     debug_link.short_description = "Debug thread"
 
     def metadata_pretty(self, obj):
-        """Render metadata as indented JSON."""
-        return format_html("<pre>{}</pre>", json.dumps(obj.metadata, indent=2, ensure_ascii=False))
+        """Render metadata as indented JSON, with compressed values unpacked."""
+        metadata = {key: codec.unpack(value) for key, value in (obj.metadata or {}).items()}
+        return format_html("<pre>{}</pre>", json.dumps(metadata, indent=2, ensure_ascii=False))
 
     metadata_pretty.short_description = "Metadata"
 
@@ -0,0 +1,152 @@
+"""
+Serialization of stored chat turns and large session metadata values.
+
+encode() serializes a value to text with orjson when it is installed (the
+standard json module otherwise). When the text is at least ``min_bytes``
+long it is compressed and wrapped in a versioned envelope::
+
+    aix1:<compression>:<base64 of the compressed JSON>
+
+Smaller values are stored as plain JSON, so existing rows and small turns
+read back unchanged. decode() accepts both forms.
+
+``compression`` is "zlib" or "zstd" (needs the optional zstandard package;
+zlib is used when it is missing). Every worker reading the same database
+must be able to decode what the others write: install zstandard everywhere
+before turning it on.
+
+pack() and unpack() apply the same envelope to values kept in
+AIWorkflowSession.metadata (flashcard decks, question slot histories), which
+are rewritten in full on each save: small values stay plain JSON values,
+large ones become an envelope string.
+"""
+import base64
+import json
+import logging
+import zlib
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_PREFIX = "aix1:"
+
+DEFAULT_CODEC_SETTINGS = {
+    "compression": "zlib",
+    "min_bytes": 4096,
+    "level": 6,
+}
+
+# Optional speedups: orjson for (de)serialization, zstandard for the "zstd" compression.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def get_codec_settings():
+    """Return codec settings with AI_EXTENSIONS_CODEC applied over the defaults."""
+    return {
+        **DEFAULT_CODEC_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_CODEC", {}) or {}),
+    }
+
+
+def is_compression_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CODEC_COMPRESSION is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CODEC_COMPRESSION", True))
+
+
+def dumps(value):
+    """Return ``value`` as compact JSON text."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"))
+
+
+def loads(text):
+    """Return the value of JSON ``text``."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _compression_name(codec_settings):
+    """Return the configured compression, or zlib when zstd is asked for without zstandard."""
+    name = codec_settings["compression"]
+    if name == "zstd" and zstandard is None:
+        logger.warning("AI_EXTENSIONS_CODEC compression 'zstd' needs the zstandard package; using zlib")
+        return "zlib"
+    return name
+
+
+def _compress(name, data, level):
+    if name == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def _decompress(name, data):
+    """Return ``data`` decompressed with the compression named in its envelope."""
+    if name == "zstd":
+        if zstandard is None:
+            raise ValueError("Stored value is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if name == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown compression '{name}' in stored value")
+
+
+def _envelope(text, codec_settings):
+    """Return the envelope of ``text``, or None when it isn't worth compressing."""
+    data = text.encode("utf-8")
+    if not is_compression_enabled() or len(data) < codec_settings["min_bytes"]:
+        return None
+    name = _compression_name(codec_settings)
+    compressed = base64.b64encode(_compress(name, data, codec_settings["level"])).decode("ascii")
+    envelope = f"{ENVELOPE_PREFIX}{name}:{compressed}"
+    return envelope if len(envelope) < len(data) else None
+
+
+def is_envelope(value):
+    """Return True if ``value`` is an encoded envelope."""
+    return isinstance(value, str) and value.startswith(ENVELOPE_PREFIX)
+
+
+def _open_envelope(envelope):
+    name, _, payload = envelope[len(ENVELOPE_PREFIX):].partition(":")
+    return loads(_decompress(name, base64.b64decode(payload)))
+
+
+def encode(value):
+    """Return ``value`` as text: plain JSON, or an envelope of the compressed JSON when large."""
+    text = dumps(value)
+    return _envelope(text, get_codec_settings()) or text
+
+
+def decode(text):
+    """Return the value of text written by encode() (or by json.dumps)."""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    if is_envelope(text):
+        return _open_envelope(text)
+    return loads(text)
+
+
+def pack(value):
+    """Return ``value`` for a JSON field: unchanged when small, an envelope string when large."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return _envelope(dumps(value), get_codec_settings()) or value
+
+
+def unpack(value):
+    """Return the value stored by pack()."""
+    if is_envelope(value):
+        return _open_envelope(value)
+    return value
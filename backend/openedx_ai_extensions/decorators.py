@@ -18,6 +18,8 @@ from litellm.exceptions import (
 )
 from rest_framework import status
 
+from openedx_ai_extensions.workflows.session_lease import SessionBusyError
+
 logger = logging.getLogger(__name__)
 
 # Mapping of exception types to error codes, messages, and HTTP status codes.
@@ -43,6 +45,11 @@ EXCEPTION_MAP = {
         "message": "The AI service is currently unavailable. Please try again later.",
         "status": status.HTTP_503_SERVICE_UNAVAILABLE,
     },
+    SessionBusyError: {
+        "code": "session_busy",
+        "message": "Your previous message is still being answered. Please try again in a moment.",
+        "status": status.HTTP_409_CONFLICT,
+    },
     ValidationError: {
         "code": "validation_error",
         "message": "The provided input or configuration is invalid.",
@@ -0,0 +1,136 @@
+"""
+Operational metrics for Open edX AI Extensions.
+
+Counters are kept in the Django cache, bucketed by hour, so every web and
+Celery worker contributes to the same rolling window and the Django admin can
+read it back without a dedicated metrics backend.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.llm.providers import get_prompt_cache_tokens
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:metrics"
+BUCKET_SECONDS = 3600
+
+PROMPT_CACHE_COUNTERS = (
+    "requests",
+    "requests_with_cache_read",
+    "prompt_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+def get_window_hours() -> int:
+    """Return the number of hourly buckets covered by the metrics reports."""
+    return max(1, int(getattr(settings, "AI_EXTENSIONS_METRICS_WINDOW_HOURS", 24)))
+
+
+def _current_bucket() -> int:
+    return int(time.time() // BUCKET_SECONDS)
+
+
+def _window_buckets():
+    current = _current_bucket()
+    return range(current - get_window_hours() + 1, current + 1)
+
+
+def _counter_key(group, name, bucket, counter):
+    return f"{CACHE_KEY_PREFIX}:{group}:{name}:{bucket}:{counter}"
+
+
+def increment_counters(group, name, increments) -> None:
+    """
+    Add ``increments`` (counter -> delta) to the current hourly bucket of ``group:name``.
+
+    Cache failures are logged and swallowed: metrics must never break a learner request.
+    """
+    bucket = _current_bucket()
+    timeout = (get_window_hours() + 1) * BUCKET_SECONDS
+    try:
+        for counter, delta in increments.items():
+            if not delta:
+                continue
+            key = _counter_key(group, name, bucket, counter)
+            cache.add(key, 0, timeout)
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                # The key expired between add() and incr(); start a fresh counter.
+                cache.set(key, delta, timeout)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not record {group} metrics for {name}: {e}")
+
+
+def read_counters(group, names, counters) -> dict:
+    """Return ``{name: {counter: total}}`` summed over the rolling window."""
+    keys = {
+        _counter_key(group, name, bucket, counter): (name, counter)
+        for name in names
+        for bucket in _window_buckets()
+        for counter in counters
+    }
+    totals = {name: dict.fromkeys(counters, 0) for name in names}
+    try:
+        values = cache.get_many(list(keys))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not read {group} metrics: {e}")
+        values = {}
+    for key, value in values.items():
+        name, counter = keys[key]
+        totals[name][counter] += value
+    return totals
+
+
+def record_prompt_cache_usage(profile_slug, usage) -> None:
+    """
+    Add one request's usage to the rolling prompt-cache counters of a profile.
+
+    Args:
+        profile_slug: Slug of the AIWorkflowProfile that made the request.
+        usage: Usage dict as emitted in workflow events.
+    """
+    if not isinstance(profile_slug, str) or not isinstance(usage, dict):
+        return
+    # Responses API usage reports input_tokens instead of prompt_tokens.
+    prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+    if not isinstance(prompt_tokens, int):
+        prompt_tokens = 0
+    cache_read, cache_creation = get_prompt_cache_tokens(usage)
+    increment_counters("prompt_cache", profile_slug, {
+        "requests": 1,
+        "requests_with_cache_read": 1 if cache_read else 0,
+        "prompt_tokens": prompt_tokens,
+        "cache_read_input_tokens": cache_read or 0,
+        "cache_creation_input_tokens": cache_creation or 0,
+    })
+
+
+def get_prompt_cache_report(profile_slugs) -> list:
+    """
+    Return rolling prompt-cache statistics, one dict per profile slug.
+
+    ``token_hit_rate`` is the share of prompt tokens served from the provider's
+    cache; ``request_hit_rate`` is the share of requests that read any cached
+    prefix. Both are None when there is no traffic in the window.
+    """
+    totals = read_counters("prompt_cache", profile_slugs, PROMPT_CACHE_COUNTERS)
+    report = []
+    for slug in profile_slugs:
+        row = {"profile": slug, **totals[slug]}
+        prompt_tokens = row["prompt_tokens"]
+        requests = row["requests"]
+        row["token_hit_rate"] = (
+            round(row["cache_read_input_tokens"] / prompt_tokens, 4) if prompt_tokens else None
+        )
+        row["request_hit_rate"] = (
+            round(row["requests_with_cache_read"] / requests, 4) if requests else None
+        )
+        report.append(row)
+    return report
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_ai_extensions', '0008_aiworkflowsession_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('edx_video_id', models.CharField(max_length=100)),
+                ('language_code', models.CharField(max_length=50)),
+                ('transcript_modified', models.DateTimeField(help_text='Modified timestamp of the edxval transcript this digest was computed from')),
+                ('method', models.CharField(default='extractive', max_length=32)),
+                ('digest', models.TextField()),
+                ('source_chars', models.PositiveIntegerField(default=0, help_text='Length of the clean transcript text the digest was computed from')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('edx_video_id', 'language_code')},
+            },
+        ),
+    ]
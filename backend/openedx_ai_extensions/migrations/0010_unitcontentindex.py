@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:20
+
+import opaque_keys.edx.django.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_ai_extensions', '0009_transcriptdigest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitContentIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(db_index=True, max_length=255)),
+                ('sequence_id', opaque_keys.edx.django.models.UsageKeyField(db_index=True, max_length=255)),
+                ('sequence_display_name', models.CharField(blank=True, default='', max_length=255)),
+                ('unit_id', opaque_keys.edx.django.models.UsageKeyField(max_length=255, unique=True)),
+                ('position', models.PositiveIntegerField(help_text='Position of the unit in its sequence')),
+                ('content', models.JSONField(help_text='Serialized unit content, as returned by get_location_content')),
+                ('token_count', models.PositiveIntegerField(default=0, help_text='Estimated tokens of the serialized content')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the serialized content', max_length=64)),
+                ('blocks_version', models.CharField(help_text='Fingerprint of the blocks the content was extracted from', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['sequence_id', 'position'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_ai_extensions', '0010_unitcontentindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('digest', models.CharField(help_text='SHA-256 of the uncompressed text', max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField(help_text='zlib-compressed UTF-8 text')),
+                ('size', models.PositiveIntegerField(default=0, help_text='Length of the uncompressed text')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_ai_extensions', '0011_contentblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary', models.TextField(blank=True, default='')),
+                ('covered_messages', models.PositiveIntegerField(default=0, help_text='Number of history messages folded into the summary')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(help_text='Session whose history is summarized', on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summary', to='openedx_ai_extensions.aiworkflowsession')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_ai_extensions', '0012_aiconversationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unitcontentindex',
+            name='course_version',
+            field=models.CharField(blank=True, default='', help_text='Published course version of the last index run that went through the whole course', max_length=255),
+        ),
+    ]
@@ -6,6 +6,7 @@ import re
 from uuid import uuid4
 
 from django.db import models
+from opaque_keys.edx.django.models import CourseKeyField, UsageKeyField
 
 logger = logging.getLogger(__name__)
 
@@ -98,3 +99,101 @@ class PromptTemplate(models.Model):
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.warning(f"Error loading PromptTemplate by slug '{template_identifier}': {e}")
             return None
+
+
+class TranscriptDigest(models.Model):
+    """
+    Condensed transcript of a video, computed offline after a course is published.
+
+    One row per video and language. ``transcript_modified`` is the edxval
+    ``modified`` timestamp of the transcript the digest was computed from, so
+    a digest is recomputed whenever its transcript changes.
+
+    .. no_pii:
+    """
+
+    edx_video_id = models.CharField(max_length=100)
+    language_code = models.CharField(max_length=50)
+    transcript_modified = models.DateTimeField(
+        help_text="Modified timestamp of the edxval transcript this digest was computed from"
+    )
+    method = models.CharField(max_length=32, default="extractive")
+    digest = models.TextField()
+    source_chars = models.PositiveIntegerField(
+        default=0,
+        help_text="Length of the clean transcript text the digest was computed from"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Model metadata."""
+
+        unique_together = ("edx_video_id", "language_code")
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.edx_video_id} ({self.language_code})"
+
+
+class UnitContentIndex(models.Model):
+    """
+    LLM-ready content of a published course unit.
+
+    One row per unit, holding the get_location_content output of the unit as
+    extracted with the default processor configuration. ``blocks_version``
+    fingerprints the unit's blocks (and video transcript versions), so a course
+    publish only re-extracts the units that changed. ``course_version`` is
+    stamped on every row of the course once a run completes; rows are served
+    only while it matches the published course.
+
+    .. no_pii:
+    """
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    sequence_id = UsageKeyField(max_length=255, db_index=True)
+    sequence_display_name = models.CharField(max_length=255, blank=True, default="")
+    unit_id = UsageKeyField(max_length=255, unique=True)
+    position = models.PositiveIntegerField(help_text="Position of the unit in its sequence")
+    content = models.JSONField(help_text="Serialized unit content, as returned by get_location_content")
+    token_count = models.PositiveIntegerField(default=0, help_text="Estimated tokens of the serialized content")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the serialized content")
+    blocks_version = models.CharField(
+        max_length=64, help_text="Fingerprint of the blocks the content was extracted from"
+    )
+    course_version = models.CharField(
+        max_length=255, blank=True, default="",
+        help_text="Published course version of the last index run that went through the whole course",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Model metadata."""
+
+        ordering = ["sequence_id", "position"]
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.unit_id}"
+
+
+class ContentBlob(models.Model):
+    """
+    Content-addressed text referenced from chat history submissions.
+
+    Large system messages (the system prompt and the course context) are stored
+    once, zlib-compressed, under the SHA-256 of their text, and submissions keep
+    a reference to the digest instead of a copy.
+
+    .. no_pii:
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the uncompressed text")
+    data = models.BinaryField(help_text="zlib-compressed UTF-8 text")
+    size = models.PositiveIntegerField(default=0, help_text="Length of the uncompressed text")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.digest} ({self.size} chars)"
@@ -0,0 +1,186 @@
+"""
+Circuit breaker for LiteLLM provider calls, shared across workers via the Django cache.
+
+After ``failure_threshold`` outage errors (timeouts, connection errors, 5xx)
+within ``failure_window_s``, even with successful calls in between, the
+circuit of that AI_EXTENSIONS provider profile opens: calls fail immediately
+with ProviderCircuitOpenError (a 503) instead of tying up a worker until the
+provider times out. Once ``open_seconds`` have passed the circuit is
+half-open and a single probe call is let through; its success closes the
+circuit and clears the failure count, its failure opens it again.
+
+Processors with ``"stale_fallback": true`` in their config additionally keep
+the last successful non-streaming response for each request and serve it while
+the provider is unavailable.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from litellm.exceptions import (
+    APIConnectionError,
+    BadGatewayError,
+    InternalServerError,
+    ServiceUnavailableError,
+    Timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:circuit_breaker"
+
+DEFAULT_CIRCUIT_BREAKER_SETTINGS = {
+    "failure_threshold": 5,
+    "failure_window_s": 60,
+    "open_seconds": 30,
+    "probe_timeout_s": 30,
+    "stale_ttl_s": 86400,
+}
+
+# Errors that indicate the provider, not the request, is at fault.
+OUTAGE_EXCEPTIONS = (
+    Timeout,
+    APIConnectionError,
+    ServiceUnavailableError,
+    InternalServerError,
+    BadGatewayError,
+)
+
+# Request keys that identify credentials or transport, not the request itself.
+_STALE_KEY_EXCLUDED_PARAMS = ("api_key", "client", "stream", "stream_options")
+
+
+class ProviderCircuitOpenError(ServiceUnavailableError):
+    """Raised without calling the provider while its circuit is open."""
+
+    def __init__(self, profile, model=None):
+        self.profile = profile
+        super().__init__(
+            message=f"Circuit open for AI_EXTENSIONS provider profile '{profile}'",
+            llm_provider=(model or "").split("/")[0],
+            model=model or "",
+        )
+
+
+def get_circuit_breaker_settings():
+    """Return breaker settings with AI_EXTENSIONS_CIRCUIT_BREAKER applied over the defaults."""
+    return {
+        **DEFAULT_CIRCUIT_BREAKER_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_CIRCUIT_BREAKER", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER", False))
+
+
+def _key(profile, name):
+    return f"{CACHE_KEY_PREFIX}:{profile}:{name}"
+
+
+def before_call(profile, model=None):
+    """
+    Raise ProviderCircuitOpenError if calls to ``profile`` must fail fast.
+
+    While open, every call is rejected. Once half-open, only the worker that
+    claims the probe slot is let through.
+    """
+    if not is_enabled():
+        return
+    open_until = cache.get(_key(profile, "open_until"))
+    if open_until is None:
+        return
+    if time.time() < open_until:
+        raise ProviderCircuitOpenError(profile, model)
+    breaker_settings = get_circuit_breaker_settings()
+    if not cache.add(_key(profile, "probe"), 1, breaker_settings["probe_timeout_s"]):
+        raise ProviderCircuitOpenError(profile, model)
+    logger.info(f"Circuit for provider profile '{profile}' is half-open; sending a probe request.")
+
+
+def record_success(profile):
+    """
+    Close the circuit of ``profile`` after a successful call.
+
+    Closing an open or half-open circuit clears the failure count, so a single
+    failure after the probe doesn't open it again. While the circuit is closed
+    the count is left to expire with its window: a provider failing every
+    other call still reaches the threshold.
+    """
+    if not is_enabled():
+        return
+    if cache.get(_key(profile, "open_until")) is None:
+        return
+    logger.info(f"Circuit for provider profile '{profile}' closed.")
+    cache.delete_many([_key(profile, name) for name in ("open_until", "probe", "failures")])
+
+
+def record_failure(profile):
+    """Count an outage error for ``profile`` and open its circuit past the threshold."""
+    if not is_enabled():
+        return
+    breaker_settings = get_circuit_breaker_settings()
+    half_open = cache.get(_key(profile, "open_until")) is not None
+    failures_key = _key(profile, "failures")
+    cache.add(failures_key, 0, breaker_settings["failure_window_s"])
+    try:
+        failures = cache.incr(failures_key)
+    except ValueError:
+        cache.set(failures_key, 1, breaker_settings["failure_window_s"])
+        failures = 1
+    if half_open or failures >= breaker_settings["failure_threshold"]:
+        open_seconds = breaker_settings["open_seconds"]
+        # Keep the open_until marker well past the open period so the circuit
+        # stays half-open (one probe at a time) until a call succeeds.
+        cache.set(_key(profile, "open_until"), time.time() + open_seconds, open_seconds * 10)
+        cache.delete(_key(profile, "probe"))
+        logger.warning(
+            f"Circuit for provider profile '{profile}' opened for {open_seconds}s after {failures} failures."
+        )
+
+
+def get_circuit_states(profiles):
+    """Return the breaker state of each provider profile for the metrics view."""
+    states = []
+    now = time.time()
+    for profile in profiles:
+        open_until = cache.get(_key(profile, "open_until"))
+        if open_until is None:
+            state = "closed"
+        elif now < open_until:
+            state = "open"
+        else:
+            state = "half-open"
+        states.append({
+            "profile": profile,
+            "state": state,
+            "recent_failures": cache.get(_key(profile, "failures")) or 0,
+            "open_for_s": max(0, round(open_until - now)) if state == "open" else None,
+        })
+    return states
+
+
+def stale_response_key(api_name, params):
+    """Return the cache key under which the last response to this request is kept."""
+    request = {k: v for k, v in params.items() if k not in _STALE_KEY_EXCLUDED_PARAMS}
+    digest = hashlib.sha256(
+        json.dumps([api_name, request], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:stale:{digest}"
+
+
+def store_stale_response(key, response):
+    """Keep ``response`` as the fallback for its request."""
+    try:
+        cache.set(key, response, get_circuit_breaker_settings()["stale_ttl_s"])
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not cache fallback response: {e}")
+
+
+def get_stale_response(key):
+    """Return the last response kept for a request, or None."""
+    return cache.get(key)
@@ -0,0 +1,189 @@
+"""
+Per-worker pool of persistent HTTP clients for LiteLLM provider calls.
+
+By default LiteLLM builds or looks up its own HTTP clients for every call. With
+AI_EXTENSIONS_ENABLE_HTTP_POOL enabled, each resolved AI_EXTENSIONS profile
+(model, api_base, hashed api_key) gets one long-lived ``httpx.Client`` per
+worker process, so keep-alive (and HTTP/2 when ``h2`` is installed) connections
+to the provider are reused instead of paying a new TLS handshake per request.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+from openai import OpenAI, OpenAIError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HTTP_POOL_SETTINGS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "connect_timeout": 10.0,
+    "read_timeout": 600.0,
+    "write_timeout": 600.0,
+    "pool_timeout": 10.0,
+    "http2": True,
+}
+
+# Client wrapper LiteLLM expects for each (provider, API) pair. LiteLLM's generic
+# HTTP handler accepts an HTTPHandler; its OpenAI Chat Completions path expects an
+# ``openai.OpenAI`` SDK client. Pairs not listed here keep LiteLLM's default handling.
+_CLIENT_WRAPPERS = {
+    ("openai", "completion"): "openai_sdk",
+    ("openai", "responses"): "http_handler",
+    ("anthropic", "completion"): "http_handler",
+    ("anthropic", "responses"): "http_handler",
+}
+
+_lock = threading.Lock()
+_pool = {}
+_pool_pid = None
+
+
+class _PooledClient:
+    """A shared ``httpx.Client`` plus the LiteLLM wrappers built around it."""
+
+    def __init__(self, key, pool_settings):
+        self.key = key
+        self.created_at = time.time()
+        self.last_used = None
+        self.requests = 0
+        self.error_responses = 0
+        self.http2 = bool(pool_settings["http2"]) and importlib.util.find_spec("h2") is not None
+        self.http_client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=pool_settings["max_connections"],
+                max_keepalive_connections=pool_settings["max_keepalive_connections"],
+                keepalive_expiry=pool_settings["keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(
+                connect=pool_settings["connect_timeout"],
+                read=pool_settings["read_timeout"],
+                write=pool_settings["write_timeout"],
+                pool=pool_settings["pool_timeout"],
+            ),
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+        # Wrappers are kept for the lifetime of the entry: HTTPHandler closes the
+        # wrapped client when it is garbage collected.
+        self._wrappers = {}
+
+    def _on_request(self, request):  # pylint: disable=unused-argument
+        self.requests += 1
+        self.last_used = time.time()
+
+    def _on_response(self, response):
+        if response.status_code >= 500:
+            self.error_responses += 1
+
+    def wrapper(self, kind, api_key=None, api_base=None):
+        """Return the LiteLLM client wrapper of the given kind around the shared client."""
+        with _lock:
+            if kind not in self._wrappers:
+                if kind == "openai_sdk":
+                    self._wrappers[kind] = OpenAI(api_key=api_key, base_url=api_base, http_client=self.http_client)
+                else:
+                    self._wrappers[kind] = HTTPHandler(client=self.http_client)
+            return self._wrappers[kind]
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of this client's usage."""
+        open_connections = idle_connections = None
+        try:
+            # httpcore internals; only used for reporting.
+            connections = self.http_client._transport._pool.connections  # pylint: disable=protected-access
+            open_connections = len(connections)
+            idle_connections = sum(1 for connection in connections if connection.is_idle())
+        except AttributeError:
+            pass
+        provider, model, api_base, key_hash = self.key
+        return {
+            "provider": provider,
+            "model": model,
+            "api_base": api_base,
+            "api_key_hash": key_hash,
+            "http2": self.http2,
+            "requests": self.requests,
+            "error_responses": self.error_responses,
+            "open_connections": open_connections,
+            "idle_connections": idle_connections,
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+        }
+
+
+def get_http_pool_settings():
+    """Return the pool settings with AI_EXTENSIONS_HTTP_POOL applied over the defaults."""
+    return {**DEFAULT_HTTP_POOL_SETTINGS, **(getattr(settings, "AI_EXTENSIONS_HTTP_POOL", {}) or {})}
+
+
+def _pool_key(provider, params):
+    api_key = params.get("api_key") or ""
+    key_hash = hashlib.sha256(str(api_key).encode("utf-8")).hexdigest()[:16] if api_key else ""
+    return (provider, params.get("model"), params.get("api_base"), key_hash)
+
+
+def _get_entry(key):
+    """Return the pooled client for ``key``, creating it (and resetting after a fork) as needed."""
+    global _pool_pid  # pylint: disable=global-statement
+    with _lock:
+        if _pool_pid != os.getpid():
+            # Sockets inherited from the parent process must not be shared; drop
+            # the references without closing them so the parent keeps working.
+            _pool.clear()
+            _pool_pid = os.getpid()
+        entry = _pool.get(key)
+        if entry is None:
+            entry = _pool[key] = _PooledClient(key, get_http_pool_settings())
+        return entry
+
+
+def get_pooled_client(provider, params):
+    """
+    Return a pooled LiteLLM client for a ``completion`` or ``responses`` call, or None.
+
+    None is returned when pooling is disabled, the call already carries a client,
+    or the provider/API pair has no known client type.
+
+    Args:
+        provider (str): Provider prefix of the model (e.g. 'openai', 'anthropic').
+        params (dict): Keyword arguments of the LiteLLM call.
+    """
+    if not getattr(settings, "AI_EXTENSIONS_ENABLE_HTTP_POOL", False) or "client" in params:
+        return None
+    api = "completion" if "messages" in params else "responses"
+    kind = _CLIENT_WRAPPERS.get((provider, api))
+    if kind is None:
+        return None
+    entry = _get_entry(_pool_key(provider, params))
+    try:
+        return entry.wrapper(kind, api_key=params.get("api_key"), api_base=params.get("api_base"))
+    except OpenAIError as e:
+        logger.warning(f"Could not build pooled {provider} client, using LiteLLM defaults: {e}")
+        return None
+
+
+def get_http_pool_stats():
+    """Return usage stats for every pooled client of the current worker process."""
+    with _lock:
+        if _pool_pid != os.getpid():
+            return []
+        return [entry.stats() for entry in _pool.values()]
+
+
+def close_http_pool():
+    """Close and forget every pooled client of the current worker process."""
+    with _lock:
+        entries = list(_pool.values()) if _pool_pid == os.getpid() else []
+        _pool.clear()
+    for entry in entries:
+        entry.http_client.close()
@@ -0,0 +1,184 @@
+"""
+Rolling memory of long chat conversations.
+
+Without a server-side thread, every turn sends the stored chat history to the
+LLM, so prompts grow with the conversation. Once the (non-system) history
+exceeds ``threshold_tokens``, compact() keeps the most recent turns verbatim,
+up to about ``recent_tokens``, and replaces the older ones with a rolling
+summary stored in AIConversationSummary.
+
+The summary is updated by a Celery task, off the request path: each update
+folds the messages not yet covered into the previous summary. Until it catches
+up, the messages after the summary are sent verbatim, and the prompt is cut
+to the recent turns if it would exceed ``max_tokens``.
+
+Each summary update is a billable LLM call of its own, so memory is off unless
+AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY is set.
+"""
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.llm.rate_limiter import LANE_BULK, estimate_tokens, priority_lane
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:conversation_memory"
+
+DEFAULT_CONVERSATION_MEMORY_SETTINGS = {
+    "threshold_tokens": 6000,
+    "recent_tokens": 3000,
+    "max_tokens": 12000,
+    "min_recent_messages": 4,
+    "lock_timeout": 300,
+}
+
+SUMMARY_PREFIX = "Summary of the earlier conversation with the learner:\n"
+
+
+def get_conversation_memory_settings():
+    """Return conversation memory settings with AI_EXTENSIONS_CONVERSATION_MEMORY applied over the defaults."""
+    return {
+        **DEFAULT_CONVERSATION_MEMORY_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_CONVERSATION_MEMORY", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY", False))
+
+
+def _tokens(messages):
+    return estimate_tokens({"messages": messages})
+
+
+def recent_start(turns, recent_tokens, min_recent_messages):
+    """
+    Return the index of the first of the recent ``turns`` kept verbatim.
+
+    At least ``min_recent_messages`` are kept, then older messages while they
+    fit in ``recent_tokens``. The index is moved back to a user message, so
+    the kept part starts with a whole turn.
+    """
+    start = max(0, len(turns) - min_recent_messages)
+    used = _tokens(turns[start:])
+    while start > 0:
+        cost = _tokens([turns[start - 1]])
+        if used + cost > recent_tokens:
+            break
+        used += cost
+        start -= 1
+    while start > 0 and turns[start].get("role") != "user":
+        start -= 1
+    return start
+
+
+def _split_system(history):
+    """Return (system messages without duplicates, other messages) of ``history``."""
+    system, turns, seen = [], [], set()
+    for msg in history:
+        if msg.get("role") == "system":
+            if msg.get("content") not in seen:
+                seen.add(msg.get("content"))
+                system.append(msg)
+        else:
+            turns.append(msg)
+    return system, turns
+
+
+def compact(session, history):
+    """
+    Return ``history`` bounded for the prompt of the next turn.
+
+    System messages are kept first. When the other messages exceed
+    ``threshold_tokens``, they are replaced by the session's rolling summary
+    plus the messages it doesn't cover yet, and a summary update is scheduled
+    if the summary lags behind the recent turns.
+    """
+    if not is_enabled() or session is None or not history:
+        return history
+    memory_settings = get_conversation_memory_settings()
+    system, turns = _split_system(history)
+    if _tokens(turns) <= memory_settings["threshold_tokens"]:
+        return history
+
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.workflows.models import AIConversationSummary
+
+    start = recent_start(turns, memory_settings["recent_tokens"], memory_settings["min_recent_messages"])
+    summary = AIConversationSummary.objects.filter(session=session).first()
+    covered = summary.covered_messages if summary and summary.covered_messages <= len(turns) else 0
+    if covered < start:
+        schedule_summary_update(session.id, start)
+
+    memory = [{"role": "system", "content": SUMMARY_PREFIX + summary.summary}] if covered else []
+    kept = turns[covered:]
+    if _tokens(memory + kept) > memory_settings["max_tokens"]:
+        kept = turns[max(covered, start):]
+    return system + memory + kept
+
+
+def schedule_summary_update(session_id, through):
+    """Queue update_conversation_summary_task unless an update of the session is already running."""
+    lock_timeout = get_conversation_memory_settings()["lock_timeout"]
+    try:
+        if not cache.add(f"{CACHE_KEY_PREFIX}:updating:{session_id}", True, lock_timeout):
+            return False
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Conversation memory lock unavailable: {e}")
+    try:
+        update_conversation_summary_task.delay(str(session_id), through)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # The prompt keeps the uncovered messages; the next turn retries.
+        logger.warning(f"Could not queue the conversation summary update of session {session_id}: {e}")
+        cache.delete(f"{CACHE_KEY_PREFIX}:updating:{session_id}")
+        return False
+    return True
+
+
+def update_summary(session, through):
+    """Fold the session's history messages up to ``through`` into its rolling summary."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.processors.llm.llm_processor import LLMProcessor
+    from openedx_ai_extensions.processors.openedx.submission_processor import SubmissionProcessor
+    from openedx_ai_extensions.workflows.models import AIConversationSummary
+
+    processor_config = session.profile.processor_config
+    history = SubmissionProcessor(processor_config, session).get_full_message_history(max_tokens=0) or []
+    _, turns = _split_system(history)
+    summary, _ = AIConversationSummary.objects.get_or_create(session=session)
+    through = min(through, len(turns))
+    if through <= summary.covered_messages:
+        return summary
+
+    with priority_lane(LANE_BULK):
+        text = LLMProcessor(processor_config, session).summarize_conversation(
+            summary.summary, turns[summary.covered_messages:through]
+        )
+    if not text:
+        return summary
+    summary.summary = text
+    summary.covered_messages = through
+    summary.save()
+    return summary
+
+
+@shared_task(
+    name="openedx_ai_extensions.processors.update_conversation_summary",
+    time_limit=300,
+    soft_time_limit=270,
+)
+def update_conversation_summary_task(session_id, through):
+    """Update the rolling summary of a chat session."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.workflows.models import AIWorkflowSession
+
+    try:
+        session = AIWorkflowSession.objects.select_related("profile").get(id=session_id)
+        summary = update_summary(session, through)
+        logger.info(f"Conversation summary of session {session_id} covers {summary.covered_messages} messages")
+    finally:
+        cache.delete(f"{CACHE_KEY_PREFIX}:updating:{session_id}")
@@ -52,7 +52,7 @@ class EducatorAssistantProcessor(LitellmProcessor):
         if self.extra_params:
             completion_params.update(self.extra_params)
 
-        response = completion(**completion_params)
+        response = self._call_litellm(completion, completion_params)
         content = response.choices[0].message.content
 
         return {
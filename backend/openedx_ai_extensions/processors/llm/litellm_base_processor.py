@@ -3,15 +3,28 @@ Base processor for LiteLLM-based processors
 """
 
 import logging
+from functools import partial
 
 from django.conf import settings
 
 from openedx_ai_extensions.functions.decorators import TOOLS_SCHEMA
 from openedx_ai_extensions.models import PromptTemplate
+from openedx_ai_extensions.processors.llm import circuit_breaker, rate_limiter
+from openedx_ai_extensions.processors.llm.client_pool import get_pooled_client
+from openedx_ai_extensions.processors.llm.routing import call_with_routing
 
 logger = logging.getLogger(__name__)
 
 
+def _get_profile_names(provider_spec):
+    """Return the ordered AI_EXTENSIONS profile names named by a ``provider`` setting."""
+    if isinstance(provider_spec, str):
+        return [provider_spec]
+    if isinstance(provider_spec, list) and provider_spec and all(isinstance(name, str) for name in provider_spec):
+        return list(provider_spec)
+    raise TypeError("`provider` must be a string or a non-empty list of strings")
+
+
 class LitellmProcessor:
     """Base class for processors that use LiteLLM for AI/LLM operations"""
 
@@ -22,23 +35,26 @@ class LitellmProcessor:
         self.extra_params = extra_params or {}
         self.usage = None
 
-        provider_spec = self.config.get("provider", "default")
-        self.config_profile = provider_spec
-        if isinstance(provider_spec, str):
-            providers = getattr(settings, "AI_EXTENSIONS", {})
-            provider = providers.get(provider_spec)
-
-            if provider is None and provider_spec != "default":
-                raise ValueError(f"Unknown AI_EXTENSIONS profile '{provider_spec}'")
+        # `provider` names one AI_EXTENSIONS profile, or an ordered list of them
+        # to fail over between (see processors/llm/routing.py).
+        profile_names = _get_profile_names(self.config.get("provider", "default"))
+        self.config_profile = profile_names[0]
 
-            provider = provider or {}
-        else:
-            raise TypeError("`provider` must be a string")
+        providers = getattr(settings, "AI_EXTENSIONS", {})
+        self.provider_routes = []
+        for name in profile_names:
+            provider = providers.get(name)
+            if provider is None and name != "default":
+                raise ValueError(f"Unknown AI_EXTENSIONS profile '{name}'")
+            self.provider_routes.append((name, {k.lower(): v for k, v in (provider or {}).items()}))
+        self.routing_config = self.config.get("routing", {}) or {}
 
         options = self.config.get("options", {}) or {}
 
-        base_params = {k.lower(): v for k, v in provider.items()}
+        base_params = self.provider_routes[0][1]
         override_params = {k.lower(): v for k, v in options.items()}
+        # Keys that apply whichever provider profile ends up serving a call.
+        self._pinned_params = {**override_params, **self.extra_params}
         self.extra_params = {**base_params, **override_params, **self.extra_params}
 
         model = self.extra_params.get("model")
@@ -49,6 +65,13 @@ class LitellmProcessor:
             )
 
         self.provider = model.split("/")[0]
+        for name, profile_params in self.provider_routes[1:]:
+            fallback_model = {**profile_params, **self._pinned_params}.get("model")
+            if not isinstance(fallback_model, str) or fallback_model.split("/")[0] != self.provider:
+                raise ValueError(
+                    f"AI_EXTENSIONS profile '{name}' must use the same provider as "
+                    f"'{self.config_profile}' ('{self.provider}/...') to be listed as a fallback"
+                )
         self.custom_prompt = self._load_prompt()
         self.stream = self.config.get("stream", False)
 
@@ -69,6 +92,7 @@ class LitellmProcessor:
             )
             cache_option = False
         self.caching_enabled = cache_option
+        self.stale_fallback = bool(self.config.get("stale_fallback", False))
 
         self.mcp_configs = {}
         allowed_mcp_configs = self.config.get("mcp_configs", [])
@@ -109,6 +133,68 @@ class LitellmProcessor:
         # Fall back to inline prompt (backwards compatibility)
         return self.config.get("prompt")
 
+    def _call_litellm(self, api_call, params):
+        """
+        Invoke a LiteLLM API function (``completion`` or ``responses``) with ``params``.
+
+        When several provider profiles are configured, the call is routed across
+        them with failover (and optional hedging). Each profile call goes through
+        its circuit breaker, its rate limiter and, when AI_EXTENSIONS_ENABLE_HTTP_POOL is on, the
+        pooled keep-alive client of that profile. With ``stale_fallback`` enabled,
+        the last response to an identical non-streaming request is served while
+        the provider is unavailable. ``params`` itself is never modified.
+        """
+        stale_key = None
+        if self.stale_fallback and not params.get("stream"):
+            stale_key = circuit_breaker.stale_response_key(getattr(api_call, "__name__", ""), params)
+
+        try:
+            if len(self.provider_routes) == 1:
+                response = self._call_profile(api_call, self.config_profile, params)
+            else:
+                candidates = [(self.config_profile, params)] + [
+                    (name, self._route_params(params, profile_params))
+                    for name, profile_params in self.provider_routes[1:]
+                ]
+                response = call_with_routing(partial(self._call_profile, api_call), candidates, self.routing_config)
+        except circuit_breaker.OUTAGE_EXCEPTIONS:
+            stale_response = circuit_breaker.get_stale_response(stale_key) if stale_key else None
+            if stale_response is None:
+                raise
+            logger.warning(f"Provider unavailable for profile '{self.config_profile}'; serving cached response.")
+            return stale_response
+
+        if stale_key:
+            circuit_breaker.store_stale_response(stale_key, response)
+        return response
+
+    def _call_profile(self, api_call, profile, params):
+        """Invoke ``api_call`` for one provider profile, behind its circuit breaker and rate limiter."""
+        circuit_breaker.before_call(profile, params.get("model"))
+        reservation = rate_limiter.acquire(profile, params)
+        client = get_pooled_client(self.provider, params)
+        if client is not None:
+            params = {**params, "client": client}
+        try:
+            response = api_call(**params)
+        except circuit_breaker.OUTAGE_EXCEPTIONS as e:
+            if not isinstance(e, circuit_breaker.ProviderCircuitOpenError):
+                circuit_breaker.record_failure(profile)
+            raise
+        circuit_breaker.record_success(profile)
+        rate_limiter.settle(reservation, response)
+        return response
+
+    def _route_params(self, params, profile_params):
+        """Return ``params`` with the primary profile's settings swapped for another profile's."""
+        primary_keys = self.provider_routes[0][1].keys()
+        routed = {
+            key: value for key, value in params.items()
+            if key not in primary_keys or key in self._pinned_params
+        }
+        routed.update({key: value for key, value in profile_params.items() if key not in self._pinned_params})
+        return routed
+
     def process(self, *args, **kwargs):
         """Process based on configured function - must be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement process method")
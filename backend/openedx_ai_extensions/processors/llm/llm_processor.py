@@ -8,13 +8,15 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 from litellm import completion, get_responses, list_input_items, responses
-from litellm.exceptions import BadRequestError
+from litellm.exceptions import BadRequestError, RateLimitError
 
 from openedx_ai_extensions.functions.decorators import AVAILABLE_TOOLS
+from openedx_ai_extensions.processors.llm import map_reduce
 from openedx_ai_extensions.processors.llm.litellm_base_processor import LitellmProcessor
 from openedx_ai_extensions.processors.llm.providers import (
     adapt_to_provider,
     after_tool_call_adaptations,
+    get_prompt_cache_tokens,
     provider_supports,
 )
 from openedx_ai_extensions.processors.llm.tool_executor import ToolExecutor
@@ -23,6 +25,12 @@ from openedx_ai_extensions.utils import STREAMING_FAILED_MESSAGE, normalize_inpu
 logger = logging.getLogger(__name__)
 
 
+def _sum_optional(*values):
+    """Add up the values that are not None; return None when all of them are."""
+    present = [value for value in values if value is not None]
+    return sum(present) if present else None
+
+
 class LLMProcessor(LitellmProcessor):
     """
     Handles AI processing using LiteLLM with support for threaded conversations.
@@ -46,14 +54,18 @@ class LLMProcessor(LitellmProcessor):
         """
         super().__init__(config, user_session, extra_params)
         self.chat_history = None
+        self.history_loader = None
         self.input_data = None
         self.context = None
+        self.context_data = None
 
     def process(self, *args, **kwargs):
         """Process based on configured function"""
         self.context = kwargs.get("context", None)
+        self.context_data = kwargs.get("context_data", None)
         self.input_data = kwargs.get("input_data", None)
         self.chat_history = kwargs.get("chat_history", None)
+        self.history_loader = kwargs.get("history_loader", None)
 
         function_name = self.config.get("function", None)
         # jsonmerge still returns "function": null", so check for that too
@@ -169,7 +181,7 @@ class LLMProcessor(LitellmProcessor):
                     response = self._completion_with_tools([], params)
                     return self._handle_streaming_completion(response)
 
-                raw_response = responses(**params)
+                raw_response = self._call_litellm(responses, params)
                 return self._yield_threaded_stream(raw_response, params)
 
             response = self._responses_with_tools(tool_calls=[], params=params)
@@ -203,7 +215,10 @@ class LLMProcessor(LitellmProcessor):
                     self.user_session.remote_response_id = None
                     self.user_session.save()
 
-                # Re-build params without previous_response_id and with full history
+                # Re-build params without previous_response_id and with full history,
+                # loaded only now that the server-side thread is gone
+                if not self.chat_history and self.history_loader is not None:
+                    self.chat_history = self.history_loader() or None
                 params = self._build_response_api_params(system_role=system_role)
                 return self._call_responses_wrapper(params=params, initialize=True, system_role=system_role)
             raise
@@ -287,7 +302,7 @@ class LLMProcessor(LitellmProcessor):
             )
 
         # Call completion again with updated messages
-        response = completion(**params)
+        response = self._call_litellm(completion, params)
 
         # For streaming, we need to handle the stream to detect tool calls
         if params.get("stream"):
@@ -337,7 +352,13 @@ class LLMProcessor(LitellmProcessor):
     # -------------------------------------------------------------------------
 
     def _set_token_usage(self, response) -> "int | None":
-        """Extract total token count from the response and save to self.usage for event emission."""
+        """
+        Extract token counts from the response and save to self.usage for event emission.
+
+        Prompt-cache reads and writes are normalized onto the usage object as
+        ``cache_read_input_tokens`` / ``cache_creation_input_tokens`` whatever field
+        names the provider used, so multi_turn_cache hit rates can be tracked per profile.
+        """
 
         usage = None
         chunk_response = getattr(response, "response", None)
@@ -349,17 +370,29 @@ class LLMProcessor(LitellmProcessor):
         if usage is None:
             return
 
+        cache_read, cache_creation = get_prompt_cache_tokens(usage)
         try:
-            if self.usage is not None:
+            if self.usage is not None and self.usage is not usage:
+                previous_read, previous_creation = get_prompt_cache_tokens(self.usage)
                 self.usage.total_tokens += usage.total_tokens
                 self.usage.prompt_tokens += usage.prompt_tokens
                 self.usage.completion_tokens += usage.completion_tokens
+                cache_read = _sum_optional(previous_read, cache_read)
+                cache_creation = _sum_optional(previous_creation, cache_creation)
             else:
                 self.usage = usage
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.error(f"Error updating token usage: {e}")
             self.usage = usage  # Fallback to latest usage if accumulation fails
 
+        if cache_read is None and cache_creation is None:
+            return
+        try:
+            self.usage.cache_read_input_tokens = cache_read or 0
+            self.usage.cache_creation_input_tokens = cache_creation or 0
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.debug(f"Could not record prompt-cache tokens on usage object: {e}")
+
     def _persist_response_id(self, chunk) -> None:
         """Save the response ID carried by *chunk* to the user session, if present."""
         if not self.user_session:
@@ -436,7 +469,7 @@ class LLMProcessor(LitellmProcessor):
             })
 
         # Call responses API with updated input
-        response = responses(**params)
+        response = self._call_litellm(responses, params)
 
         if params.get("stream"):
             return self._handle_streaming_tool_calls_responses(response, params)
@@ -502,15 +535,107 @@ class LLMProcessor(LitellmProcessor):
         return self._call_responses_wrapper(params=params, initialize=True, system_role=system_role)
 
     def summarize_content(self):
-        """Summarize content using LiteLLM"""
+        """
+        Summarize content using LiteLLM.
+
+        With ``summary_mode`` "map_reduce" (or "auto" on a context larger than
+        ``auto_threshold_tokens``) and multi-unit ``context_data``, each unit is
+        summarized separately and the final summary is written from those
+        partial summaries. See processors/llm/map_reduce.py.
+        """
         system_role = (
             "You are an academic assistant which helps students briefly "
             "summarize a unit of content of an online course."
         )
 
+        units = map_reduce.content_units(self.context_data)
+        if len(units) > 1 and self._use_map_reduce():
+            return self._summarize_map_reduce(units)
+
         result = self._call_completion_wrapper(system_role=system_role)
         return result
 
+    def _use_map_reduce(self):
+        """Return True when the configured summary_mode calls for a map-reduce summary."""
+        summary_mode = self.config.get("summary_mode", "single") or "single"
+        if summary_mode not in map_reduce.SUMMARY_MODES:
+            raise ValueError(f"Unknown summary_mode '{summary_mode}'. Options: {', '.join(map_reduce.SUMMARY_MODES)}")
+        if summary_mode == "auto":
+            threshold = map_reduce.get_map_reduce_settings()["auto_threshold_tokens"]
+            return len(self.context or "") // 4 > threshold
+        return summary_mode == "map_reduce"
+
+    def _summarize_map_reduce(self, units):
+        """Summarize each unit (map), then combine the unit summaries into one (reduce)."""
+        map_role = (
+            "You are an academic assistant. Summarize this unit of an online course "
+            "in a few sentences, keeping its key concepts, definitions and examples. "
+            "The summary will be combined with the summaries of the other units."
+        )
+        reduce_role = (
+            "You are an academic assistant which helps students briefly summarize "
+            "a section of an online course. You are given the summaries of its units, "
+            "in course order; write one summary of the whole section."
+        )
+        responses_received = []
+
+        def summarize_unit(unit):
+            params = {
+                **{key: value for key, value in self.extra_params.items() if key != "tools"},
+                "stream": False,
+                "messages": [
+                    {"role": "system", "content": map_role},
+                    {"role": "user", "content": json.dumps(unit, default=str)},
+                ],
+            }
+            params = adapt_to_provider(self.provider, params, has_user_input=True)
+            response = self._call_litellm(completion, params)
+            responses_received.append(response)
+            return response.choices[0].message.content or ""
+
+        summaries, summarized = map_reduce.map_units(
+            units, summarize_unit, map_role, self.extra_params.get("model")
+        )
+        for response in responses_received:
+            self._set_token_usage(response)
+        logger.debug(f"Map-reduce summary: {summarized} of {len(units)} units summarized, the rest cached")
+
+        self.context = "\n\n".join(
+            f"Unit {position}: {unit.get('display_name', '')}\n{summary}"
+            for position, (unit, summary) in enumerate(zip(units, summaries), start=1)
+        )
+        return self._call_completion_wrapper(system_role=reduce_role)
+
+    def summarize_conversation(self, previous_summary, messages):
+        """
+        Return the rolling summary of a conversation extended with ``messages``.
+
+        Used by the conversation memory (processors/llm/conversation_memory.py)
+        to fold older turns of a long chat into one summary message.
+        """
+        system_role = (
+            "You maintain the memory of a conversation between a learner and a course assistant. "
+            "Update the summary with the new messages. Keep the learner's goals, questions, "
+            "misconceptions and what was already explained, in at most a few paragraphs. "
+            "Reply with the updated summary only."
+        )
+        transcript = "\n".join(f"{msg.get('role', '')}: {msg.get('content', '')}" for msg in messages)
+        params = {
+            **{key: value for key, value in self.extra_params.items() if key != "tools"},
+            "stream": False,
+            "messages": [
+                {"role": "system", "content": system_role},
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}",
+                },
+            ],
+        }
+        params = adapt_to_provider(self.provider, params, has_user_input=True)
+        response = self._call_litellm(completion, params)
+        self._set_token_usage(response)
+        return response.choices[0].message.content or ""
+
     def explain_like_five(self):
         """
         Explain content in very simple terms, like explaining to a 5-year-old
@@ -700,6 +825,9 @@ class LLMProcessor(LitellmProcessor):
 
         try:
             result = self._call_completion_wrapper(prompt)
+        except RateLimitError:
+            # Let async tasks retry once the provider quota frees up.
+            raise
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.exception(f"Error calling LiteLLM: {e}")
             return {"error": f"AI processing failed: {str(e)}"}
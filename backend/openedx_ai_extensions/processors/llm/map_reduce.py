@@ -0,0 +1,90 @@
+"""
+Map-reduce summarization of multi-unit content.
+
+A ``sequence`` (or ``up_to_current_unit``) context can be larger than the
+model accepts. With ``"summary_mode": "map_reduce"`` (or ``"auto"`` once the
+context exceeds ``auto_threshold_tokens``) summarize_content first summarizes
+every unit on its own, a few units at a time (map), then asks for the final
+summary over the partial summaries only (reduce).
+
+Unit summaries are cached under a hash of the unit content, the map prompt and
+the model, so after a republish only the units whose content changed are
+summarized again.
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:unit_summary"
+
+DEFAULT_MAP_REDUCE_SETTINGS = {
+    "max_workers": 4,
+    "auto_threshold_tokens": 12000,
+    "cache_timeout": 60 * 60 * 24 * 30,
+}
+
+SUMMARY_MODES = ("single", "map_reduce", "auto")
+
+
+def get_map_reduce_settings():
+    """Return map-reduce settings with AI_EXTENSIONS_MAP_REDUCE_SUMMARY applied over the defaults."""
+    return {
+        **DEFAULT_MAP_REDUCE_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_MAP_REDUCE_SUMMARY", {}) or {}),
+    }
+
+
+def content_units(context_data):
+    """Return the units of a multi-unit location content result, or an empty list."""
+    if not isinstance(context_data, dict):
+        return []
+    units = context_data.get("units")
+    return units if isinstance(units, list) else []
+
+
+def unit_summary_key(unit, prompt, model):
+    """Return the cache key of the summary of ``unit`` for a map prompt and model."""
+    digest = hashlib.sha256(
+        json.dumps([unit, prompt, model], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def map_units(units, summarize_unit, prompt, model):
+    """
+    Return the summary of each unit, in order.
+
+    Cached summaries are reused; the other units are passed to
+    ``summarize_unit(unit)`` on at most ``max_workers`` threads, each call in
+    a copy of the caller's context (so its priority lane applies), and their
+    summaries are cached. Returns (summaries, summarized count).
+    """
+    map_settings = get_map_reduce_settings()
+    keys = [unit_summary_key(unit, prompt, model) for unit in units]
+    try:
+        cached = cache.get_many(keys)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Unit summary cache unavailable: {e}")
+        cached = {}
+
+    missing = [index for index, key in enumerate(keys) if key not in cached]
+    if missing:
+        workers = max(1, min(map_settings["max_workers"], len(missing)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-map-summary") as executor:
+            futures = [executor.submit(copy_context().run, summarize_unit, units[index]) for index in missing]
+            summaries = [future.result() for future in futures]
+        fresh = {keys[index]: summary for index, summary in zip(missing, summaries) if summary}
+        try:
+            cache.set_many(fresh, map_settings["cache_timeout"])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not cache unit summaries: {e}")
+        cached.update(fresh)
+
+    return [cached.get(key, "") for key in keys], len(missing)
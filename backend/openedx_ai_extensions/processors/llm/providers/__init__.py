@@ -162,3 +162,33 @@ def after_tool_call_adaptations(provider, params, data=None):
             params["previous_response_id"] = data.id
 
     return params
+
+
+def get_prompt_cache_tokens(usage):
+    """
+    Return ``(cache_read_tokens, cache_creation_tokens)`` reported in a usage object.
+
+    Providers report prompt-cache activity under different names: Anthropic uses
+    ``cache_read_input_tokens`` / ``cache_creation_input_tokens``, the OpenAI
+    Completion API nests ``cached_tokens`` under ``prompt_tokens_details`` and the
+    Responses API under ``input_tokens_details``. Each value is None when the
+    provider did not report it.
+    """
+    def _get(obj, name):
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+    def _int_field(obj, name):
+        value = _get(obj, name)
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    cache_read = _int_field(usage, "cache_read_input_tokens")
+    cache_creation = _int_field(usage, "cache_creation_input_tokens")
+    for details_name in ("prompt_tokens_details", "input_tokens_details"):
+        details = _get(usage, details_name)
+        if details is None:
+            continue
+        if cache_read is None:
+            cache_read = _int_field(details, "cached_tokens")
+        if cache_creation is None:
+            cache_creation = _int_field(details, "cache_creation_tokens")
+    return cache_read, cache_creation
@@ -0,0 +1,221 @@
+"""
+Provider rate limiter with priority lanes, shared across workers via the Django cache.
+
+AI_EXTENSIONS_RATE_LIMITER["limits"] caps the requests and tokens per minute
+sent to each AI_EXTENSIONS provider profile. Calls run in one of two lanes:
+
+* ``interactive`` (the default) may use the whole limit. Learner and educator
+  requests served by the API views run in this lane.
+* ``bulk`` may only use ``bulk_share`` of each limit, so the rest is always
+  left for interactive calls. Celery tasks run in this lane; when the quota is
+  used up they wait with jittered backoff, and the task itself is retried
+  later if the wait is not enough.
+
+Counters are kept per profile and minute with atomic cache increments, so the
+limits hold across web and Celery workers that share a cache backend.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from litellm.exceptions import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:rate_limit"
+WINDOW_SECONDS = 60
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+
+DEFAULT_RATE_LIMITER_SETTINGS = {
+    # Per-profile limits, e.g. {"default": {"requests_per_minute": 50, "tokens_per_minute": 40000}}
+    "limits": {},
+    "bulk_share": 0.7,
+    "interactive_max_wait_s": 0,
+    "bulk_max_wait_s": 30,
+    "backoff_base_s": 0.5,
+    "backoff_max_s": 8,
+}
+
+_lane = contextvars.ContextVar("openedx_ai_extensions_priority_lane", default=LANE_INTERACTIVE)
+
+
+class ProviderRateLimitedError(RateLimitError):
+    """Raised without calling the provider when its local quota is used up."""
+
+    def __init__(self, profile, model=None):
+        self.profile = profile
+        super().__init__(
+            message=f"Rate limit reached for AI_EXTENSIONS provider profile '{profile}'",
+            llm_provider=(model or "").split("/")[0],
+            model=model or "",
+        )
+
+
+@dataclass
+class Reservation:
+    """Quota taken for one call, settled against the real usage afterwards."""
+
+    profile: str
+    window: int
+    tokens: int
+
+
+def get_rate_limiter_settings():
+    """Return limiter settings with AI_EXTENSIONS_RATE_LIMITER applied over the defaults."""
+    return {
+        **DEFAULT_RATE_LIMITER_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_RATE_LIMITER", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_RATE_LIMITER is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_RATE_LIMITER", False))
+
+
+def get_priority_lane():
+    """Return the lane of the calls made in the current context."""
+    return _lane.get()
+
+
+@contextlib.contextmanager
+def priority_lane(lane):
+    """Run the calls made inside the block in ``lane``."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def estimate_tokens(params):
+    """
+    Roughly estimate the tokens a LiteLLM call will use, before making it.
+
+    About four characters per prompt token, plus the requested output limit.
+    The estimate is corrected with the reported usage once the call returns.
+    """
+    prompt = params.get("messages") or params.get("input") or ""
+    prompt_tokens = len(json.dumps(prompt, default=str)) // 4
+    output_tokens = params.get("max_tokens") or params.get("max_output_tokens") or 0
+    return prompt_tokens + (output_tokens if isinstance(output_tokens, int) else 0)
+
+
+def _key(profile, metric, window):
+    return f"{CACHE_KEY_PREFIX}:{profile}:{metric}:{window}"
+
+
+def _reserve(profile, limits, tokens, share, window):
+    """Take one request and ``tokens`` from the window, or nothing if either would exceed its share."""
+    taken = []
+    try:
+        for metric, amount, limit in (
+            ("requests", 1, limits.get("requests_per_minute")),
+            ("tokens", tokens, limits.get("tokens_per_minute")),
+        ):
+            if not limit or not amount:
+                continue
+            key = _key(profile, metric, window)
+            cache.add(key, 0, WINDOW_SECONDS * 2)
+            used = cache.incr(key, amount)
+            taken.append((key, amount))
+            # A call larger than the whole share still goes through on an idle window.
+            if used > limit * share and used > amount:
+                for taken_key, taken_amount in taken:
+                    cache.decr(taken_key, taken_amount)
+                return False
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Rate limiter unavailable, allowing call: {e}")
+    return True
+
+
+def acquire(profile, params):
+    """
+    Wait for quota for one call to ``profile`` in the current lane.
+
+    Returns:
+        A Reservation to pass to settle(), or None when no limit applies.
+
+    Raises:
+        ProviderRateLimitedError: When no quota became available within the
+            lane's maximum wait.
+    """
+    if not is_enabled():
+        return None
+    limiter_settings = get_rate_limiter_settings()
+    limits = limiter_settings["limits"].get(profile)
+    if not limits:
+        return None
+
+    lane = get_priority_lane()
+    share = limiter_settings["bulk_share"] if lane == LANE_BULK else 1
+    deadline = time.monotonic() + limiter_settings[f"{lane}_max_wait_s"]
+    tokens = estimate_tokens(params)
+    attempt = 0
+    while True:
+        window = int(time.time() // WINDOW_SECONDS)
+        if _reserve(profile, limits, tokens, share, window):
+            return Reservation(profile, window, tokens)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"Rate limit reached for provider profile '{profile}' in the {lane} lane.")
+            raise ProviderRateLimitedError(profile, params.get("model"))
+        until_next_window = (window + 1) * WINDOW_SECONDS - time.time()
+        time.sleep(min(backoff_delay(attempt, limiter_settings), until_next_window, remaining))
+        attempt += 1
+
+
+def settle(reservation, response):
+    """Replace the estimated tokens of ``reservation`` with the usage reported in ``response``."""
+    if reservation is None:
+        return
+    usage = getattr(response, "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    if not isinstance(total_tokens, int) or reservation.window != int(time.time() // WINDOW_SECONDS):
+        return
+    limits = get_rate_limiter_settings()["limits"].get(reservation.profile) or {}
+    if not limits.get("tokens_per_minute"):
+        return
+    delta = total_tokens - reservation.tokens
+    key = _key(reservation.profile, "tokens", reservation.window)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        elif delta < 0:
+            cache.decr(key, -delta)
+    except ValueError:
+        pass
+
+
+def backoff_delay(attempt, limiter_settings=None):
+    """Return a full-jitter exponential backoff delay in seconds for ``attempt`` (0-based)."""
+    limiter_settings = limiter_settings or get_rate_limiter_settings()
+    cap = min(limiter_settings["backoff_max_s"], limiter_settings["backoff_base_s"] * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def get_rate_limit_usage(profiles):
+    """Return this minute's usage against the configured limits for the metrics view."""
+    limits_by_profile = get_rate_limiter_settings()["limits"]
+    window = int(time.time() // WINDOW_SECONDS)
+    rows = []
+    for profile in profiles:
+        limits = limits_by_profile.get(profile)
+        if not limits:
+            continue
+        rows.append({
+            "profile": profile,
+            "requests": cache.get(_key(profile, "requests", window)) or 0,
+            "requests_per_minute": limits.get("requests_per_minute"),
+            "tokens": cache.get(_key(profile, "tokens", window)) or 0,
+            "tokens_per_minute": limits.get("tokens_per_minute"),
+        })
+    return rows
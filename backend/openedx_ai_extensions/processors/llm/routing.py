@@ -0,0 +1,280 @@
+"""
+Health-aware routing of LiteLLM calls across AI_EXTENSIONS provider profiles.
+
+A processor config may name an ordered list of provider profiles instead of a
+single one::
+
+    "LLMProcessor": {
+        "provider": ["anthropic_primary", "anthropic_backup"],
+        "routing": {"hedge": true, "hedge_after_ms": 3000},
+    }
+
+Calls go to the first healthy profile and fail over to the next one on
+timeouts, connection errors, 5xx responses and rate limits. Each worker tracks
+an EWMA of latency and error rate per profile; profiles with a high error rate
+are tried last until they cool down. With hedging enabled, a second request is
+sent to the next profile once the first has been outstanding longer than the
+primary's p95 latency, and whichever answers first wins.
+
+For streaming calls LiteLLM returns as soon as the response headers arrive, so
+failover and hedging apply to establishing the stream, not to errors raised
+after the first chunk.
+"""
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from litellm.exceptions import (
+    APIConnectionError,
+    BadGatewayError,
+    InternalServerError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+# Errors that say nothing about the request itself, so another profile may succeed.
+FAILOVER_EXCEPTIONS = (
+    Timeout,
+    APIConnectionError,
+    ServiceUnavailableError,
+    InternalServerError,
+    BadGatewayError,
+    RateLimitError,
+)
+
+DEFAULT_ROUTING_CONFIG = {
+    # Send a second request to the next profile when the first one is slow.
+    "hedge": False,
+    # Hedge delay used until the primary has enough latency samples for a percentile.
+    "hedge_after_ms": 2000,
+    "hedge_percentile": 95,
+    "hedge_min_samples": 20,
+    # Error-rate EWMA above which a profile is tried after the healthy ones...
+    "unhealthy_error_rate": 0.5,
+    # ...until this many seconds have passed since its last failure.
+    "unhealthy_cooldown_s": 30,
+}
+
+EWMA_ALPHA = 0.2
+LATENCY_SAMPLES = 200
+HEDGE_MAX_WORKERS = 32
+
+
+class ProviderHealth:
+    """Latency and error-rate tracker for one provider profile in this worker."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+        self.latency_ewma = None
+        self.error_rate_ewma = 0.0
+        self.last_failure = None
+        self._samples = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record_success(self, latency):
+        """Record a successful call that took ``latency`` seconds."""
+        with self._lock:
+            self.calls += 1
+            self._samples.append(latency)
+            self.latency_ewma = latency if self.latency_ewma is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency_ewma
+            )
+            self.error_rate_ewma *= 1 - EWMA_ALPHA
+
+    def record_failure(self):
+        """Record a call that failed with one of FAILOVER_EXCEPTIONS."""
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.last_failure = time.monotonic()
+            self.error_rate_ewma = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate_ewma
+
+    def latency_percentile(self, percentile):
+        """Return the given latency percentile in seconds, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = max(0, math.ceil(percentile / 100 * len(samples)) - 1)
+        return samples[index]
+
+    def sample_count(self):
+        """Return how many latency samples are available."""
+        return len(self._samples)
+
+    def is_healthy(self, config):
+        """Return False while the error rate is high and the last failure is recent."""
+        if self.error_rate_ewma < config["unhealthy_error_rate"]:
+            return True
+        return time.monotonic() - self.last_failure > config["unhealthy_cooldown_s"]
+
+    def snapshot(self):
+        """Return a JSON-serializable view of the tracker."""
+        p95 = self.latency_percentile(95)
+        return {
+            "profile": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency_ewma_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+            "latency_p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "error_rate_ewma": round(self.error_rate_ewma, 4),
+        }
+
+
+_health_lock = threading.Lock()
+_health = {}
+_executor = None
+
+
+def get_provider_health(name) -> ProviderHealth:
+    """Return the health tracker of a provider profile, creating it on first use."""
+    with _health_lock:
+        if name not in _health:
+            _health[name] = ProviderHealth(name)
+        return _health[name]
+
+
+def get_provider_health_stats():
+    """Return health snapshots of every routed provider profile seen by this worker."""
+    with _health_lock:
+        trackers = list(_health.values())
+    return [tracker.snapshot() for tracker in trackers]
+
+
+def reset_provider_health():
+    """Forget all health data (used by tests and after configuration changes)."""
+    with _health_lock:
+        _health.clear()
+
+
+def _get_executor():
+    """Return the shared thread pool used for hedged requests."""
+    global _executor  # pylint: disable=global-statement
+    with _health_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="ai-extensions-hedge")
+        return _executor
+
+
+def _timed_call(call, name, params):
+    """Run ``call(name, params)`` and record its latency or failure on the profile's health."""
+    health = get_provider_health(name)
+    start = time.monotonic()
+    try:
+        result = call(name, params)
+    except FAILOVER_EXCEPTIONS:
+        health.record_failure()
+        raise
+    health.record_success(time.monotonic() - start)
+    return result
+
+
+def _order_candidates(candidates, config):
+    """Keep the configured order, moving currently unhealthy profiles to the end."""
+    healthy, unhealthy = [], []
+    for candidate in candidates:
+        is_healthy = get_provider_health(candidate[0]).is_healthy(config)
+        (healthy if is_healthy else unhealthy).append(candidate)
+    return healthy + unhealthy
+
+
+def _hedge_delay(name, config):
+    """Return seconds to wait before hedging: the primary's percentile latency when known."""
+    health = get_provider_health(name)
+    if health.sample_count() >= config["hedge_min_samples"]:
+        return health.latency_percentile(config["hedge_percentile"])
+    return config["hedge_after_ms"] / 1000
+
+
+def _call_sequential(call, candidates):
+    """Try each candidate in turn until one succeeds."""
+    last_error = None
+    for name, params in candidates:
+        try:
+            return _timed_call(call, name, params)
+        except FAILOVER_EXCEPTIONS as e:
+            logger.warning(f"Provider profile '{name}' failed ({type(e).__name__}); trying the next one.")
+            last_error = e
+    raise last_error
+
+
+def _discard(future):
+    """Close the result of a request that lost a hedge race, if it is a stream."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        close()
+
+
+def _call_hedged(call, candidates, config):
+    """Race the primary against the next candidate once the primary is slower than the hedge delay."""
+    executor = _get_executor()
+    remaining = list(candidates)
+
+    def _launch():
+        name, params = remaining.pop(0)
+        # Run in a copy of the caller's context so context variables carry over.
+        context = contextvars.copy_context()
+        return executor.submit(context.run, _timed_call, call, name, params), name
+
+    future, name = _launch()
+    pending = {future: name}
+    timeout = _hedge_delay(name, config)
+    last_error = None
+    while pending:
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        timeout = None
+        if not done:
+            if remaining:
+                future, name = _launch()
+                logger.info(f"Hedging slow provider request with profile '{name}'.")
+                pending[future] = name
+            continue
+        for future in done:
+            name = pending.pop(future)
+            try:
+                result = future.result()
+            except FAILOVER_EXCEPTIONS as e:
+                logger.warning(f"Provider profile '{name}' failed ({type(e).__name__}); trying the next one.")
+                last_error = e
+                if remaining and not pending:
+                    future, name = _launch()
+                    pending[future] = name
+                continue
+            for loser in pending:
+                loser.add_done_callback(_discard)
+            return result
+    raise last_error
+
+
+def call_with_routing(call, candidates, routing_config=None):
+    """
+    Run ``call(name, params)`` against an ordered list of provider profiles.
+
+    Args:
+        call: Callable taking a profile name and the keyword arguments of one LiteLLM call as a dict.
+        candidates: Ordered ``(profile_name, params)`` pairs.
+        routing_config: Optional overrides of DEFAULT_ROUTING_CONFIG.
+
+    Returns:
+        The result of the first successful call.
+
+    Raises:
+        The last failover error when every profile failed, or any other error
+        immediately (e.g. a bad request that no other profile would accept).
+    """
+    config = {**DEFAULT_ROUTING_CONFIG, **(routing_config or {})}
+    ordered = _order_candidates(candidates, config)
+    if config["hedge"] and len(ordered) > 1:
+        return _call_hedged(call, ordered, config)
+    return _call_sequential(call, ordered)
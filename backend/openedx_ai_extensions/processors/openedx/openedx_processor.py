@@ -4,17 +4,23 @@ Open edX Content Extraction
 
 import json
 import logging
+from contextlib import nullcontext
 
 from django.conf import settings
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import CourseLocator
 
 from openedx_ai_extensions.functions.decorators import llm_tool, register_instance
+from openedx_ai_extensions.processors.openedx.utils import content_index, course_cache
 from openedx_ai_extensions.processors.openedx.utils.component_extractors import (
     COMPONENT_EXTRACTORS,
     extract_generic_info,
-    extract_problem_info,
 )
+from openedx_ai_extensions.processors.openedx.utils.extraction_cache import cached_extract
+from openedx_ai_extensions.processors.openedx.utils.extraction_scheduler import extract_blocks
+from openedx_ai_extensions.processors.openedx.utils.lexical_index import search_course
+from openedx_ai_extensions.processors.openedx.utils.transcript_digests import load_transcript_digests
+from openedx_ai_extensions.processors.openedx.utils.transcripts import prefetched_transcripts
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +28,7 @@ logger = logging.getLogger(__name__)
 class OpenEdXProcessor:
     """Handles Open edX content extraction"""
 
-    def __init__(self, processor_config=None, location_id=None, course_id=None, user=None):
+    def __init__(self, processor_config=None, location_id=None, course_id=None, user=None, query=None):
         processor_config = processor_config or {}
 
         # Find specific config using class name
@@ -31,6 +37,8 @@ class OpenEdXProcessor:
         self.location_id = location_id
         self.course_id = course_id
         self.user = user
+        # The learner's question, used by the "relevant" retrieval mode
+        self.query = query
 
         # Register this instance for LLM function calls
         register_instance(self)
@@ -55,7 +63,8 @@ class OpenEdXProcessor:
                 "Get published Open edX course content. "
                 "This function reads the content of course unit(s) and "
                 "converts it into a structured format suitable for LLM processing. "
-                "Can retrieve just the current unit, units up to the current one, or the entire sequence."
+                "Can retrieve just the current unit, units up to the current one, the entire sequence, "
+                "or the passages of the course most relevant to a question."
             ),
             "parameters": {
                 "type": "object",
@@ -69,11 +78,18 @@ class OpenEdXProcessor:
                     },
                     "retrieval_mode": {
                         "type": "string",
-                        "enum": ["unit", "up_to_current_unit", "sequence"],
+                        "enum": ["unit", "up_to_current_unit", "sequence", "relevant"],
                         "description": (
                             "How much content to retrieve: "
                             "'unit' (current only), 'up_to_current_unit' (sequence up to current), "
-                            "or 'sequence' (entire sequence)."
+                            "'sequence' (entire sequence), or 'relevant' (course passages matching 'query')."
+                        )
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": (
+                            "The question to find course passages for, used with retrieval_mode 'relevant'. "
+                            "Defaults to the learner's message."
                         )
                     }
                 },
@@ -81,83 +97,223 @@ class OpenEdXProcessor:
             }
         }
     })
-    def get_location_content(self, location_id=None, retrieval_mode=None):
+    def get_location_content(self, location_id=None, retrieval_mode=None, query=None):
         """Extract unit or sequence content from Open edX modulestore based on configuration"""
         try:
-            # pylint: disable=import-error,import-outside-toplevel
-            from xmodule.modulestore.django import modulestore
-
             # Get char_limit from config. Useful during development
             char_limit = self.config.get("char_limit", None)
             location_id = location_id or self.location_id
 
             unit_key = UsageKey.from_string(location_id)
-            store = modulestore()
 
             # Get retrieval_mode from arg or config, default to 'unit'
             retrieval_mode = retrieval_mode or self.config.get("retrieval_mode", "unit")
 
-            if retrieval_mode in ("sequence", "up_to_current_unit"):
-                parent_key = store.get_parent_location(unit_key)
-                if parent_key:
-                    sequence = store.get_item(parent_key)
-                    children = getattr(sequence, "children", [])
-
-                    if retrieval_mode == "up_to_current_unit":
-                        # Find the index of the current unit in the sequence
-                        try:
-                            current_index = children.index(unit_key)
-                            children = children[:current_index + 1]
-                        except ValueError:
-                            # Fallback if the unit isn't found in the parent's children
-                            return self._get_unit_data(store, unit_key, char_limit)
-
-                    return {
-                        "sequence_id": str(sequence.location),
-                        "display_name": sequence.display_name,
-                        "retrieval_mode": retrieval_mode,
-                        "units": [
-                            self._get_unit_data(store, child_key, char_limit)
-                            for child_key in children
-                        ]
-                    }
+            if retrieval_mode == "relevant":
+                relevant = self._get_relevant_content(unit_key, query or self.query)
+                if relevant is not None:
+                    return relevant
+                # Without a question or an indexed course, fall back to the current unit
+                retrieval_mode = "unit"
 
-            return self._get_unit_data(store, unit_key, char_limit)
+            indexed = self._get_indexed_content(unit_key, retrieval_mode, char_limit)
+            if indexed is not None:
+                return indexed
+
+            # pylint: disable=import-error,import-outside-toplevel
+            from xmodule.modulestore.django import modulestore
+
+            store = modulestore()
+
+            # Each subtree is loaded with a single depth=None get_item call and then
+            # walked in memory, instead of one modulestore round trip per block.
+            with store.bulk_operations(unit_key.course_key):
+                if retrieval_mode in ("sequence", "up_to_current_unit"):
+                    parent_key = store.get_parent_location(unit_key)
+                    if parent_key:
+                        sequence = store.get_item(parent_key, depth=None)
+                        units = sequence.get_children()
+
+                        if retrieval_mode == "up_to_current_unit":
+                            # Keep the units up to and including the current one
+                            current_index = next(
+                                (index for index, unit in enumerate(units) if unit.location == unit_key), None
+                            )
+                            if current_index is None:
+                                # Fallback if the unit isn't found in the parent's children
+                                return self._get_unit_data(store.get_item(unit_key, depth=None), char_limit)
+                            units = units[:current_index + 1]
+
+                        return {
+                            "sequence_id": str(sequence.location),
+                            "display_name": sequence.display_name,
+                            "retrieval_mode": retrieval_mode,
+                            "units": self._get_units_data(units, char_limit),
+                        }
+
+                return self._get_unit_data(store.get_item(unit_key, depth=None), char_limit)
 
         except Exception as exc:  # pylint: disable=broad-exception-caught
             return {"error": f"Error accessing content: {str(exc)}"}
 
-    def _get_unit_data(self, store, unit_key, char_limit=None):
-        """Extract content for a single unit"""
-        unit = store.get_item(unit_key)
-        unit_info = {
-            "unit_id": str(unit.location),
-            "display_name": unit.display_name,
-            "category": unit.category,
-            "blocks": [],
+    def _get_relevant_content(self, unit_key, query):
+        """
+        Return the course passages most relevant to ``query``, or None if they can't be retrieved.
+
+        Only units in the user's course blocks (released, not hidden from
+        them, in their cohort or track) are searched. Without a user, or when
+        the visible units can't be determined, nothing is retrieved.
+        """
+        if not query:
+            return None
+        unit_ids = self._visible_unit_ids(unit_key.course_key)
+        if unit_ids is None:
+            return None
+        passages = search_course(
+            unit_key.course_key,
+            query,
+            top_k=self.config.get("top_k"),
+            token_budget=self.config.get("token_budget"),
+            unit_ids=unit_ids,
+        )
+        if not passages:
+            return None
+        return {
+            "course_id": str(unit_key.course_key),
+            "retrieval_mode": "relevant",
+            "query": query,
+            "passages": passages,
         }
 
-        for child_key in getattr(unit, "children", []):
-            block_info = self._extract_block(store, child_key)
-            if block_info:
-                unit_info["blocks"].append(block_info)
+    def _visible_unit_ids(self, course_key):
+        """Return the ids of the course units visible to the user, or None if they can't be determined."""
+        if self.user is None:
+            return None
+        try:
+            return set(course_cache.get_or_build(
+                "visible_units", course_key, lambda: self._build_visible_unit_ids(course_key, self.user), user=self.user
+            ))
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not determine the units of {course_key} visible to the user: {exc}")
+            return None
+
+    @staticmethod
+    def _build_visible_unit_ids(course_key, user):
+        """Return the sorted ids of the units in the course blocks of ``user``."""
+        # pylint: disable=import-error,import-outside-toplevel
+        from lms.djangoapps.course_blocks.api import get_course_blocks
+
+        block_structure = get_course_blocks(
+            user, course_key.make_usage_key("course", "course"), include_completion=False
+        )
+        return sorted(
+            str(block_key)
+            for block_key in block_structure.topological_traversal()
+            if block_structure.get_xblock_field(block_key, "category") == "vertical"
+        )
+
+    def _get_indexed_content(self, unit_key, retrieval_mode, char_limit=None):
+        """
+        Return get_location_content output read from the content index, or None if it can't be served from it.
 
+        The index holds content extracted with the default show_answer and
+        transcript_mode, so profiles overriding them always read the modulestore.
+        Rows not stamped with the current published course version, or a
+        sequence with missing units, are not served either.
+        """
+        if (
+            not content_index.is_enabled()
+            or self.config.get("show_answer", "auto") != "auto"
+            or self.config.get("transcript_mode", "full") != "full"
+        ):
+            return None
+
+        if retrieval_mode not in ("sequence", "up_to_current_unit"):
+            row = content_index.get_indexed_unit(unit_key)
+            if row is None or row.course_version != content_index.published_course_version(unit_key.course_key):
+                return None
+            unit_info = row.content
+            if char_limit:
+                self._truncate_unit_text(unit_info, char_limit)
+            return unit_info
+
+        rows = content_index.get_indexed_sequence(unit_key)
+        if not rows:
+            return None
+        course_version = content_index.published_course_version(unit_key.course_key)
+        if course_version is None or not content_index.is_current_sequence(rows, course_version, unit_key):
+            return None
+        if retrieval_mode == "up_to_current_unit":
+            rows = rows[:next(index for index, row in enumerate(rows) if row.unit_id == unit_key) + 1]
+        units = [row.content for row in rows]
         if char_limit:
-            self._truncate_unit_text(unit_info, char_limit)
+            for unit_info in units:
+                self._truncate_unit_text(unit_info, char_limit)
+        return {
+            "sequence_id": str(rows[0].sequence_id),
+            "display_name": rows[0].sequence_display_name,
+            "retrieval_mode": retrieval_mode,
+            "units": units,
+        }
+
+    def _get_unit_data(self, unit, char_limit=None):
+        """Extract content for a single unit whose children are already loaded"""
+        return self._get_units_data([unit], char_limit)[0]
+
+    def _get_units_data(self, units, char_limit=None):
+        """Extract content for units whose children are already loaded, scheduling all their blocks at once"""
+        children = [unit.get_children() for unit in units]
+        blocks = [block for unit_children in children for block in unit_children]
+        transcript_mode = self.config.get("transcript_mode", "full")
+        with self._transcripts_for_mode(transcript_mode, blocks):
+            block_infos = iter(extract_blocks(blocks, self._extract_block, self.config.get("show_answer", "auto")))
+
+        units_data = []
+        for unit, unit_children in zip(units, children):
+            unit_info = {
+                "unit_id": str(unit.location),
+                "display_name": unit.display_name,
+                "category": unit.category,
+                "blocks": [],
+            }
+            for _ in unit_children:
+                block_info = next(block_infos)
+                if block_info:
+                    if transcript_mode == "digest" and "transcript_text" in block_info:
+                        block_info["transcript_digest"] = block_info.pop("transcript_text")
+                    unit_info["blocks"].append(block_info)
+
+            if char_limit:
+                self._truncate_unit_text(unit_info, char_limit)
+            units_data.append(unit_info)
 
-        return unit_info
+        return units_data
 
-    def _extract_block(self, store, block_key):
+    @staticmethod
+    def _transcripts_for_mode(transcript_mode, blocks):
+        """
+        Return a context in which video blocks get the transcript text of ``transcript_mode``.
+
+        ``full`` (default) loads whole transcripts, ``digest`` their stored
+        condensed version and ``none`` leaves transcripts out.
+        """
+        videos = [block for block in blocks if getattr(block, "category", None) == "video"]
+        if transcript_mode == "full" or not videos:
+            return nullcontext()
+        if transcript_mode == "digest":
+            return prefetched_transcripts(load_transcript_digests(videos))
+        if transcript_mode == "none":
+            return prefetched_transcripts({str(block.location): None for block in videos})
+        raise ValueError(f"Unknown transcript_mode '{transcript_mode}', expected 'full', 'digest' or 'none'")
+
+    def _extract_block(self, block):
         """Helper to extract block info safely"""
         try:
-            block = store.get_item(block_key)
             block_type = block.category.lower()
             extractor = COMPONENT_EXTRACTORS.get(block_type, extract_generic_info)
-            if extractor is extract_problem_info:
-                return extractor(block, self.config.get("show_answer", "auto"))
-            return extractor(block)
+            return cached_extract(block, extractor, self.config.get("show_answer", "auto"))
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            logger.warning(f"Could not load block {block_key}: {exc}")
+            logger.warning(f"Could not load block {getattr(block, 'location', block)}: {exc}")
             return None
 
     def _truncate_unit_text(self, unit_info, char_limit):
@@ -195,14 +351,25 @@ class OpenEdXProcessor:
         return "unknown"
 
     def get_course_outline(self, course_id=None, user=None):
-        """Retrieve course outline structure (Sections > Subsections > Units)."""
-        # pylint: disable=import-error,import-outside-toplevel
-        from lms.djangoapps.course_blocks.api import get_course_blocks
+        """
+        Retrieve course outline structure (Sections > Subsections > Units).
 
+        The outline is cached per course publish and per set of users who can
+        see the same blocks (see utils/course_cache.py).
+        """
         course_id = course_id or self.course_id
         user = user or self.user
 
         course_key = CourseLocator.from_string(course_id)
+        return course_cache.get_or_build(
+            "outline", course_key, lambda: self._build_course_outline(course_key, user), user=user
+        )
+
+    def _build_course_outline(self, course_key, user):
+        """Return the course outline visible to ``user`` as a JSON string."""
+        # pylint: disable=import-error,import-outside-toplevel
+        from lms.djangoapps.course_blocks.api import get_course_blocks
+
         course_usage_key = course_key.make_usage_key("course", "course")
 
         # 1. Get the BlockStructure object. This respects the user's permissions.
@@ -214,6 +381,9 @@ class OpenEdXProcessor:
         # Returning the single dictionary (which represents the course outline object) as JSON string
         return json.dumps(full_outline)
 
+    # (category, children field) of each outline level, from the top down.
+    OUTLINE_LEVELS = (("chapter", "subsections"), ("sequential", "units"), ("vertical", None))
+
     def _serialize_block_structure_outline(self, block_structure):
         """
         Convert BlockStructure into:
@@ -240,65 +410,40 @@ class OpenEdXProcessor:
                 }
             ]
         }
+
+        The tree is walked with an explicit stack, and every section or
+        subsection is added to its parent once its children are known, so
+        the ones left without units are never emitted.
         """
         root_key = block_structure.root_block_usage_key
         if not root_key:
             return []
 
         outline = []
-
-        # -------- Chapters (Sections) --------
-        for chapter_key in block_structure.get_children(root_key):
-            category = block_structure.get_xblock_field(chapter_key, "category")
-            if category != "chapter":
+        # Frames of (remaining children, depth, list receiving them, block info, its parent's list)
+        stack = [(iter(block_structure.get_children(root_key)), 0, outline, None, None)]
+        while stack:
+            children, depth, items, info, parent_items = stack[-1]
+            child_key = next(children, None)
+            if child_key is None:
+                stack.pop()
+                if items and parent_items is not None:
+                    parent_items.append(info)
                 continue
 
-            chapter_info = {
-                "display_name": block_structure.get_xblock_field(
-                    chapter_key, "display_name"
-                ),
+            category, children_field = self.OUTLINE_LEVELS[depth]
+            if block_structure.get_xblock_field(child_key, "category") != category:
+                continue
+            child_info = {
+                "display_name": block_structure.get_xblock_field(child_key, "display_name"),
                 "category": self.define_category(category),
-                "subsections": [],
             }
-
-            # -------- Sequentials (Subsections) --------
-            for sequential_key in block_structure.get_children(chapter_key):
-                seq_category = block_structure.get_xblock_field(
-                    sequential_key, "category"
-                )
-                if seq_category != "sequential":
-                    continue
-
-                sequential_info = {
-                    "display_name": block_structure.get_xblock_field(
-                        sequential_key, "display_name"
-                    ),
-                    "category": self.define_category(seq_category),
-                    "units": [],
-                }
-
-                # -------- Verticals (Units) --------
-                for vertical_key in block_structure.get_children(sequential_key):
-                    vert_category = block_structure.get_xblock_field(
-                        vertical_key, "category"
-                    )
-                    if vert_category != "vertical":
-                        continue
-
-                    vertical_info = {
-                        "display_name": block_structure.get_xblock_field(
-                            vertical_key, "display_name"
-                        ),
-                        "category": self.define_category(vert_category),
-                    }
-
-                    sequential_info["units"].append(vertical_info)
-
-                if sequential_info["units"]:
-                    chapter_info["subsections"].append(sequential_info)
-
-            if chapter_info["subsections"]:
-                outline.append(chapter_info)
+            if children_field is None:
+                items.append(child_info)
+            else:
+                child_info[children_field] = []
+                grandchildren = iter(block_structure.get_children(child_key))
+                stack.append((grandchildren, depth + 1, child_info[children_field], child_info, items))
 
         return outline
 
@@ -426,20 +571,23 @@ class OpenEdXProcessor:
 
             course_id = course_id or self.course_id
             course_key = CourseKey.from_string(course_id)
-            course_details = CourseDetails.fetch(course_key)
-            course_block = modulestore().get_course(course_key)
+
+            def build_info():
+                course_details = CourseDetails.fetch(course_key)
+                course_block = modulestore().get_course(course_key)
+                return {
+                    "title": str(course_block.display_name or ""),
+                    "subtitle": str(course_details.subtitle or ""),
+                    "short_description": str(course_details.short_description or ""),
+                    "description": str(course_details.description or ""),
+                    "overview": str(course_details.overview or ""),
+                    "syllabus": str(course_details.syllabus or ""),
+                    "duration": str(course_details.duration or ""),
+                }
 
             requested_fields = fields if fields is not None else self.config.get("fields")
 
-            full_info = {
-                "title": str(course_block.display_name or ""),
-                "subtitle": str(course_details.subtitle or ""),
-                "short_description": str(course_details.short_description or ""),
-                "description": str(course_details.description or ""),
-                "overview": str(course_details.overview or ""),
-                "syllabus": str(course_details.syllabus or ""),
-                "duration": str(course_details.duration or ""),
-            }
+            full_info = dict(course_cache.get_or_build("info", course_key, build_info))
 
             if requested_fields and "outline" in requested_fields:
                 full_info["outline"] = self.get_course_outline(course_id=course_id)
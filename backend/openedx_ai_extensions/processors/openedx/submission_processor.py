@@ -2,12 +2,17 @@
 Submission processor for handling OpenEdX submissions
 """
 
+import bisect
 import json
 import logging
 
 from django.conf import settings
 from submissions import api as submissions_api
 
+from openedx_ai_extensions import codec
+from openedx_ai_extensions.processors.openedx.utils import content_blobs, history_tail
+from openedx_ai_extensions.utils import estimate_message_tokens
+
 logger = logging.getLogger(__name__)
 
 # Filter constants for _process_messages / get_full_message_history.
@@ -23,6 +28,39 @@ FILTER_NON_STRING_CONTENT = "non_string_content"
 
 _DEFAULT_FILTERS = frozenset({FILTER_SYSTEM, FILTER_NON_STRING_CONTENT})
 
+# Key of the token count stored with each message when it is saved.
+TOKENS_KEY = "tokens"
+
+
+def message_tokens(msg):
+    """Return the token count stored with a message, or an estimate for messages saved without one."""
+    tokens = msg.get(TOKENS_KEY)
+    if isinstance(tokens, int) and not isinstance(tokens, bool):
+        return tokens
+    return estimate_message_tokens(msg)
+
+
+def _without_token_counts(messages):
+    """Return ``messages`` without their stored token counts, which only the history window uses."""
+    return [{key: value for key, value in msg.items() if key != TOKENS_KEY} for msg in messages]
+
+
+def _encode_cursor(position):
+    """Return the page cursor of an (attempt_number, index) position, or None without an attempt number."""
+    attempt, index = position
+    return None if attempt is None else f"{attempt}:{index}"
+
+
+def _parse_cursor(cursor):
+    """Return the (attempt_number, index) position of a page cursor, or None if it isn't one."""
+    if not cursor:
+        return None
+    try:
+        attempt, index = str(cursor).split(":")
+        return int(attempt), int(index)
+    except ValueError:
+        return None
+
 
 class SubmissionProcessor:
     """Handles OpenEdX submission operations for chat history and persistence"""
@@ -45,6 +83,11 @@ class SubmissionProcessor:
             "max_context_messages",
             getattr(settings, "AI_EXTENSIONS_MAX_CONTEXT_MESSAGES", 10),
         )
+        # Optional token budget of the history window (see _token_window_start)
+        self.max_context_tokens = self.config.get(
+            "max_context_tokens",
+            getattr(settings, "AI_EXTENSIONS_MAX_CONTEXT_TOKENS", None),
+        )
 
     def process(self, context, input_data=None):
         """Process based on configured function"""
@@ -52,110 +95,251 @@ class SubmissionProcessor:
         function = getattr(self, function_name)
         return function(context, input_data)
 
+    def _indexed_messages(self, submission, filters=_DEFAULT_FILTERS, include_submission_id=False):
+        """
+        Return the messages of a decoded submission that pass ``filters``, with their timestamp.
+
+        Each message comes with its index in the submission's stored message
+        list, so positions (and page cursors) don't depend on the filters.
+        """
+        submission_messages = codec.decode(submission["answer"])
+        if not submission_messages or not isinstance(submission_messages, list):
+            return []
+        timestamp = str(submission.get("created_at") or submission.get("submitted_at") or "")
+        submission_uuid = submission.get("uuid", "")
+        messages = []
+        for index, msg in enumerate(submission_messages):
+            if not isinstance(msg, dict):
+                continue
+            if FILTER_SYSTEM in filters and msg.get("role") == "system":
+                continue
+            if content_blobs.REF_KEY in msg:
+                # Stored as a content blob; resolved once the messages are loaded
+                pass
+            elif FILTER_NON_STRING_CONTENT in filters and "role" in msg:
+                content = msg.get("content")
+                if not isinstance(content, str) or not content:
+                    continue
+            msg["timestamp"] = timestamp
+            if include_submission_id:
+                msg["submission_id"] = submission_uuid
+            messages.append((index, msg))
+        return messages
+
+    def _filter_messages(self, submission, filters=_DEFAULT_FILTERS, include_submission_id=False):
+        """Return the messages of a decoded submission that pass ``filters``, with their timestamp."""
+        return [msg for _, msg in self._indexed_messages(submission, filters, include_submission_id)]
+
+    def _load_indexed_messages(self, include_submission_id=False, filters=_DEFAULT_FILTERS):
+        """Return every ((attempt_number, index), message) of the session that passes ``filters``, oldest first."""
+        submissions = submissions_api.get_submissions(self.student_item_dict)
+        all_messages = []
+        # get_submissions returns newest first, so we need to reverse to get chronological order
+        for submission in reversed(submissions):
+            attempt = submission.get("attempt_number")
+            all_messages.extend(
+                ((attempt, index), msg)
+                for index, msg in self._indexed_messages(submission, filters, include_submission_id)
+            )
+        content_blobs.resolve([msg for _, msg in all_messages])
+        return all_messages
+
+    def _load_messages(self, include_submission_id=False, filters=_DEFAULT_FILTERS):
+        """Return every message of the session's submissions that passes ``filters``, oldest first."""
+        return [msg for _, msg in self._load_indexed_messages(include_submission_id, filters)]
+
+    def _history_tail_capacity(self):
+        """Return how many of the most recent messages the history tail keeps."""
+        return max(history_tail.get_history_tail_settings()["size"], self.max_context_messages)
+
+    def _message_window(self, total, current_messages_count, use_max_context):
+        """Return the (start, end) slice of the ``total`` messages to return, oldest first."""
+        if current_messages_count > 0:
+            # Frontend has the most recent current_messages_count messages,
+            # return the next max_context_messages before those
+            end = max(0, total - current_messages_count)
+            start = max(0, end - self.max_context_messages) if use_max_context else 0
+        else:
+            # Initial load: return most recent messages
+            end = total
+            start = max(0, total - self.max_context_messages) if use_max_context and self.max_context_messages else 0
+        return start, end
+
+    def _token_window_start(self, entries, start, end, max_tokens):
+        """
+        Return where the newest of ``entries[start:end]`` that fit in ``max_tokens`` begin.
+
+        Uses the token count stored with each message, so nothing is
+        re-tokenized on read. The newest message is always kept.
+        """
+        used = 0
+        index = end
+        while index > start:
+            cost = message_tokens(entries[index - 1][1])
+            if used + cost > max_tokens and index < end:
+                break
+            used += cost
+            index -= 1
+        return index
+
+    def _get_history_tail(self):
+        """Return the session's current history tail, or None."""
+        if not history_tail.is_enabled():
+            return None
+        return history_tail.get_tail(self.user_session.id, self.user_session.local_submission_id)
+
+    def _process_indexed_messages(
+        self,
+        current_messages_count=0,
+        use_max_context=True,
+        include_submission_id=False,
+        filters=_DEFAULT_FILTERS,
+        max_tokens=None,
+    ):
+        """Return ([(position, message)], has_more) as described in _process_messages."""
+        if max_tokens is None and use_max_context:
+            max_tokens = self.max_context_tokens
+        use_tail = history_tail.is_enabled() and not include_submission_id and filters == _DEFAULT_FILTERS
+        submission_id = self.user_session.local_submission_id
+        tail = self._get_history_tail() if use_tail else None
+        if tail is not None:
+            offset = tail["total"] - len(tail["messages"])
+            start, end = self._message_window(tail["total"], current_messages_count, use_max_context)
+            first = max(start, offset)
+            if first <= end:
+                entries = list(zip(
+                    [tuple(position) for position in tail["positions"][first - offset:end - offset]],
+                    tail["messages"][first - offset:end - offset],
+                ))
+                window_start = self._token_window_start(entries, 0, len(entries), max_tokens) if max_tokens else 0
+                # A window reaching past the oldest cached message needs the whole history
+                if first == start or window_start > 0:
+                    entries = entries[window_start:]
+                    return entries, bool(entries) and (start > 0 or len(entries) < end - start)
+
+        all_entries = self._load_indexed_messages(include_submission_id, filters)
+        if use_tail and submission_id:
+            history_tail.store_tail(
+                self.user_session.id,
+                submission_id,
+                [msg for _, msg in all_entries],
+                [list(position) for position, _ in all_entries],
+                self._history_tail_capacity(),
+            )
+
+        start, end = self._message_window(len(all_entries), current_messages_count, use_max_context)
+        if max_tokens:
+            start = self._token_window_start(all_entries, start, end, max_tokens)
+        entries = all_entries[start:end]
+        return entries, bool(entries) and start > 0
+
     def _process_messages(
         self,
         current_messages_count=0,
         use_max_context=True,
         include_submission_id=False,
         filters=_DEFAULT_FILTERS,
+        max_tokens=None,
     ):
         """
         Retrieve messages from submissions.
         If current_messages_count > 0, return only new messages not already loaded.
         Otherwise, return the most recent messages up to max_context_messages.
 
+        Recent messages with the default filters are served from the session's
+        history tail (see utils/history_tail.py) when it covers them, so reading
+        a window of max_context_messages or max_tokens doesn't depend on the
+        length of the conversation.
+
         Args:
             current_messages_count: Number of messages already loaded in the frontend
             filters: Set of FILTER_* constants controlling which messages are excluded.
                      Defaults to _DEFAULT_FILTERS (excludes system messages and
                      non-string content). Pass frozenset() to return everything.
+            max_tokens: Token budget of the window: only the newest messages that
+                        fit are returned. Defaults to max_context_tokens when
+                        use_max_context is set; 0 disables it.
 
         Returns:
             tuple: (new_messages, has_more) where new_messages is a list of messages
                    and has_more is a boolean indicating if more messages are available
         """
-        submissions = submissions_api.get_submissions(self.student_item_dict)
-        all_messages = []
-
-        # Extract all messages from all submissions
-        # get_submissions returns newest first, so we need to reverse to get chronological order
-        for submission in reversed(submissions):
-            submission_messages = json.loads(submission["answer"])
-            timestamp = str(submission.get("created_at") or submission.get("submitted_at") or "")
-            if submission_messages and isinstance(submission_messages, list):
-                submission_messages_copy = []
-                for msg in submission_messages:
-                    if not isinstance(msg, dict):
-                        continue
-                    if FILTER_SYSTEM in filters and msg.get("role") == "system":
-                        continue
-                    if FILTER_NON_STRING_CONTENT in filters and "role" in msg:
-                        content = msg.get("content")
-                        if not isinstance(content, str) or not content:
-                            continue
-                    submission_messages_copy.append(msg)
-                submission_uuid = submission.get("uuid", "")
-                for msg in submission_messages_copy:
-                    msg["timestamp"] = timestamp
-                    if include_submission_id:
-                        msg["submission_id"] = submission_uuid
-                # Extend to maintain chronological order (oldest to newest)
-                all_messages.extend(submission_messages_copy)
+        entries, has_more = self._process_indexed_messages(
+            current_messages_count, use_max_context, include_submission_id, filters, max_tokens
+        )
+        return [msg for _, msg in entries], has_more
 
-        if current_messages_count > 0:
-            # If current_messages_count provided, return the next batch of older messages
-            # Frontend has the most recent current_messages_count messages
-            # We need to return the next max_context_messages before those
-
-            if current_messages_count >= len(all_messages):
-                # No more messages available
-                return [], False
-
-            # Calculate how many messages are left to load
-            # Total messages - messages already shown = remaining older messages
-            remaining_message_count = len(all_messages) - current_messages_count
-
-            if remaining_message_count <= 0:
-                # No more messages available
-                return [], False
-
-            # Calculate the slice to get the next batch of older messages
-            # We want messages from [end - current_count - max_context : end - current_count]
-            if use_max_context:
-                start_index = max(
-                    0,
-                    len(all_messages) - current_messages_count - self.max_context_messages,
-                )
-                end_index = len(all_messages) - current_messages_count
-            else:
-                start_index = 0
-                end_index = len(all_messages) - current_messages_count
-
-            new_messages = all_messages[start_index:end_index]
-            has_more = start_index > 0
-
-            if not new_messages:
-                has_more = False
-            return new_messages, has_more
-        else:
-            # Initial load: return most recent messages
-            if use_max_context:
-                messages = (
-                    all_messages[-self.max_context_messages:] if all_messages else []
-                )
-            else:
-                messages = all_messages if all_messages else []
-            has_more = len(all_messages) > len(messages)
+    def _tail_page_before(self, cursor):
+        """Return the page of messages before ``cursor`` from the history tail, or None if it doesn't cover it."""
+        tail = self._get_history_tail()
+        if tail is None:
+            return None
+        positions = [tuple(position) for position in tail["positions"]]
+        if any(attempt is None for attempt, _ in positions):
+            return None
+        end = bisect.bisect_left(positions, cursor)
+        start = max(0, end - self.max_context_messages)
+        offset = tail["total"] - len(positions)
+        if start == 0 and offset > 0:
+            # The page reaches past the oldest cached message
+            return None
+        entries = list(zip(positions[start:end], tail["messages"][start:end]))
+        return entries, bool(entries) and start > 0
 
-            return messages, has_more
+    def _messages_before(self, cursor):
+        """
+        Return ([(position, message)], has_more) for the page of messages before ``cursor``.
+
+        Positions are (attempt_number, index) pairs, so the page stays the same
+        when new turns are saved while the user scrolls. Submissions newer than
+        the cursor are skipped without decoding their answer, and only as many
+        submissions as the page needs are requested: the Submissions API has no
+        "before attempt" filter, so the request limit grows until the page is
+        full. has_more is derived from the attempt number of the oldest message
+        (attempts start at 1) instead of decoding older submissions.
+        """
+        page = self._tail_page_before(cursor)
+        if page is not None:
+            return page
+
+        wanted = self.max_context_messages
+        limit = wanted + 1
+        while True:
+            submissions = submissions_api.get_submissions(self.student_item_dict, limit=limit)
+            exhausted = len(submissions) < limit
+            entries = []  # newest first
+            for submission in submissions:
+                attempt = submission.get("attempt_number")
+                if attempt is None:
+                    # Without attempt numbers there are no cursors to page by
+                    return [], False
+                if attempt > cursor[0]:
+                    continue
+                for index, msg in reversed(self._indexed_messages(submission)):
+                    if (attempt, index) < cursor:
+                        entries.append(((attempt, index), msg))
+                if len(entries) > wanted:
+                    exhausted = False
+                    break
+            if len(entries) >= wanted or exhausted:
+                break
+            limit *= 2
+
+        page = entries[:wanted]
+        if not page:
+            return [], False
+        has_more = len(entries) > wanted or (not exhausted and page[-1][0][0] > 1)
+        return list(reversed(page)), has_more
 
     def get_chat_history(self, _context, _user_query=None):
         """
         Retrieve initial chat history for the user session.
-        Returns the most recent messages up to max_context_messages.
+        Returns the most recent messages up to max_context_messages, with the
+        cursor of the oldest one for get_previous_messages.
         """
         if self.user_session.local_submission_id:
-            messages, has_more = self._process_messages()
+            entries, has_more = self._process_indexed_messages()
+            messages = _without_token_counts(msg for _, msg in entries)
 
             return {
                 "response": json.dumps(
@@ -164,6 +348,7 @@ class SubmissionProcessor:
                         "metadata": {
                             "has_more": has_more,
                             "current_count": len(messages),
+                            "cursor": _encode_cursor(entries[0][0]) if entries else None,
                         },
                     }
                 ),
@@ -171,27 +356,39 @@ class SubmissionProcessor:
         else:
             return {"error": "No submission ID associated with the session"}
 
-    def get_previous_messages(self, current_messages_count=0):
+    def get_previous_messages(self, current_messages_count=0, cursor=None):
         """
         Retrieve previous messages for lazy loading older chat history.
-        Takes the count of current messages from frontend and returns the next batch of older messages.
+
+        With ``cursor`` (the ``cursor`` of the last page's metadata) returns
+        the batch of messages before it. Without one, falls back to the count
+        of current messages in the frontend.
 
         Args:
             current_messages_count: Number of messages currently displayed in the frontend
+            cursor: Position of the oldest message displayed, as "<attempt_number>:<index>"
 
         Returns:
-            dict: Contains 'response' (JSON string of new messages) and 'metadata' (has_more flag)
+            dict: Contains 'response' (JSON string of new messages) and 'metadata'
+                  (has_more flag and the cursor of the next page)
         """
-        # Ensure current_messages_count is an integer
-        if isinstance(current_messages_count, str):
-            try:
-                current_messages_count = int(current_messages_count)
-            except (ValueError, TypeError):
-                current_messages_count = 0
-
-        new_messages, has_more = self._process_messages(
-            current_messages_count=current_messages_count
-        )
+        position = _parse_cursor(cursor)
+        if position is not None:
+            entries, has_more = self._messages_before(position)
+            next_cursor = _encode_cursor(entries[0][0]) if entries else cursor
+        else:
+            # Ensure current_messages_count is an integer
+            if isinstance(current_messages_count, str):
+                try:
+                    current_messages_count = int(current_messages_count)
+                except (ValueError, TypeError):
+                    current_messages_count = 0
+
+            entries, has_more = self._process_indexed_messages(
+                current_messages_count=current_messages_count
+            )
+            next_cursor = _encode_cursor(entries[0][0]) if entries else None
+        new_messages = _without_token_counts(msg for _, msg in entries)
 
         return {
             "response": json.dumps(
@@ -200,6 +397,7 @@ class SubmissionProcessor:
                     "metadata": {
                         "has_more": has_more,
                         "new_count": len(new_messages),
+                        "cursor": next_cursor,
                     },
                 }
             ),
@@ -212,22 +410,44 @@ class SubmissionProcessor:
         Each call stores the provided messages (prompt + AI response) as a new
         Submission.  History is tracked implicitly via ``attempt_number``, which
         the Submissions API auto-increments for the same ``student_item``.
+        Each message is stored with its estimated token count, used by the
+        token-budget history window. Large system messages are stored as
+        content blobs and referenced from the submission (see
+        utils/content_blobs.py). The messages are also appended to the
+        session's history tail.
         """
-        self.update_submission(messages)
+        previous_submission_id = self.user_session.local_submission_id
+        messages = [
+            {**msg, TOKENS_KEY: estimate_message_tokens(msg)} if isinstance(msg, dict) else msg
+            for msg in messages
+        ]
+        submission = self.update_submission(content_blobs.externalize(messages))
+        if history_tail.is_enabled():
+            entries = self._indexed_messages({**submission, "answer": codec.dumps(messages)})
+            history_tail.append_to_tail(
+                self.user_session.id,
+                previous_submission_id,
+                submission["uuid"],
+                [msg for _, msg in entries],
+                [[submission.get("attempt_number"), index] for index, _ in entries],
+                self._history_tail_capacity(),
+            )
 
     def update_submission(self, data):
         """
         Create a new Submission record with the provided data.
 
         ``attempt_number`` is intentionally omitted so the Submissions API
-        auto-increments it for the given ``student_item``.
+        auto-increments it for the given ``student_item``. Returns the new
+        submission.
         """
         submission = submissions_api.create_submission(
             student_item_dict=self.student_item_dict,
-            answer=json.dumps(data),
+            answer=codec.encode(data),
         )
         self.user_session.local_submission_id = submission["uuid"]
         self.user_session.save()
+        return submission
 
     def get_submission(self):
         """
@@ -239,7 +459,7 @@ class SubmissionProcessor:
             )
         return None
 
-    def get_full_message_history(self, filters=_DEFAULT_FILTERS):
+    def get_full_message_history(self, filters=_DEFAULT_FILTERS, max_tokens=None):
         """
         Retrieve the full message history for the current submission.
 
@@ -250,15 +470,38 @@ class SubmissionProcessor:
                      which is what the LLM input path requires.
                      Pass frozenset() to retrieve everything stored (system messages,
                      function calls, block-format content) for debug/admin views.
+            max_tokens: Token budget of the history: only the newest messages that
+                        fit are returned. Defaults to max_context_tokens; 0 returns
+                        the whole history.
         """
         if self.user_session.local_submission_id:
-            messages, _ = self._process_messages(use_max_context=False, filters=filters)
+            if max_tokens is None:
+                max_tokens = self.max_context_tokens
+            messages, _ = self._process_messages(use_max_context=False, filters=filters, max_tokens=max_tokens or 0)
             for msg in messages:
                 if isinstance(msg, dict):
                     msg.pop("timestamp", None)
+                    msg.pop(TOKENS_KEY, None)
             return messages
         return None
 
+    def get_thread_rebuild_history(self):
+        """
+        Retrieve the history needed to rebuild a lost server-side thread.
+
+        Unlike get_full_message_history, the stored system prompt and course
+        context are included (resolving their content blobs), followed by the
+        user/assistant messages. With max_context_tokens, only the newest
+        user/assistant messages that fit in the budget are kept.
+        """
+        history = self.get_full_message_history(filters=frozenset({FILTER_NON_STRING_CONTENT}), max_tokens=0)
+        if not history or not self.max_context_tokens:
+            return history
+        system = [msg for msg in history if msg.get("role") == "system"]
+        turns = [(None, msg) for msg in history if msg.get("role") != "system"]
+        start = self._token_window_start(turns, 0, len(turns), self.max_context_tokens)
+        return system + [msg for _, msg in turns[start:]]
+
     def get_full_thread(self):
         """
         Retrieve the full message history with timestamps for debugging.
@@ -0,0 +1,129 @@
+"""
+Content-addressed storage of large chat history messages.
+
+For providers without a server-side thread, the first submission of a session
+also stores the system prompt and the course context as system messages. They
+are the largest part of a chat history, identical across every session of the
+same unit, and only needed when the full history is sent to the LLM again.
+
+Before a submission is saved, system messages of at least ``min_chars``
+characters are stored once in ContentBlob (keyed by the SHA-256 of their text,
+zlib-compressed) and replaced in the submission by
+``{"role": "system", "content_ref": "<digest>"}``. References are resolved only
+when the history is read with system messages included.
+"""
+import hashlib
+import logging
+import zlib
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+REF_KEY = "content_ref"
+
+DEFAULT_CONTENT_BLOB_SETTINGS = {
+    "min_chars": 2048,
+    "compress_level": 6,
+}
+
+
+def get_content_blob_settings():
+    """Return content blob settings with AI_EXTENSIONS_CONTENT_BLOBS applied over the defaults."""
+    return {
+        **DEFAULT_CONTENT_BLOB_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_CONTENT_BLOBS", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CONTENT_BLOBS is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CONTENT_BLOBS", True))
+
+
+def content_digest(text):
+    """Return the SHA-256 hex digest of ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def externalize(messages):
+    """
+    Return ``messages`` with large system messages replaced by blob references.
+
+    The blobs are stored before returning. If they can't be stored the
+    messages are returned unchanged, so history is never lost.
+    """
+    if not is_enabled():
+        return messages
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import ContentBlob
+
+    blob_settings = get_content_blob_settings()
+    blobs = {}
+    stored = []
+    for msg in messages:
+        if _is_large_system_message(msg, blob_settings["min_chars"]):
+            digest = content_digest(msg["content"])
+            blobs.setdefault(digest, msg["content"])
+            reference = {key: value for key, value in msg.items() if key != "content"}
+            reference[REF_KEY] = digest
+            stored.append(reference)
+        else:
+            stored.append(msg)
+    if not blobs:
+        return messages
+
+    try:
+        existing = set(ContentBlob.objects.filter(digest__in=blobs).values_list("digest", flat=True))
+        ContentBlob.objects.bulk_create(
+            [
+                ContentBlob(
+                    digest=digest,
+                    data=zlib.compress(text.encode("utf-8"), blob_settings["compress_level"]),
+                    size=len(text),
+                )
+                for digest, text in blobs.items()
+                if digest not in existing
+            ],
+            ignore_conflicts=True,
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not store content blobs, keeping messages inline: {e}")
+        return messages
+    return stored
+
+
+def _is_large_system_message(msg, min_chars):
+    """Return True if ``msg`` is a system message whose text is worth storing as a blob."""
+    return (
+        isinstance(msg, dict)
+        and msg.get("role") == "system"
+        and isinstance(msg.get("content"), str)
+        and len(msg["content"]) >= min_chars
+    )
+
+
+def resolve(messages):
+    """
+    Replace blob references in ``messages`` (in place) by their text.
+
+    All references are loaded with a single query. A reference whose blob is
+    missing resolves to an empty string.
+    """
+    refs = {msg[REF_KEY] for msg in messages if isinstance(msg, dict) and REF_KEY in msg}
+    if not refs:
+        return messages
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import ContentBlob
+
+    texts = {
+        digest: zlib.decompress(bytes(data)).decode("utf-8")
+        for digest, data in ContentBlob.objects.filter(digest__in=refs).values_list("digest", "data")
+    }
+    for msg in messages:
+        if isinstance(msg, dict) and REF_KEY in msg:
+            digest = msg.pop(REF_KEY)
+            if digest not in texts:
+                logger.warning(f"Content blob {digest} referenced from chat history is missing")
+            msg["content"] = texts.get(digest, "")
+    return messages
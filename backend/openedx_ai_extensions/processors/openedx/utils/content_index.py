@@ -0,0 +1,134 @@
+"""
+Persistent index of LLM-ready unit content.
+
+get_location_content otherwise walks the modulestore and runs every block
+extractor on each request. After a course is published, the content of each
+unit is stored in UnitContentIndex (see content_indexing) together with a
+fingerprint of its blocks, and requests read a unit or a whole sequence with a
+single indexed query.
+
+Once an index run has gone through the whole course, its rows are stamped with
+the published course version. Rows are only served while they carry the
+current version, so after a publish (and until the next run completes), and
+for units that are not indexed yet, requests fall back to the modulestore.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import Subquery
+
+from openedx_ai_extensions.processors.openedx.utils.component_extractors import EXTRACTOR_VERSION
+from openedx_ai_extensions.processors.openedx.utils.transcripts import CLEANER_VERSION, transcript_language
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTENT_INDEX_SETTINGS = {
+    "publish_delay": 60,
+}
+
+
+def get_content_index_settings():
+    """Return index settings with AI_EXTENSIONS_CONTENT_INDEX applied over the defaults."""
+    return {
+        **DEFAULT_CONTENT_INDEX_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_CONTENT_INDEX", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CONTENT_INDEX is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CONTENT_INDEX", False))
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+
+def get_indexed_unit(unit_key):
+    """Return the UnitContentIndex row of a unit, or None if it isn't indexed."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import UnitContentIndex
+
+    try:
+        return UnitContentIndex.objects.filter(unit_id=unit_key).first()
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Content index unavailable: {exc}")
+        return None
+
+
+def get_indexed_sequence(unit_key):
+    """Return the rows of every unit in the sequence of ``unit_key``, in order, from a single query."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import UnitContentIndex
+
+    try:
+        sequence_id = UnitContentIndex.objects.filter(unit_id=unit_key).values("sequence_id")[:1]
+        return list(UnitContentIndex.objects.filter(sequence_id=Subquery(sequence_id)).order_by("position"))
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Content index unavailable: {exc}")
+        return []
+
+
+def is_current_sequence(rows, course_version, unit_key):
+    """
+    Return True if ``rows`` are a complete index of the sequence of ``unit_key`` at ``course_version``.
+
+    Every row must carry the version and the positions must run from 0
+    without gaps, so no unit of the sequence is missing.
+    """
+    return (
+        bool(rows)
+        and all(row.course_version == course_version for row in rows)
+        and [row.position for row in rows] == list(range(len(rows)))
+        and any(row.unit_id == unit_key for row in rows)
+    )
+
+
+# -----------------------------
+# Versioning
+# -----------------------------
+
+
+def published_course_version(course_key):
+    """Return the version of the published course, or None if it can't be read."""
+    # pylint: disable=import-error,import-outside-toplevel
+    from xmodule.modulestore import ModuleStoreEnum
+    from xmodule.modulestore.django import modulestore
+
+    try:
+        store = modulestore()
+        with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            course = store.get_course(course_key, depth=0)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Published version of {course_key} unavailable: {exc}")
+        return None
+    version = getattr(course, "course_version", None) if course is not None else None
+    return str(version) if version else None
+
+
+def video_transcript_pair(block):
+    """Return (edx_video_id, language_code) of a video block, or None."""
+    video_id = getattr(block, "edx_video_id", None)
+    language_code = transcript_language(block)
+    return (video_id, language_code) if video_id and language_code else None
+
+
+def unit_blocks_version(unit, transcript_versions):
+    """
+    Return the fingerprint of a unit's content.
+
+    It covers the unit and its blocks' edit timestamps, the transcript versions
+    of its videos and the extractor versions, so any change that alters the
+    extracted content changes the fingerprint.
+    """
+    parts = [str(unit.location), str(unit.display_name), str(EXTRACTOR_VERSION), str(CLEANER_VERSION)]
+    for block in unit.get_children():
+        edited_on = getattr(block, "edited_on", None)
+        parts.append(f"{block.location}@{edited_on.isoformat() if edited_on else ''}")
+        pair = video_transcript_pair(block) if getattr(block, "category", None) == "video" else None
+        if pair:
+            modified = transcript_versions.get(pair)
+            parts.append(f"{pair}@{modified.isoformat() if modified else ''}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
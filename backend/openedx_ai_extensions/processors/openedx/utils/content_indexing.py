@@ -0,0 +1,144 @@
+"""
+Course-publish-driven updates of the unit content index.
+
+After a course is published, a Celery task walks the published course once and
+re-extracts only the units whose fingerprint changed since the last run:
+units whose blocks were edited or whose video transcripts were updated. Units
+that only moved are renumbered in place and removed units are deleted. Finally
+every row is stamped with the published course version the run read.
+"""
+import hashlib
+import json
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils.content_index import (
+    get_content_index_settings,
+    unit_blocks_version,
+    video_transcript_pair,
+)
+from openedx_ai_extensions.processors.openedx.utils.transcripts import _transcript_versions
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:content_index"
+
+
+def _published_units(course_key):
+    """Return the published course version and [(sequence, position, unit)] of every unit, loaded in one fetch."""
+    # pylint: disable=import-error,import-outside-toplevel
+    from xmodule.modulestore import ModuleStoreEnum
+    from xmodule.modulestore.django import modulestore
+
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        course = store.get_course(course_key, depth=None)
+    version = getattr(course, "course_version", None)
+    return str(version) if version else "", [
+        (sequence, position, unit)
+        for chapter in course.get_children()
+        for sequence in chapter.get_children()
+        for position, unit in enumerate(sequence.get_children())
+    ]
+
+
+def index_course(course_key):
+    """
+    Bring the content index of a published course up to date.
+
+    Returns a {"units", "extracted", "deleted"} summary of the run.
+    """
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import UnitContentIndex
+
+    course_version, entries = _published_units(course_key)
+    video_pairs = {
+        video_transcript_pair(block)
+        for _, _, unit in entries
+        for block in unit.get_children()
+        if getattr(block, "category", None) == "video"
+    } - {None}
+    transcript_versions = _transcript_versions(sorted({video_id for video_id, _ in video_pairs}))
+
+    existing = {str(row.unit_id): row for row in UnitContentIndex.objects.filter(course_id=course_key)}
+    changed = []
+    moved = []
+    for sequence, position, unit in entries:
+        version = unit_blocks_version(unit, transcript_versions)
+        row = existing.get(str(unit.location))
+        if row is None or row.blocks_version != version:
+            changed.append((sequence, position, unit, version))
+        elif (str(row.sequence_id), row.position, row.sequence_display_name) != (
+            str(sequence.location), position, sequence.display_name or ""
+        ):
+            row.sequence_id, row.position, row.sequence_display_name = (
+                sequence.location, position, sequence.display_name or ""
+            )
+            moved.append(row)
+
+    if changed:
+        processor = OpenEdXProcessor(processor_config={})
+        units_data = processor._get_units_data(  # pylint: disable=protected-access
+            [unit for _, _, unit, _ in changed]
+        )
+        for (sequence, position, unit, version), unit_data in zip(changed, units_data):
+            serialized = json.dumps(unit_data, sort_keys=True, default=str)
+            UnitContentIndex.objects.update_or_create(
+                unit_id=unit.location,
+                defaults={
+                    "course_id": course_key,
+                    "sequence_id": sequence.location,
+                    "sequence_display_name": sequence.display_name or "",
+                    "position": position,
+                    "content": unit_data,
+                    "token_count": len(serialized) // 4,
+                    "content_hash": hashlib.sha256(serialized.encode("utf-8")).hexdigest(),
+                    "blocks_version": version,
+                },
+            )
+    if moved:
+        UnitContentIndex.objects.bulk_update(moved, ["sequence_id", "position", "sequence_display_name"])
+
+    current = {str(unit.location) for _, _, unit in entries}
+    stale = [row.pk for unit_id, row in existing.items() if unit_id not in current]
+    if stale:
+        UnitContentIndex.objects.filter(pk__in=stale).delete()
+
+    # Only now is the whole course indexed at this version; until then readers fall back to the modulestore.
+    UnitContentIndex.objects.filter(course_id=course_key).update(course_version=course_version)
+
+    return {"units": len(entries), "extracted": len(changed), "deleted": len(stale)}
+
+
+@shared_task(
+    name="openedx_ai_extensions.processors.index_course_content",
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def index_course_content_task(course_id):
+    """Update the content index of a published course."""
+    course_key = CourseKey.from_string(course_id)
+    summary = index_course(course_key)
+    logger.info(f"Content index of {course_key} updated: {summary}")
+    return summary
+
+
+def schedule_course_index(course_key):
+    """
+    Schedule index_course_content_task after a course is published.
+
+    Publishing a course emits one signal per published block, so runs are
+    debounced: at most one task per course is queued within publish_delay.
+    """
+    delay = get_content_index_settings()["publish_delay"]
+    try:
+        if not cache.add(f"{CACHE_KEY_PREFIX}:scheduled:{course_key}", True, delay):
+            return False
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Content index debounce unavailable: {exc}")
+    index_course_content_task.apply_async(args=[str(course_key)], countdown=delay)
+    return True
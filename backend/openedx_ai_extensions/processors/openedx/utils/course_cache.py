@@ -0,0 +1,149 @@
+"""
+Cache of course-level tool results: the course outline and the course info.
+
+get_course_outline and get_course_info are LLM tools, so a single chat turn can
+call them several times, and each call runs get_course_blocks or loads the
+course from the modulestore. Their results are cached per course generation, a
+token replaced whenever the course is published, so a publish invalidates every
+cached result of the course at once.
+
+The outline depends on what the user may see, so it is cached per visibility
+signature: staff access, beta-tester access (early release), the user's group
+in each user partition (cohorts, enrollment tracks, content gating), the
+user's personal date overrides and the prerequisites they haven't fulfilled
+yet. Users sharing a signature share the outline. Course release dates are
+not part of the signature; cached outlines expire after ``timeout`` seconds so
+newly released content shows up.
+"""
+import hashlib
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:course_cache"
+
+DEFAULT_COURSE_CACHE_SETTINGS = {
+    "timeout": 3600,
+    "signature_timeout": 300,
+}
+
+
+def get_course_cache_settings():
+    """Return course cache settings with AI_EXTENSIONS_COURSE_CACHE applied over the defaults."""
+    return {
+        **DEFAULT_COURSE_CACHE_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_COURSE_CACHE", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_COURSE_CACHE is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_COURSE_CACHE", True))
+
+
+def _generation_key(course_key):
+    return f"{CACHE_KEY_PREFIX}:generation:{course_key}"
+
+
+def course_generation(course_key):
+    """Return the current generation token of a course, creating one if needed."""
+    key = _generation_key(course_key)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_course(course_key):
+    """Start a new generation for a course, so every cached result of the course is rebuilt."""
+    try:
+        cache.set(_generation_key(course_key), uuid.uuid4().hex, None)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not invalidate course cache of {course_key}: {e}")
+
+
+def _compute_visibility_signature(user, course_key):
+    """Return the signature of the course content visible to ``user``."""
+    # pylint: disable=import-error,import-outside-toplevel
+    from common.djangoapps.student.roles import CourseBetaTesterRole
+    from common.djangoapps.util import milestones_helpers
+    from edx_when.api import get_overrides_for_user
+    from lms.djangoapps.courseware.access import has_access
+    from xmodule.modulestore.django import modulestore
+    from xmodule.partitions.partitions_service import get_all_partitions_for_course, get_user_partition_groups
+
+    if has_access(user, "staff", course_key):
+        return "staff"
+    course = modulestore().get_course(course_key, depth=0)
+    groups = get_user_partition_groups(course_key, get_all_partitions_for_course(course), user, "id")
+    parts = [",".join(sorted(f"{partition_id}:{group.id}" for partition_id, group in groups.items())) or "-"]
+    if CourseBetaTesterRole(course_key).has_user(user):
+        parts.append("beta")
+    overrides = sorted(
+        f"{override['location']}={override['actual_date']}" for override in get_overrides_for_user(course_key, user)
+    )
+    if overrides:
+        parts.append("dates:" + ",".join(overrides))
+    unfulfilled = sorted(
+        f"{milestone.get('namespace')}:{milestone.get('id')}"
+        for milestone in milestones_helpers.get_course_content_milestones(
+            course_key, None, "requires", user.id
+        )
+    )
+    if unfulfilled:
+        parts.append("gated:" + ",".join(unfulfilled))
+    return "|".join(parts)
+
+
+def visibility_signature(user, course_key, generation):
+    """
+    Return the visibility signature of ``user`` in a course, or None if it can't be computed.
+
+    Signatures are cached per user for ``signature_timeout`` seconds, bounding
+    how long a cohort or enrollment change takes to show in the outline.
+    """
+    key = f"{CACHE_KEY_PREFIX}:signature:{course_key}:{generation}:{getattr(user, 'id', None)}"
+    signature = cache.get(key)
+    if signature is not None:
+        return signature
+    try:
+        signature = _compute_visibility_signature(user, course_key)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not compute the visibility signature in {course_key}: {e}")
+        return None
+    cache.set(key, signature, get_course_cache_settings()["signature_timeout"])
+    return signature
+
+
+def get_or_build(name, course_key, build, user=None):
+    """
+    Return the cached ``name`` result of a course, calling ``build()`` on a miss.
+
+    With ``user``, the result is cached per visibility signature; when the
+    signature can't be computed, the result is built without caching.
+    """
+    if not is_enabled():
+        return build()
+    try:
+        generation = course_generation(course_key)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Course cache unavailable: {e}")
+        return build()
+    parts = [name, str(course_key), generation]
+    if user is not None:
+        signature = visibility_signature(user, course_key, generation)
+        if signature is None:
+            return build()
+        parts.append(hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16])
+
+    key = f"{CACHE_KEY_PREFIX}:{':'.join(parts)}"
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, get_course_cache_settings()["timeout"])
+    return result
@@ -0,0 +1,178 @@
+"""
+Versioned cache of component extractor output.
+
+Parsing HTML and problem XML with BeautifulSoup is the most expensive part of
+get_location_content, yet a block's output only changes when the block is
+edited. Extractor results are therefore cached under a key made of the usage
+key, the block's ``edited_on`` timestamp, the extractor version and, for
+problems, the show_answer mode. Entries are stored zlib-compressed in the
+Django cache, with a small per-process LRU in front of it.
+"""
+import hashlib
+import json
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.openedx.utils.component_extractors import (
+    EXTRACTOR_VERSION,
+    extract_html_info,
+    extract_problem_info,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:extraction"
+
+DEFAULT_EXTRACTION_CACHE_SETTINGS = {
+    "timeout": 7 * 24 * 3600,
+    "local_max_entries": 2048,
+}
+
+# Extractors whose output depends only on the block itself (video transcripts
+# live in edxval and can change without the block being edited).
+CACHEABLE_EXTRACTORS = (extract_html_info, extract_problem_info)
+
+_local_lock = threading.Lock()
+_local = OrderedDict()
+
+
+def get_extraction_cache_settings():
+    """Return cache settings with AI_EXTENSIONS_EXTRACTION_CACHE applied over the defaults."""
+    return {
+        **DEFAULT_EXTRACTION_CACHE_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_EXTRACTION_CACHE", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE", True))
+
+
+def clear_local_cache():
+    """Empty the per-process LRU (used by tests)."""
+    with _local_lock:
+        _local.clear()
+
+
+def extraction_cache_key(block, extractor, show_answer=None):
+    """
+    Return the cache key of ``extractor`` output for ``block``, or None if it can't be versioned.
+
+    Blocks without an ``edited_on`` timestamp are never cached, since there
+    would be no way to tell a stale entry apart.
+    """
+    edited_on = getattr(block, "edited_on", None)
+    if not isinstance(edited_on, datetime):
+        return None
+    parts = [
+        str(block.location),
+        edited_on.isoformat(),
+        extractor.__name__,
+        str(EXTRACTOR_VERSION),
+        str(show_answer) if extractor is extract_problem_info else "",
+    ]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def _local_get(key):
+    """Return a payload from the per-process LRU, marking it as recently used."""
+    with _local_lock:
+        payload = _local.get(key)
+        if payload is not None:
+            _local.move_to_end(key)
+        return payload
+
+
+def _local_set(key, payload, max_entries):
+    """Store a payload in the per-process LRU, evicting the least recently used entries."""
+    with _local_lock:
+        _local[key] = payload
+        _local.move_to_end(key)
+        while len(_local) > max_entries:
+            _local.popitem(last=False)
+
+
+def _shared_get(key):
+    """Return a payload from the Django cache, or None if the backend fails."""
+    try:
+        return cache.get(key)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Extraction cache unavailable: {exc}")
+        return None
+
+
+def _shared_set(key, payload, timeout):
+    """Store a payload in the Django cache, ignoring backend failures."""
+    try:
+        cache.set(key, payload, timeout)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Extraction cache unavailable: {exc}")
+
+
+def get_cached(block, extractor, show_answer=None):
+    """
+    Return the cached ``extractor`` output for ``block``, or None on a miss.
+
+    Also returns None when caching is disabled or the extractor is not cacheable.
+    """
+    if not is_enabled() or extractor not in CACHEABLE_EXTRACTORS:
+        return None
+    key = extraction_cache_key(block, extractor, show_answer)
+    if key is None:
+        return None
+
+    payload = _local_get(key)
+    if payload is None:
+        payload = _shared_get(key)
+        if payload is not None:
+            _local_set(key, payload, get_extraction_cache_settings()["local_max_entries"])
+    if payload is None:
+        return None
+    try:
+        return json.loads(zlib.decompress(payload))
+    except (zlib.error, ValueError) as exc:
+        logger.warning(f"Discarding unreadable extraction cache entry {key}: {exc}")
+        return None
+
+
+def store_cached(block, extractor, info, show_answer=None):
+    """Cache ``info`` as the ``extractor`` output for ``block``, when the block can be versioned."""
+    if not is_enabled() or extractor not in CACHEABLE_EXTRACTORS:
+        return
+    key = extraction_cache_key(block, extractor, show_answer)
+    if key is None:
+        return
+    try:
+        payload = zlib.compress(json.dumps(info, separators=(",", ":")).encode("utf-8"))
+    except (TypeError, ValueError):
+        return
+    cache_settings = get_extraction_cache_settings()
+    _shared_set(key, payload, cache_settings["timeout"])
+    _local_set(key, payload, cache_settings["local_max_entries"])
+
+
+def cached_extract(block, extractor, show_answer=None):
+    """
+    Run ``extractor`` on ``block``, serving the result from cache when the block is unchanged.
+
+    A fresh dict is returned on every call, so callers may modify it (e.g. to
+    truncate text) without affecting the cached entry.
+    """
+    info = get_cached(block, extractor, show_answer)
+    if info is not None:
+        return info
+
+    if extractor is extract_problem_info:
+        info = extractor(block, show_answer)
+    else:
+        info = extractor(block)
+    store_cached(block, extractor, info, show_answer)
+    return info
@@ -0,0 +1,215 @@
+"""
+Concurrent extraction of the blocks returned by get_location_content.
+
+Video extractors wait on edxval for transcripts, so the transcripts of all
+video blocks are batch-loaded in a background thread (downloading cache misses
+in a thread pool) while the calling thread extracts the other blocks. HTML and
+problem parsing is CPU-bound: it normally runs in the calling thread (most
+blocks are served from the extraction cache anyway), and for very large
+sequences it can be pushed to a process pool. Results are always returned in
+document order, and a block that fails to extract yields None without affecting
+the others.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import copy_context
+from types import SimpleNamespace
+
+import django
+from django.conf import settings
+from django.db import connections
+
+from openedx_ai_extensions.processors.openedx.utils.component_extractors import (
+    COMPONENT_EXTRACTORS,
+    extract_problem_info,
+)
+from openedx_ai_extensions.processors.openedx.utils.extraction_cache import get_cached, store_cached
+from openedx_ai_extensions.processors.openedx.utils.transcripts import load_transcripts, prefetched_transcripts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTION_SCHEDULER_SETTINGS = {
+    "io_workers": 8,
+    "process_workers": 0,
+    "process_min_blocks": 50,
+}
+
+IO_BOUND_CATEGORIES = ("video",)
+CPU_BOUND_CATEGORIES = ("html", "problem")
+
+_process_pool_lock = threading.Lock()
+_process_pool = None
+
+
+def get_extraction_scheduler_settings():
+    """Return scheduler settings with AI_EXTENSIONS_EXTRACTION_SCHEDULER applied over the defaults."""
+    return {
+        **DEFAULT_EXTRACTION_SCHEDULER_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_EXTRACTION_SCHEDULER", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION", True))
+
+
+def _category(block):
+    """Return the lower-cased category of a block, or "" if it has none."""
+    category = getattr(block, "category", "")
+    return category.lower() if isinstance(category, str) else ""
+
+
+def _safe_extract(extract, block):
+    """Run ``extract`` on a block, returning None if it raises."""
+    try:
+        return extract(block)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not load block {getattr(block, 'location', block)}: {exc}")
+        return None
+
+
+def _load_transcripts_in_thread(video_blocks, io_workers):
+    """Batch-load transcripts in a background thread, closing the DB connections it opened."""
+    try:
+        return load_transcripts(video_blocks, max_workers=io_workers)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not batch-load transcripts: {exc}")
+        return {}
+    finally:
+        connections.close_all()
+
+
+def _init_process_worker():
+    """Set Django up in a freshly spawned worker process."""
+    django.setup()
+
+
+def _get_process_pool(workers):
+    """Return the shared process pool, creating it on first use."""
+    global _process_pool  # pylint: disable=global-statement
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked: forking a threaded web worker is unsafe.
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+            )
+        return _process_pool
+
+
+def _reset_process_pool():
+    """Drop a broken process pool so the next large sequence starts a new one."""
+    global _process_pool  # pylint: disable=global-statement
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _snapshot(block):
+    """Return a picklable copy of the block fields read by the HTML and problem extractors."""
+    return SimpleNamespace(
+        location=str(block.location),
+        display_name=block.display_name,
+        data=getattr(block, "data", "") or "",
+        showanswer=getattr(block, "showanswer", False),
+    )
+
+
+def _extract_snapshot(category, snapshot, show_answer):
+    """Run the extractor for ``category`` on a block snapshot (process pool entry point)."""
+    extractor = COMPONENT_EXTRACTORS[category]
+    if extractor is extract_problem_info:
+        return extractor(snapshot, show_answer)
+    return extractor(snapshot)
+
+
+def _extract_in_processes(blocks, indexes, extract, show_answer, workers):
+    """Return {index: result} for the CPU-bound blocks at ``indexes``, parsing cache misses in worker processes."""
+    results = {}
+    pending = {}
+    for index in indexes:
+        block = blocks[index]
+        extractor = COMPONENT_EXTRACTORS[_category(block)]
+        try:
+            cached = get_cached(block, extractor, show_answer)
+            if cached is not None:
+                results[index] = cached
+                continue
+            pending[index] = _get_process_pool(workers).submit(
+                _extract_snapshot, _category(block), _snapshot(block), show_answer
+            )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not schedule block {getattr(block, 'location', block)}: {exc}")
+            results[index] = _safe_extract(extract, block)
+
+    for index, future in pending.items():
+        block = blocks[index]
+        try:
+            results[index] = future.result()
+            store_cached(block, COMPONENT_EXTRACTORS[_category(block)], results[index], show_answer)
+        except BrokenProcessPool as exc:
+            logger.warning(f"Extraction process pool failed, extracting in-process: {exc}")
+            _reset_process_pool()
+            results[index] = _safe_extract(extract, block)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not load block {getattr(block, 'location', block)}: {exc}")
+            results[index] = None
+    return results
+
+
+def extract_blocks(blocks, extract, show_answer="auto"):
+    """
+    Extract ``blocks`` concurrently and return their results in document order.
+
+    ``extract`` is the per-block extractor (e.g. OpenEdXProcessor._extract_block);
+    a block for which it raises yields None. ``show_answer`` is passed to the
+    problem extractor when problems are parsed in the process pool.
+    """
+    blocks = list(blocks)
+    if not is_enabled():
+        return [extract(block) for block in blocks]
+
+    scheduler_settings = get_extraction_scheduler_settings()
+    categories = [_category(block) for block in blocks]
+    video_indexes = [index for index, category in enumerate(categories) if category in IO_BOUND_CATEGORIES]
+    cpu_indexes = [index for index, category in enumerate(categories) if category in CPU_BOUND_CATEGORIES]
+    use_processes = (
+        scheduler_settings["process_workers"] > 0
+        and len(cpu_indexes) >= scheduler_settings["process_min_blocks"]
+    )
+
+    loader = transcripts = None
+    if video_indexes:
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-transcripts")
+        # Run in a copy of the caller's context, so transcripts it prefetched are honored.
+        transcripts = loader.submit(
+            copy_context().run,
+            _load_transcripts_in_thread, [blocks[index] for index in video_indexes], scheduler_settings["io_workers"]
+        )
+
+    scheduled = set(video_indexes) | set(cpu_indexes if use_processes else ())
+    results = [None] * len(blocks)
+    try:
+        # The calling thread works through the other blocks while transcripts load.
+        if use_processes:
+            for index, result in _extract_in_processes(
+                blocks, cpu_indexes, extract, show_answer, scheduler_settings["process_workers"]
+            ).items():
+                results[index] = result
+        for index, block in enumerate(blocks):
+            if index not in scheduled:
+                results[index] = _safe_extract(extract, block)
+        if loader:
+            with prefetched_transcripts(transcripts.result()):
+                for index in video_indexes:
+                    results[index] = _safe_extract(extract, blocks[index])
+    finally:
+        if loader:
+            loader.shutdown()
+    return results
@@ -0,0 +1,106 @@
+"""
+Cached tail of the chat history of each session.
+
+Reading the recent history of a chat otherwise loads and decodes every
+submission of the session. The last messages of each session (with the
+default filters applied) are kept in the Django cache together with the total
+message count and the id of the latest submission they cover. New turns are
+appended as they are saved, and a tail whose submission id doesn't match the
+session's latest submission is ignored and rebuilt from the submissions.
+
+Each message is kept with its position, the (attempt_number, index) of the
+message in its submission, which is what history page cursors refer to.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:history_tail"
+
+DEFAULT_HISTORY_TAIL_SETTINGS = {
+    "size": 50,
+    "timeout": 86400,
+}
+
+
+def get_history_tail_settings():
+    """Return history tail settings with AI_EXTENSIONS_HISTORY_TAIL applied over the defaults."""
+    return {
+        **DEFAULT_HISTORY_TAIL_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_HISTORY_TAIL", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_HISTORY_TAIL is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_HISTORY_TAIL", True))
+
+
+def _key(session_id):
+    return f"{CACHE_KEY_PREFIX}:{session_id}"
+
+
+def get_tail(session_id, submission_id):
+    """
+    Return the cached tail of a session if it is current, else None.
+
+    The tail is a dict with ``messages`` (the last messages, oldest first),
+    their ``positions`` and ``total`` (the number of messages in the whole
+    history).
+    """
+    if not submission_id:
+        return None
+    try:
+        tail = cache.get(_key(session_id))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"History tail cache unavailable: {e}")
+        return None
+    if tail is None or tail.get("submission") != submission_id or "positions" not in tail:
+        return None
+    return tail
+
+
+def store_tail(session_id, submission_id, messages, positions, capacity):
+    """Cache the last ``capacity`` of ``messages`` (and ``positions``), the whole history up to ``submission_id``."""
+    tail = {
+        "submission": submission_id,
+        "total": len(messages),
+        "messages": messages[-capacity:],
+        "positions": positions[-capacity:],
+    }
+    try:
+        cache.set(_key(session_id), tail, get_history_tail_settings()["timeout"])
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not cache history tail: {e}")
+
+
+def append_to_tail(session_id, previous_submission_id,  # pylint: disable=too-many-positional-arguments
+                   submission_id, messages, positions, capacity):
+    """
+    Append the messages of a new submission to the cached tail of a session.
+
+    A session without a previous submission starts a new tail. When the cached
+    tail doesn't end at ``previous_submission_id`` it is dropped instead, and
+    the next read rebuilds it.
+    """
+    if not previous_submission_id:
+        store_tail(session_id, submission_id, messages, positions, capacity)
+        return
+    tail = get_tail(session_id, previous_submission_id)
+    if tail is None:
+        try:
+            cache.delete(_key(session_id))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not drop history tail: {e}")
+        return
+    tail["messages"] = (tail["messages"] + messages)[-capacity:]
+    tail["positions"] = (tail["positions"] + positions)[-capacity:]
+    tail["total"] += len(messages)
+    tail["submission"] = submission_id
+    try:
+        cache.set(_key(session_id), tail, get_history_tail_settings()["timeout"])
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not cache history tail: {e}")
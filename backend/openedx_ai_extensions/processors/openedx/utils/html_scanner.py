@@ -0,0 +1,365 @@
+"""
+Single-pass text extraction for HTML and problem blocks.
+
+The BeautifulSoup pipeline this replaces (kept as the reference implementation
+in tests/test_html_scanner.py) built a tree and then walked it once per kind of
+embedded content, once more to drop noisy tags and a last time for get_text().
+The scanner below produces the same output while the markup is being
+tokenized: it feeds html.parser events into a tag stack that mirrors the one
+kept by BeautifulSoup's html.parser tree builder (implicit closes, void
+elements, string container types), so text, embeddings and problem sections
+are collected without ever building a tree.
+"""
+import re
+from html.parser import HTMLParser
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+NOISY_TAGS = frozenset(["script", "style", "iframe", "embed", "object", "video", "audio", "img"])
+
+# A problem tag's "kind" is its position in SENSITIVE_TAGS + SENSITIVE_CLASSES,
+# which is also the order in which sections are pulled out of the problem.
+SENSITIVE_TAGS = ("choicehint", "hint", "demandhint", "solution")
+SENSITIVE_CLASSES = (
+    "solution-span",
+    "detailed-solution",
+    "feedback-hint",
+    "notification-submit",
+    "status",
+    "correctness",
+)
+SECTION_LABELS = ("Feedback", "Hint", "Hint", "Solution") + ("Feedback/Explanation",) * len(SENSITIVE_CLASSES)
+CORRECT_ANSWER_MARKER = "[CORRECT ANSWER] "
+
+_TAG_KINDS = {name: kind for kind, name in enumerate(SENSITIVE_TAGS)}
+_CLASS_KINDS = {name: kind for kind, name in enumerate(SENSITIVE_CLASSES, start=len(SENSITIVE_TAGS))}
+
+_VOID_ELEMENTS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+_STRING_CONTAINERS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+_NON_WHITESPACE = re.compile(r"\S+")
+
+# String types: plain text, CDATA, or the name of the enclosing string container
+# (script, style, template, rt, rp). get_text() only returns the first two.
+_PLAIN = ""
+_CDATA = "[cdata]"
+_TEXT_TYPES = frozenset([_PLAIN, _CDATA])
+
+
+class _Element:
+    """An open tag on the scanner's stack."""
+
+    __slots__ = ("name", "removed", "min_kind", "section", "media")
+
+    def __init__(self, name, removed, min_kind):
+        self.name = name
+        self.removed = removed
+        self.min_kind = min_kind
+        self.section = None
+        self.media = None
+
+
+class _Section:
+    """Hint, solution or feedback text pulled out of a problem."""
+
+    __slots__ = ("kind", "string_types", "parts")
+
+    def __init__(self, kind, string_types):
+        self.kind = kind
+        self.string_types = string_types
+        self.parts = []
+
+    def render(self):
+        """Return the labelled section, or None if it has no text."""
+        text = " ".join(part.strip() for part in self.parts)
+        return f"[{SECTION_LABELS[self.kind]}]: {text}" if text else None
+
+
+class _HtmlTextScanner(HTMLParser):
+    """
+    Collect text and embedded content in a single html.parser pass.
+
+    With ``problem=True`` the scanner drops hints, solutions and feedback from
+    the main text and, when ``show_answer`` is set, collects them as sections.
+    """
+
+    def __init__(self, problem=False, show_answer=False):
+        super().__init__(convert_charrefs=False)
+        self.problem = problem
+        self.show_answer = show_answer
+        self.stack = []
+        self.open_counts = {}
+        self.containers = []
+        self.already_closed = []
+        self.data = []
+        self.strings = []
+        self.sections = []
+        self.open_sections = 0
+        self.open_media = []
+        self.embeddings = {"iframe": [], "object": [], "img": [], "media": [], "embed": [], "xblock": []}
+
+    # -- tree building, mirroring bs4's BeautifulSoupHTMLParser ------------
+
+    def handle_startendtag(self, tag, attrs):
+        """Handle ``<tag/>``: an explicit open immediately followed by a close."""
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        """Open a tag; void elements are closed right away."""
+        self._flush()
+        attributes = {key: "" if value is None else value for key, value in attrs}
+        self._push(tag, attributes)
+        if handle_empty_element and tag in _VOID_ELEMENTS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed.append(tag)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        """Close the most recent open tag with this name, and everything opened after it."""
+        if check_already_closed and tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self._flush()
+        if not self.open_counts.get(tag):
+            return
+        while self.stack:
+            if self._pop().name == tag:
+                break
+
+    def handle_data(self, data):
+        """Buffer text until the next tag boundary."""
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        """Decode a numeric character reference the way bs4 does."""
+        if name.startswith("x"):
+            codepoint = int(name.lstrip("x"), 16)
+        elif name.startswith("X"):
+            codepoint = int(name.lstrip("X"), 16)
+        else:
+            codepoint = int(name)
+        data = None
+        if codepoint < 256:
+            try:
+                data = bytearray([codepoint]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(codepoint)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        """Decode a named entity, keeping unknown ones as literal text."""
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_comment(self, data):
+        """Drop comments, which never reach the text."""
+        self._flush()
+
+    def handle_decl(self, decl):
+        """Drop doctypes, which never reach the text."""
+        self._flush()
+
+    def handle_pi(self, data):
+        """Drop processing instructions, which never reach the text."""
+        self._flush()
+
+    def unknown_decl(self, data):
+        """Keep CDATA sections as text; drop other declarations."""
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._add_string(data[len("CDATA["):], _CDATA)
+
+    def close(self):
+        """Finish tokenizing and close every tag left open."""
+        super().close()
+        self._flush()
+        while self.stack:
+            self._pop()
+
+    def _flush(self):
+        """Turn buffered text into a string typed by its innermost string container."""
+        if self.data:
+            text = "".join(self.data)
+            self.data = []
+            self._add_string(text, self.containers[-1] if self.containers else _PLAIN)
+
+    def _push(self, name, attributes):
+        """Open a tag, classifying it and recording any embedded content it describes."""
+        parent = self.stack[-1] if self.stack else None
+        kind = self._kind(name, attributes) if self.problem else None
+        inherited_kind = parent.min_kind if parent else None
+        element = _Element(
+            name,
+            removed=(parent is not None and parent.removed) or kind is not None or name in NOISY_TAGS,
+            min_kind=inherited_kind if kind is None or (inherited_kind is not None and inherited_kind < kind) else kind,
+        )
+        # A tag is pulled out as its own section unless an ancestor pulled before it contains it.
+        if kind is not None and self.show_answer and (inherited_kind is None or inherited_kind > kind):
+            element.section = _Section(kind, frozenset([name]) if name in _STRING_CONTAINERS else _TEXT_TYPES)
+            self.sections.append(element.section)
+            self.open_sections += 1
+
+        self.stack.append(element)
+        self.open_counts[name] = self.open_counts.get(name, 0) + 1
+        if name in _STRING_CONTAINERS:
+            self.containers.append(name)
+
+        if self.problem:
+            if self.show_answer and name == "choice" and attributes.get("correct") == "true":
+                self._add_string(CORRECT_ANSWER_MARKER, _PLAIN)
+        else:
+            self._collect_embedding(element, attributes)
+
+    def _pop(self):
+        """Close the innermost open tag."""
+        element = self.stack.pop()
+        self.open_counts[element.name] -= 1
+        if element.name in _STRING_CONTAINERS:
+            self.containers.pop()
+        if element.section is not None:
+            self.open_sections -= 1
+        if element.media is not None:
+            self.open_media.pop()
+        return element
+
+    def _add_string(self, text, string_type):
+        """Route a finished string to the main text and to the open sections that contain it."""
+        if text.isspace():
+            return
+        if string_type in _TEXT_TYPES and not (self.stack and self.stack[-1].removed):
+            self.strings.append(text)
+        if self.open_sections:
+            # Descendants pulled before a section (lower kind) are not part of its text.
+            lowest_kind = None
+            for element in reversed(self.stack):
+                section = element.section
+                if (
+                    section is not None
+                    and (lowest_kind is None or lowest_kind >= section.kind)
+                    and string_type in section.string_types
+                ):
+                    section.parts.append(text)
+                if element.min_kind is not None and (lowest_kind is None or element.min_kind < lowest_kind):
+                    lowest_kind = element.min_kind
+
+    # -- classification ---------------------------------------------------
+
+    @staticmethod
+    def _kind(name, attributes):
+        """Return the sensitivity kind of a problem tag, or None for regular content."""
+        kind = _TAG_KINDS.get(name)
+        if kind is not None:
+            return kind
+        for css_class in _NON_WHITESPACE.findall(attributes.get("class", "")):
+            class_kind = _CLASS_KINDS.get(css_class)
+            if class_kind is not None and (kind is None or class_kind < kind):
+                kind = class_kind
+        return kind
+
+    def _collect_embedding(self, element, attributes):
+        """Record the LLM-friendly description of an embedded iframe, object, image, media or XBlock."""
+        name = element.name
+        if name == "iframe":
+            src = attributes.get("src")
+            if src:
+                title = attributes.get("title", "").strip() or "iframe"
+                self.embeddings["iframe"].append(f'[Embedded iframe: title="{title}", src="{src}"]')
+        elif name == "object":
+            data = attributes.get("data")
+            if data:
+                mime = attributes.get("type", "")
+                title = attributes.get("title", "").strip() or "Object"
+                if "pdf" in mime.lower() or data.lower().endswith(".pdf"):
+                    self.embeddings["object"].append(f'[Embedded PDF: title="{title}", file="{data}"]')
+                else:
+                    self.embeddings["object"].append(
+                        f'[Embedded object: title="{title}", type="{mime}", file="{data}"]'
+                    )
+        elif name == "img":
+            src = attributes.get("src")
+            if src:
+                alt = attributes.get("alt", "").strip() or "image"
+                self.embeddings["img"].append(f'[Embedded image: alt="{alt}", src="{src}"]')
+        elif name in ("video", "audio"):
+            element.media = (name, attributes, [])
+            self.embeddings["media"].append(element.media)
+            self.open_media.append(element.media)
+        elif name == "source":
+            src = attributes.get("src")
+            if src:
+                for _, _, sources in self.open_media:
+                    sources.append(src)
+        elif name == "embed":
+            src = attributes.get("src")
+            if src:
+                self.embeddings["embed"].append(f'[Embedded content: tag=embed, src="{src}"]')
+        elif name == "div":
+            xblock_type = attributes.get("data-type")
+            block_id = attributes.get("data-block-id")
+            if xblock_type or block_id:
+                desc = "[Embedded XBlock"
+                if xblock_type:
+                    desc += f': type="{xblock_type}"'
+                if block_id:
+                    desc += f', id="{block_id}"'
+                self.embeddings["xblock"].append(desc + "]")
+
+    # -- output -----------------------------------------------------------
+
+    def text(self):
+        """Return the collected text, one stripped non-empty line per line."""
+        return "\n".join(
+            line.strip()
+            for line in "\n".join(self.strings).splitlines()
+            if line.strip()
+        )
+
+    def embedding_descriptions(self):
+        """Return embedded content descriptions grouped by type, in document order."""
+        descriptions = []
+        for kind, found in self.embeddings.items():
+            if kind != "media":
+                descriptions.extend(found)
+                continue
+            for name, attributes, sources in found:
+                direct_src = attributes.get("src")
+                if direct_src and direct_src not in sources:
+                    sources.append(direct_src)
+                if sources:
+                    title = attributes.get("title", "").strip() or name
+                    descriptions.append(f'[Embedded {name}: title="{title}", sources="{", ".join(sources)}"]')
+        return descriptions
+
+    def section_texts(self):
+        """Return the pulled problem sections, grouped by kind, in document order."""
+        rendered = (section.render() for section in sorted(self.sections, key=lambda section: section.kind))
+        return [section for section in rendered if section]
+
+
+def scan_html_text(raw_html: str) -> str:
+    """Return the clean text of HTML followed by descriptions of its embedded content."""
+    scanner = _HtmlTextScanner()
+    scanner.feed(raw_html)
+    scanner.close()
+    clean = scanner.text()
+    embeddings = scanner.embedding_descriptions()
+    if embeddings:
+        clean += "\n\n" + "\n".join(embeddings)
+    return clean.strip()
+
+
+def scan_problem_text(raw_html: str, show_answer: bool) -> str:
+    """Return the clean text of problem markup, with its solutions and hints appended or removed."""
+    scanner = _HtmlTextScanner(problem=True, show_answer=bool(show_answer))
+    scanner.feed(raw_html)
+    scanner.close()
+    base_text = scanner.text()
+    sections = scanner.section_texts()
+    if show_answer and sections:
+        base_text += "\n" + "\n".join(sections)
+    return base_text
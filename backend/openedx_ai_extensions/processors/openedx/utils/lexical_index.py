@@ -0,0 +1,248 @@
+"""
+BM25 passage retrieval over the unit content index.
+
+The ``relevant`` retrieval mode sends the LLM only the passages of the course
+that best match the learner's question. Unit content from UnitContentIndex is
+cut into passages of a fixed number of words, and a per-course inverted index
+maps each term to the passages containing it, so scoring a query only visits
+the postings of its terms.
+
+Only units indexed at the current published course version are searched.
+Course indexes are kept per process and refreshed when the content index
+changes: only units whose content hash changed since the last build are
+tokenized again.
+"""
+import heapq
+import logging
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from math import log
+
+from django.conf import settings
+
+from openedx_ai_extensions.processors.openedx.utils import content_index
+from openedx_ai_extensions.processors.openedx.utils.text_utils import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICAL_RETRIEVAL_SETTINGS = {
+    "top_k": 8,
+    "token_budget": 2000,
+    "passage_words": 120,
+    "k1": 1.2,
+    "b": 0.75,
+    "local_max_courses": 16,
+}
+
+# Block fields whose text is indexed, in order of preference.
+TEXT_FIELDS = ("text", "transcript_text", "transcript_digest")
+
+_TERM = re.compile(r"\w{2,}")
+_ID_CHUNK = 500
+
+_local_lock = threading.Lock()
+_local = OrderedDict()
+
+
+def get_lexical_retrieval_settings():
+    """Return retrieval settings with AI_EXTENSIONS_LEXICAL_RETRIEVAL applied over the defaults."""
+    return {
+        **DEFAULT_LEXICAL_RETRIEVAL_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_LEXICAL_RETRIEVAL", {}) or {}),
+    }
+
+
+def clear_local_indexes():
+    """Drop the per-process course indexes (used by tests)."""
+    with _local_lock:
+        _local.clear()
+
+
+def tokenize(text):
+    """Return the lower-cased index terms of ``text``, without stopwords."""
+    return [term for term in _TERM.findall(text.lower()) if term not in STOPWORDS]
+
+
+def unit_passages(unit_content, passage_words):
+    """Return [(passage, term counts)] for the blocks of a serialized unit."""
+    passages = []
+    for block in unit_content.get("blocks", []):
+        text = next((block[field] for field in TEXT_FIELDS if isinstance(block.get(field), str)), "")
+        words = text.split()
+        for start in range(0, len(words), passage_words):
+            passage_text = " ".join(words[start:start + passage_words])
+            passages.append((
+                {
+                    "unit_id": unit_content.get("unit_id"),
+                    "unit_display_name": unit_content.get("display_name"),
+                    "block_title": block.get("title"),
+                    "type": block.get("type"),
+                    "text": passage_text,
+                },
+                Counter(tokenize(passage_text)),
+            ))
+    return passages
+
+
+class CourseLexicalIndex:
+    """
+    Inverted BM25 index of the passages of one course.
+
+    ``units`` maps unit_id to (content_hash, passages) and is kept so the next
+    build can reuse the passages of unchanged units. Postings hold raw term
+    frequencies: building is a single pass over the passages, and the BM25
+    weights are computed at query time for the query terms only.
+    """
+
+    def __init__(self, signature, units, k1, b):
+        """
+        Index the passages of ``units``.
+
+        ``signature`` is (course_version, rows), with rows the (unit_id,
+        content_hash) pairs of the course in index order.
+        """
+        self.signature = signature
+        self.units = units
+        self.k1 = k1
+        self.passages = []
+        self.passage_units = []
+        self.postings = defaultdict(list)
+        lengths = []
+        for unit_id, _ in signature[1]:
+            for passage, terms in units[unit_id][1]:
+                passage_id = len(self.passages)
+                self.passages.append(passage)
+                self.passage_units.append(unit_id)
+                lengths.append(sum(terms.values()))
+                for term, frequency in terms.items():
+                    self.postings[term].append((passage_id, frequency))
+
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        self.norms = [
+            k1 * (1 - b + b * length / average_length) if average_length else k1 for length in lengths
+        ]
+
+    def search(self, query, top_k, token_budget, unit_ids=None):
+        """
+        Return the best passages for ``query``, best first, within about ``token_budget`` tokens.
+
+        With ``unit_ids``, only passages of those units are candidates; the
+        other passages are never scored.
+        """
+        count = len(self.passages)
+        norms = self.norms
+        passage_units = self.passage_units
+        scale = self.k1 + 1
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, frequency in postings:
+                if unit_ids is not None and passage_units[passage_id] not in unit_ids:
+                    continue
+                scores[passage_id] += idf * frequency * scale / (frequency + norms[passage_id])
+
+        results = []
+        used = 0
+        for passage_id, _ in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            passage = self.passages[passage_id]
+            tokens = len(passage["text"]) // 4
+            if used + tokens <= token_budget:
+                results.append(passage)
+                used += tokens
+        return results
+
+
+def _load_contents(unit_ids):
+    """Return {unit_id: content} for indexed units, in chunks that fit any database's parameter limit."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import UnitContentIndex
+
+    contents = {}
+    for start in range(0, len(unit_ids), _ID_CHUNK):
+        rows = UnitContentIndex.objects.filter(unit_id__in=unit_ids[start:start + _ID_CHUNK])
+        contents.update((str(unit_id), content) for unit_id, content in rows.values_list("unit_id", "content"))
+    return contents
+
+
+def get_course_index(course_key):
+    """
+    Return the lexical index of a course, or None if it has no current indexed content.
+
+    Only rows stamped with the published course version are indexed, so right
+    after a publish, until an index run has gone through the whole course,
+    there is no index. The unit content hashes are checked on every call (a
+    single query); when they changed, the index is rebuilt reusing the
+    passages of unchanged units.
+    """
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import UnitContentIndex
+
+    course_version = content_index.published_course_version(course_key)
+    if course_version is None:
+        return None
+    rows = tuple(
+        (str(unit_id), content_hash)
+        for unit_id, content_hash in UnitContentIndex.objects.filter(
+            course_id=course_key, course_version=course_version
+        )
+        .order_by("sequence_id", "position")
+        .values_list("unit_id", "content_hash")
+    )
+    if not rows:
+        return None
+    signature = (course_version, rows)
+
+    key = str(course_key)
+    with _local_lock:
+        index = _local.get(key)
+        if index is not None:
+            _local.move_to_end(key)
+    if index is not None and index.signature == signature:
+        return index
+
+    retrieval_settings = get_lexical_retrieval_settings()
+    previous = index.units if index is not None else {}
+    units = {unit_id: previous[unit_id] for unit_id, content_hash in rows
+             if unit_id in previous and previous[unit_id][0] == content_hash}
+    changed = [unit_id for unit_id, _ in rows if unit_id not in units]
+    contents = _load_contents(changed)
+    hashes = dict(rows)
+    passage_words = retrieval_settings["passage_words"]
+    for unit_id in changed:
+        units[unit_id] = (hashes[unit_id], unit_passages(contents.get(unit_id, {}), passage_words))
+    logger.debug(f"Lexical index of {course_key}: {len(changed)} of {len(rows)} units tokenized")
+
+    index = CourseLexicalIndex(signature, units, retrieval_settings["k1"], retrieval_settings["b"])
+    with _local_lock:
+        _local[key] = index
+        _local.move_to_end(key)
+        while len(_local) > retrieval_settings["local_max_courses"]:
+            _local.popitem(last=False)
+    return index
+
+
+def search_course(course_key, query, top_k=None, token_budget=None, unit_ids=None):
+    """
+    Return the passages of a course most relevant to ``query``, or None if the course isn't indexed.
+
+    The index covers every unit of the course; pass the ids of the units the
+    user may see as ``unit_ids`` so hidden content is never returned.
+    """
+    try:
+        index = get_course_index(course_key)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Lexical index unavailable for {course_key}: {exc}")
+        return None
+    if index is None:
+        return None
+    retrieval_settings = get_lexical_retrieval_settings()
+    return index.search(
+        query,
+        retrieval_settings["top_k"] if top_k is None else top_k,
+        retrieval_settings["token_budget"] if token_budget is None else token_budget,
+        unit_ids=unit_ids,
+    )
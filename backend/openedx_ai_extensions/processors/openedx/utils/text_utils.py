@@ -0,0 +1,15 @@
+"""
+Text helpers shared by the course content summarizers and retrievers.
+"""
+
+# Common English words, and the filler words of spoken transcripts, that say
+# little about what a text is about.
+STOPWORDS = frozenset(
+    "about above after again all also and any are because been before being below between both but can "
+    "could did does doing down during each few for from further had has have having her here hers him his "
+    "how into its itself just let like more most much not now off once only other our ours out over own "
+    "really right same she should some such than that the their theirs them then there these they this "
+    "those through too under until very was way were what when where which while who whom why will with "
+    "would yeah you your yours okay going gonna want know see get got thing things"
+    .split()
+)
@@ -0,0 +1,247 @@
+"""
+Condensed video transcripts for the ``digest`` transcript mode.
+
+Full transcripts are usually the largest part of get_location_content output.
+A digest keeps the most representative sentences of a transcript (extractive
+summarization by word frequency) within a character budget, in their original
+order. Digests are computed by a Celery task shortly after a course is
+published and stored in TranscriptDigest, one row per video and language,
+tagged with the edxval ``modified`` timestamp of the transcript they were
+computed from. At request time a missing or outdated digest is computed on the
+spot from the (cached) clean transcript and stored.
+"""
+import logging
+import re
+from collections import Counter
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.processors.openedx.utils.text_utils import STOPWORDS
+from openedx_ai_extensions.processors.openedx.utils.transcripts import (
+    _transcript_versions,
+    load_transcripts,
+    transcript_language,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:transcript_digest"
+
+# Stored with every digest; bump the version whenever summarize_transcript
+# output changes, so stored digests are recomputed.
+DIGEST_METHOD = "extractive:1"
+
+DEFAULT_TRANSCRIPT_DIGEST_SETTINGS = {
+    "max_chars": 1500,
+    "min_chars": 400,
+    "ratio": 0.25,
+    "publish_delay": 60,
+    "io_workers": 4,
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[^\W\d_]{3,}")
+# Auto-generated captions often have no punctuation: long "sentences" are cut
+# into windows of this many words.
+_WINDOW_WORDS = 40
+
+
+def get_transcript_digest_settings():
+    """Return digest settings with AI_EXTENSIONS_TRANSCRIPT_DIGEST applied over the defaults."""
+    return {
+        **DEFAULT_TRANSCRIPT_DIGEST_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_TRANSCRIPT_DIGEST", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS", False))
+
+
+# -----------------------------
+# Summarization
+# -----------------------------
+
+
+def _split_sentences(text):
+    """Split a transcript into sentences, cutting unpunctuated runs into fixed word windows."""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), _WINDOW_WORDS):
+            sentences.append(" ".join(words[start:start + _WINDOW_WORDS]))
+    return sentences
+
+
+def summarize_transcript(text, max_chars=None, ratio=None, min_chars=None):
+    """
+    Return an extractive digest of a clean transcript.
+
+    The digest is ``ratio`` of the transcript, but at least ``min_chars`` and
+    at most ``max_chars`` (all default to AI_EXTENSIONS_TRANSCRIPT_DIGEST), so
+    short transcripts are kept whole. Sentences are scored by the frequency of
+    their content words across the transcript and the best ones are kept in
+    their original order.
+    """
+    digest_settings = get_transcript_digest_settings()
+    max_chars = digest_settings["max_chars"] if max_chars is None else max_chars
+    ratio = digest_settings["ratio"] if ratio is None else ratio
+    min_chars = digest_settings["min_chars"] if min_chars is None else min_chars
+
+    text = (text or "").strip()
+    budget = min(max_chars, max(int(len(text) * ratio), min_chars, 1))
+    if len(text) <= budget:
+        return text
+
+    sentences = _split_sentences(text)
+    sentence_words = [[word.lower() for word in _WORD.findall(sentence)] for sentence in sentences]
+    frequencies = Counter(
+        word for words in sentence_words for word in words if word not in STOPWORDS
+    )
+
+    def score(index):
+        words = [word for word in sentence_words[index] if word not in STOPWORDS]
+        return sum(frequencies[word] for word in set(words)) / (len(sentence_words[index]) + 1)
+
+    chosen = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=score, reverse=True):
+        length = len(sentences[index]) + (1 if chosen else 0)
+        if used + length <= budget:
+            chosen.append(index)
+            used += length
+
+    if not chosen:
+        # Not even the best sentence fits: keep its beginning.
+        best = sentences[max(range(len(sentences)), key=score)]
+        return best[:budget].rsplit(" ", 1)[0] + "…"
+    return " ".join(sentences[index] for index in sorted(chosen))
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+
+
+def _store_digests(digests, versions):
+    """Create or update TranscriptDigest rows for {(video_id, language_code): (digest, source_chars)}."""
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import TranscriptDigest
+
+    for (video_id, language_code), (digest, source_chars) in digests.items():
+        try:
+            TranscriptDigest.objects.update_or_create(
+                edx_video_id=video_id,
+                language_code=language_code,
+                defaults={
+                    "transcript_modified": versions[(video_id, language_code)],
+                    "method": DIGEST_METHOD,
+                    "digest": digest,
+                    "source_chars": source_chars,
+                },
+            )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Could not store transcript digest of video {video_id}: {exc}")
+
+
+def load_transcript_digests(blocks, max_workers=1):
+    """
+    Return {str(block.location): transcript digest or None} for video blocks.
+
+    Stored digests are used when they were computed from the current transcript
+    version; the others are computed from the clean transcript and stored.
+    """
+    # pylint: disable=import-outside-toplevel
+    from openedx_ai_extensions.models import TranscriptDigest
+
+    results = {}
+    wanted = {}
+    for block in blocks:
+        language_code = transcript_language(block)
+        video_id = getattr(block, "edx_video_id", None)
+        if language_code and video_id:
+            wanted[str(block.location)] = (video_id, language_code)
+        else:
+            results[str(block.location)] = None
+    if not wanted:
+        return results
+
+    video_ids = sorted({video_id for video_id, _ in wanted.values()})
+    versions = _transcript_versions(video_ids)
+    digests = {
+        (row.edx_video_id, row.language_code): row.digest
+        for row in TranscriptDigest.objects.filter(edx_video_id__in=video_ids)
+        if row.method == DIGEST_METHOD
+        and versions.get((row.edx_video_id, row.language_code)) == row.transcript_modified
+    }
+
+    missing = {}
+    for block in blocks:
+        pair = wanted.get(str(block.location))
+        if pair and pair not in digests:
+            missing.setdefault(pair, block)
+    if missing:
+        texts = load_transcripts(list(missing.values()), max_workers=max_workers)
+        computed = {}
+        for pair, block in missing.items():
+            text = texts.get(str(block.location))
+            if text:
+                computed[pair] = (summarize_transcript(text), len(text))
+        _store_digests({pair: value for pair, value in computed.items() if pair in versions}, versions)
+        digests.update({pair: digest for pair, (digest, _) in computed.items()})
+
+    for location, pair in wanted.items():
+        results[location] = digests.get(pair)
+    return results
+
+
+# -----------------------------
+# Offline computation
+# -----------------------------
+
+
+def compute_course_digests(course_key):
+    """Compute the missing or outdated digests of every published video of a course; return how many videos."""
+    # pylint: disable=import-error,import-outside-toplevel
+    from xmodule.modulestore import ModuleStoreEnum
+    from xmodule.modulestore.django import modulestore
+
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        videos = store.get_items(course_key, qualifiers={"category": "video"})
+    load_transcript_digests(videos, max_workers=get_transcript_digest_settings()["io_workers"])
+    return len(videos)
+
+
+@shared_task(
+    name="openedx_ai_extensions.processors.compute_transcript_digests",
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def compute_transcript_digests_task(course_id):
+    """Compute the transcript digests of a published course."""
+    course_key = CourseKey.from_string(course_id)
+    count = compute_course_digests(course_key)
+    logger.info(f"Transcript digests are up to date for {count} videos of {course_key}")
+    return count
+
+
+def schedule_course_digests(course_key):
+    """
+    Schedule compute_transcript_digests_task after a course is published.
+
+    Publishing a course emits one signal per published block, so runs are
+    debounced: at most one task per course is queued within publish_delay.
+    """
+    delay = get_transcript_digest_settings()["publish_delay"]
+    try:
+        if not cache.add(f"{CACHE_KEY_PREFIX}:scheduled:{course_key}", True, delay):
+            return False
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Transcript digest debounce unavailable: {exc}")
+    compute_transcript_digests_task.apply_async(args=[str(course_key)], countdown=delay)
+    return True
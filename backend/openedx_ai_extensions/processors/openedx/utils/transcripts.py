@@ -0,0 +1,259 @@
+"""
+Batched loading of video transcripts as clean text.
+
+Transcripts live in edxval as SJSON (or SRT/VTT) files. They are normalized to
+plain text once and cached per (edx_video_id, language) under a key that
+includes the transcript's ``modified`` timestamp, so an updated transcript is
+picked up without explicit invalidation. All videos of a sequence are resolved
+together: one edxval query returns the transcript versions, one cache round
+trip returns the texts already cleaned, and only the misses are downloaded
+(concurrently, when allowed).
+"""
+import hashlib
+import io
+import json
+import logging
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:transcript"
+
+# Bump whenever clean_transcript output changes, so cached texts are recomputed.
+CLEANER_VERSION = 1
+
+DEFAULT_TRANSCRIPT_CACHE_SETTINGS = {
+    "timeout": 7 * 24 * 3600,
+}
+
+_CUE_TIMING = "-->"
+_INLINE_MARKUP = re.compile(r"<[^>]*>|\{\\[^}]*\}")
+_WHITESPACE = re.compile(r"\s+")
+
+_prefetched = ContextVar("openedx_ai_extensions_prefetched_transcripts", default=None)
+
+
+def get_transcript_cache_settings():
+    """Return cache settings with AI_EXTENSIONS_TRANSCRIPT_CACHE applied over the defaults."""
+    return {
+        **DEFAULT_TRANSCRIPT_CACHE_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_TRANSCRIPT_CACHE", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE", True))
+
+
+# -----------------------------
+# Cleaning
+# -----------------------------
+
+
+def _iter_sjson_captions(data):
+    """Yield the captions of a parsed SJSON transcript."""
+    captions = data.get("text", [])
+    if isinstance(captions, str):
+        captions = [captions]
+    for caption in captions:
+        if isinstance(caption, str):
+            yield caption
+
+
+def _iter_subtitle_captions(content):
+    """Yield caption lines of an SRT/VTT (or plain text) transcript, one line at a time."""
+    at_cue_start = True
+    for line in io.StringIO(content):
+        line = line.strip()
+        if not line:
+            at_cue_start = True
+            continue
+        if line == "WEBVTT" or (at_cue_start and line.isdigit()):
+            continue
+        at_cue_start = False  # only a cue's first line can be its number
+        if _CUE_TIMING not in line:
+            yield line
+
+
+def clean_transcript(content):
+    r"""
+    Return a transcript as plain text: captions joined into one paragraph.
+
+    Accepts SJSON, SRT, VTT or plain text, as str or bytes. Cue numbers,
+    timings and inline markup (``<i>``, ``{\an8}``) are dropped, as are
+    consecutive duplicate captions left by rolling subtitles.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    content = content.lstrip("\ufeff")
+
+    captions = None
+    if content.lstrip().startswith("{"):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            captions = _iter_sjson_captions(data)
+    if captions is None:
+        captions = _iter_subtitle_captions(content)
+
+    parts = []
+    for caption in captions:
+        caption = _WHITESPACE.sub(" ", _INLINE_MARKUP.sub("", caption)).strip()
+        if caption and (not parts or parts[-1] != caption):
+            parts.append(caption)
+    return " ".join(parts)
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+
+
+def transcript_language(block):
+    """Return the transcript language to use for a video block: English if available, else the first one."""
+    transcripts = getattr(block, "transcripts", {}) or {}
+    if not transcripts:
+        return None
+    return "en" if "en" in transcripts else next(iter(transcripts.keys()))
+
+
+def _transcript_versions(video_ids):
+    """Return {(edx_video_id, language_code): modified} for the videos, from a single edxval query."""
+    try:
+        # pylint: disable=import-error,import-outside-toplevel
+        from edxval.models import VideoTranscript
+
+        rows = VideoTranscript.objects.filter(video__edx_video_id__in=video_ids).values_list(
+            "video__edx_video_id", "language_code", "modified"
+        )
+        return {(video_id, language_code): modified for video_id, language_code, modified in rows}
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.debug(f"Transcript versions unavailable, transcripts will not be cached: {exc}")
+        return {}
+
+
+def transcript_cache_key(video_id, language_code, modified):
+    """Return the cache key of a cleaned transcript version."""
+    parts = [str(video_id), str(language_code), modified.isoformat(), str(CLEANER_VERSION)]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def _cache_get_many(keys):
+    """Return {key: text} for the cached transcripts among ``keys``, ignoring backend failures."""
+    try:
+        payloads = cache.get_many(keys)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Transcript cache unavailable: {exc}")
+        return {}
+    texts = {}
+    for key, payload in payloads.items():
+        try:
+            texts[key] = zlib.decompress(payload).decode("utf-8")
+        except (zlib.error, TypeError, UnicodeDecodeError) as exc:
+            logger.warning(f"Discarding unreadable transcript cache entry {key}: {exc}")
+    return texts
+
+
+def _cache_set_many(texts):
+    """Store {key: text} in the cache, ignoring backend failures."""
+    if not texts:
+        return
+    payloads = {key: zlib.compress(text.encode("utf-8")) for key, text in texts.items()}
+    try:
+        cache.set_many(payloads, get_transcript_cache_settings()["timeout"])
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Transcript cache unavailable: {exc}")
+
+
+def _fetch_transcript(video_id, language_code):
+    """Download a transcript from edxval and return it cleaned, or None if it can't be loaded."""
+    try:
+        # pylint: disable=import-error,import-outside-toplevel
+        from edxval.api import get_video_transcript_data
+
+        transcript = get_video_transcript_data(video_id=video_id, language_code=language_code)
+        return clean_transcript(transcript["content"])
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not load {language_code} transcript of video {video_id}: {exc}")
+        return None
+
+
+def _fetch_in_thread(video_id, language_code):
+    """Fetch a transcript in a pool thread, closing the DB connections the thread opened."""
+    try:
+        return _fetch_transcript(video_id, language_code)
+    finally:
+        connections.close_all()
+
+
+def _fetch_all(pairs, max_workers):
+    """Return {(video_id, language_code): text} for ``pairs``, fetching up to ``max_workers`` at a time."""
+    workers = min(max_workers, len(pairs))
+    if workers <= 1:
+        return {pair: _fetch_transcript(*pair) for pair in pairs}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-transcripts") as executor:
+        futures = {pair: executor.submit(_fetch_in_thread, *pair) for pair in pairs}
+        return {pair: future.result() for pair, future in futures.items()}
+
+
+def load_transcripts(blocks, max_workers=1):
+    """
+    Return {str(block.location): transcript text or None} for video blocks.
+
+    Texts come from the active prefetched_transcripts() mapping, then from the
+    cache, and are only downloaded from edxval when missing or outdated.
+    """
+    prefetched = _prefetched.get() or {}
+    results = {}
+    wanted = {}
+    for block in blocks:
+        location = str(block.location)
+        if location in prefetched:
+            results[location] = prefetched[location]
+            continue
+        language_code = transcript_language(block)
+        video_id = getattr(block, "edx_video_id", None)
+        if not language_code or not video_id:
+            results[location] = None
+            continue
+        wanted[location] = (video_id, language_code)
+    if not wanted:
+        return results
+
+    pairs = sorted(set(wanted.values()))
+    keys = {}
+    if is_enabled():
+        versions = _transcript_versions(sorted({video_id for video_id, _ in pairs}))
+        keys = {pair: transcript_cache_key(*pair, versions[pair]) for pair in pairs if pair in versions}
+    cached = _cache_get_many(list(keys.values())) if keys else {}
+    texts = {pair: cached[keys[pair]] for pair in pairs if keys.get(pair) in cached}
+
+    fetched = _fetch_all([pair for pair in pairs if pair not in texts], max_workers)
+    _cache_set_many({keys[pair]: text for pair, text in fetched.items() if text is not None and pair in keys})
+    texts.update(fetched)
+
+    for location, pair in wanted.items():
+        results[location] = texts.get(pair)
+    return results
+
+
+@contextmanager
+def prefetched_transcripts(transcripts):
+    """Serve load_transcripts() from ``transcripts`` ({location: text}) within the block."""
+    token = _prefetched.set(transcripts)
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
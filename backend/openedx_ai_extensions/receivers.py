@@ -7,8 +7,19 @@ import logging
 
 from django.contrib.auth import get_user_model
 from django.dispatch import receiver
+from openedx_events.content_authoring.signals import (
+    COURSE_CATALOG_INFO_CHANGED,
+    COURSE_IMPORT_COMPLETED,
+    XBLOCK_PUBLISHED,
+)
 
 from openedx_ai_extensions.events.signals import AI_ORCHESTRATION_REQUESTED
+from openedx_ai_extensions.processors.openedx.utils import (
+    content_index,
+    content_indexing,
+    course_cache,
+    transcript_digests,
+)
 from openedx_ai_extensions.workflows.models import AIWorkflowScope
 
 log = logging.getLogger(__name__)
@@ -53,3 +64,34 @@ def handle_ai_orchestration_requested(_sender, ai_orchestration_request, **kwarg
     except Exception:
         log.exception("Error running orchestrator for workflow")
         raise
+
+
+def _schedule_course_published_tasks(course_key):
+    """Drop the cached course results and queue the stages that refresh derived content after a publish."""
+    course_cache.invalidate_course(course_key)
+    if content_index.is_enabled():
+        content_indexing.schedule_course_index(course_key)
+    if transcript_digests.is_enabled():
+        transcript_digests.schedule_course_digests(course_key)
+
+
+@receiver(XBLOCK_PUBLISHED)
+def handle_xblock_published(xblock_info, **kwargs):  # pylint: disable=unused-argument
+    """
+    Refresh the course's cached results, content index and video transcript digests after a publish.
+
+    Runs are debounced per course, since a course publish emits one signal per block.
+    """
+    _schedule_course_published_tasks(xblock_info.usage_key.course_key)
+
+
+@receiver(COURSE_IMPORT_COMPLETED)
+def handle_course_import_completed(course, **kwargs):  # pylint: disable=unused-argument
+    """Index the content and compute the video transcript digests of an imported course."""
+    _schedule_course_published_tasks(course.course_key)
+
+
+@receiver(COURSE_CATALOG_INFO_CHANGED)
+def handle_course_catalog_info_changed(catalog_info, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached course info and outline when the course details change in Studio."""
+    course_cache.invalidate_course(catalog_info.course_key)
@@ -35,7 +35,7 @@ DEFAULT_FIELD_FILTERS = {
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-def plugin_settings(settings):
+def plugin_settings(settings):  # pylint: disable=too-many-statements
     """
     Add plugin settings to main settings object.
 
@@ -75,6 +75,132 @@ def plugin_settings(settings):
     # This prevents context window from growing too large while maintaining conversation continuity
     if not hasattr(settings, "AI_EXTENSIONS_MAX_CONTEXT_MESSAGES"):
         settings.AI_EXTENSIONS_MAX_CONTEXT_MESSAGES = 3
+    # Optional token budget of the history window. When set (or with
+    # "max_context_tokens" in the SubmissionProcessor config), the history
+    # sent to the LLM is the newest messages that fit in the budget, using the
+    # token count stored with each message when it was saved. None keeps the
+    # whole history (bounded by the conversation memory).
+    if not hasattr(settings, "AI_EXTENSIONS_MAX_CONTEXT_TOKENS"):
+        settings.AI_EXTENSIONS_MAX_CONTEXT_TOKENS = None
+
+    # -------------------------
+    # Session resolver
+    # -------------------------
+    # Seconds the id of a workflow session stays cached under its (user,
+    # scope, profile, course, location) lookup, so orchestrator requests such
+    # as status polls read the session by primary key. 0 disables the cache.
+    if not hasattr(settings, "AI_EXTENSIONS_SESSION_ID_CACHE_TIMEOUT"):
+        settings.AI_EXTENSIONS_SESSION_ID_CACHE_TIMEOUT = 300
+
+    # -------------------------
+    # Session lease
+    # -------------------------
+    # Run the chat turns of a session one at a time. A turn sent while another
+    # one of the same session is running (double submit, two open tabs) waits
+    # up to wait_s seconds for it, then is rejected with a 409. The lease is
+    # held in the Django cache and expires after ttl_s seconds, so a worker
+    # that died mid-turn doesn't block the session.
+    #
+    # Any key omitted from AI_EXTENSIONS_SESSION_LEASE keeps its default:
+    #   AI_EXTENSIONS_SESSION_LEASE = {
+    #       "wait_s": 15,  # 0 rejects overlapping turns right away
+    #       "ttl_s": 300,
+    #       "poll_interval_s": 0.25,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_SESSION_LEASE"):
+        settings.AI_EXTENSIONS_ENABLE_SESSION_LEASE = True
+    if not hasattr(settings, "AI_EXTENSIONS_SESSION_LEASE"):
+        settings.AI_EXTENSIONS_SESSION_LEASE = {}
+
+    # -------------------------
+    # Chat history tail
+    # -------------------------
+    # Keep the last messages of each chat session in the Django cache, appended
+    # as turns are saved, so reading the recent history doesn't load and decode
+    # every submission of the conversation. The tail holds the last size
+    # messages (at least max_context_messages) for timeout seconds and is
+    # rebuilt from the submissions when it is missing or out of date. The LLM
+    # history is read from the tail when AI_EXTENSIONS_MAX_CONTEXT_TOKENS fills
+    # up within its last size messages; without a token budget, or with one
+    # the tail can't hold, it needs every submission.
+    #
+    # Any key omitted from AI_EXTENSIONS_HISTORY_TAIL keeps its default:
+    #   AI_EXTENSIONS_HISTORY_TAIL = {
+    #       "size": 50,
+    #       "timeout": 86400,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_HISTORY_TAIL"):
+        settings.AI_EXTENSIONS_ENABLE_HISTORY_TAIL = True
+    if not hasattr(settings, "AI_EXTENSIONS_HISTORY_TAIL"):
+        settings.AI_EXTENSIONS_HISTORY_TAIL = {}
+
+    # -------------------------
+    # Chat history content blobs
+    # -------------------------
+    # Store system messages of at least min_chars characters (the system prompt
+    # and course context saved with the first turn of a session) once, in the
+    # ContentBlob table keyed by their SHA-256, and keep only a reference in the
+    # submission. References are resolved when a full history with system
+    # messages is read, e.g. to rebuild a lost server-side thread.
+    #
+    # Any key omitted from AI_EXTENSIONS_CONTENT_BLOBS keeps its default:
+    #   AI_EXTENSIONS_CONTENT_BLOBS = {
+    #       "min_chars": 2048,
+    #       "compress_level": 6,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CONTENT_BLOBS"):
+        settings.AI_EXTENSIONS_ENABLE_CONTENT_BLOBS = True
+    if not hasattr(settings, "AI_EXTENSIONS_CONTENT_BLOBS"):
+        settings.AI_EXTENSIONS_CONTENT_BLOBS = {}
+
+    # -------------------------
+    # Stored chat turns and session metadata
+    # -------------------------
+    # Chat turns saved as submissions, and large session metadata values
+    # (flashcard decks, question slot histories), are serialized with orjson
+    # when it is installed. Values of at least min_bytes of JSON are stored
+    # compressed in a versioned envelope ("aix1:<compression>:<base64>");
+    # smaller ones stay plain JSON. compression is "zlib" or "zstd", which
+    # needs the zstandard package on every worker.
+    #
+    # Any key omitted from AI_EXTENSIONS_CODEC keeps its default:
+    #   AI_EXTENSIONS_CODEC = {
+    #       "compression": "zlib",
+    #       "min_bytes": 4096,
+    #       "level": 6,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CODEC_COMPRESSION"):
+        settings.AI_EXTENSIONS_ENABLE_CODEC_COMPRESSION = True
+    if not hasattr(settings, "AI_EXTENSIONS_CODEC"):
+        settings.AI_EXTENSIONS_CODEC = {}
+
+    # -------------------------
+    # Conversation memory
+    # -------------------------
+    # Once the chat history sent to the LLM exceeds threshold_tokens, keep the
+    # recent turns (about recent_tokens, at least min_recent_messages) and
+    # replace the older ones with a rolling summary of the session, updated
+    # by a Celery task. Messages the summary doesn't cover yet are sent
+    # verbatim unless the prompt would exceed max_tokens.
+    #
+    # Off by default. Each summary update is an extra, billable call to the
+    # profile's LLM, made in the background on top of the learner's own
+    # turns: a long conversation pays for one summarization each time the
+    # uncovered history grows past threshold_tokens. Turn it on when shorter
+    # prompts save more than the summaries cost.
+    #
+    # Any key omitted from AI_EXTENSIONS_CONVERSATION_MEMORY keeps its default:
+    #   AI_EXTENSIONS_CONVERSATION_MEMORY = {
+    #       "threshold_tokens": 6000,
+    #       "recent_tokens": 3000,
+    #       "max_tokens": 12000,
+    #       "min_recent_messages": 4,
+    #       "lock_timeout": 300,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY"):
+        settings.AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY = False
+    if not hasattr(settings, "AI_EXTENSIONS_CONVERSATION_MEMORY"):
+        settings.AI_EXTENSIONS_CONVERSATION_MEMORY = {}
 
     # -------------------------
     # Caching
@@ -99,6 +225,245 @@ def plugin_settings(settings):
     if not hasattr(settings, "AI_EXTENSIONS_LLM_CACHE"):
         settings.AI_EXTENSIONS_LLM_CACHE = {}
 
+    # -------------------------
+    # Provider HTTP connection pool
+    # -------------------------
+    # Keep one persistent httpx client per AI_EXTENSIONS profile (model,
+    # api_base, api_key) and worker process, so LiteLLM calls reuse keep-alive
+    # connections instead of opening a new TLS session per request. HTTP/2 is
+    # used when the optional ``h2`` package is installed.
+    #
+    # Any key omitted from AI_EXTENSIONS_HTTP_POOL keeps its default:
+    #   AI_EXTENSIONS_HTTP_POOL = {
+    #       "max_connections": 20,
+    #       "max_keepalive_connections": 10,
+    #       "keepalive_expiry": 60.0,  # seconds an idle connection is kept
+    #       "connect_timeout": 10.0,
+    #       "read_timeout": 600.0,
+    #       "write_timeout": 600.0,
+    #       "pool_timeout": 10.0,  # wait for a free connection
+    #       "http2": True,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_HTTP_POOL"):
+        settings.AI_EXTENSIONS_ENABLE_HTTP_POOL = False
+    if not hasattr(settings, "AI_EXTENSIONS_HTTP_POOL"):
+        settings.AI_EXTENSIONS_HTTP_POOL = {}
+
+    # -------------------------
+    # Provider circuit breaker
+    # -------------------------
+    # Fail fast (503) instead of waiting for timeouts while a provider profile
+    # is down. State is shared between workers through the Django cache.
+    # Processors with "stale_fallback": true serve the last response to an
+    # identical non-streaming request while the provider is unavailable.
+    #
+    # Any key omitted from AI_EXTENSIONS_CIRCUIT_BREAKER keeps its default:
+    #   AI_EXTENSIONS_CIRCUIT_BREAKER = {
+    #       "failure_threshold": 5,  # outage errors within the window to open
+    #       "failure_window_s": 60,
+    #       "open_seconds": 30,  # fail fast for this long, then probe once
+    #       "probe_timeout_s": 30,
+    #       "stale_ttl_s": 86400,  # how long fallback responses are kept
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER"):
+        settings.AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER = False
+    if not hasattr(settings, "AI_EXTENSIONS_CIRCUIT_BREAKER"):
+        settings.AI_EXTENSIONS_CIRCUIT_BREAKER = {}
+
+    # -------------------------
+    # Provider rate limiter
+    # -------------------------
+    # Cap requests and tokens per minute sent to each AI_EXTENSIONS profile,
+    # shared between workers through the Django cache. Celery tasks run in a
+    # "bulk" lane limited to bulk_share of each limit, so interactive requests
+    # always have quota left; bulk calls wait with jittered backoff and the
+    # task is retried later when the quota stays exhausted.
+    #
+    # Any key omitted from AI_EXTENSIONS_RATE_LIMITER keeps its default:
+    #   AI_EXTENSIONS_RATE_LIMITER = {
+    #       "limits": {
+    #           "default": {"requests_per_minute": 50, "tokens_per_minute": 40000},
+    #       },
+    #       "bulk_share": 0.7,
+    #       "interactive_max_wait_s": 0,  # interactive calls get a 429 right away
+    #       "bulk_max_wait_s": 30,
+    #       "backoff_base_s": 0.5,
+    #       "backoff_max_s": 8,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_RATE_LIMITER"):
+        settings.AI_EXTENSIONS_ENABLE_RATE_LIMITER = False
+    if not hasattr(settings, "AI_EXTENSIONS_RATE_LIMITER"):
+        settings.AI_EXTENSIONS_RATE_LIMITER = {}
+
+    # -------------------------
+    # Map-reduce summaries
+    # -------------------------
+    # LLMProcessor profiles running summarize_content with "summary_mode":
+    # "map_reduce" (or "auto", once the context exceeds auto_threshold_tokens)
+    # summarize each unit of a multi-unit context separately, max_workers at a
+    # time, then summarize the unit summaries. Unit summaries are cached for
+    # cache_timeout seconds by unit content, prompt and model, so only the
+    # units changed by a republish are summarized again.
+    #
+    # Any key omitted from AI_EXTENSIONS_MAP_REDUCE_SUMMARY keeps its default:
+    #   AI_EXTENSIONS_MAP_REDUCE_SUMMARY = {
+    #       "max_workers": 4,
+    #       "auto_threshold_tokens": 12000,
+    #       "cache_timeout": 2592000,  # 30 days
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_MAP_REDUCE_SUMMARY"):
+        settings.AI_EXTENSIONS_MAP_REDUCE_SUMMARY = {}
+
+    # -------------------------
+    # Content extraction cache
+    # -------------------------
+    # Cache the text extracted from HTML and problem blocks, keyed by the
+    # block's usage key and edited_on timestamp, so it is only recomputed
+    # after the block changes. Stored zlib-compressed in the Django cache with
+    # a per-process LRU in front.
+    #
+    # Any key omitted from AI_EXTENSIONS_EXTRACTION_CACHE keeps its default:
+    #   AI_EXTENSIONS_EXTRACTION_CACHE = {
+    #       "timeout": 604800,  # seconds
+    #       "local_max_entries": 2048,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE"):
+        settings.AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE = True
+    if not hasattr(settings, "AI_EXTENSIONS_EXTRACTION_CACHE"):
+        settings.AI_EXTENSIONS_EXTRACTION_CACHE = {}
+
+    # -------------------------
+    # Transcript cache
+    # -------------------------
+    # Cache video transcripts as clean text, keyed by edx_video_id, language
+    # and the transcript's modified timestamp in edxval, so updated transcripts
+    # are downloaded again. Stored zlib-compressed in the Django cache.
+    #
+    # Any key omitted from AI_EXTENSIONS_TRANSCRIPT_CACHE keeps its default:
+    #   AI_EXTENSIONS_TRANSCRIPT_CACHE = {
+    #       "timeout": 604800,  # seconds
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE"):
+        settings.AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE = True
+    if not hasattr(settings, "AI_EXTENSIONS_TRANSCRIPT_CACHE"):
+        settings.AI_EXTENSIONS_TRANSCRIPT_CACHE = {}
+
+    # -------------------------
+    # Course cache
+    # -------------------------
+    # Cache the results of the get_course_outline and get_course_info tools
+    # until the course is next published (or its details change in Studio).
+    # Outlines are kept per visibility signature (staff and beta-tester access,
+    # the user's partition groups, personal date overrides and unfulfilled
+    # prerequisites), computed once per user every signature_timeout seconds.
+    # Cached results expire after timeout seconds, so content reaching its
+    # release date shows up in the outline.
+    #
+    # Any key omitted from AI_EXTENSIONS_COURSE_CACHE keeps its default:
+    #   AI_EXTENSIONS_COURSE_CACHE = {
+    #       "timeout": 3600,
+    #       "signature_timeout": 300,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_COURSE_CACHE"):
+        settings.AI_EXTENSIONS_ENABLE_COURSE_CACHE = True
+    if not hasattr(settings, "AI_EXTENSIONS_COURSE_CACHE"):
+        settings.AI_EXTENSIONS_COURSE_CACHE = {}
+
+    # -------------------------
+    # Content index
+    # -------------------------
+    # After a course is published, a Celery task stores the LLM-ready content
+    # of every unit in UnitContentIndex, re-extracting only the units whose
+    # blocks or video transcripts changed. get_location_content then reads
+    # units and sequences from the index. Rows are only served while they are
+    # stamped with the current published course version, so right after a
+    # publish, and for units not indexed yet, content is read from the
+    # modulestore. The task runs publish_delay seconds after the first publish
+    # signal. Off by default: turn it on once Celery workers run the index task.
+    #
+    # Any key omitted from AI_EXTENSIONS_CONTENT_INDEX keeps its default:
+    #   AI_EXTENSIONS_CONTENT_INDEX = {
+    #       "publish_delay": 60,  # seconds
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CONTENT_INDEX"):
+        settings.AI_EXTENSIONS_ENABLE_CONTENT_INDEX = False
+    if not hasattr(settings, "AI_EXTENSIONS_CONTENT_INDEX"):
+        settings.AI_EXTENSIONS_CONTENT_INDEX = {}
+
+    # -------------------------
+    # Lexical retrieval
+    # -------------------------
+    # OpenEdXProcessor profiles with "retrieval_mode": "relevant" send the LLM
+    # the course passages (of passage_words words) that best match the
+    # learner's question, ranked with BM25 (k1, b) over the content index: at
+    # most top_k passages and about token_budget tokens. Profiles can override
+    # top_k and token_budget in their OpenEdXProcessor config. Each process
+    # keeps the indexes of the local_max_courses most recently used courses.
+    #
+    # Any key omitted from AI_EXTENSIONS_LEXICAL_RETRIEVAL keeps its default:
+    #   AI_EXTENSIONS_LEXICAL_RETRIEVAL = {
+    #       "top_k": 8,
+    #       "token_budget": 2000,
+    #       "passage_words": 120,
+    #       "k1": 1.2,
+    #       "b": 0.75,
+    #       "local_max_courses": 16,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_LEXICAL_RETRIEVAL"):
+        settings.AI_EXTENSIONS_LEXICAL_RETRIEVAL = {}
+
+    # -------------------------
+    # Transcript digests
+    # -------------------------
+    # After a course is published, a Celery task condenses every video
+    # transcript into a digest of its most representative sentences, served to
+    # OpenEdXProcessor profiles configured with "transcript_mode": "digest".
+    # Digests are ratio of the transcript length, between min_chars and
+    # max_chars. The task runs publish_delay seconds after the first publish
+    # signal and downloads up to io_workers transcripts at a time. Off by
+    # default: turn it on once Celery workers run the digest task.
+    #
+    # Any key omitted from AI_EXTENSIONS_TRANSCRIPT_DIGEST keeps its default:
+    #   AI_EXTENSIONS_TRANSCRIPT_DIGEST = {
+    #       "max_chars": 1500,
+    #       "min_chars": 400,
+    #       "ratio": 0.25,
+    #       "publish_delay": 60,  # seconds
+    #       "io_workers": 4,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS"):
+        settings.AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS = False
+    if not hasattr(settings, "AI_EXTENSIONS_TRANSCRIPT_DIGEST"):
+        settings.AI_EXTENSIONS_TRANSCRIPT_DIGEST = {}
+
+    # -------------------------
+    # Concurrent content extraction
+    # -------------------------
+    # get_location_content extracts all blocks of the requested units together:
+    # video transcripts are batch-loaded in the background, downloading up to
+    # io_workers of them from edxval at a time. When a request has at least
+    # process_min_blocks HTML and problem blocks and process_workers > 0, cache
+    # misses are parsed in a shared pool of spawned worker processes.
+    #
+    # Any key omitted from AI_EXTENSIONS_EXTRACTION_SCHEDULER keeps its default:
+    #   AI_EXTENSIONS_EXTRACTION_SCHEDULER = {
+    #       "io_workers": 8,
+    #       "process_workers": 0,  # process pool disabled
+    #       "process_min_blocks": 50,
+    #   }
+    if not hasattr(settings, "AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION"):
+        settings.AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION = True
+    if not hasattr(settings, "AI_EXTENSIONS_EXTRACTION_SCHEDULER"):
+        settings.AI_EXTENSIONS_EXTRACTION_SCHEDULER = {}
+
+    # -------------------------
+    # Metrics
+    # -------------------------
+    # Rolling window, in hours, of the per-profile counters shown in the
+    # "metrics/" view of the AIWorkflowProfile admin (prompt-cache hit rates).
+    if not hasattr(settings, "AI_EXTENSIONS_METRICS_WINDOW_HOURS"):
+        settings.AI_EXTENSIONS_METRICS_WINDOW_HOURS = 24
+
     # -------------------------
     # Default field filters
     # -------------------------
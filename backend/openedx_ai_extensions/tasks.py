@@ -3,6 +3,11 @@ Celery tasks that will be registered.
 """
 
 # pylint: disable=unused-import
+from openedx_ai_extensions.processors.llm.conversation_memory import update_conversation_summary_task  # noqa: F401
+from openedx_ai_extensions.processors.openedx.utils.content_indexing import index_course_content_task  # noqa: F401
+from openedx_ai_extensions.processors.openedx.utils.transcript_digests import (  # noqa: F401
+    compute_transcript_digests_task,
+)
 from openedx_ai_extensions.workflows.orchestrators.session_based_orchestrator import (  # noqa: F401
     _execute_orchestrator_async,
 )
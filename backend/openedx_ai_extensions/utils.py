@@ -2,6 +2,7 @@
 Utility functions for Open edX AI Extensions.
 """
 
+import json
 from types import GeneratorType
 
 # Standardized error message for mid-stream failures.
@@ -35,3 +36,15 @@ def is_generator(result):
         bool: True if the object is an instance of GeneratorType, False otherwise.
     """
     return isinstance(result, GeneratorType)
+
+
+def estimate_message_tokens(message) -> int:
+    """
+    Roughly estimate the tokens of a chat message.
+
+    About four characters per token of content, plus a few for the role and
+    message framing. Non-string content is measured as JSON.
+    """
+    content = message.get("content", "") if isinstance(message, dict) else message
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    return len(text) // 4 + 4
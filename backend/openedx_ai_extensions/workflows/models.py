@@ -529,14 +529,15 @@ class AIWorkflowSession(models.Model):
         )
         return processor.fetch_remote_thread(self.remote_response_id)
 
-    def get_combined_thread(self):  # pylint: disable=too-many-statements
+    def get_combined_thread(self):
         """
         Build a unified chronological thread combining local and remote data.
 
         The remote thread is the backbone (it has system messages, reasoning,
         tool calls). Local thread enriches with submission_id and timestamp.
         Messages are deduplicated across responses since each remote response's
-        input replays the full history.
+        input replays the full history. Messages are matched on their role and
+        full content, stringified once per message.
 
         Returns:
             list or None: Flat list of message dicts with all available metadata.
@@ -547,16 +548,11 @@ class AIWorkflowSession(models.Model):
         if not remote_thread:
             return local_thread
 
-        # Build lookup from local thread: (role, content_prefix) -> local msg
+        # Build lookup from local thread: (role, content) -> local msg
         local_by_content = {}
-        if local_thread:
-            for msg in local_thread:
-                role = msg.get("role", "")
-                content = msg.get("content", "")
-                content_str = content if isinstance(content, str) else str(content)
-                key = (role, content_str[:200])
-                # Keep the last match (most recent submission_id)
-                local_by_content[key] = msg
+        for msg in local_thread or []:
+            # Keep the last match (most recent submission_id)
+            local_by_content[_thread_item_key(msg)] = msg
 
         combined = []
         seen = set()
@@ -582,9 +578,7 @@ class AIWorkflowSession(models.Model):
 
             # Process input items (system, user, reasoning, tool results, etc.)
             for item in response.get("input", []):
-                content = item.get("content", "")
-                content_str = content if isinstance(content, str) else str(content)
-                content_key = (item.get("role", ""), content_str[:200])
+                content_key = _thread_item_key(item)
                 if content_key in seen:
                     continue
                 seen.add(content_key)
@@ -592,63 +586,107 @@ class AIWorkflowSession(models.Model):
                 msg = {
                     "role": item.get("role", "unknown"),
                     "type": item.get("type", "message"),
-                    "content": content,
+                    "content": item.get("content", ""),
                     "source": "remote",
                     **response_meta,
                 }
-
-                # Enrich with local metadata
-                local_key = (item.get("role", ""), content_str[:200])
-                if local_key in local_by_content:
-                    local_msg = local_by_content.pop(local_key)
-                    msg["timestamp"] = local_msg.get("timestamp")
-                    msg["submission_id"] = local_msg.get("submission_id")
-                    msg["source"] = "both"
-
+                _enrich_from_local(msg, local_by_content.pop(content_key, None))
                 combined.append(msg)
 
             # Process output items (assistant responses, tool calls)
             for item in response.get("output", []):
-                content = item.get("content", "")
-                content_str = content if isinstance(content, str) else str(content)
-                content_key = (item.get("role", ""), content_str[:200])
+                content_key = _thread_item_key(item)
                 seen.add(content_key)
 
                 msg = {
                     "role": item.get("role", "unknown"),
                     "type": item.get("type", "message"),
-                    "content": content,
+                    "content": item.get("content", ""),
                     "source": "remote",
                     "tokens": response.get("tokens"),
                     **response_meta,
                 }
                 # Pass through structured fields for tool-call items.
                 msg.update({k: item[k] for k in ("name", "arguments", "call_id") if item.get(k) is not None})
+                _enrich_from_local(msg, local_by_content.pop(content_key, None))
+                combined.append(msg)
 
-                local_key = (item.get("role", ""), content_str[:200])
-                if local_key in local_by_content:
-                    local_msg = local_by_content.pop(local_key)
-                    msg["timestamp"] = local_msg.get("timestamp")
-                    msg["submission_id"] = local_msg.get("submission_id")
-                    msg["source"] = "both"
+        # Merge the local-only messages in at their chronological position
+        local_only = [
+            {**local_msg, "type": "message", "source": "local"}
+            for local_msg in local_by_content.values()
+        ]
+        return _merge_by_timestamp(combined, local_only)
 
-                combined.append(msg)
 
-        # Insert any local-only messages at their correct chronological position
-        for local_msg in local_by_content.values():
-            entry = {
-                **local_msg,
-                "type": "message",
-                "source": "local",
-            }
-            ts = str(local_msg.get("timestamp", ""))
-            # Find the right position: before the first message with a later timestamp
-            insert_at = len(combined)
-            for i, existing in enumerate(combined):
-                existing_ts = str(existing.get("timestamp") or existing.get("created_at") or "")
-                if existing_ts and ts and existing_ts > ts:
-                    insert_at = i
-                    break
-            combined.insert(insert_at, entry)
-
-        return combined
+def _thread_item_key(item):
+    """Return the (role, full content) key matching a message across the local and remote threads."""
+    content = item.get("content", "")
+    return item.get("role", ""), content if isinstance(content, str) else str(content)
+
+
+def _enrich_from_local(msg, local_msg):
+    """Copy the timestamp and submission_id of the matching local message, if any, into ``msg``."""
+    if local_msg is None:
+        return
+    msg["timestamp"] = local_msg.get("timestamp")
+    msg["submission_id"] = local_msg.get("submission_id")
+    msg["source"] = "both"
+
+
+def _merge_by_timestamp(combined, local_only):
+    """
+    Return ``combined`` with the ``local_only`` messages merged in by timestamp.
+
+    Each local message goes right before the first message of ``combined``
+    with a later timestamp (or created_at), and at the end when there is none
+    or it has no timestamp. Local messages are sorted once and merged in a
+    single pass: the first later message is where the running maximum of the
+    timestamps seen so far exceeds the local timestamp.
+    """
+    pending = sorted(
+        ((str(msg.get("timestamp", "")), msg) for msg in local_only),
+        key=lambda entry: (not entry[0], entry[0]),
+    )
+    merged = []
+    next_local = 0
+    latest = ""
+    for msg in combined:
+        timestamp = str(msg.get("timestamp") or msg.get("created_at") or "")
+        latest = max(latest, timestamp)
+        while next_local < len(pending) and pending[next_local][0] and pending[next_local][0] < latest:
+            merged.append(pending[next_local][1])
+            next_local += 1
+        merged.append(msg)
+    merged.extend(msg for _, msg in pending[next_local:])
+    return merged
+
+
+class AIConversationSummary(models.Model):
+    """
+    Rolling summary of the older turns of a chat session.
+
+    Updated in the background once the session's history exceeds the
+    conversation memory threshold; ``covered_messages`` is the number of
+    (non-system) history messages folded into ``summary``.
+
+    .. pii: Summary of the learner's conversation with the assistant
+    .. pii_types: other
+    .. pii_retirement: retained
+    """
+
+    session = models.OneToOneField(
+        AIWorkflowSession,
+        on_delete=models.CASCADE,
+        related_name="conversation_summary",
+        help_text="Session whose history is summarized",
+    )
+    summary = models.TextField(blank=True, default="")
+    covered_messages = models.PositiveIntegerField(
+        default=0, help_text="Number of history messages folded into the summary"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.session_id} ({self.covered_messages} messages)"  # pylint: disable=no-member
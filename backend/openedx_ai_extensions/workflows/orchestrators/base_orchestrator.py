@@ -6,6 +6,8 @@ import logging
 
 from eventtracking import tracker
 
+from openedx_ai_extensions.metrics import record_prompt_cache_usage
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,6 +82,7 @@ class BaseOrchestrator:
             event_data["user_id"] = self.user.id
         if usage:
             event_data["usage"] = self._convert_usage_to_json_serializable(usage)
+            record_prompt_cache_usage(self.profile.slug, event_data["usage"])
 
         tracking_context = {}
         if self.course_id:
@@ -67,7 +67,7 @@ class DirectLLMResponse(BaseOrchestrator):
 
         # --- 2. Process with LLM processor ---
         self.llm_processor = LLMProcessor(self.profile.processor_config)
-        llm_result = self.llm_processor.process(context=llm_input_content)
+        llm_result = self.llm_processor.process(context=llm_input_content, context_data=content_result)
 
         # --- 4. Handle Streaming Response (Generator) ---
         if is_generator(llm_result):
@@ -159,7 +159,7 @@ class EducatorAssistantOrchestrator(SessionBasedOrchestrator):
         if "question_slots" in metadata:
             return {
                 "response": {
-                    "question_slots": metadata["question_slots"],
+                    "question_slots": self._get_metadata("question_slots"),
                     "collection_name": metadata.get("collection_name", ""),
                 }
             }
@@ -191,10 +191,8 @@ class EducatorAssistantOrchestrator(SessionBasedOrchestrator):
             for p in problems
         ]
 
-        metadata = self.session.metadata or {}
-        metadata['question_slots'] = question_slots
-        metadata['collection_name'] = collection_name
-        self.session.metadata = metadata
+        self._set_metadata('question_slots', question_slots)
+        self._set_metadata('collection_name', collection_name)
         self.session.save(update_fields=["metadata"])
 
         self._emit_workflow_event(EVENT_NAME_WORKFLOW_COMPLETED)
@@ -220,8 +218,7 @@ class EducatorAssistantOrchestrator(SessionBasedOrchestrator):
         if 'error' in content_result:
             return {'error': content_result['error'], 'status': 'OpenEdXProcessor error'}
 
-        metadata = self.session.metadata or {}
-        question_slots = metadata.get('question_slots', [])
+        question_slots = self._get_metadata('question_slots', [])
 
         if question_index is None or not 0 <= question_index < len(question_slots):
             return {'error': 'Invalid question index', 'status': 'error'}
@@ -252,8 +249,7 @@ class EducatorAssistantOrchestrator(SessionBasedOrchestrator):
         slot['versions'].append(new_question)
         slot['selected'] = len(slot['versions']) - 1
 
-        metadata['question_slots'] = question_slots
-        self.session.metadata = metadata
+        self._set_metadata('question_slots', question_slots)
         self.session.save(update_fields=["metadata"])
         return {
             'status': 'completed',
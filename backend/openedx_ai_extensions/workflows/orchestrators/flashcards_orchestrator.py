@@ -75,8 +75,7 @@ class FlashCardsOrchestrator(ScopedSessionOrchestrator):
             # Generate random number of cards between 1 and 25 if num_cards is not provided or is None
             input_data['num_cards'] = random.randint(1, 25)
 
-        metadata = self.session.metadata or {}
-        existing_cards = metadata.get('cards')
+        existing_cards = self._get_metadata('cards')
         if isinstance(existing_cards, list):
             existing_cards_str = ""
             for card in existing_cards:
@@ -112,11 +111,11 @@ class FlashCardsOrchestrator(ScopedSessionOrchestrator):
         response_obj = llm_result.get('response')
         cards = self._get_structured_cards(response_obj)
 
-        existing_cards = self.session.metadata.get('cards')
+        existing_cards = self._get_metadata('cards')
         if isinstance(existing_cards, list):
-            existing_cards.extend(cards)
+            self._set_metadata('cards', existing_cards + cards)
         else:
-            self.session.metadata['cards'] = cards
+            self._set_metadata('cards', cards)
         self.session.save(update_fields=['metadata'])
 
         response_data = {
@@ -137,7 +136,7 @@ class FlashCardsOrchestrator(ScopedSessionOrchestrator):
                 cards = card_stack.get('cards')
             else:
                 cards = card_stack
-        self.session.metadata['cards'] = cards
+        self._set_metadata('cards', cards)
         self.session.save(update_fields=['metadata'])
         num_cards = len(cards) if cards else 0
         return {
@@ -155,7 +154,7 @@ class FlashCardsOrchestrator(ScopedSessionOrchestrator):
         metadata = self.session.metadata or {}
         if "cards" in metadata:
             return {
-                'cards': metadata['cards'],
+                'cards': self._get_metadata('cards'),
                 'status': 'completed',
             }
         return {
@@ -5,9 +5,13 @@ import logging
 
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
+from litellm.exceptions import RateLimitError
 
+from openedx_ai_extensions import codec
 from openedx_ai_extensions.processors import SubmissionProcessor
+from openedx_ai_extensions.processors.llm.rate_limiter import LANE_BULK, backoff_delay, priority_lane
 from openedx_ai_extensions.workflows.models import AIWorkflowSession
+from openedx_ai_extensions.workflows.session_resolver import resolve_session
 
 from .base_orchestrator import BaseOrchestrator
 
@@ -18,7 +22,8 @@ logger = logging.getLogger(__name__)
     name="openedx_ai_extensions.workflows.execute_orchestrator",
     bind=True,
     time_limit=300,
-    soft_time_limit=270
+    soft_time_limit=270,
+    max_retries=5,
 )
 def _execute_orchestrator_async(task_self, session_id, action, params=None):
     """
@@ -32,6 +37,10 @@ def _execute_orchestrator_async(task_self, session_id, action, params=None):
 
     Returns:
         Result from the orchestrator action method
+
+    LLM calls made by the action run in the bulk priority lane, so interactive
+    requests keep part of each provider's quota. When the provider quota is
+    exhausted the task is retried later with jittered backoff.
     """
 
     task_id = task_self.request.id
@@ -76,14 +85,15 @@ def _execute_orchestrator_async(task_self, session_id, action, params=None):
         # 6. Call the action method with params
         orchestrator_method = getattr(orchestrator, action)
         logger.info(f"Task {task_id}: Executing {orchestrator_name}.{action} for session {session_id}")
-        result = orchestrator_method(**params)
+        with priority_lane(LANE_BULK):
+            result = orchestrator_method(**params)
 
         # 7. Update session metadata with result
         # Re-fetch from DB to pick up any metadata changes the orchestrator method
         # saved during execution (e.g. question_slots, collection_name), so we
         # don't overwrite them with the stale in-memory copy.
         session.refresh_from_db(fields=['metadata'])
-        session.metadata['task_result'] = result
+        session.metadata['task_result'] = codec.pack(result)
         session.metadata['task_status'] = 'completed'
         session.save(update_fields=['metadata'])
 
@@ -101,6 +111,10 @@ def _execute_orchestrator_async(task_self, session_id, action, params=None):
         logger.error(f"Task {task_id}: Session {session_id} not found")
         raise
 
+    except RateLimitError as e:
+        _retry_rate_limited(task_self, session, e)
+        raise
+
     except Exception as e:
         logger.error(f"Task {task_id}: Error executing {action} for session {session_id}: {str(e)}")
         session.metadata['task_status'] = 'error'
@@ -109,13 +123,35 @@ def _execute_orchestrator_async(task_self, session_id, action, params=None):
         raise
 
 
+def _retry_rate_limited(task_self, session, exc):
+    """
+    Schedule a retry of a task whose provider quota was exhausted.
+
+    Raises celery's Retry while retries are left; otherwise marks the session
+    as failed and returns so the caller re-raises ``exc``.
+    """
+    task_id = task_self.request.id
+    retries = task_self.request.retries
+    if retries < task_self.max_retries:
+        # Back off at least a rate-limit window, spread out so retries don't arrive together.
+        countdown = 60 + backoff_delay(retries, {"backoff_base_s": 30, "backoff_max_s": 600})
+        logger.warning(f"Task {task_id}: Provider rate limited; retrying in {countdown:.0f}s")
+        session.metadata['task_status_message'] = 'Waiting for AI provider capacity'
+        session.save(update_fields=['metadata'])
+        raise task_self.retry(exc=exc, countdown=countdown)
+    logger.error(f"Task {task_id}: Provider rate limited after {retries} retries for session {session.id}")
+    session.metadata['task_status'] = 'error'
+    session.metadata['task_error'] = str(exc)
+    session.save(update_fields=['metadata'])
+
+
 class SessionBasedOrchestrator(BaseOrchestrator):
     """Orchestrator that provides session-based LLM responses."""
 
     def __init__(self, workflow, user, context):
 
         super().__init__(workflow, user, context)
-        self.session, _ = AIWorkflowSession.objects.get_or_create(
+        self.session = resolve_session(
             user=self.user,
             scope=self.workflow,
             profile=self.workflow.profile,
@@ -130,6 +166,20 @@ class SessionBasedOrchestrator(BaseOrchestrator):
             "status": "session_cleared",
         }
 
+    def _get_metadata(self, key, default=None):
+        """Return the session metadata value ``key``, unpacked if it was stored compressed."""
+        return codec.unpack((self.session.metadata or {}).get(key, default))
+
+    def _set_metadata(self, key, value):
+        """
+        Set the session metadata value ``key``; the caller saves the session.
+
+        Large values (flashcard decks, question slot histories) are stored
+        compressed, see codec.pack().
+        """
+        self.session.metadata = self.session.metadata or {}
+        self.session.metadata[key] = codec.pack(value)
+
     def _get_submission_processor(self):
         return SubmissionProcessor(
             self.profile.processor_config, self.session
@@ -188,10 +238,10 @@ class SessionBasedOrchestrator(BaseOrchestrator):
         task_status = metadata.get('task_status', 'idle')
 
         if task_status == 'completed':
-            return metadata.get('task_result', {
+            return codec.unpack(metadata.get('task_result', {
                 'status': 'completed',
                 'message': 'Task completed but no result found'
-            })
+            }))
         elif task_status == 'error':
             return {
                 'status': 'error',
@@ -225,7 +275,7 @@ class ScopedSessionOrchestrator(SessionBasedOrchestrator):  # pylint: disable=ab
 
     def __init__(self, workflow, user, context):  # pylint: disable=super-init-not-called
         BaseOrchestrator.__init__(self, workflow, user, context)  # pylint: disable=non-parent-init-called
-        self.session, _ = AIWorkflowSession.objects.get_or_create(
+        self.session = resolve_session(
             user=self.user,
             scope=self.workflow,
             profile=self.workflow.profile,
@@ -7,8 +7,10 @@ import logging
 import re
 
 from openedx_ai_extensions.processors import LLMProcessor, OpenEdXProcessor
+from openedx_ai_extensions.processors.llm import conversation_memory
 from openedx_ai_extensions.processors.llm.providers import provider_supports
 from openedx_ai_extensions.utils import STREAMING_FAILED_MESSAGE, is_generator, normalize_input_to_text
+from openedx_ai_extensions.workflows import session_lease
 from openedx_ai_extensions.xapi.constants import EVENT_NAME_WORKFLOW_INITIALIZED, EVENT_NAME_WORKFLOW_INTERACTED
 
 from .session_based_orchestrator import SessionBasedOrchestrator
@@ -24,25 +26,27 @@ class ThreadedLLMResponse(SessionBasedOrchestrator):
     def lazy_load_chat_history(self, input_data):
         """
         Load older messages for infinite scroll.
-        Expects input_data to contain current_messages (count) from frontend.
+        Expects input_data to contain before (the cursor of the oldest loaded
+        message) and/or current_messages (count) from frontend.
         Returns only new messages not already loaded, limited by max_context_messages.
         """
 
-        # Extract current_messages_count from input_data
+        # Extract the cursor and current_messages_count from input_data
         current_messages_count = 0
+        cursor = None
+        if isinstance(input_data, str):
+            try:
+                input_data = json.loads(input_data)
+            except json.JSONDecodeError:
+                input_data = None
         if isinstance(input_data, dict):
             current_messages_count = input_data.get("current_messages", 0)
-        elif isinstance(input_data, str):
-            try:
-                parsed_data = json.loads(input_data)
-                current_messages_count = parsed_data.get("current_messages", 0)
-            except (json.JSONDecodeError, AttributeError):
-                current_messages_count = 0
+            cursor = input_data.get("before")
         elif isinstance(input_data, int):
             current_messages_count = input_data
 
         submission_processor = self._get_submission_processor()
-        result = submission_processor.get_previous_messages(current_messages_count)
+        result = submission_processor.get_previous_messages(current_messages_count, cursor=cursor)
 
         if "error" in result:
             return {
@@ -119,7 +123,45 @@ class ThreadedLLMResponse(SessionBasedOrchestrator):
             except Exception as e:  # pylint: disable=broad-exception-caught
                 logger.error(f"Failed to save chat history after stream: {e}")
 
+    def _compact_history(self, history, submission_processor):
+        """
+        Bound the chat history sent with the next turn.
+
+        Long histories are replaced by the session's rolling summary plus the
+        recent turns; see processors/llm/conversation_memory.py. A history
+        already cut to a token budget (max_context_tokens) is sent as it is.
+        """
+        if submission_processor.max_context_tokens:
+            return history
+        return conversation_memory.compact(self.session, history)
+
     def run(self, input_data):
+        """
+        Run one chat turn, or return the history when there is no input.
+
+        Turns of the same session run one at a time under the session lease
+        (see workflows/session_lease.py); a streamed turn keeps the lease
+        until its answer is saved.
+        """
+        if self.session.local_submission_id and not input_data:
+            return self._run_turn(input_data)
+
+        lease = session_lease.acquire(self.session.id, self.profile.slug)
+        try:
+            if lease and lease.contended:
+                # The turn we waited for moved the thread forward.
+                self.session.refresh_from_db()
+            result = self._run_turn(input_data)
+        except BaseException:
+            session_lease.release(lease)
+            raise
+        if is_generator(result):
+            return session_lease.release_after(result, lease)
+        session_lease.release(lease)
+        return result
+
+    def _run_turn(self, input_data):
+        """Answer ``input_data`` with the LLM and save the turn, or return the history."""
         context = {
             'course_id': self.course_id,
             'location_id': self.location_id,
@@ -144,6 +186,7 @@ class ThreadedLLMResponse(SessionBasedOrchestrator):
             location_id=self.location_id,
             course_id=self.course_id,
             user=self.user,
+            query=normalize_input_to_text(input_data),
         )
         content_result = openedx_processor.process()
 
@@ -156,11 +199,22 @@ class ThreadedLLMResponse(SessionBasedOrchestrator):
         has_remote_id = bool(self.session and self.session.remote_response_id)
         chat_history = []
         if not has_remote_id:
-            chat_history = submission_processor.get_full_message_history() or []
+            chat_history = self._compact_history(
+                submission_processor.get_full_message_history() or [], submission_processor
+            )
 
-        # Call the processor
+        # Call the processor. If the remote thread was lost, the processor
+        # loads the stored history (system prompt and context included) on demand.
         llm_result = self.llm_processor.process(
-            context=str(content_result), input_data=input_data, chat_history=chat_history
+            context=str(content_result),
+            input_data=input_data,
+            chat_history=chat_history,
+            history_loader=(
+                (lambda: self._compact_history(
+                    submission_processor.get_thread_rebuild_history() or [], submission_processor
+                ))
+                if has_remote_id else None
+            ),
         )
 
         # --- BRANCH A: Handle Streaming (Generator) ---
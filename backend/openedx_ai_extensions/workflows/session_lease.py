@@ -0,0 +1,156 @@
+"""
+Per-session lease serializing the chat turns of a workflow session.
+
+Two turns of the same session running at once (a double submit, two open
+tabs) would both continue from the same remote_response_id and history, fork
+the thread and pay for a wasted LLM call. A turn first takes the session's
+lease, an atomic cache.add() shared by every web and Celery worker:
+
+* while another turn holds it, the new turn waits up to ``wait_s`` seconds,
+  so overlapping turns run one after the other in arrival order (roughly);
+* if the lease is still held after the wait, SessionBusyError (a 409) is
+  raised and the turn is not run.
+
+The lease expires after ``ttl_s`` seconds, so a worker that died mid-turn
+doesn't block the session. Turns, contended turns, rejections and wait time
+are counted per profile for the metrics view.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from openedx_ai_extensions.metrics import increment_counters, read_counters
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:session_lease"
+
+DEFAULT_SESSION_LEASE_SETTINGS = {
+    "wait_s": 15,
+    "ttl_s": 300,
+    "poll_interval_s": 0.25,
+}
+
+SESSION_LEASE_COUNTERS = ("turns", "contended", "rejected", "wait_ms")
+
+
+class SessionBusyError(Exception):
+    """Raised when a turn of the session is still running after the lease wait."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        super().__init__(f"Another turn of session {session_id} is still running")
+
+
+@dataclass
+class Lease:
+    """The lease held by one turn."""
+
+    key: str
+    token: str
+    contended: bool
+
+
+def get_session_lease_settings():
+    """Return lease settings with AI_EXTENSIONS_SESSION_LEASE applied over the defaults."""
+    return {
+        **DEFAULT_SESSION_LEASE_SETTINGS,
+        **(getattr(settings, "AI_EXTENSIONS_SESSION_LEASE", {}) or {}),
+    }
+
+
+def is_enabled():
+    """Return True when AI_EXTENSIONS_ENABLE_SESSION_LEASE is on."""
+    return bool(getattr(settings, "AI_EXTENSIONS_ENABLE_SESSION_LEASE", True))
+
+
+def _try_add(key, token, ttl):
+    """Return whether the lease was added, or None when the cache is unavailable."""
+    try:
+        return cache.add(key, token, ttl)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Session lease unavailable, running the turn without it: {e}")
+        return None
+
+
+def acquire(session_id, profile_slug):
+    """
+    Take the lease of ``session_id``, waiting for a running turn to finish.
+
+    Returns:
+        The Lease to pass to release(), or None when leases are disabled or
+        the cache is unavailable.
+
+    Raises:
+        SessionBusyError: When the lease is still held after ``wait_s``.
+    """
+    if not is_enabled():
+        return None
+    lease_settings = get_session_lease_settings()
+    key = f"{CACHE_KEY_PREFIX}:{session_id}"
+    token = uuid4().hex
+    start = time.monotonic()
+    deadline = start + lease_settings["wait_s"]
+    contended = False
+    while True:
+        added = _try_add(key, token, lease_settings["ttl_s"])
+        if added is None:
+            return None
+        waited = time.monotonic() - start
+        if added:
+            increment_counters("session_lease", profile_slug, {
+                "turns": 1,
+                "contended": 1 if contended else 0,
+                "wait_ms": int(waited * 1000) if contended else 0,
+            })
+            return Lease(key, token, contended)
+        if time.monotonic() >= deadline:
+            increment_counters("session_lease", profile_slug, {"rejected": 1, "wait_ms": int(waited * 1000)})
+            logger.warning(f"Rejected an overlapping turn of session {session_id} after {waited:.1f}s")
+            raise SessionBusyError(session_id)
+        contended = True
+        time.sleep(min(lease_settings["poll_interval_s"], max(0, deadline - time.monotonic())))
+
+
+def release(lease):
+    """Release ``lease`` unless it expired and was taken by another turn."""
+    if lease is None:
+        return
+    try:
+        # Not atomic, but a lease only changes hands after expiring, long after its turn.
+        if cache.get(lease.key) == lease.token:
+            cache.delete(lease.key)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not release session lease {lease.key}: {e}")
+
+
+def release_after(generator, lease):
+    """Yield from ``generator``, then release ``lease`` (also when the client disconnects)."""
+    try:
+        yield from generator
+    finally:
+        release(lease)
+
+
+def get_session_lease_report(profile_slugs) -> list:
+    """
+    Return rolling turn contention statistics, one dict per profile slug.
+
+    ``contention_rate`` is the share of turns, rejected ones included, that
+    found another turn of their session running; ``avg_wait_ms`` is the mean
+    wait of those turns. They are None without turns, or contention, in the window.
+    """
+    totals = read_counters("session_lease", profile_slugs, SESSION_LEASE_COUNTERS)
+    report = []
+    for slug in profile_slugs:
+        row = {"profile": slug, **totals[slug]}
+        attempts = row["turns"] + row["rejected"]
+        contended = row["contended"] + row["rejected"]
+        row["contention_rate"] = round(contended / attempts, 4) if attempts else None
+        row["avg_wait_ms"] = round(row["wait_ms"] / contended) if contended else None
+        report.append(row)
+    return report
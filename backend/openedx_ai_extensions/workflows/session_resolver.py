@@ -0,0 +1,80 @@
+"""
+Read-first lookup of the AIWorkflowSession of an orchestrator.
+
+Every request to a session-based workflow, status polls included, resolves
+its session from the (user, scope, profile, course_id[, location_id]) tuple.
+resolve_session() keeps the id of the resolved session in the Django cache
+for AI_EXTENSIONS_SESSION_ID_CACHE_TIMEOUT seconds, so repeated requests read
+the row by primary key. On a cache miss the row is read through the
+unique-together index, and it is only inserted when it doesn't exist; an
+insert that loses a race with a concurrent request reads the winner's row.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from openedx_ai_extensions.workflows.models import AIWorkflowSession
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "openedx_ai_extensions:session_id"
+
+
+def _cache_key(lookup):
+    """Return the cache key of the session id matching ``lookup``."""
+    parts = [f"{field}={getattr(value, 'pk', value)}" for field, value in sorted(lookup.items())]
+    digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def _cache_timeout():
+    return getattr(settings, "AI_EXTENSIONS_SESSION_ID_CACHE_TIMEOUT", 300)
+
+
+def _get_cached(key, lookup):
+    """Return the session cached under ``key`` if it still exists and matches ``lookup``."""
+    try:
+        session_id = cache.get(key)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Session id cache unavailable: {e}")
+        return None
+    if session_id is None:
+        return None
+    return AIWorkflowSession.objects.filter(id=session_id, **lookup).first()
+
+
+def _set_cached(key, session):
+    try:
+        cache.set(key, str(session.id), _cache_timeout())
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning(f"Could not cache the id of session {session.id}: {e}")
+
+
+def resolve_session(**lookup):
+    """
+    Return the AIWorkflowSession matching ``lookup``, creating it if needed.
+
+    Unlike get_or_create, the lookup tolerates duplicate rows (the unique
+    constraint doesn't apply to rows with a NULL course_id or location_id)
+    by returning the oldest one.
+    """
+    key = _cache_key(lookup)
+    session = _get_cached(key, lookup)
+    if session is not None:
+        return session
+
+    session = AIWorkflowSession.objects.filter(**lookup).order_by("created_at").first()
+    if session is None:
+        try:
+            with transaction.atomic():
+                session = AIWorkflowSession.objects.create(**lookup)
+        except IntegrityError:
+            # A concurrent request inserted the same session first.
+            session = AIWorkflowSession.objects.filter(**lookup).order_by("created_at").first()
+            if session is None:
+                raise
+    _set_cached(key, session)
+    return session
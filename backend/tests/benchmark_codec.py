@@ -0,0 +1,101 @@
+"""
+Benchmark the codec of stored chat turns and session metadata.
+
+Run from the backend directory (not collected by pytest)::
+
+    python tests/benchmark_codec.py [--samples 200]
+
+Each fixture is serialized with json.dumps/json.loads, as before, and with
+codec.encode/codec.decode; the table shows the stored size and the median
+time of a write and a read.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from openedx_ai_extensions import codec  # noqa: E402
+
+OLX = (
+    '<problem><multiplechoiceresponse><label>{question}</label><choicegroup type="MultipleChoice">'
+    + "".join(f'<choice correct="{str(i == 0).lower()}">Option {i} of the question</choice>' for i in range(4))
+    + "</choicegroup></multiplechoiceresponse></problem>"
+)
+
+
+def _fixtures():
+    """Return {name: value} of typical stored values."""
+    context = " ".join(f"Unit {i}: the course explains variables, loops and functions." for i in range(60))
+    first_turn = [
+        {"role": "system", "content": "You are a helpful teaching assistant for this course. " * 20, "tokens": 280},
+        {"role": "system", "content": context, "tokens": len(context) // 4},
+        {"role": "user", "content": "Can you explain what a loop is?", "tokens": 12},
+        {"role": "assistant", "content": "A loop repeats a block of code while a condition holds. " * 8, "tokens": 120},
+    ]
+    turn = first_turn[2:]
+    deck = [
+        {"id": i, "question": f"What does concept {i} of the unit describe?", "answer": "It describes " * 12}
+        for i in range(100)
+    ]
+    slots = [
+        {
+            "versions": [
+                {
+                    "display_name": f"Question {i}.{v}",
+                    "question_html": f"Which statement about topic {i} is correct?",
+                    "choices": [{"text": f"Statement {c}", "is_correct": c == 0} for c in range(4)],
+                    "olx": OLX.format(question=f"Which statement about topic {i} is correct?"),
+                }
+                for v in range(5)
+            ],
+            "selected": 4,
+        }
+        for i in range(20)
+    ]
+    return {"chat turn": turn, "first chat turn": first_turn, "flashcard deck": deck, "question slots": slots}
+
+
+def _median_us(function, samples):
+    """Return the median microseconds of ``function()``."""
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(latencies)
+
+
+def main():
+    """Print stored size and write/read time of json and of the codec for each fixture."""
+    parser = argparse.ArgumentParser(description="Benchmark the stored value codec.")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"orjson: {codec.orjson is not None}, zstandard: {codec.zstandard is not None}, "
+          f"settings: {codec.get_codec_settings()}")
+    print(f"{'fixture':<16}{'json (B)':>10}{'codec (B)':>11}{'json w/r (us)':>16}{'codec w/r (us)':>17}")
+    for name, value in _fixtures().items():
+        plain = json.dumps(value)
+        encoded = codec.encode(value)
+        json_write = _median_us(lambda v=value: json.dumps(v), args.samples)
+        json_read = _median_us(lambda p=plain: json.loads(p), args.samples)
+        codec_write = _median_us(lambda v=value: codec.encode(v), args.samples)
+        codec_read = _median_us(lambda e=encoded: codec.decode(e), args.samples)
+        print(
+            f"{name:<16}{len(plain):>10}{len(encoded):>11}"
+            f"{f'{json_write:.0f}/{json_read:.0f}':>16}{f'{codec_write:.0f}/{codec_read:.0f}':>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
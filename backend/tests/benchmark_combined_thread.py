@@ -0,0 +1,126 @@
+"""
+Benchmark AIWorkflowSession.get_combined_thread on long synthetic threads.
+
+Run from the backend directory (not collected by pytest)::
+
+    python tests/benchmark_combined_thread.py [--messages 2000] [--local-only 0.5] [--samples 5]
+
+The remote thread has one response per turn whose input replays the whole
+history, as the Responses API returns it; the local thread holds every
+message with a timestamp, and a ``--local-only`` fraction of the turns is
+missing from the remote thread. The merge is compared with the previous
+implementation, kept below for reference: 200-character content keys and a
+linear scan plus list.insert per local-only message.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from openedx_ai_extensions.workflows.models import AIWorkflowSession  # noqa: E402
+
+
+def _threads(messages, local_only):
+    """Return (local thread, remote thread) of a conversation of ``messages`` messages."""
+    turns = messages // 2
+    local, remote, history = [], [], []
+    for turn in range(turns):
+        timestamp = f"2024-01-01T{turn // 3600:02d}:{turn // 60 % 60:02d}:{turn % 60:02d}"
+        question = {"role": "user", "content": f"Question {turn}: " + "about the course " * 20}
+        answer = {"role": "assistant", "content": f"Answer {turn}: " + "an explanation " * 60}
+        local += [{**msg, "timestamp": timestamp, "submission_id": f"sub-{turn}"} for msg in (question, answer)]
+        if turn % 100 < local_only * 100:
+            continue
+        history = history + [question]
+        remote.append({
+            "id": f"resp-{turn}",
+            "created_at": timestamp,
+            "model": "gpt-4",
+            "input": [{**msg, "type": "message"} for msg in history],
+            "output": [answer],
+        })
+        history = history + [answer]
+    return local, remote
+
+
+def _legacy_combined_thread(local_thread, remote_thread):
+    """Merge the threads as get_combined_thread did before (prefix keys, insertion by linear scan)."""
+    local_by_content = {}
+    for msg in local_thread:
+        content = msg.get("content", "")
+        content_str = content if isinstance(content, str) else str(content)
+        local_by_content[(msg.get("role", ""), content_str[:200])] = msg
+    combined, seen = [], set()
+    for response in remote_thread:
+        for items, replayed in ((response.get("input", []), True), (response.get("output", []), False)):
+            for item in items:
+                content = item.get("content", "")
+                content_str = content if isinstance(content, str) else str(content)
+                key = (item.get("role", ""), content_str[:200])
+                if replayed and key in seen:
+                    continue
+                seen.add(key)
+                msg = {"role": item.get("role"), "content": content, "created_at": response.get("created_at")}
+                if key in local_by_content:
+                    msg["timestamp"] = local_by_content.pop(key).get("timestamp")
+                combined.append(msg)
+    for local_msg in local_by_content.values():
+        timestamp = str(local_msg.get("timestamp", ""))
+        insert_at = len(combined)
+        for index, existing in enumerate(combined):
+            existing_ts = str(existing.get("timestamp") or existing.get("created_at") or "")
+            if existing_ts and timestamp and existing_ts > timestamp:
+                insert_at = index
+                break
+        combined.insert(insert_at, {**local_msg, "source": "local"})
+    return combined
+
+
+def _median_ms(function, samples):
+    """Return the median milliseconds of ``function()``."""
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def _measure(session, messages, local_only, samples):
+    """Return (local-only messages, merge ms, previous ms) for a thread of ``messages`` messages."""
+    local, remote = _threads(messages, local_only)
+    with patch.object(AIWorkflowSession, "get_local_thread", lambda _self: [dict(m) for m in local]), \
+            patch.object(AIWorkflowSession, "get_remote_thread", lambda _self: remote):
+        current = _median_ms(session.get_combined_thread, samples)
+        merged_local = sum(m["source"] == "local" for m in session.get_combined_thread())
+    previous = _median_ms(lambda: _legacy_combined_thread(local, remote), samples)
+    return merged_local, current, previous
+
+
+def main():
+    """Print the median merge time of the current and the previous implementation."""
+    parser = argparse.ArgumentParser(description="Benchmark get_combined_thread.")
+    parser.add_argument("--messages", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--local-only", type=float, default=0.5)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    session = AIWorkflowSession()
+    print(f"{'messages':>9}{'local-only':>12}{'merge (ms)':>12}{'previous (ms)':>15}")
+    for messages in args.messages:
+        local_only, current, previous = _measure(session, messages, args.local_only, args.samples)
+        print(f"{messages:>9}{local_only:>12}{current:>12.1f}{previous:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark the per-turn cost of reading and saving chat history.
+
+Run from the backend directory (not collected by pytest)::
+
+    python tests/benchmark_history_tail.py [--turns 10 100 1000] [--samples 50] [--max-context-tokens 1000]
+
+Each turn reads the recent history for the chat UI (get_chat_history) and the
+LLM history within max_context_tokens (get_full_message_history, as the
+threaded orchestrator does), then saves a new user/assistant pair
+(update_chat_submission). Submissions live in an in-memory store that
+serializes answers like the Submissions API, so the timings isolate the
+processor's own work. The history tail is compared against
+AI_EXTENSIONS_ENABLE_HISTORY_TAIL = False. With --max-context-tokens 0, or a
+budget larger than the tail's size messages hold, the LLM history loads every
+submission.
+"""
+import argparse
+import os
+import sys
+import time
+import types
+import uuid
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+
+# The submissions app only exists in edx-platform; the store below replaces its API.
+sys.modules.setdefault("submissions", types.ModuleType("submissions"))
+sys.modules.setdefault("submissions.api", types.ModuleType("submissions.api"))
+
+from openedx_ai_extensions.processors.openedx import submission_processor  # noqa: E402
+
+
+class InMemorySubmissions:
+    """Submissions API stand-in keeping one student item's submissions in a list."""
+
+    def __init__(self):
+        """Start with no submissions."""
+        self.submissions = []
+
+    def create_submission(self, student_item_dict, answer):  # pylint: disable=unused-argument
+        """Store a submission and return its serialized form."""
+        submission = {
+            "uuid": uuid.uuid4().hex,
+            "attempt_number": len(self.submissions) + 1,
+            "answer": answer,
+            "created_at": time.time(),
+        }
+        self.submissions.append(submission)
+        return dict(submission)
+
+    def get_submissions(self, student_item_dict, limit=None):  # pylint: disable=unused-argument
+        """Return copies of the latest ``limit`` submissions (or every one), newest first."""
+        latest = list(reversed(self.submissions))[:limit]
+        return [dict(submission) for submission in latest]
+
+
+def _session():
+    """Return a stand-in chat session."""
+    return types.SimpleNamespace(
+        id=uuid.uuid4().hex,
+        user=types.SimpleNamespace(id=1),
+        course_id="course-v1:edX+Bench+1",
+        local_submission_id=None,
+        save=lambda: None,
+    )
+
+
+def _turn_ms(processor, samples):
+    """Return the median milliseconds of one read-and-save turn."""
+    latencies = []
+    for index in range(samples):
+        start = time.perf_counter()
+        processor.get_chat_history(None)
+        processor.get_full_message_history()
+        processor.update_chat_submission([
+            {"role": "user", "content": f"Question {index} about the course"},
+            {"role": "assistant", "content": "An answer of a few sentences. " * 10},
+        ])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2]
+
+
+def main():
+    """Print the median per-turn latency with and without the history tail."""
+    parser = argparse.ArgumentParser(description="Benchmark chat history reads per turn.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--max-context-tokens", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'turns':>7}{'tail (ms)':>12}{'no tail (ms)':>15}")
+    for turns in args.turns:
+        results = []
+        for enabled in (True, False):
+            settings.AI_EXTENSIONS_ENABLE_HISTORY_TAIL = enabled
+            cache.clear()
+            store = InMemorySubmissions()
+            submission_processor.submissions_api = store
+            processor = submission_processor.SubmissionProcessor(
+                config={"SubmissionProcessor": {
+                    "max_context_messages": 10,
+                    "max_context_tokens": args.max_context_tokens,
+                }},
+                user_session=_session(),
+            )
+            for index in range(turns):
+                processor.update_chat_submission([
+                    {"role": "user", "content": f"Earlier question {index}"},
+                    {"role": "assistant", "content": "An earlier answer. " * 10},
+                ])
+            processor.get_chat_history(None)
+            results.append(_turn_ms(processor, args.samples))
+        print(f"{turns:>7}{results[0]:>12.3f}{results[1]:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
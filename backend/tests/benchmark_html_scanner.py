@@ -0,0 +1,66 @@
+"""
+Benchmark the single-pass HTML scanner against the BeautifulSoup pipeline.
+
+Run from the backend directory (not collected by pytest)::
+
+    python tests/benchmark_html_scanner.py [--repeat 20] [--scale 10]
+
+Every corpus document is also concatenated ``--scale`` times to approximate
+the long HTML pages found in real courses.
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from openedx_ai_extensions.processors.openedx.utils.html_scanner import scan_html_text, scan_problem_text  # noqa: E402
+from tests.test_html_scanner import load_corpus, reference_html_to_text, reference_problem_text  # noqa: E402
+
+
+def _cases(scale):
+    """Yield (label, reference callable, scanner callable) for every corpus document and mode."""
+    for name, markup in load_corpus().items():
+        for label, text in ((name, markup), (f"{name} x{scale}", markup * scale)):
+            if name.endswith(".xml"):
+                for show_answer in (True, False):
+                    yield (
+                        f"{label} show_answer={show_answer}",
+                        lambda text=text, show=show_answer: reference_problem_text(text, show),
+                        lambda text=text, show=show_answer: scan_problem_text(text, show),
+                    )
+            else:
+                yield label, lambda text=text: reference_html_to_text(text), lambda text=text: scan_html_text(text)
+
+
+def main():
+    """Print per-document timings and speedups."""
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass HTML scanner.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'document':<52}{'bs4 (ms)':>10}{'single (ms)':>13}{'speedup':>9}")
+    total_reference = total_scanner = 0.0
+    for label, reference, scanner in _cases(args.scale):
+        if reference() != scanner():
+            raise SystemExit(f"Output mismatch for {label}")
+        reference_time = min(timeit.repeat(reference, number=1, repeat=args.repeat))
+        scanner_time = min(timeit.repeat(scanner, number=1, repeat=args.repeat))
+        total_reference += reference_time
+        total_scanner += scanner_time
+        print(f"{label:<52}{reference_time * 1000:>10.2f}{scanner_time * 1000:>13.2f}"
+              f"{reference_time / scanner_time:>8.1f}x")
+    print(f"{'total':<52}{total_reference * 1000:>10.2f}{total_scanner * 1000:>13.2f}"
+          f"{total_reference / total_scanner:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark building and querying the BM25 lexical index of large courses.
+
+Run from the backend directory (not collected by pytest)::
+
+    python tests/benchmark_lexical_index.py [--units 1000 5000] [--queries 200]
+
+Courses are synthetic: every unit has three blocks of a few hundred words
+drawn from a Zipf-distributed vocabulary, roughly the shape of real course
+text. The incremental rebuild changes 1% of the units.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from openedx_ai_extensions.processors.openedx.utils.lexical_index import (  # noqa: E402
+    CourseLexicalIndex,
+    get_lexical_retrieval_settings,
+    unit_passages,
+)
+
+VOCABULARY = [f"term{index}" for index in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def _unit(rng, unit_id):
+    """Return serialized content of a synthetic unit."""
+    return {
+        "unit_id": unit_id,
+        "display_name": unit_id,
+        "blocks": [
+            {"type": "html", "title": f"{unit_id}-{block}", "text": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=300))}
+            for block in range(3)
+        ],
+    }
+
+
+def _build(contents, previous=None):
+    """Build a course index from {unit_id: (hash, content)}, reusing the passages of ``previous``."""
+    retrieval_settings = get_lexical_retrieval_settings()
+    signature = ("v1", tuple((unit_id, content_hash) for unit_id, (content_hash, _) in contents.items()))
+    units = {}
+    for unit_id, (content_hash, content) in contents.items():
+        if previous is not None and previous.units.get(unit_id, (None,))[0] == content_hash:
+            units[unit_id] = previous.units[unit_id]
+        else:
+            units[unit_id] = (content_hash, unit_passages(content, retrieval_settings["passage_words"]))
+    return CourseLexicalIndex(signature, units, retrieval_settings["k1"], retrieval_settings["b"])
+
+
+def main():
+    """Print build, incremental rebuild and query timings per course size."""
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 lexical index.")
+    parser.add_argument("--units", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'units':>7}{'passages':>10}{'build (s)':>11}{'rebuild 1% (s)':>16}{'query p50 (ms)':>16}{'p95 (ms)':>10}")
+    for count in args.units:
+        contents = {f"unit{index}": ("v1", _unit(rng, f"unit{index}")) for index in range(count)}
+
+        start = time.perf_counter()
+        index = _build(contents)
+        build = time.perf_counter() - start
+
+        for unit_id in rng.sample(sorted(contents), max(1, count // 100)):
+            contents[unit_id] = ("v2", _unit(rng, unit_id))
+        start = time.perf_counter()
+        index = _build(contents, index)
+        rebuild = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.queries):
+            query = " ".join(rng.choices(VOCABULARY, WEIGHTS, k=8))
+            start = time.perf_counter()
+            index.search(query, top_k=8, token_budget=2000)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(
+            f"{count:>7}{len(index.passages):>10}{build:>11.2f}{rebuild:>16.2f}"
+            f"{latencies[len(latencies) // 2]:>16.2f}{latencies[int(len(latencies) * 0.95)]:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Tests for the per-provider circuit breaker and stale-response fallback.
+"""
+# pylint: disable=protected-access
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.cache import cache
+from litellm.exceptions import APIConnectionError, BadRequestError
+
+from openedx_ai_extensions.decorators import EXCEPTION_MAP
+from openedx_ai_extensions.processors.llm import circuit_breaker
+from openedx_ai_extensions.processors.llm.circuit_breaker import (
+    ProviderCircuitOpenError,
+    before_call,
+    get_circuit_states,
+    record_failure,
+    record_success,
+)
+from openedx_ai_extensions.processors.llm.litellm_base_processor import LitellmProcessor
+
+
+@pytest.fixture(autouse=True)
+def breaker_enabled(settings):
+    """Enable the breaker with a low threshold and clean shared state."""
+    settings.AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER = True
+    settings.AI_EXTENSIONS_CIRCUIT_BREAKER = {"failure_threshold": 2, "open_seconds": 30}
+    settings.AI_EXTENSIONS = {
+        "primary": {"MODEL": "anthropic/claude-primary", "API_KEY": "key-primary"},
+        "backup": {"MODEL": "anthropic/claude-backup", "API_KEY": "key-backup"},
+    }
+    cache.clear()
+    yield settings
+    cache.clear()
+
+
+def _connection_error():
+    return APIConnectionError(message="connection refused", llm_provider="anthropic", model="claude")
+
+
+def _state(profile):
+    return get_circuit_states([profile])[0]
+
+
+def test_circuit_opens_after_threshold():
+    """Consecutive outage errors open the circuit and calls then fail fast."""
+    record_failure("primary")
+    before_call("primary")
+    record_failure("primary")
+
+    with pytest.raises(ProviderCircuitOpenError):
+        before_call("primary")
+    state = _state("primary")
+    assert state["state"] == "open"
+    assert state["recent_failures"] == 2
+    assert 0 < state["open_for_s"] <= 30
+
+
+def test_half_open_allows_single_probe():
+    """After the open period only one caller gets through until the probe resolves."""
+    record_failure("primary")
+    record_failure("primary")
+
+    with patch("openedx_ai_extensions.processors.llm.circuit_breaker.time.time", return_value=time.time() + 31):
+        assert _state("primary")["state"] == "half-open"
+        before_call("primary")
+        with pytest.raises(ProviderCircuitOpenError):
+            before_call("primary")
+
+
+def test_probe_success_closes_circuit():
+    """A successful probe closes the circuit and clears the failure count."""
+    record_failure("primary")
+    record_failure("primary")
+    with patch("openedx_ai_extensions.processors.llm.circuit_breaker.time.time", return_value=time.time() + 31):
+        before_call("primary")
+        record_success("primary")
+
+    before_call("primary")
+    assert _state("primary") == {"profile": "primary", "state": "closed", "recent_failures": 0, "open_for_s": None}
+
+
+def test_failure_after_probe_success_does_not_reopen_circuit():
+    """The failures that opened the circuit don't count toward opening it again once a probe succeeded."""
+    record_failure("primary")
+    record_failure("primary")
+    with patch("openedx_ai_extensions.processors.llm.circuit_breaker.time.time", return_value=time.time() + 31):
+        before_call("primary")
+        record_success("primary")
+
+    record_failure("primary")
+    before_call("primary")
+    assert _state("primary")["state"] == "closed"
+
+
+def test_failures_between_successes_open_circuit():
+    """Successes don't reset the windowed failure count, so a provider failing every other call trips the breaker."""
+    record_failure("primary")
+    record_success("primary")
+    before_call("primary")
+    record_failure("primary")
+
+    with pytest.raises(ProviderCircuitOpenError):
+        before_call("primary")
+
+
+def test_probe_failure_reopens_circuit():
+    """A failing probe opens the circuit again for a full period."""
+    record_failure("primary")
+    record_failure("primary")
+    later = time.time() + 31
+    with patch("openedx_ai_extensions.processors.llm.circuit_breaker.time.time", return_value=later):
+        before_call("primary")
+        record_failure("primary")
+        with pytest.raises(ProviderCircuitOpenError):
+            before_call("primary")
+
+
+def test_breaker_disabled_never_blocks(settings):
+    """With AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER off, failures are not tracked."""
+    settings.AI_EXTENSIONS_ENABLE_CIRCUIT_BREAKER = False
+    for _ in range(5):
+        record_failure("primary")
+    before_call("primary")
+    assert _state("primary")["state"] == "closed"
+
+
+def test_open_circuit_maps_to_service_unavailable():
+    """handle_ai_errors turns an open circuit into the existing 503 contract."""
+    error = ProviderCircuitOpenError("primary", "anthropic/claude")
+    config = next(cfg for exc_type, cfg in EXCEPTION_MAP.items() if isinstance(error, exc_type))
+    assert config["status"] == 503
+
+
+@pytest.mark.django_db
+def test_processor_fails_fast_when_circuit_open():
+    """Once open, LitellmProcessor stops calling the provider."""
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": "primary"}})
+    api_call = Mock(side_effect=_connection_error())
+    params = {"model": "anthropic/claude-primary", "messages": []}
+
+    for _ in range(2):
+        with pytest.raises(APIConnectionError):
+            processor._call_litellm(api_call, params)
+    with pytest.raises(ProviderCircuitOpenError):
+        processor._call_litellm(api_call, params)
+    assert api_call.call_count == 2
+
+
+@pytest.mark.django_db
+def test_request_errors_do_not_trip_the_breaker():
+    """Bad requests are the caller's fault and leave the circuit closed."""
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": "primary"}})
+    api_call = Mock(side_effect=BadRequestError(message="bad", model="claude", llm_provider="anthropic"))
+
+    for _ in range(3):
+        with pytest.raises(BadRequestError):
+            processor._call_litellm(api_call, {"model": "anthropic/claude-primary", "messages": []})
+    assert _state("primary")["state"] == "closed"
+
+
+@pytest.mark.django_db
+def test_open_circuit_fails_over_to_next_profile():
+    """With a provider list, an open circuit moves straight on to the next profile."""
+    record_failure("primary")
+    record_failure("primary")
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": ["primary", "backup"]}})
+    api_call = Mock(return_value="from backup")
+
+    assert processor._call_litellm(api_call, {**processor.extra_params, "messages": []}) == "from backup"
+    assert api_call.call_count == 1
+    assert api_call.call_args.kwargs["model"] == "anthropic/claude-backup"
+
+
+@pytest.mark.django_db
+def test_stale_fallback_serves_last_response():
+    """Deterministic workflows get the last good response while the provider is down."""
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": "primary", "stale_fallback": True}})
+    params = {"model": "anthropic/claude-primary", "messages": [{"role": "system", "content": "Summarize"}]}
+    api_call = Mock(return_value={"content": "cached summary"})
+
+    assert processor._call_litellm(api_call, params) == {"content": "cached summary"}
+
+    api_call.side_effect = _connection_error()
+    assert processor._call_litellm(api_call, params) == {"content": "cached summary"}
+    assert processor._call_litellm(api_call, params) == {"content": "cached summary"}
+    with pytest.raises(ProviderCircuitOpenError):
+        processor._call_litellm(api_call, {**params, "messages": [{"role": "user", "content": "new"}]})
+
+
+@pytest.mark.django_db
+def test_stale_fallback_skips_streaming_and_other_credentials():
+    """Streams are never cached; the fallback key ignores credentials and clients."""
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": "primary", "stale_fallback": True}})
+    api_call = Mock(return_value="streamed")
+    processor._call_litellm(api_call, {"model": "anthropic/claude-primary", "messages": [], "stream": True})
+
+    api_call.side_effect = _connection_error()
+    with pytest.raises(APIConnectionError):
+        processor._call_litellm(api_call, {"model": "anthropic/claude-primary", "messages": [], "stream": True})
+
+    key = circuit_breaker.stale_response_key("completion", {"model": "m", "messages": [], "api_key": "a"})
+    assert key == circuit_breaker.stale_response_key("completion", {"model": "m", "messages": [], "api_key": "b"})
@@ -0,0 +1,202 @@
+"""
+Tests for the per-worker provider HTTP client pool.
+
+The end-to-end tests run LiteLLM against a local HTTP stub and check on the
+server side that consecutive calls reuse the same keep-alive connection.
+"""
+# pylint: disable=redefined-outer-name,protected-access
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import litellm
+import pytest
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+from openai import OpenAI
+
+from openedx_ai_extensions.processors.llm import client_pool
+from openedx_ai_extensions.processors.llm.client_pool import close_http_pool, get_http_pool_stats, get_pooled_client
+from openedx_ai_extensions.processors.llm.litellm_base_processor import LitellmProcessor
+
+ANTHROPIC_RESPONSE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-test",
+    "content": [{"type": "text", "text": "pong"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 10, "output_tokens": 2},
+}
+
+OPENAI_RESPONSE = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "gpt-test",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "pong"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answer every POST with a canned provider response and record the client port."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serve the canned JSON body for the requested API."""
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.client_ports.append(self.client_address[1])
+        body = OPENAI_RESPONSE if self.path.endswith("/chat/completions") else ANTHROPIC_RESPONSE
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Run a keep-alive capable HTTP stub on a free local port."""
+    # LiteLLM counts tokens with tiktoken; use its bundled encodings instead of downloading them.
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(Path(litellm.__file__).parent / "litellm_core_utils" / "tokenizers"))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.client_ports = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def pool_enabled(settings):
+    """Enable pooling and start every test with an empty pool."""
+    settings.AI_EXTENSIONS_ENABLE_HTTP_POOL = True
+    settings.AI_EXTENSIONS_HTTP_POOL = {"max_connections": 4, "max_keepalive_connections": 2}
+    close_http_pool()
+    yield settings
+    close_http_pool()
+
+
+def _stub_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_pooling_disabled_returns_none(settings):
+    """No client is injected unless AI_EXTENSIONS_ENABLE_HTTP_POOL is on."""
+    settings.AI_EXTENSIONS_ENABLE_HTTP_POOL = False
+    assert get_pooled_client("anthropic", {"model": "anthropic/claude", "messages": []}) is None
+
+
+def test_unknown_provider_and_explicit_client_are_left_alone():
+    """Providers without a known client type, and calls with a client, get nothing."""
+    assert get_pooled_client("ollama", {"model": "ollama/llama3", "messages": []}) is None
+    assert get_pooled_client("anthropic", {"model": "anthropic/claude", "messages": [], "client": object()}) is None
+
+
+def test_client_type_per_provider_and_api():
+    """OpenAI chat completions get an SDK client; the generic handler is used elsewhere."""
+    base = {"model": "openai/gpt-4o", "api_key": "sk-test"}
+    assert isinstance(get_pooled_client("openai", {**base, "messages": []}), OpenAI)
+    assert isinstance(get_pooled_client("openai", {**base, "input": []}), HTTPHandler)
+    assert isinstance(get_pooled_client("anthropic", {"model": "anthropic/claude", "messages": []}), HTTPHandler)
+
+
+def test_clients_are_keyed_by_profile():
+    """Model, api_base and api_key select distinct pooled clients; repeats reuse them."""
+    params = {"model": "anthropic/claude", "api_key": "key-a", "messages": []}
+
+    first = get_pooled_client("anthropic", params)
+    assert get_pooled_client("anthropic", dict(params)) is first
+    assert get_pooled_client("anthropic", {**params, "api_key": "key-b"}) is not first
+    assert get_pooled_client("anthropic", {**params, "api_base": "http://proxy"}) is not first
+
+    stats = get_http_pool_stats()
+    assert len(stats) == 3
+    assert all("key-a" not in json.dumps(entry) for entry in stats)
+
+
+def test_pool_limits_and_timeouts_come_from_settings():
+    """AI_EXTENSIONS_HTTP_POOL overrides the defaults of the shared httpx client."""
+    handler = get_pooled_client("anthropic", {"model": "anthropic/claude", "messages": []})
+    pool = handler.client._transport._pool
+
+    assert pool._max_connections == 4
+    assert pool._max_keepalive_connections == 2
+    assert handler.client.timeout.connect == client_pool.DEFAULT_HTTP_POOL_SETTINGS["connect_timeout"]
+
+
+def test_pool_is_reset_after_fork():
+    """A child process never reuses clients (and sockets) created by its parent."""
+    params = {"model": "anthropic/claude", "messages": []}
+    parent_client = get_pooled_client("anthropic", params)
+
+    with patch("openedx_ai_extensions.processors.llm.client_pool.os.getpid", return_value=-1):
+        assert get_http_pool_stats() == []
+        assert get_pooled_client("anthropic", params) is not parent_client
+
+
+def test_anthropic_completion_reuses_connection(stub_server):
+    """Consecutive LiteLLM calls through the pooled client share one keep-alive connection."""
+    from litellm import completion  # pylint: disable=import-outside-toplevel
+
+    params = {
+        "model": "anthropic/claude-test",
+        "api_base": _stub_url(stub_server),
+        "api_key": "test-key",
+        "messages": [{"role": "user", "content": "ping"}],
+    }
+    for _ in range(3):
+        response = completion(**params, client=get_pooled_client("anthropic", params))
+        assert response.choices[0].message.content == "pong"
+
+    assert len(stub_server.client_ports) == 3
+    assert len(set(stub_server.client_ports)) == 1
+    [stats] = get_http_pool_stats()
+    assert stats["requests"] == 3
+    assert stats["open_connections"] == 1
+    assert stats["error_responses"] == 0
+
+
+def test_openai_completion_reuses_connection(stub_server):
+    """The OpenAI SDK client built around the pooled httpx client keeps its connection."""
+    from litellm import completion  # pylint: disable=import-outside-toplevel
+
+    params = {
+        "model": "openai/gpt-test",
+        "api_base": _stub_url(stub_server),
+        "api_key": "test-key",
+        "messages": [{"role": "user", "content": "ping"}],
+    }
+    for _ in range(2):
+        response = completion(**params, client=get_pooled_client("openai", params))
+        assert response.choices[0].message.content == "pong"
+
+    assert len(stub_server.client_ports) == 2
+    assert len(set(stub_server.client_ports)) == 1
+
+
+@pytest.mark.django_db
+def test_call_litellm_injects_pooled_client(settings):
+    """LitellmProcessor._call_litellm passes the pooled client without mutating params."""
+    settings.AI_EXTENSIONS = {"default": {"MODEL": "anthropic/claude-test", "API_KEY": "test-key"}}
+    processor = LitellmProcessor(config={})
+    api_call = Mock(return_value="response")
+    params = {"model": "anthropic/claude-test", "messages": []}
+
+    assert processor._call_litellm(api_call, params) == "response"
+
+    assert isinstance(api_call.call_args.kwargs["client"], HTTPHandler)
+    assert "client" not in params
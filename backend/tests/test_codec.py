@@ -0,0 +1,83 @@
+"""
+Tests for the serialization of stored chat turns and session metadata.
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions import codec
+from openedx_ai_extensions.workflows.models import AIWorkflowProfile, AIWorkflowScope
+from openedx_ai_extensions.workflows.orchestrators.flashcards_orchestrator import FlashCardsOrchestrator
+
+User = get_user_model()
+
+TURN = [
+    {"role": "system", "content": "Course context. " * 400},
+    {"role": "user", "content": "What is a loop?", "tokens": 8},
+    {"role": "assistant", "content": "A loop repeats a block of code.", "tokens": 12},
+]
+
+
+def test_small_values_stay_plain_json():
+    """Values under min_bytes are plain JSON, readable by json.loads."""
+    encoded = codec.encode(TURN[1:])
+    assert not codec.is_envelope(encoded)
+    assert json.loads(encoded) == TURN[1:]
+    assert codec.pack({"collection_name": "Quiz"}) == {"collection_name": "Quiz"}
+
+
+def test_large_values_are_compressed():
+    """Large values are stored in a smaller envelope and read back unchanged."""
+    encoded = codec.encode(TURN)
+    assert encoded.startswith("aix1:zlib:")
+    assert len(encoded) < len(json.dumps(TURN)) / 10
+    assert codec.decode(encoded) == TURN
+
+    packed = codec.pack(TURN)
+    assert codec.is_envelope(packed)
+    assert codec.unpack(packed) == TURN
+
+
+def test_decode_reads_rows_written_by_json_dumps():
+    """Submissions stored before the codec are still read."""
+    assert codec.decode(json.dumps(TURN)) == TURN
+    assert codec.unpack(TURN) == TURN
+
+
+def test_compression_can_be_disabled(settings):
+    """With compression off every value is plain JSON."""
+    settings.AI_EXTENSIONS_ENABLE_CODEC_COMPRESSION = False
+    assert json.loads(codec.encode(TURN)) == TURN
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(settings):
+    """Asking for zstd without the zstandard package writes zlib envelopes."""
+    settings.AI_EXTENSIONS_CODEC = {"compression": "zstd"}
+    with patch.object(codec, "zstandard", None):
+        encoded = codec.encode(TURN)
+        assert encoded.startswith("aix1:zlib:")
+        with pytest.raises(ValueError):
+            codec.decode("aix1:zstd:AAAA")
+    assert codec.decode(encoded) == TURN
+
+
+@pytest.mark.django_db
+def test_flashcard_deck_is_stored_packed():
+    """A large deck is stored compressed in the session metadata and returned unpacked."""
+    course_key = CourseKey.from_string("course-v1:edX+DemoX+Demo_Course")
+    profile = AIWorkflowProfile.objects.create(slug="cards", base_filepath="base/default.json", content_patch="{}")
+    scope = AIWorkflowScope.objects.create(
+        location_regex=".*", course_id=course_key, service_variant="lms", profile=profile, enabled=True
+    )
+    user = User.objects.create_user(username="cards", email="cards@example.com")
+    orchestrator = FlashCardsOrchestrator(workflow=scope, user=user, context={"course_id": str(course_key)})
+    cards = [{"id": index, "question": f"Question {index}?", "answer": "An answer. " * 10} for index in range(100)]
+
+    orchestrator.save({"cards": cards})
+    orchestrator.session.refresh_from_db()
+
+    assert codec.is_envelope(orchestrator.session.metadata["cards"])
+    assert orchestrator.get_current_session_response(None)["cards"] == cards
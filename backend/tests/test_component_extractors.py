@@ -1,92 +1,73 @@
 """
 Unit tests for component_extractors module.
 
-These tests cover HTML extraction helpers, html_to_text conversion, transcript loading,
+These tests cover embedded content descriptions, html_to_text conversion, transcript loading,
 block extractors, and allowed field filtering. Mocks are used for edxval API interactions.
 """
 
 import json
 from unittest.mock import MagicMock, patch
 
-from bs4 import BeautifulSoup
 from django.conf import settings
+from django.test import override_settings
 
 from openedx_ai_extensions.processors.openedx.utils.component_extractors import (
-    _assemble_problem_text,
     _check_show_answer,
-    _clean_noisy_tags,
-    _extract_embeds,
-    _extract_iframes,
-    _extract_images,
-    _extract_media,
-    _extract_objects,
-    _extract_solution_feedback,
-    _extract_xblocks,
     _is_field_allowed,
     _load_transcript_content,
     _process_problem_html,
-    _remove_sensitive_content,
     extract_discussion_info,
     extract_generic_info,
     extract_html_info,
     extract_problem_info,
     extract_video_info,
+    get_compiled_field_filters,
     html_to_text,
 )
 
 # -------------------------------------------------------------------------
-# HTML EXTRACTION HELPERS
+# EMBEDDED CONTENT
 # -------------------------------------------------------------------------
 
 
 def test_extract_iframes():
     """Test that <iframe> tags are converted into LLM-friendly descriptive strings."""
-    soup = BeautifulSoup('<iframe src="/x" title="Player"></iframe>', "html.parser")
-    result = _extract_iframes(soup)
-    assert result == ['[Embedded iframe: title="Player", src="/x"]']
+    result = html_to_text('<iframe src="/x" title="Player"></iframe>')
+    assert result == '[Embedded iframe: title="Player", src="/x"]'
 
 
 def test_extract_objects_pdf():
     """Test that <object> tags with PDF MIME type are correctly identified as PDFs."""
-    soup = BeautifulSoup(
-        '<object data="/a.pdf" type="application/pdf" title="Doc"></object>', "html.parser"
-    )
-    assert _extract_objects(soup) == ['[Embedded PDF: title="Doc", file="/a.pdf"]']
+    result = html_to_text('<object data="/a.pdf" type="application/pdf" title="Doc"></object>')
+    assert result == '[Embedded PDF: title="Doc", file="/a.pdf"]'
 
 
 def test_extract_objects_generic():
     """Test extraction of non-PDF <object> tags."""
-    soup = BeautifulSoup('<object data="/a.obj" type="3d/obj"></object>', "html.parser")
-    assert _extract_objects(soup) == ['[Embedded object: title="Object", type="3d/obj", file="/a.obj"]']
+    result = html_to_text('<object data="/a.obj" type="3d/obj"></object>')
+    assert result == '[Embedded object: title="Object", type="3d/obj", file="/a.obj"]'
 
 
 def test_extract_images():
     """Test that <img> tags are converted into descriptive strings with alt and src."""
-    soup = BeautifulSoup('<img src="/img.png" alt="Logo">', "html.parser")
-    assert _extract_images(soup) == ['[Embedded image: alt="Logo", src="/img.png"]']
+    assert html_to_text('<img src="/img.png" alt="Logo">') == '[Embedded image: alt="Logo", src="/img.png"]'
 
 
 def test_extract_media():
     """Test extraction of <video> and <audio> tags including <source> elements."""
-    soup = BeautifulSoup(
-        '<video title="Lec"><source src="/v1.mp4"><source src="/v2.webm"></video>',
-        "html.parser",
-    )
-    assert _extract_media(soup) == [
-        '[Embedded video: title="Lec", sources="/v1.mp4, /v2.webm"]'
-    ]
+    result = html_to_text('<video title="Lec"><source src="/v1.mp4"><source src="/v2.webm"></video>')
+    assert result == '[Embedded video: title="Lec", sources="/v1.mp4, /v2.webm"]'
 
 
 def test_extract_embeds():
     """Test extraction of <embed> tags into descriptive strings."""
-    soup = BeautifulSoup('<embed src="/x.swf">', "html.parser")
-    assert _extract_embeds(soup) == ['[Embedded content: tag=embed, src="/x.swf"]']
+    assert html_to_text('<embed src="/x.swf">') == '[Embedded content: tag=embed, src="/x.swf"]'
 
 
 def test_extract_xblocks():
     """Test extraction of custom XBlock <div> placeholders."""
-    soup = BeautifulSoup('<div data-type="problem" data-block-id="id123"></div>', "html.parser")
-    assert _extract_xblocks(soup) == ['[Embedded XBlock: type="problem", id="id123"]']
+    result = html_to_text('<div data-type="problem" data-block-id="id123"></div>')
+    assert result == '[Embedded XBlock: type="problem", id="id123"]'
 
 
 # -------------------------------------------------------------------------
@@ -111,7 +92,7 @@ def test_html_to_text_with_embeds():
 def test_html_to_text_invalid_html():
     """Test html_to_text returns raw HTML if parsing fails."""
     with patch(
-        "openedx_ai_extensions.processors.openedx.utils.component_extractors.BeautifulSoup",
+        "openedx_ai_extensions.processors.openedx.utils.component_extractors.scan_html_text",
         side_effect=Exception,
     ):
         assert html_to_text("<bad>") == "<bad>"
@@ -176,8 +157,8 @@ def test_load_transcript_no_transcripts():
     assert _load_transcript_content(block) is None
 
 
-def test_load_transcript_api_error_fallback():
-    """Test that API exceptions return the original transcripts dict."""
+def test_load_transcript_api_error_returns_none():
+    """Test that API exceptions return None instead of the raw transcripts dict."""
     block = MagicMock()
     block.transcripts = {"en": {"text": "fallback"}}
     block.edx_video_id = "v1"
@@ -188,7 +169,7 @@ def test_load_transcript_api_error_fallback():
 
     with patch.dict("sys.modules", {"edxval.api": mock_edxval_api}):
         result = _load_transcript_content(block)
-        assert result == block.transcripts
+        assert result is None
 
 
 # -------------------------------------------------------------------------
@@ -239,9 +220,13 @@ def test_extract_video_info_with_transcript():
     """Test extraction of Video blocks includes transcript if available."""
     block = make_block(category="video", display_name="Vid", edx_video_id="v1")
     block.transcripts = {"en": {}}
-    result = extract_video_info(block)
+    mock_edxval_api = MagicMock()
+    mock_edxval_api.get_video_transcript_data.return_value = {"content": json.dumps({"text": ["Hi", "there"]})}
+
+    with patch.dict("sys.modules", {"edxval.api": mock_edxval_api}):
+        result = extract_video_info(block)
     assert result["type"] == "video"
-    assert "transcript_text" in result
+    assert result["transcript_text"] == "Hi there"
 
 
 def test_extract_video_info_no_transcript():
@@ -288,6 +273,41 @@ def test_extract_generic_info_filters_fields(monkeypatch):
     assert "skip_me" not in result
 
 
+class CustomBlock:
+    """Stand-in for a custom XBlock class."""
+
+    fields = ("title", "course_description", "secret")
+
+    def __init__(self, title):
+        self.location = "block-v1:edX+T+1+type@custom+block@x"
+        self.display_name = title
+        self.category = "custom"
+        self.title = title
+        self.course_description = "About"
+        self.secret = "hidden"
+
+
+@override_settings(AI_EXTENSIONS_FIELD_FILTERS={"allowed_fields": ["title"], "allowed_field_substrings": ["desc"]})
+def test_extract_generic_info_reuses_plan_per_block_class():
+    """Fields are checked once per block class; later blocks of the class only gather attributes."""
+    compiled = get_compiled_field_filters()
+    with patch.object(compiled, "allows", wraps=compiled.allows) as allows:
+        first = extract_generic_info(CustomBlock("One"))
+        second = extract_generic_info(CustomBlock("Two"))
+
+    assert allows.call_count == len(CustomBlock.fields)
+    assert first["fields"] == {"title": "One", "course_description": "About"}
+    assert second["fields"] == {"title": "Two", "course_description": "About"}
+
+
+def test_compiled_filters_follow_setting_changes():
+    """Overriding AI_EXTENSIONS_FIELD_FILTERS recompiles the filters and their plans."""
+    with override_settings(AI_EXTENSIONS_FIELD_FILTERS={"allowed_fields": ["title"]}):
+        assert extract_generic_info(CustomBlock("One"))["fields"] == {"title": "One"}
+    with override_settings(AI_EXTENSIONS_FIELD_FILTERS={"allowed_fields": ["secret"]}):
+        assert extract_generic_info(CustomBlock("One"))["fields"] == {"secret": "hidden"}
+
+
 # -------------------------------------------------------------------------
 # _check_show_answer
 # -------------------------------------------------------------------------
@@ -332,7 +352,7 @@ def test_extract_problem_info_show_answer_auto():
     assert "[Solution]" not in result2["text"]
 
 # -------------------------------------------------------------------------
-# _remove_sensitive_content
+# Sensitive content (show_answer=False)
 # -------------------------------------------------------------------------
 
 
@@ -347,10 +367,8 @@ def test_remove_sensitive_content_removes_tags_and_classes():
         <div class="correctness">Correctness info</div>
     </div>
     """
-    soup = BeautifulSoup(html, "html.parser")
-    _remove_sensitive_content(soup)
+    text = _process_problem_html(html, show_answer=False)
 
-    text = soup.get_text(strip=True)
     assert "Question text" in text
     assert "Hidden solution" not in text
     assert "Hidden hint" not in text
@@ -358,82 +376,62 @@ def test_remove_sensitive_content_removes_tags_and_classes():
     assert "Correctness info" not in text
 
 
-def test_remove_sensitive_content_cleans_choice_attributes():
-    """Test that the 'correct' attribute is removed from choice tags."""
+def test_remove_sensitive_content_does_not_mark_correct_choices():
+    """Test that correct choices are not revealed."""
     html = """
     <choicegroup>
         <choice correct="true">Option A</choice>
         <choice correct="false">Option B</choice>
     </choicegroup>
     """
-    soup = BeautifulSoup(html, "html.parser")
-    _remove_sensitive_content(soup)
+    text = _process_problem_html(html, show_answer=False)
 
-    choices = soup.find_all("choice")
-    for choice in choices:
-        assert not choice.has_attr("correct")
+    assert "[CORRECT ANSWER]" not in text
     # Content should remain
-    assert "Option A" in soup.get_text()
+    assert "Option A" in text
 
 
 # -------------------------------------------------------------------------
-# _extract_solution_feedback
+# Solutions and feedback (show_answer=True)
 # -------------------------------------------------------------------------
 
 def test_extract_solution_feedback_marks_correct_answers():
-    """Test that correct answers get explicitly marked in the soup."""
+    """Test that correct answers get explicitly marked."""
     html = """
     <choicegroup>
         <choice correct="true">Paris</choice>
         <choice correct="false">London</choice>
     </choicegroup>
     """
-    soup = BeautifulSoup(html, "html.parser")
-    extracted = _extract_solution_feedback(soup)
+    text = _process_problem_html(html, show_answer=True)
 
-    # Check modification of the soup (inline marking)
-    correct_choice = soup.find("choice", attrs={"correct": "true"})
-    assert "[CORRECT ANSWER]" in correct_choice.get_text()
-
-    # Check that nothing was extracted into the list (since these are choices, not hints/solutions)
-    assert not extracted
-    assert isinstance(extracted, list)
+    assert text.splitlines() == ["[CORRECT ANSWER]", "Paris", "London"]
 
 
 def test_extract_solution_feedback_pulls_info():
-    """Test that solutions, hints, and feedback are extracted and removed from soup."""
+    """Test that solutions, hints, and feedback are moved after the problem text."""
     html = """
     <div>
+        <p>Question</p>
         <solution>42</solution>
         <hint>Try counting</hint>
         <div class="detailed-solution">It is the answer.</div>
     </div>
     """
-    soup = BeautifulSoup(html, "html.parser")
-    extracted = _extract_solution_feedback(soup)
-
-    expected_snippets = [
-        "[Solution]: 42",
-        "[Hint]: Try counting",
-        "[Feedback/Explanation]: It is the answer."
-    ]
+    lines = _process_problem_html(html, show_answer=True).splitlines()
 
-    # Verify extracted list contents
-    for expect in expected_snippets:
-        assert expect in extracted
-
-    # Verify tags are gone from soup
-    soup_text = soup.get_text(strip=True)
-    assert "42" not in soup_text
-    assert "Try counting" not in soup_text
+    assert lines[0] == "Question"
+    for expect in ["[Solution]: 42", "[Hint]: Try counting", "[Feedback/Explanation]: It is the answer."]:
+        assert expect in lines[1:]
+    assert "42" not in lines and "Try counting" not in lines
 
 
 # -------------------------------------------------------------------------
-# _clean_noisy_tags
+# Noisy tags
 # -------------------------------------------------------------------------
 
 def test_clean_noisy_tags():
-    """Test removal of script, style, img and other noisy tags."""
+    """Test removal of script, style, img and other noisy tags from the text."""
     html = """
     <div>
         <p>Keep me</p>
@@ -442,42 +440,9 @@ def test_clean_noisy_tags():
         <img src="img.png" alt="img" />
     </div>
     """
-    soup = BeautifulSoup(html, "html.parser")
-    _clean_noisy_tags(soup)
-
-    text = soup.get_text(strip=True)
-    assert "Keep me" in text
-    assert "console.log" not in text
-    assert ".css" not in text
-    assert soup.find("img") is None
-
-
-# -------------------------------------------------------------------------
-# _assemble_problem_text
-# -------------------------------------------------------------------------
-
-def test_assemble_problem_text_with_show_answer():
-    """Test assembling text with extracted sections appended."""
-    soup = BeautifulSoup("<p>Question</p>", "html.parser")
-    extracted = ["[Solution]: 42"]
-
-    result = _assemble_problem_text(soup, extracted, show_answer=True)
-
-    assert "Question" in result
-    assert "[Solution]: 42" in result
-
-
-def test_assemble_problem_text_without_show_answer():
-    """Test that extracted sections are ignored if show_answer is False."""
-    soup = BeautifulSoup("<p>Question</p>", "html.parser")
-    extracted = ["[Solution]: 42"]
-
-    # Even if extracted list is passed (which technically shouldn't happen in flow),
-    # the function should ignore it if show_answer=False
-    result = _assemble_problem_text(soup, extracted, show_answer=False)
+    text = _process_problem_html(html, show_answer=False)
 
-    assert "Question" in result
-    assert "[Solution]: 42" not in result
+    assert text == "Keep me"
 
 
 # -------------------------------------------------------------------------
@@ -533,11 +498,11 @@ def test_process_problem_html_empty_input():
     assert _process_problem_html(None, False) == ""
 
 
-@patch("openedx_ai_extensions.processors.openedx.utils.component_extractors.BeautifulSoup")
-def test_process_problem_html_exception_handling(mock_bs):
+@patch("openedx_ai_extensions.processors.openedx.utils.component_extractors.scan_problem_text")
+def test_process_problem_html_exception_handling(mock_scan):
     """Test that if processing fails, raw HTML is returned."""
     # Force an exception during processing
-    mock_bs.side_effect = Exception("Boom")
+    mock_scan.side_effect = Exception("Boom")
 
     raw_html = "<div>Raw</div>"
     result = _process_problem_html(raw_html, show_answer=True)
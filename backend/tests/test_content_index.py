@@ -0,0 +1,191 @@
+"""
+Tests for the persistent unit content index.
+"""
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from openedx_ai_extensions.models import UnitContentIndex
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils import content_indexing
+from openedx_ai_extensions.processors.openedx.utils.content_indexing import index_course
+from openedx_ai_extensions.processors.openedx.utils.extraction_cache import clear_local_cache
+
+COURSE_KEY = CourseKey.from_string("course-v1:edX+T+1")
+EDITED_ON = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(settings):
+    """Start every test with the index on and empty caches."""
+    settings.AI_EXTENSIONS_ENABLE_CONTENT_INDEX = True
+    cache.clear()
+    clear_local_cache()
+    yield
+    cache.clear()
+    clear_local_cache()
+
+
+def make_block(category, name, children=(), data=""):
+    """Build a published block with real usage keys."""
+    block = MagicMock()
+    block.location = COURSE_KEY.make_usage_key(category, name)
+    block.category = category
+    block.display_name = name.title()
+    block.data = data
+    block.showanswer = "never"
+    block.edited_on = EDITED_ON
+    block.get_children.return_value = list(children)
+    return block
+
+
+def make_course():
+    """Build a course with one sequence of two HTML units."""
+    units = [
+        make_block("vertical", f"unit{index}", [make_block("html", f"html{index}", data=f"<p>Text {index}</p>")])
+        for index in range(2)
+    ]
+    sequence = make_block("sequential", "seq", units)
+    course = make_block("course", "course", [make_block("chapter", "chapter", [sequence])])
+    course.course_version = "v1"
+    return course
+
+
+def modulestore_modules(course):
+    """Return sys.modules entries for a fake modulestore serving ``course``."""
+    store = MagicMock()
+    store.get_course.return_value = course
+    xmodule = MagicMock()
+    xmodule.django.modulestore.return_value = store
+    return {"xmodule": xmodule, "xmodule.modulestore": xmodule, "xmodule.modulestore.django": xmodule.django}
+
+
+def run_index(course):
+    """Index ``course`` and return the run summary."""
+    with patch.dict("sys.modules", modulestore_modules(course)):
+        return index_course(COURSE_KEY)
+
+
+# -------------------------------------------------------------------------
+# Indexing
+# -------------------------------------------------------------------------
+
+@pytest.mark.django_db
+def test_index_stores_each_unit():
+    """Every unit is stored with its content, position, token count and hash."""
+    assert run_index(make_course()) == {"units": 2, "extracted": 2, "deleted": 0}
+
+    rows = list(UnitContentIndex.objects.order_by("position"))
+    assert [row.content["blocks"][0]["text"] for row in rows] == ["Text 0", "Text 1"]
+    assert [row.position for row in rows] == [0, 1]
+    assert rows[0].sequence_display_name == "Seq"
+    assert rows[0].token_count > 0 and len(rows[0].content_hash) == 64
+    assert {row.course_version for row in rows} == {"v1"}
+
+
+@pytest.mark.django_db
+def test_only_changed_units_are_reextracted():
+    """Units whose blocks are unchanged are not extracted again; removed units are deleted."""
+    course = make_course()
+    run_index(course)
+    assert run_index(course)["extracted"] == 0
+
+    sequence = course.get_children()[0].get_children()[0]
+    edited_html = sequence.get_children()[1].get_children()[0]
+    edited_html.data = "<p>Edited</p>"
+    edited_html.edited_on = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    assert run_index(course) == {"units": 2, "extracted": 1, "deleted": 0}
+    assert UnitContentIndex.objects.get(position=1).content["blocks"][0]["text"] == "Edited"
+
+    sequence.get_children.return_value = sequence.get_children()[1:]
+    assert run_index(course) == {"units": 1, "extracted": 0, "deleted": 1}
+    assert UnitContentIndex.objects.get().position == 0
+
+
+# -------------------------------------------------------------------------
+# Reading
+# -------------------------------------------------------------------------
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("retrieval_mode, expected_units", [
+    ("unit", None),
+    ("up_to_current_unit", ["Unit0"]),
+    ("sequence", ["Unit0", "Unit1"]),
+])
+def test_location_content_is_read_from_index(retrieval_mode, expected_units):
+    """Current indexed units and sequences are served without loading blocks from the modulestore."""
+    course = make_course()
+    run_index(course)
+    unit_id = str(COURSE_KEY.make_usage_key("vertical", "unit0"))
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"retrieval_mode": retrieval_mode}})
+
+    with patch.dict("sys.modules", modulestore_modules(course)) as modules:
+        result = processor.get_location_content(location_id=unit_id)
+        modules["xmodule.modulestore.django"].modulestore.return_value.get_item.assert_not_called()
+
+    if expected_units is None:
+        assert result["display_name"] == "Unit0"
+        assert result["blocks"][0]["text"] == "Text 0"
+    else:
+        assert result["retrieval_mode"] == retrieval_mode
+        assert result["display_name"] == "Seq"
+        assert [unit["display_name"] for unit in result["units"]] == expected_units
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("retrieval_mode", ["unit", "sequence"])
+def test_index_of_older_publish_is_not_served(retrieval_mode):
+    """After a new publish, rows stay unused until an index run stamps them with the new version."""
+    course = make_course()
+    run_index(course)
+    course.course_version = "v2"
+    unit_key = COURSE_KEY.make_usage_key("vertical", "unit0")
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"retrieval_mode": retrieval_mode}})
+
+    with patch.dict("sys.modules", modulestore_modules(course)):
+        assert processor._get_indexed_content(unit_key, retrieval_mode) is None  # pylint: disable=protected-access
+        run_index(course)
+        assert processor._get_indexed_content(unit_key, retrieval_mode) is not None  # pylint: disable=protected-access
+
+
+@pytest.mark.django_db
+def test_incomplete_sequence_is_not_served():
+    """A sequence with a unit missing from the index is read from the modulestore."""
+    course = make_course()
+    run_index(course)
+    UnitContentIndex.objects.filter(position=0).delete()
+    unit_key = COURSE_KEY.make_usage_key("vertical", "unit1")
+
+    with patch.dict("sys.modules", modulestore_modules(course)):
+        assert OpenEdXProcessor()._get_indexed_content(unit_key, "sequence") is None  # pylint: disable=protected-access
+
+
+@pytest.mark.django_db
+def test_non_default_config_reads_modulestore():
+    """Profiles that change show_answer bypass the index, which holds default-config content."""
+    run_index(make_course())
+    unit_key = UsageKey.from_string(str(COURSE_KEY.make_usage_key("vertical", "unit0")))
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"show_answer": "always"}})
+
+    assert processor._get_indexed_content(unit_key, "unit") is None  # pylint: disable=protected-access
+
+
+@pytest.mark.django_db
+def test_disabled_index_reads_modulestore(settings):
+    """AI_EXTENSIONS_ENABLE_CONTENT_INDEX = False always reads the modulestore."""
+    settings.AI_EXTENSIONS_ENABLE_CONTENT_INDEX = False
+    run_index(make_course())
+    unit_key = COURSE_KEY.make_usage_key("vertical", "unit0")
+
+    assert OpenEdXProcessor()._get_indexed_content(unit_key, "unit") is None  # pylint: disable=protected-access
+
+
+def test_publish_schedules_index_task():
+    """A course publish queues the index task for the course."""
+    with patch.object(content_indexing.index_course_content_task, "apply_async") as apply_async:
+        assert content_indexing.schedule_course_index(COURSE_KEY) is True
+        assert content_indexing.schedule_course_index(COURSE_KEY) is False
+    apply_async.assert_called_once_with(args=[str(COURSE_KEY)], countdown=60)
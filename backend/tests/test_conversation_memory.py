@@ -0,0 +1,115 @@
+"""
+Tests for the rolling conversation memory of long chats.
+"""
+# pylint: disable=redefined-outer-name
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.processors.llm import conversation_memory
+from openedx_ai_extensions.workflows.models import (
+    AIConversationSummary,
+    AIWorkflowProfile,
+    AIWorkflowScope,
+    AIWorkflowSession,
+)
+
+User = get_user_model()
+
+SYSTEM = {"role": "system", "content": "Course context"}
+
+
+@pytest.fixture(autouse=True)
+def memory_settings(settings):
+    """Turn memory on with small token budgets: each test message is about 30 tokens."""
+    settings.AI_EXTENSIONS_ENABLE_CONVERSATION_MEMORY = True
+    settings.AI_EXTENSIONS_CONVERSATION_MEMORY = {
+        "threshold_tokens": 200,
+        "recent_tokens": 100,
+        "max_tokens": 400,
+        "min_recent_messages": 2,
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def session(db):  # pylint: disable=unused-argument
+    """Create and return a chat session."""
+    course_key = CourseKey.from_string("course-v1:edX+DemoX+Demo_Course")
+    profile = AIWorkflowProfile.objects.create(
+        slug="test-memory", base_filepath="base/default.json", content_patch="{}"
+    )
+    scope = AIWorkflowScope.objects.create(
+        location_regex=".*", course_id=course_key, service_variant="lms", profile=profile, enabled=True
+    )
+    user = User.objects.create_user(username="memory", email="memory@example.com")
+    return AIWorkflowSession.objects.create(
+        user=user, scope=scope, profile=profile, course_id=course_key, local_submission_id="sub-1"
+    )
+
+
+def turns(count):
+    """Return ``count`` user/assistant turns of about 30 tokens per message."""
+    return [
+        {"role": role, "content": f"{role} message {index} " + "x" * 90}
+        for index in range(count)
+        for role in ("user", "assistant")
+    ]
+
+
+def test_short_history_is_unchanged(session):
+    """Histories under the threshold are sent as they are."""
+    history = [SYSTEM] + turns(2)
+    with patch.object(conversation_memory.update_conversation_summary_task, "delay") as delay:
+        assert conversation_memory.compact(session, history) == history
+    delay.assert_not_called()
+
+
+def test_long_history_schedules_one_summary_update(session):
+    """Without a summary the history is kept while an update is queued once."""
+    history = [SYSTEM] + turns(5)
+    with patch.object(conversation_memory.update_conversation_summary_task, "delay") as delay:
+        first = conversation_memory.compact(session, history)
+        conversation_memory.compact(session, history)
+
+    assert first == history
+    delay.assert_called_once_with(str(session.id), 8)
+
+
+def test_summary_replaces_covered_turns(session):
+    """Covered turns are replaced by the summary; the prompt is cut to the recent turns when too long."""
+    AIConversationSummary.objects.create(session=session, summary="Asked about loops.", covered_messages=4)
+    history = [SYSTEM, SYSTEM] + turns(5)
+
+    with patch.object(conversation_memory.update_conversation_summary_task, "delay"):
+        compacted = conversation_memory.compact(session, history)
+        cache.clear()
+        bounded = conversation_memory.compact(session, [SYSTEM] + turns(12))
+
+    assert compacted[0] == SYSTEM
+    assert compacted[1]["content"] == conversation_memory.SUMMARY_PREFIX + "Asked about loops."
+    assert compacted[2:] == turns(5)[4:]
+    assert bounded[2:] == turns(12)[-2:]
+
+
+def test_update_summary_folds_uncovered_messages(session):
+    """A summary update only sends the messages after the current summary."""
+    AIConversationSummary.objects.create(session=session, summary="Earlier.", covered_messages=2)
+    history = turns(4)
+
+    with patch(
+        "openedx_ai_extensions.processors.openedx.submission_processor.SubmissionProcessor.get_full_message_history",
+        return_value=history,
+    ), patch(
+        "openedx_ai_extensions.processors.llm.llm_processor.LLMProcessor.summarize_conversation",
+        return_value="Updated.",
+    ) as summarize:
+        summary = conversation_memory.update_summary(session, 6)
+
+    summarize.assert_called_once_with("Earlier.", history[2:6])
+    assert (summary.summary, summary.covered_messages) == ("Updated.", 6)
@@ -0,0 +1,165 @@
+"""
+Tests for the cached course outline and course info.
+"""
+# pylint: disable=protected-access
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils import course_cache
+from openedx_ai_extensions.receivers import handle_course_catalog_info_changed
+
+COURSE_ID = "course-v1:edX+T+1"
+COURSE_KEY = CourseKey.from_string(COURSE_ID)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test with an empty cache."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_user(user_id):
+    """Return a stand-in user."""
+    return MagicMock(id=user_id)
+
+
+def test_outline_is_built_once_per_signature():
+    """Users with the same visibility signature share the cached outline; other signatures get their own."""
+    processor = OpenEdXProcessor(course_id=COURSE_ID)
+    signatures = {1: "50:1", 2: "50:1", 3: "50:2"}
+    with patch.object(course_cache, "_compute_visibility_signature",
+                      side_effect=lambda user, course_key: signatures[user.id]), \
+            patch.object(processor, "_build_course_outline", return_value="[]") as build:
+        for user_id in (1, 2, 1, 3):
+            assert processor.get_course_outline(user=make_user(user_id)) == "[]"
+
+    assert build.call_count == 2
+
+
+def test_publish_invalidates_outline():
+    """A new course generation rebuilds the outline."""
+    processor = OpenEdXProcessor(course_id=COURSE_ID)
+    with patch.object(course_cache, "_compute_visibility_signature", return_value="-"), \
+            patch.object(processor, "_build_course_outline", return_value="[]") as build:
+        processor.get_course_outline(user=make_user(1))
+        course_cache.invalidate_course(COURSE_KEY)
+        processor.get_course_outline(user=make_user(1))
+
+    assert build.call_count == 2
+
+
+def test_outline_is_not_cached_without_signature():
+    """When the user's visibility can't be determined, the outline is built for every call."""
+    processor = OpenEdXProcessor(course_id=COURSE_ID)
+    with patch.object(course_cache, "_compute_visibility_signature", side_effect=ImportError), \
+            patch.object(processor, "_build_course_outline", return_value="[]") as build:
+        processor.get_course_outline(user=make_user(1))
+        processor.get_course_outline(user=make_user(1))
+
+    assert build.call_count == 2
+
+
+def visibility_modules(beta_users=(), overrides=None, unfulfilled=None):
+    """Return sys.modules entries for the platform APIs of the visibility signature; every user is in group 50:1."""
+    platform = MagicMock()
+    platform.access.has_access.return_value = False
+    platform.partitions.get_user_partition_groups.return_value = {50: MagicMock(id=1)}
+    platform.roles.CourseBetaTesterRole.return_value.has_user.side_effect = lambda user: user.id in beta_users
+    platform.when.get_overrides_for_user.side_effect = lambda course_key, user: (overrides or {}).get(user.id, [])
+    platform.util.milestones_helpers.get_course_content_milestones.side_effect = (
+        lambda course_key, content_id, relationship, user_id: (unfulfilled or {}).get(user_id, [])
+    )
+    return {
+        "common": platform, "common.djangoapps": platform, "common.djangoapps.student": platform,
+        "common.djangoapps.student.roles": platform.roles, "common.djangoapps.util": platform.util,
+        "edx_when": platform, "edx_when.api": platform.when,
+        "lms": platform, "lms.djangoapps": platform, "lms.djangoapps.courseware": platform,
+        "lms.djangoapps.courseware.access": platform.access,
+        "xmodule": platform, "xmodule.modulestore": platform, "xmodule.modulestore.django": platform,
+        "xmodule.partitions": platform, "xmodule.partitions.partitions_service": platform.partitions,
+    }
+
+
+def test_signature_covers_beta_access_date_overrides_and_gating():
+    """Users in the same groups get different signatures when beta access, date overrides or gating differ."""
+    modules = visibility_modules(
+        beta_users={2},
+        overrides={3: [{"location": "block-v1:edX+T+1+type@sequential+block@s1", "actual_date": "2026-01-01"}]},
+        unfulfilled={4: [{"namespace": "course-v1:edX+T+1.gating", "id": 7}]},
+    )
+    with patch.dict("sys.modules", modules):
+        signatures = [course_cache._compute_visibility_signature(make_user(i), COURSE_KEY) for i in (1, 2, 3, 4, 5)]
+
+    assert signatures[0] == signatures[4] == "50:1"
+    assert len(set(signatures[:4])) == 4
+
+
+def test_outline_walker_emits_compact_structure():
+    """The outline keeps sections > subsections > units and drops branches without units."""
+    children = {
+        "root": ["ch1", "ch2", "about"],
+        "ch1": ["seq1", "seq-empty"],
+        "seq1": ["v1", "v2", "problem"],
+        "ch2": ["seq-empty"],
+    }
+    categories = {
+        "ch1": "chapter", "ch2": "chapter", "about": "about", "seq1": "sequential", "seq-empty": "sequential",
+        "v1": "vertical", "v2": "vertical", "problem": "problem",
+    }
+    block_structure = MagicMock(root_block_usage_key="root")
+    block_structure.get_children.side_effect = lambda key: children.get(key, [])
+    block_structure.get_xblock_field.side_effect = (
+        lambda key, field: categories[key] if field == "category" else key.upper()
+    )
+
+    assert OpenEdXProcessor()._serialize_block_structure_outline(block_structure) == [
+        {"display_name": "CH1", "category": "section", "subsections": [
+            {"display_name": "SEQ1", "category": "subsection", "units": [
+                {"display_name": "V1", "category": "unit"},
+                {"display_name": "V2", "category": "unit"},
+            ]},
+        ]},
+    ]
+
+
+def course_info_modules(title):
+    """Return sys.modules entries for the platform APIs get_course_info reads."""
+    details = MagicMock()
+    details.CourseDetails.fetch.return_value = MagicMock(subtitle="Sub", duration="4 weeks")
+    store = MagicMock()
+    store.django.modulestore.return_value.get_course.return_value = MagicMock(display_name=title)
+    return {
+        "openedx": details, "openedx.core": details, "openedx.core.djangoapps": details,
+        "openedx.core.djangoapps.models": details, "openedx.core.djangoapps.models.course_details": details,
+        "xmodule": store, "xmodule.modulestore": store, "xmodule.modulestore.django": store.django,
+    }
+
+
+def test_course_info_is_cached_until_details_change():
+    """Course info is read once per course generation; a catalog info change reloads it."""
+    processor = OpenEdXProcessor(course_id=COURSE_ID)
+    with patch.dict("sys.modules", course_info_modules("First")):
+        assert processor.get_course_info(fields=["title"]) == {"title": "First"}
+        assert processor.get_course_info()["duration"] == "4 weeks"
+    with patch.dict("sys.modules", course_info_modules("Renamed")):
+        assert processor.get_course_info(fields=["title"]) == {"title": "First"}
+        handle_course_catalog_info_changed(catalog_info=MagicMock(course_key=COURSE_KEY))
+        assert processor.get_course_info(fields=["title"]) == {"title": "Renamed"}
+
+
+def test_disabled_cache_builds_every_time(settings):
+    """AI_EXTENSIONS_ENABLE_COURSE_CACHE = False calls the builder on every request."""
+    settings.AI_EXTENSIONS_ENABLE_COURSE_CACHE = False
+    build = MagicMock(return_value=json.dumps([]))
+
+    course_cache.get_or_build("outline", COURSE_KEY, build)
+    course_cache.get_or_build("outline", COURSE_KEY, build)
+
+    assert build.call_count == 2
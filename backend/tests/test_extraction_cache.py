@@ -0,0 +1,145 @@
+"""
+Tests for the versioned component extraction cache.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.openedx.utils import extraction_cache
+from openedx_ai_extensions.processors.openedx.utils.component_extractors import (
+    extract_html_info,
+    extract_problem_info,
+    extract_video_info,
+)
+from openedx_ai_extensions.processors.openedx.utils.extraction_cache import (
+    cached_extract,
+    clear_local_cache,
+    extraction_cache_key,
+)
+
+EDITED_ON = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start every test with empty shared and local caches."""
+    cache.clear()
+    clear_local_cache()
+    yield
+    cache.clear()
+    clear_local_cache()
+
+
+def make_block(data="<p>Hello <b>world</b></p>", edited_on=EDITED_ON, location="block-v1:edX+T+1+type@html+block@a"):
+    """Build a block with the attributes the extractors read."""
+    block = MagicMock()
+    block.location = location
+    block.display_name = "Intro"
+    block.data = data
+    block.edited_on = edited_on
+    block.showanswer = "never"
+    return block
+
+
+def test_second_extraction_served_from_cache():
+    """Unchanged blocks are parsed once; later calls skip HTML parsing."""
+    block = make_block()
+    first = cached_extract(block, extract_html_info)
+
+    with patch("openedx_ai_extensions.processors.openedx.utils.component_extractors.scan_html_text") as scan:
+        second = cached_extract(block, extract_html_info)
+
+    assert second == first == {
+        "type": "html", "block_id": block.location, "title": "Intro", "text": "Hello\nworld",
+    }
+    scan.assert_not_called()
+
+
+def test_shared_cache_is_used_by_other_processes():
+    """An entry written by another worker is found in the Django cache and stored locally."""
+    block = make_block()
+    cached_extract(block, extract_html_info)
+    clear_local_cache()
+
+    block.data = "<p>changed without a new edited_on</p>"
+    assert cached_extract(block, extract_html_info)["text"] == "Hello\nworld"
+
+
+def test_edit_invalidates_entry():
+    """A new edited_on timestamp produces a new key and a fresh extraction."""
+    block = make_block()
+    cached_extract(block, extract_html_info)
+
+    block.data = "<p>Updated</p>"
+    block.edited_on = EDITED_ON + timedelta(minutes=5)
+    assert cached_extract(block, extract_html_info)["text"] == "Updated"
+
+
+def test_key_includes_show_answer_and_extractor_version():
+    """Problem output differs per show_answer mode and extractor version."""
+    block = make_block()
+    always = extraction_cache_key(block, extract_problem_info, "always")
+
+    assert always != extraction_cache_key(block, extract_problem_info, "auto")
+    assert extraction_cache_key(block, extract_html_info, "always") == extraction_cache_key(block, extract_html_info)
+    with patch.object(extraction_cache, "EXTRACTOR_VERSION", 2):
+        assert extraction_cache_key(block, extract_problem_info, "always") != always
+
+
+def test_problem_answers_not_leaked_across_modes():
+    """A cached answer-revealing extraction is never served to the hidden-answer mode."""
+    block = make_block(data='<problem><choice correct="true">A</choice><solution>Because</solution></problem>')
+    shown = cached_extract(block, extract_problem_info, True)
+    hidden = cached_extract(block, extract_problem_info, False)
+
+    assert "Because" in shown["text"]
+    assert "Because" not in hidden["text"]
+
+
+def test_returned_dicts_are_independent():
+    """Callers may truncate returned text without corrupting the cache."""
+    block = make_block()
+    cached_extract(block, extract_html_info)["text"] = "truncated"
+    assert cached_extract(block, extract_html_info)["text"] == "Hello\nworld"
+
+
+def test_unversioned_and_uncacheable_blocks_bypass_cache():
+    """Blocks without edited_on and video blocks (external transcripts) are always extracted."""
+    block = make_block(edited_on=None)
+    cached_extract(block, extract_html_info)
+    block.data = "<p>Again</p>"
+    assert cached_extract(block, extract_html_info)["text"] == "Again"
+
+    video = make_block()
+    video.transcripts = {}
+    with patch.object(extraction_cache, "cache") as shared:
+        cached_extract(video, extract_video_info)
+    shared.get.assert_not_called()
+
+
+def test_disabled_by_setting(settings):
+    """AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE = False turns caching off."""
+    settings.AI_EXTENSIONS_ENABLE_EXTRACTION_CACHE = False
+    block = make_block()
+    cached_extract(block, extract_html_info)
+    block.data = "<p>Again</p>"
+    assert cached_extract(block, extract_html_info)["text"] == "Again"
+
+
+def test_local_lru_is_bounded(settings):
+    """The per-process LRU keeps at most local_max_entries entries."""
+    settings.AI_EXTENSIONS_EXTRACTION_CACHE = {"local_max_entries": 2}
+    for index in range(3):
+        cached_extract(make_block(location=f"block-{index}"), extract_html_info)
+    assert len(extraction_cache._local) == 2  # pylint: disable=protected-access
+
+
+def test_cache_backend_errors_fall_back_to_extraction():
+    """A failing cache backend never breaks content extraction."""
+    broken = MagicMock()
+    broken.get.side_effect = ConnectionError("down")
+    broken.set.side_effect = ConnectionError("down")
+    with patch.object(extraction_cache, "cache", broken):
+        assert cached_extract(make_block(), extract_html_info)["text"] == "Hello\nworld"
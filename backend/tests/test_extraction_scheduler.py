@@ -0,0 +1,138 @@
+"""
+Tests for concurrent block extraction.
+"""
+# pylint: disable=protected-access
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils import extraction_scheduler
+from openedx_ai_extensions.processors.openedx.utils.extraction_cache import clear_local_cache
+from openedx_ai_extensions.processors.openedx.utils.extraction_scheduler import extract_blocks
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start every test with empty extraction caches."""
+    cache.clear()
+    clear_local_cache()
+    yield
+    cache.clear()
+    clear_local_cache()
+
+
+def make_block(name, category, data=""):
+    """Build a loaded block with the attributes the extractors read."""
+    block = MagicMock()
+    block.location = f"block-v1:edX+T+1+type@{category}+block@{name}"
+    block.display_name = name
+    block.category = category
+    block.data = data
+    block.showanswer = "never"
+    block.edited_on = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    block.get_children.return_value = []
+    return block
+
+
+def test_transcripts_load_concurrently_in_document_order():
+    """Transcripts of all videos are downloaded together; results keep document order."""
+    blocks = [make_block(f"v{index}", "video") for index in range(4)]
+    for index, block in enumerate(blocks):
+        block.edx_video_id = f"vid{index}"
+        block.transcripts = {"en": f"vid{index}-en.srt"}
+    blocks.insert(2, make_block("h", "html"))
+    barrier = threading.Barrier(4, timeout=5)
+
+    def get_video_transcript_data(video_id, language_code):
+        barrier.wait()  # raises BrokenBarrierError unless all four downloads are in flight at once
+        return {"content": f"1\n00:00:01,000 --> 00:00:02,000\n{video_id} {language_code}\n"}
+
+    edxval_api = Mock(get_video_transcript_data=get_video_transcript_data)
+    processor = OpenEdXProcessor(processor_config={})
+    with patch.dict("sys.modules", {"edxval.api": edxval_api}):
+        results = extract_blocks(blocks, processor._extract_block)
+
+    assert [result["title"] for result in results] == ["v0", "v1", "h", "v2", "v3"]
+    assert [result.get("transcript_text") for result in results] == [
+        "vid0 en", "vid1 en", None, "vid2 en", "vid3 en",
+    ]
+
+
+def test_failures_are_isolated():
+    """A block that raises yields None; the other blocks are still extracted."""
+    blocks = [make_block("v0", "video"), make_block("h1", "html"), make_block("v2", "video")]
+
+    def extract(block):
+        if block.display_name == "h1":
+            raise ValueError("broken block")
+        return block.display_name
+
+    assert extract_blocks(blocks, extract) == ["v0", None, "v2"]
+
+
+def test_disabled_runs_sequentially_in_calling_thread(settings):
+    """AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION = False keeps the old serial behavior."""
+    settings.AI_EXTENSIONS_ENABLE_CONCURRENT_EXTRACTION = False
+    blocks = [make_block(f"v{index}", "html") for index in range(3)]
+    caller = threading.get_ident()
+
+    assert extract_blocks(blocks, lambda block: threading.get_ident()) == [caller] * 3
+
+
+def test_process_pool_parses_large_sequences(settings):
+    """Cache misses are parsed in worker processes and cached for the next request."""
+    settings.AI_EXTENSIONS_EXTRACTION_SCHEDULER = {"process_workers": 1, "process_min_blocks": 2}
+    blocks = [
+        make_block("h", "html", "<p>Hello <b>world</b></p>"),
+        make_block("p", "problem", '<problem><choice correct="true">A</choice><solution>S</solution></problem>'),
+        make_block("d", "discussion"),
+    ]
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"show_answer": "always"}})
+    expected = [processor._extract_block(block) for block in blocks]
+    cache.clear()
+    clear_local_cache()
+
+    try:
+        assert extract_blocks(blocks, processor._extract_block, "always") == expected
+        with patch.object(extraction_scheduler, "_get_process_pool") as pool:
+            assert extract_blocks(blocks, processor._extract_block, "always") == expected
+        pool.assert_not_called()
+    finally:
+        extraction_scheduler._reset_process_pool()
+
+
+def test_broken_process_pool_falls_back_to_calling_thread(settings):
+    """If worker processes die, the affected blocks are extracted in-process."""
+    settings.AI_EXTENSIONS_EXTRACTION_SCHEDULER = {"process_workers": 1, "process_min_blocks": 1}
+    broken = Future()
+    broken.set_exception(BrokenProcessPool("worker died"))
+    blocks = [make_block("h", "html", "<p>Hi</p>")]
+
+    with patch.object(extraction_scheduler, "_get_process_pool", return_value=Mock(submit=Mock(return_value=broken))):
+        assert extract_blocks(blocks, lambda block: "in-process") == ["in-process"]
+
+
+def test_units_keep_their_blocks():
+    """Blocks scheduled together for a sequence are returned to their own units."""
+    units = []
+    for unit_index in range(3):
+        unit = make_block(f"unit-{unit_index}", "vertical")
+        unit.get_children.return_value = [
+            make_block(f"{unit_index}-video", "video"),
+            make_block(f"{unit_index}-html", "html"),
+        ]
+        units.append(unit)
+    processor = OpenEdXProcessor(processor_config={})
+
+    with patch.object(processor, "_extract_block", side_effect=lambda block: {"text": block.display_name}):
+        units_data = processor._get_units_data(units)
+
+    assert [[block["text"] for block in unit["blocks"]] for unit in units_data] == [
+        ["0-video", "0-html"], ["1-video", "1-html"], ["2-video", "2-html"],
+    ]
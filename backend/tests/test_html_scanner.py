@@ -0,0 +1,390 @@
+"""
+Tests for the single-pass HTML scanner.
+
+Every case is compared with the multi-pass BeautifulSoup pipeline it replaces,
+so any difference in output is a failure.
+"""
+import random
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from openedx_ai_extensions.processors.openedx.utils.component_extractors import _process_problem_html, html_to_text
+from openedx_ai_extensions.processors.openedx.utils.html_scanner import scan_html_text, scan_problem_text
+
+CORPUS_DIR = Path(__file__).parent / "fixtures" / "html_corpus"
+
+
+def load_corpus():
+    """Return {file name: markup} for every HTML block (.html) and problem (.xml) in the corpus."""
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(CORPUS_DIR.iterdir())}
+
+
+# -------------------------------------------------------------------------
+# Reference implementation: the multi-pass BeautifulSoup pipeline that
+# component_extractors used before the scanner.
+# -------------------------------------------------------------------------
+
+
+def _extract_iframes(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract all <iframe> tags from the HTML and return
+    a list of LLM-friendly strings describing the embedded iframes.
+
+    Example output:
+    '[Embedded iframe: title="Video Player", src="/path/to/video"]'
+    """
+    embeddings = []
+    for iframe in soup.find_all("iframe"):
+        src = iframe.get("src")
+        title = iframe.get("title", "").strip() or "iframe"
+        if src:
+            embeddings.append(f'[Embedded iframe: title="{title}", src="{src}"]')
+    return embeddings
+
+
+def _extract_objects(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract <object> tags, identifying PDFs and other objects.
+    Returns a list of strings describing each embedded object.
+
+    Example output:
+    '[Embedded PDF: title="Manual", file="/static/manual.pdf"]'
+    '[Embedded object: title="3D Model", type="application/x-3d", file="/assets/model.obj"]'
+    """
+    embeddings = []
+    for obj in soup.find_all("object"):
+        data = obj.get("data")
+        mime = obj.get("type", "")
+        title = obj.get("title", "").strip() or "Object"
+        if data:
+            if "pdf" in mime.lower() or data.lower().endswith(".pdf"):
+                embeddings.append(f'[Embedded PDF: title="{title}", file="{data}"]')
+            else:
+                embeddings.append(
+                    f'[Embedded object: title="{title}", type="{mime}", file="{data}"]'
+                )
+    return embeddings
+
+
+def _extract_images(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract <img> tags and return a list of strings describing the images.
+
+    Example output:
+    '[Embedded image: alt="Logo", src="/static/logo.png"]'
+    """
+    embeddings = []
+    for img in soup.find_all("img"):
+        src = img.get("src")
+        alt = img.get("alt", "").strip() or "image"
+        if src:
+            embeddings.append(f'[Embedded image: alt="{alt}", src="{src}"]')
+    return embeddings
+
+
+def _extract_media(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract <video> and <audio> tags, including <source> elements.
+    Returns a list of descriptive strings.
+
+    Example output:
+    '[Embedded video: title="Lecture", sources="/videos/lec.mp4, /videos/lec.webm"]'
+    """
+    embeddings = []
+    for media in soup.find_all(["video", "audio"]):
+        sources = [s.get("src") for s in media.find_all("source") if s.get("src")]
+        direct_src = media.get("src")
+        if direct_src and direct_src not in sources:
+            sources.append(direct_src)
+
+        title = media.get("title", "").strip() or media.name
+        if sources:
+            sources_str = ", ".join(sources)
+            embeddings.append(
+                f'[Embedded {media.name}: title="{title}", sources="{sources_str}"]'
+            )
+    return embeddings
+
+
+def _extract_embeds(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract <embed> tags and return descriptive strings.
+
+    Example output:
+    '[Embedded content: tag=embed, src="/assets/interactive.swf"]'
+    """
+    embeddings = []
+    for embed in soup.find_all("embed"):
+        src = embed.get("src")
+        if src:
+            embeddings.append(f'[Embedded content: tag=embed, src="{src}"]')
+    return embeddings
+
+
+def _extract_xblocks(soup: BeautifulSoup) -> list[str]:
+    """
+    Extract custom XBlock placeholders from <div> tags with data-type or data-block-id.
+    Returns descriptive strings for LLM consumption.
+
+    Example output:
+    '[Embedded XBlock: type="problem", id="block-v1:course+unit+block"]'
+    """
+    embeddings = []
+    for div in soup.find_all("div"):
+        xblock_type = div.get("data-type")
+        block_id = div.get("data-block-id")
+        if xblock_type or block_id:
+            desc = "[Embedded XBlock"
+            if xblock_type:
+                desc += f': type="{xblock_type}"'
+            if block_id:
+                desc += f', id="{block_id}"'
+            desc += "]"
+            embeddings.append(desc)
+    return embeddings
+
+
+def _remove_sensitive_content(soup: BeautifulSoup):
+    """Remove hints, solutions, and correctness info when show_answer=False."""
+    sensitive_tags = ["choicehint", "solution", "demandhint", "hint"]
+    sensitive_selectors = [
+        ".solution-span",
+        ".detailed-solution",
+        ".feedback-hint",
+        ".notification-submit",
+        ".status",
+        ".correctness",
+    ]
+    for tag_name in sensitive_tags:
+        for tag in soup.find_all(tag_name):
+            tag.decompose()
+    for selector in sensitive_selectors:
+        for tag in soup.select(selector):
+            tag.decompose()
+    for choice in soup.find_all("choice"):
+        if choice.has_attr("correct"):
+            del choice["correct"]
+
+
+def _extract_solution_feedback(soup: BeautifulSoup) -> list[str]:
+    """Extract solutions, hints, and feedback when show_answer=True."""
+    extracted_sections = []
+
+    # Mark correct answers
+    for choice in soup.find_all("choice", attrs={"correct": "true"}):
+        choice.insert(0, soup.new_string("[CORRECT ANSWER] "))
+
+    def _pull(tag_name, label):
+        for tag in soup.find_all(tag_name):
+            text = tag.get_text(" ", strip=True)
+            if text:
+                extracted_sections.append(f"[{label}]: {text}")
+            tag.decompose()
+
+    _pull("choicehint", "Feedback")
+    _pull("hint", "Hint")
+    _pull("demandhint", "Hint")
+    _pull("solution", "Solution")
+
+    sensitive_selectors = [
+        ".solution-span",
+        ".detailed-solution",
+        ".feedback-hint",
+        ".notification-submit",
+        ".status",
+        ".correctness",
+    ]
+    for selector in sensitive_selectors:
+        for tag in soup.select(selector):
+            text = tag.get_text(" ", strip=True)
+            if text:
+                extracted_sections.append(f"[Feedback/Explanation]: {text}")
+            tag.decompose()
+
+    return extracted_sections
+
+
+def _clean_noisy_tags(soup: BeautifulSoup):
+    """
+    Remove noisy HTML tags that are not useful for LLM text extraction.
+    """
+    noisy_tags = [
+        "script",
+        "style",
+        "iframe",
+        "embed",
+        "object",
+        "video",
+        "audio",
+        "img",
+    ]
+    for tag in soup.find_all(noisy_tags):
+        tag.extract()
+
+
+def _assemble_problem_text(
+    soup: BeautifulSoup, extracted_sections: list[str], show_answer: bool
+) -> str:
+    """Assemble clean text and append solution/feedback if show_answer=True."""
+    base_text = "\n".join(
+        line.strip()
+        for line in soup.get_text(separator="\n").splitlines()
+        if line.strip()
+    )
+    if show_answer and extracted_sections:
+        base_text += "\n" + "\n".join(extracted_sections)
+    return base_text
+
+
+def reference_html_to_text(raw_html):
+    """Convert HTML with the multi-pass BeautifulSoup pipeline the scanner replaces."""
+    soup = BeautifulSoup(raw_html, "html.parser")
+    embeddings = []
+    for extract in (
+        _extract_iframes, _extract_objects, _extract_images, _extract_media, _extract_embeds, _extract_xblocks,
+    ):
+        embeddings.extend(extract(soup))
+    _clean_noisy_tags(soup)
+    clean = "\n".join(line.strip() for line in soup.get_text(separator="\n").splitlines() if line.strip())
+    if embeddings:
+        clean += "\n\n" + "\n".join(embeddings)
+    return clean.strip()
+
+
+def reference_problem_text(raw_html, show_answer):
+    """Convert problem markup with the multi-pass BeautifulSoup pipeline the scanner replaces."""
+    soup = BeautifulSoup(raw_html, "html.parser")
+    sections = []
+    if show_answer:
+        sections = _extract_solution_feedback(soup)
+    else:
+        _remove_sensitive_content(soup)
+    _clean_noisy_tags(soup)
+    return _assemble_problem_text(soup, sections, show_answer)
+
+
+# -------------------------------------------------------------------------
+# Parity
+# -------------------------------------------------------------------------
+
+CORPUS = load_corpus()
+
+EDGE_CASES = [
+    "",
+    "plain text only",
+    "<p>Hello <b>world</b></p>",
+    "<p>a&amp;b &#65; &#150; &#x263a; &#0; &bogus; &lt no semicolon</p>",
+    "<p>before<!-- comment -->after</p><!DOCTYPE html><?php echo 1; ?>",
+    "<p><![CDATA[character data]]></p><script><![CDATA[hidden]]></script>",
+    "<br>a</br>b",
+    "<img src=a><img src=b/>after a self-closed void tag",
+    "<div><p>unclosed<li>item<li>item 2</div>still open?</span>",
+    "<video><source src=a><video src=b><source src=c></video></video>",
+    '<video src="x"><source src="x"></video><audio title="  "><source></audio>',
+    "<ruby>kanji<rp>(</rp><rt>reading</rt><rp>)</rp></ruby><template>template text</template>",
+    '<div data-type="problem"></div><div data-block-id="id"></div><div data-type="" data-block-id=""></div>',
+    '<object data="/x.PDF"></object><object data="/m" type="Application/PDF"></object><object type="a"></object>',
+    '<iframe src="/a" title="  "><p>inside iframe</p></iframe><embed src="/e"><embed>',
+    "<p title>attribute without value</p><p class='a' class='status'>duplicate attributes</p>",
+    "<div><p>unterminated tag <b",
+    "<pre>  keep\n\n  spacing  </pre><textarea> a\n b </textarea>",
+]
+
+PROBLEM_EDGE_CASES = [
+    '<choice correct="true">A</choice><choice correct="True">B</choice><choice correct>C</choice>',
+    "<hint>outer <hint>inner</hint> tail</hint>",
+    "<solution>s <choicehint>c</choicehint> <span class='status'>st</span></solution>",
+    "<div class='status'>x <div class='correctness'>y</div> <hint>h</hint></div>",
+    "<span class='correctness status'>both</span><span class='STATUS'>case</span>",
+    "<script class='status'>script text</script><style class='hint'>css</style>",
+    "<demandhint><hint><p>first</p></hint><hint></hint></demandhint>",
+    '<solution><choice correct="true">marked inside a solution</choice></solution>',
+    "<iframe><solution>inside noisy</solution></iframe><template><hint>template hint</hint></template>",
+    "<hint>unclosed hint <p>text",
+]
+
+TAGS = [
+    "div", "p", "b", "span", "script", "style", "iframe", "embed", "object", "video", "audio", "img", "source",
+    "br", "hint", "choicehint", "demandhint", "solution", "choice", "template", "rt", "pre", "li", "input",
+]
+ATTRIBUTES = [
+    "", ' class="status"', ' class="a solution-span"', ' class="correctness feedback-hint"', ' correct="true"',
+    ' src="/s.mp4"', ' title=" T "', ' data-type="problem"', ' data-block-id="b1"', ' data="/f.pdf"', " src",
+]
+TEXT = [
+    "hello", " ", "\n", "a&amp;b", "&#150;", "&bogus;", "<!-- c -->", "<![CDATA[cd]]>", "two  words", "x\ny",
+]
+
+
+def _random_markup(rng):
+    """Return a random tag soup built from tags and text that exercise the scanner."""
+    parts = []
+    for _ in range(rng.randint(1, 40)):
+        roll = rng.random()
+        tag = rng.choice(TAGS)
+        if roll < 0.35:
+            parts.append(f"<{tag}{rng.choice(ATTRIBUTES)}{rng.choice(ATTRIBUTES)}>")
+        elif roll < 0.55:
+            parts.append(f"</{tag}>")
+        elif roll < 0.6:
+            parts.append(f"<{tag}{rng.choice(ATTRIBUTES)}/>")
+        else:
+            parts.append(rng.choice(TEXT))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_corpus_output_matches_reference(name):
+    """Real-world HTML and problem blocks convert exactly as with BeautifulSoup."""
+    markup = CORPUS[name]
+    if name.endswith(".xml"):
+        for show_answer in (True, False):
+            assert scan_problem_text(markup, show_answer) == reference_problem_text(markup, show_answer)
+    else:
+        assert scan_html_text(markup) == reference_html_to_text(markup)
+
+
+@pytest.mark.parametrize("markup", EDGE_CASES + PROBLEM_EDGE_CASES)
+def test_edge_cases_match_reference(markup):
+    """Malformed markup, entities, void tags and string containers are handled like html.parser."""
+    assert scan_html_text(markup) == reference_html_to_text(markup)
+    for show_answer in (True, False):
+        assert scan_problem_text(markup, show_answer) == reference_problem_text(markup, show_answer)
+
+
+def test_random_markup_matches_reference():
+    """Randomly generated tag soup produces the same output in both implementations."""
+    rng = random.Random(20251019)
+    for _ in range(300):
+        markup = _random_markup(rng)
+        assert scan_html_text(markup) == reference_html_to_text(markup), markup
+        for show_answer in (True, False):
+            assert scan_problem_text(markup, show_answer) == reference_problem_text(markup, show_answer), markup
+
+
+def test_problem_sections_order_and_nesting():
+    """Sections are grouped by kind; a tag pulled earlier is not repeated in its container's text."""
+    markup = (
+        "<p>Question</p>"
+        "<solution>Because <hint>inner hint</hint></solution>"
+        "<hint>Top hint</hint>"
+        "<div class='status'>correct</div>"
+    )
+    assert scan_problem_text(markup, True) == (
+        "Question\n"
+        "[Hint]: inner hint\n"
+        "[Hint]: Top hint\n"
+        "[Solution]: Because\n"
+        "[Feedback/Explanation]: correct"
+    )
+    assert scan_problem_text(markup, False) == "Question"
+
+
+def test_public_helpers_use_scanner():
+    """html_to_text and _process_problem_html return the scanner output."""
+    markup = CORPUS["course_overview.html"]
+    assert html_to_text(markup) == scan_html_text(markup)
+    problem = CORPUS["multiple_choice_problem.xml"]
+    assert _process_problem_html(problem, True) == scan_problem_text(problem, True)
@@ -0,0 +1,196 @@
+"""
+Tests for BM25 passage retrieval and the "relevant" retrieval mode.
+"""
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.models import UnitContentIndex
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils import content_index, lexical_index
+from openedx_ai_extensions.processors.openedx.utils.lexical_index import (
+    clear_local_indexes,
+    get_course_index,
+    search_course,
+    unit_passages,
+)
+
+COURSE_KEY = CourseKey.from_string("course-v1:edX+T+1")
+
+UNITS = {
+    "photosynthesis": "Photosynthesis turns light into chemical energy inside the chloroplast of plant cells.",
+    "mitochondria": "The mitochondria is the powerhouse of the cell and produces ATP through respiration.",
+    "grading": "Homework counts for forty percent of the final grade and exams for sixty percent.",
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_indexes(settings):
+    """Start every test without per-process course indexes; stored units are current for the content index."""
+    settings.AI_EXTENSIONS_ENABLE_CONTENT_INDEX = True
+    clear_local_indexes()
+    with patch.object(content_index, "published_course_version", return_value="v1"):
+        yield
+    clear_local_indexes()
+
+
+def store_unit(name, text, position=0, course_version="v1"):
+    """Store an indexed unit holding a single HTML block with ``text``, indexed at ``course_version``."""
+    unit_id = COURSE_KEY.make_usage_key("vertical", name)
+    return UnitContentIndex.objects.update_or_create(
+        unit_id=unit_id,
+        defaults={
+            "course_id": COURSE_KEY,
+            "sequence_id": COURSE_KEY.make_usage_key("sequential", "seq"),
+            "position": position,
+            "content": {
+                "unit_id": str(unit_id),
+                "display_name": name.title(),
+                "category": "vertical",
+                "blocks": [{"type": "html", "title": f"{name} notes", "text": text}],
+            },
+            "content_hash": str(hash(text)),
+            "blocks_version": "v",
+            "course_version": course_version,
+        },
+    )[0]
+
+
+def store_course():
+    """Store the UNITS course."""
+    for position, (name, text) in enumerate(UNITS.items()):
+        store_unit(name, text, position)
+
+
+def test_unit_passages_split_blocks_into_word_windows():
+    """Every block is cut into passages of at most passage_words words."""
+    content = {"unit_id": "u", "display_name": "U", "blocks": [
+        {"type": "html", "title": "A", "text": "one two three four five"},
+        {"type": "video", "title": "V", "transcript_text": "six seven"},
+        {"type": "discussion", "title": "D"},
+    ]}
+    passages = unit_passages(content, passage_words=2)
+    assert [passage["text"] for passage, _ in passages] == ["one two", "three four", "five", "six seven"]
+    assert passages[3][0]["type"] == "video"
+
+
+@pytest.mark.django_db
+def test_search_ranks_matching_passages_first():
+    """The passage sharing the question's rare terms ranks first."""
+    store_course()
+
+    results = search_course(COURSE_KEY, "What does the mitochondria produce?", top_k=2)
+    assert results[0]["unit_display_name"] == "Mitochondria"
+    assert all(result["unit_display_name"] != "Grading" for result in results)
+
+
+@pytest.mark.django_db
+def test_search_respects_token_budget():
+    """Passages that would exceed the token budget are left out."""
+    store_course()
+    assert search_course(COURSE_KEY, "cell energy", top_k=3, token_budget=25) == [
+        search_course(COURSE_KEY, "cell energy", top_k=1)[0]
+    ]
+
+
+@pytest.mark.django_db
+def test_unchanged_units_are_not_retokenized():
+    """After a unit changes, only that unit is tokenized again."""
+    store_course()
+    first = get_course_index(COURSE_KEY)
+    assert get_course_index(COURSE_KEY) is first
+
+    store_unit("grading", "Late homework loses ten percent per day.", 2)
+    with patch.object(lexical_index, "unit_passages", wraps=unit_passages) as tokenized:
+        second = get_course_index(COURSE_KEY)
+
+    assert second is not first
+    assert tokenized.call_count == 1
+    assert search_course(COURSE_KEY, "late homework", top_k=1)[0]["text"].startswith("Late homework")
+
+
+@pytest.mark.django_db
+def test_units_indexed_before_the_last_publish_are_not_searched():
+    """Rows stamped with an older course version are left out until the index run reaches them."""
+    store_course()
+    store_unit("deleted", "Mitochondria mitochondria produce mitochondria.", 3, course_version="v0")
+
+    results = search_course(COURSE_KEY, "mitochondria", top_k=5)
+    assert [result["unit_display_name"] for result in results] == ["Mitochondria"]
+
+    with patch.object(content_index, "published_course_version", return_value="v2"):
+        assert get_course_index(COURSE_KEY) is None
+
+
+def visible_units(*names):
+    """Patch the units in the user's course blocks to ``names``."""
+    return patch.object(
+        OpenEdXProcessor,
+        "_build_visible_unit_ids",
+        return_value=[str(COURSE_KEY.make_usage_key("vertical", name)) for name in names],
+    )
+
+
+@pytest.mark.django_db
+def test_relevant_mode_returns_passages_for_the_question():
+    """retrieval_mode "relevant" answers from the course passages matching the learner's question."""
+    store_course()
+    processor = OpenEdXProcessor(
+        processor_config={"OpenEdXProcessor": {"retrieval_mode": "relevant", "top_k": 1}},
+        user=Mock(id=1),
+        query="how is the final grade computed",
+    )
+
+    with visible_units(*UNITS):
+        result = processor.get_location_content(
+            location_id=str(COURSE_KEY.make_usage_key("vertical", "photosynthesis"))
+        )
+
+    assert result["retrieval_mode"] == "relevant"
+    assert [passage["unit_display_name"] for passage in result["passages"]] == ["Grading"]
+
+
+@pytest.mark.django_db
+def test_relevant_mode_never_returns_units_hidden_from_the_user():
+    """A unit missing from the user's course blocks is not returned, even when it matches best."""
+    store_course()
+    processor = OpenEdXProcessor(
+        processor_config={"OpenEdXProcessor": {"retrieval_mode": "relevant", "top_k": 3}},
+        user=Mock(id=1),
+        query="how is the final grade computed with homework and exams",
+    )
+
+    with visible_units("photosynthesis", "mitochondria"):
+        result = processor.get_location_content(
+            location_id=str(COURSE_KEY.make_usage_key("vertical", "photosynthesis"))
+        )
+
+    assert "Grading" not in [passage["unit_display_name"] for passage in result.get("passages", [])]
+    assert "Homework" not in json.dumps(result)
+
+
+@pytest.mark.django_db
+def test_relevant_mode_without_user_falls_back_to_unit():
+    """Without a user to check visibility against, no course passages are retrieved."""
+    store_course()
+    processor = OpenEdXProcessor(
+        processor_config={"OpenEdXProcessor": {"retrieval_mode": "relevant"}},
+        query="how is the final grade computed",
+    )
+
+    result = processor.get_location_content(location_id=str(COURSE_KEY.make_usage_key("vertical", "photosynthesis")))
+
+    assert result["display_name"] == "Photosynthesis"
+
+
+@pytest.mark.django_db
+def test_relevant_mode_without_question_falls_back_to_unit():
+    """Without a question the current unit is returned instead."""
+    store_course()
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"retrieval_mode": "relevant"}})
+
+    result = processor.get_location_content(location_id=str(COURSE_KEY.make_usage_key("vertical", "photosynthesis")))
+
+    assert result["display_name"] == "Photosynthesis"
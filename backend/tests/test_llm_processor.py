@@ -9,12 +9,14 @@ from unittest.mock import Mock, mock_open, patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from litellm.exceptions import BadRequestError
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import BlockUsageLocator
 
 from openedx_ai_extensions.functions.decorators import AVAILABLE_TOOLS
 from openedx_ai_extensions.processors.llm.llm_processor import LLMProcessor
+from openedx_ai_extensions.processors.llm.rate_limiter import LANE_BULK, get_priority_lane, priority_lane
 from openedx_ai_extensions.workflows.models import AIWorkflowProfile, AIWorkflowScope, AIWorkflowSession
 
 User = get_user_model()
@@ -245,6 +247,94 @@ def test_summarize_content_non_stream(
     mock_completion.assert_called_once()
 
 
+SEQUENCE_CONTENT = {
+    "retrieval_mode": "sequence",
+    "display_name": "Week 1",
+    "units": [
+        {"unit_id": f"unit-{index}", "display_name": f"Unit {index}", "blocks": [{"type": "html", "text": text}]}
+        for index, text in enumerate(["Cells", "Mitochondria", "Photosynthesis"])
+    ],
+}
+
+
+def summarize_by_messages(**params):
+    """Return a completion that echoes which unit (or the reduce step) was summarized."""
+    user_message = next((m["content"] for m in params["messages"] if m["role"] == "user"), None)
+    if user_message:
+        return MockChunk(f"summary of {json.loads(user_message)['blocks'][0]['text']}", is_stream=False)
+    return MockChunk("final summary", is_stream=False)
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_summarize_content_map_reduce(mock_completion, llm_processor):
+    """Each unit is summarized on its own and the final call only sees the unit summaries."""
+    cache.clear()
+    llm_processor.config.update({"function": "summarize_content", "summary_mode": "map_reduce"})
+    mock_completion.side_effect = summarize_by_messages
+
+    result = llm_processor.process(context=str(SEQUENCE_CONTENT), context_data=SEQUENCE_CONTENT)
+
+    assert result["response"] == "final summary"
+    assert mock_completion.call_count == 4
+    reduce_context = mock_completion.call_args.kwargs["messages"][1]["content"]
+    assert reduce_context == (
+        "Unit 1: Unit 0\nsummary of Cells\n\n"
+        "Unit 2: Unit 1\nsummary of Mitochondria\n\n"
+        "Unit 3: Unit 2\nsummary of Photosynthesis"
+    )
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_summarize_content_map_reduce_reuses_unchanged_unit_summaries(mock_completion, llm_processor):
+    """After a unit changes only that unit is summarized again."""
+    cache.clear()
+    llm_processor.config.update({"function": "summarize_content", "summary_mode": "map_reduce"})
+    mock_completion.side_effect = summarize_by_messages
+    llm_processor.process(context=str(SEQUENCE_CONTENT), context_data=SEQUENCE_CONTENT)
+
+    republished = json.loads(json.dumps(SEQUENCE_CONTENT))
+    republished["units"][1]["blocks"][0]["text"] = "Ribosomes"
+    mock_completion.reset_mock()
+    llm_processor.process(context=str(republished), context_data=republished)
+
+    assert mock_completion.call_count == 2
+    assert "summary of Ribosomes" in mock_completion.call_args.kwargs["messages"][1]["content"]
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_summarize_content_map_reduce_keeps_priority_lane(mock_completion, llm_processor):
+    """Unit summaries run on worker threads in the caller's priority lane."""
+    cache.clear()
+    llm_processor.config.update({"function": "summarize_content", "summary_mode": "map_reduce"})
+    lanes = []
+
+    def record_lane(**params):
+        lanes.append(get_priority_lane())
+        return summarize_by_messages(**params)
+
+    mock_completion.side_effect = record_lane
+    with priority_lane(LANE_BULK):
+        llm_processor.process(context=str(SEQUENCE_CONTENT), context_data=SEQUENCE_CONTENT)
+
+    assert lanes == [LANE_BULK] * 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("summary_mode", [None, "auto"])
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_summarize_content_single_call_by_default(mock_completion, llm_processor, summary_mode):
+    """Without map_reduce, or with "auto" on a context under the threshold, one call is made."""
+    llm_processor.config.update({"function": "summarize_content", "summary_mode": summary_mode})
+    mock_completion.return_value = MockChunk("Summary text", is_stream=False)
+
+    llm_processor.process(context=str(SEQUENCE_CONTENT), context_data=SEQUENCE_CONTENT)
+
+    mock_completion.assert_called_once()
+
+
 # ============================================================================
 # Streaming Tests
 # ============================================================================
@@ -1516,6 +1606,41 @@ def test_llm_processor_lost_thread_retry(mock_responses, workflow_scope, user):
     assert "previous_response_id" not in kwargs or kwargs["previous_response_id"] is None
 
 
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.responses")
+def test_llm_processor_lost_thread_retry_loads_history_lazily(mock_responses, workflow_scope, user):
+    """The history loader is only called once the remote thread turns out to be lost."""
+    processor_config = {
+        "LLMProcessor": {"provider": "default", "stream": False, "function": "chat_with_context"}
+    }
+    session = AIWorkflowSession.objects.create(
+        user=user,
+        scope=workflow_scope,
+        profile=workflow_scope.profile,
+        course_id=workflow_scope.course_id,
+        remote_response_id="lost-id",
+    )
+    processor = LLMProcessor(processor_config, session)
+    mock_error = BadRequestError("Previous response not found", model="gpt-4", llm_provider="openai")
+    mock_error.code = "previous_response_not_found"
+    mock_success = Mock(id="new-id", output=[], usage=Mock(total_tokens=10))
+    mock_responses.side_effect = [mock_error, mock_success]
+    history = [
+        {"role": "system", "content": "Stored course context"},
+        {"role": "user", "content": "Earlier question"},
+        {"role": "assistant", "content": "Earlier answer"},
+    ]
+    history_loader = Mock(return_value=history)
+
+    processor.process(input_data="test input", history_loader=history_loader)
+
+    history_loader.assert_called_once_with()
+    _, kwargs = mock_responses.call_args_list[1]
+    assert [msg["content"] for msg in kwargs["input"]] == [
+        "Stored course context", "Earlier question", "Earlier answer", "test input",
+    ]
+
+
 # ============================================================================
 # generate_flashcards Tests
 # ============================================================================
@@ -1680,3 +1805,46 @@ def test_generate_flashcards_clears_input_data(
     messages = call_kwargs["messages"]
     user_messages = [m for m in messages if m.get("role") == "user"]
     assert len(user_messages) == 0
+
+
+# ============================================================================
+# Prompt-cache token usage
+# ============================================================================
+
+def test_set_token_usage_records_anthropic_cache_tokens(llm_processor):
+    """Anthropic cache read/creation tokens are accumulated across calls."""
+    from litellm import Usage  # pylint: disable=import-outside-toplevel
+
+    first = Usage(prompt_tokens=1200, completion_tokens=10, total_tokens=1210,
+                  cache_creation_input_tokens=1000, cache_read_input_tokens=0)
+    second = Usage(prompt_tokens=1300, completion_tokens=20, total_tokens=1320,
+                   cache_creation_input_tokens=50, cache_read_input_tokens=1000)
+
+    llm_processor._set_token_usage(Mock(usage=first, response=None))
+    llm_processor._set_token_usage(Mock(usage=second, response=None))
+
+    usage = llm_processor.get_usage()
+    assert usage.prompt_tokens == 2500
+    assert usage.cache_read_input_tokens == 1000
+    assert usage.cache_creation_input_tokens == 1050
+    assert usage.model_dump()["cache_read_input_tokens"] == 1000
+
+
+def test_set_token_usage_normalizes_openai_cached_tokens(llm_processor):
+    """OpenAI prompt_tokens_details.cached_tokens is exposed as cache_read_input_tokens."""
+    usage = types.SimpleNamespace(
+        total_tokens=150, prompt_tokens=100, completion_tokens=50,
+        prompt_tokens_details=types.SimpleNamespace(cached_tokens=64),
+    )
+    llm_processor._set_token_usage(types.SimpleNamespace(usage=usage))
+
+    assert llm_processor.get_usage().cache_read_input_tokens == 64
+    assert llm_processor.get_usage().cache_creation_input_tokens == 0
+
+
+def test_set_token_usage_without_cache_info_adds_nothing(llm_processor):
+    """Usage objects without prompt-cache fields are left untouched."""
+    usage = types.SimpleNamespace(total_tokens=15, prompt_tokens=10, completion_tokens=5)
+    llm_processor._set_token_usage(types.SimpleNamespace(usage=usage))
+
+    assert not hasattr(llm_processor.get_usage(), "cache_read_input_tokens")
@@ -0,0 +1,134 @@
+"""
+Tests for the rolling operational metrics and their admin view.
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+
+from openedx_ai_extensions.admin import AIWorkflowProfileAdmin
+from openedx_ai_extensions.metrics import get_prompt_cache_report, record_prompt_cache_usage
+from openedx_ai_extensions.workflows.models import AIWorkflowProfile
+from openedx_ai_extensions.workflows.orchestrators import BaseOrchestrator
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with empty counters."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_prompt_cache_report_hit_rates():
+    """Token and request hit rates are computed from accumulated counters."""
+    record_prompt_cache_usage("chat", {
+        "prompt_tokens": 1000, "cache_creation_input_tokens": 900, "cache_read_input_tokens": 0,
+    })
+    record_prompt_cache_usage("chat", {
+        "prompt_tokens": 1000, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 900,
+    })
+    record_prompt_cache_usage("chat", {
+        "prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": 600},
+    })
+
+    row = get_prompt_cache_report(["chat"])[0]
+
+    assert row["profile"] == "chat"
+    assert row["requests"] == 3
+    assert row["requests_with_cache_read"] == 2
+    assert row["prompt_tokens"] == 3000
+    assert row["cache_read_input_tokens"] == 1500
+    assert row["cache_creation_input_tokens"] == 900
+    assert row["token_hit_rate"] == 0.5
+    assert row["request_hit_rate"] == 0.6667
+
+
+def test_prompt_cache_report_without_traffic():
+    """Profiles without traffic report zero counters and no hit rate."""
+    row = get_prompt_cache_report(["idle"])[0]
+
+    assert row["requests"] == 0
+    assert row["token_hit_rate"] is None
+    assert row["request_hit_rate"] is None
+
+
+def test_prompt_cache_report_drops_expired_buckets(settings):
+    """Only buckets inside the rolling window are reported."""
+    settings.AI_EXTENSIONS_METRICS_WINDOW_HOURS = 2
+    with patch("openedx_ai_extensions.metrics.time.time", return_value=10 * 3600):
+        record_prompt_cache_usage("chat", {"prompt_tokens": 100, "cache_read_input_tokens": 50})
+    with patch("openedx_ai_extensions.metrics.time.time", return_value=11 * 3600):
+        record_prompt_cache_usage("chat", {"prompt_tokens": 100, "cache_read_input_tokens": 0})
+        assert get_prompt_cache_report(["chat"])[0]["requests"] == 2
+    with patch("openedx_ai_extensions.metrics.time.time", return_value=12 * 3600):
+        assert get_prompt_cache_report(["chat"])[0]["requests"] == 1
+
+
+def test_record_prompt_cache_usage_survives_cache_errors():
+    """A failing cache backend never propagates to the caller."""
+    with patch("openedx_ai_extensions.metrics.cache") as mock_cache:
+        mock_cache.add.side_effect = ConnectionError("cache down")
+        record_prompt_cache_usage("chat", {"prompt_tokens": 10})
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.workflows.orchestrators.base_orchestrator.tracker")
+def test_emit_workflow_event_records_prompt_cache_usage(mock_tracker):  # pylint: disable=unused-argument
+    """Workflow events feed the per-profile prompt-cache counters."""
+    workflow = MagicMock(id=1, action="run")
+    workflow.profile.slug = "chat"
+    orchestrator = BaseOrchestrator(workflow=workflow, user=None, context={})
+    orchestrator.llm_processor = MagicMock()
+    orchestrator.llm_processor.get_usage.return_value = {
+        "prompt_tokens": 400, "cache_read_input_tokens": 300, "cache_creation_input_tokens": 0,
+    }
+
+    orchestrator._emit_workflow_event("TEST_EVENT")  # pylint: disable=protected-access
+
+    row = get_prompt_cache_report(["chat"])[0]
+    assert row["requests"] == 1
+    assert row["token_hit_rate"] == 0.75
+
+
+def _metrics_request(user, **params):
+    """Build a GET request for the profile admin metrics view."""
+    request = RequestFactory().get("/admin/openedx_ai_extensions/aiworkflowprofile/metrics/", params)
+    request.user = user
+    return request
+
+
+@pytest.mark.django_db
+def test_admin_metrics_view():
+    """The profile admin exposes the prompt-cache report as HTML and JSON."""
+    AIWorkflowProfile.objects.create(slug="chat", base_filepath="base/default.json")
+    record_prompt_cache_usage("chat", {"prompt_tokens": 200, "cache_read_input_tokens": 100})
+    admin_user = User.objects.create_superuser("admin", "admin@example.com", "password")
+    model_admin = AIWorkflowProfileAdmin(AIWorkflowProfile, admin.site)
+
+    with patch.object(admin.site, "each_context", return_value={}):
+        response = model_admin.metrics_view(_metrics_request(admin_user))
+    assert response.template_name == "admin/ai_metrics.html"
+    assert response.context_data["prompt_cache"][0]["requests"] == 1
+
+    data = json.loads(model_admin.metrics_view(_metrics_request(admin_user, format="json")).content)
+    assert data["window_hours"] == 24
+    assert data["prompt_cache"][0]["profile"] == "chat"
+    assert data["prompt_cache"][0]["token_hit_rate"] == 0.5
+
+
+@pytest.mark.django_db
+def test_admin_metrics_view_requires_permission():
+    """Staff without view permission on profiles are rejected."""
+    staff = User.objects.create_user("staff", "staff@example.com", "password", is_staff=True)
+    model_admin = AIWorkflowProfileAdmin(AIWorkflowProfile, admin.site)
+
+    with pytest.raises(PermissionDenied):
+        model_admin.metrics_view(_metrics_request(staff))
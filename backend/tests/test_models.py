@@ -491,6 +491,38 @@ class TestAIWorkflowSessionDebugThreads:
         assert result[0]["source"] == "both"
         assert result[0]["submission_id"] == "sub-1"
 
+    @patch.object(AIWorkflowSession, "get_remote_thread")
+    @patch.object(AIWorkflowSession, "get_local_thread")
+    def test_combined_thread_merges_local_only_messages_by_timestamp(
+        self, mock_local, mock_remote, session_with_ids,
+    ):
+        """Local-only messages land before the first later remote message; long shared prefixes don't collide."""
+        prefix = "x" * 300
+        mock_local.return_value = [
+            {"role": "user", "content": "late", "timestamp": "2024-01-05T00:00:00"},
+            {"role": "user", "content": "early", "timestamp": "2024-01-01T12:00:00"},
+            {"role": "user", "content": "undated", "timestamp": ""},
+            {"role": "user", "content": prefix + "b", "timestamp": "2024-01-03T12:00:00"},
+        ]
+        mock_remote.return_value = [
+            {
+                "id": f"resp-{day}",
+                "created_at": f"2024-01-0{day}T00:00:00",
+                "model": "gpt-4",
+                "input": [{"role": "user", "type": "message", "content": f"remote {day}"}],
+                "output": [{"role": "assistant", "content": prefix + "a" if day == 3 else f"answer {day}"}],
+            }
+            for day in (2, 3, 4)
+        ]
+
+        result = session_with_ids.get_combined_thread()
+
+        assert [m["content"] for m in result] == [
+            "early", "remote 2", "answer 2", "remote 3", prefix + "a", prefix + "b",
+            "remote 4", "answer 4", "late", "undated",
+        ]
+        assert [m["source"] for m in result].count("local") == 4
+
     # --- type field and tool-call field propagation ---
 
     @patch.object(AIWorkflowSession, "get_remote_thread")
@@ -8,6 +8,7 @@ import sys
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.core.cache import cache
 
 from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
 
@@ -16,6 +17,14 @@ from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXPr
 # ============================================================================
 
 
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test without cached course results."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def mock_edx_imports():
     """
@@ -46,6 +55,8 @@ def mock_keys():
     with patch("openedx_ai_extensions.processors.openedx.openedx_processor.UsageKey") as mock_usage:
         with patch("openedx_ai_extensions.processors.openedx.openedx_processor.CourseLocator") as mock_course:
             class MockKey(str):
+                course_key = "mock-course-key"
+
                 def make_usage_key(self, *args, **kwargs):
                     return MockKey("mock-usage-key")
 
@@ -78,17 +89,23 @@ def configure_mock_bs(mock_bs, children_map, fields_map):
 # Tests: Content Extraction
 # ============================================================================
 
+def make_block(location, display_name="Block", category="vertical", children=()):
+    """Helper to build a modulestore block whose children are already loaded."""
+    block = MagicMock()
+    block.location = location
+    block.display_name = display_name
+    block.category = category
+    block.get_children.return_value = list(children)
+    return block
+
+
 def test_get_location_content_success(mock_edx_imports, mock_keys):
     """Test successful unit content extraction."""
     # pylint: disable=unused-argument
     # pylint: disable=import-error, import-outside-toplevel
     from xmodule.modulestore.django import modulestore
 
-    mock_unit = MagicMock()
-    mock_unit.location = "course-key-1"
-    mock_unit.display_name = "Test Unit"
-    mock_unit.category = "vertical"
-    mock_unit.children = ["block-1"]
+    mock_unit = make_block("course-key-1", "Test Unit", children=[make_block("block-1", category="html")])
 
     mock_store = modulestore.return_value
     mock_store.get_item.return_value = mock_unit
@@ -101,6 +118,7 @@ def test_get_location_content_success(mock_edx_imports, mock_keys):
     assert result.get("display_name") == "Test Unit"
     assert len(result["blocks"]) == 1
     assert result["blocks"][0]["text"] == "Block Content"
+    mock_store.get_item.assert_called_once_with("loc-id", depth=None)
 
 
 def test_get_location_content_sequence_mode_success(mock_edx_imports, mock_keys):
@@ -112,35 +130,13 @@ def test_get_location_content_sequence_mode_success(mock_edx_imports, mock_keys)
     config = {"OpenEdXProcessor": {"retrieval_mode": "sequence"}}
     test_processor = OpenEdXProcessor(processor_config=config)
 
-    mock_unit = MagicMock()
-    mock_unit.location = "unit-loc"
-    mock_unit.display_name = "Test Unit"
-    mock_unit.category = "vertical"
-    mock_unit.children = ["block-1"]
-
-    mock_sequence = MagicMock()
-    mock_sequence.location = "seq-loc"
-    mock_sequence.display_name = "Test Sequence"
-    mock_sequence.children = ["unit-loc", "unit-loc-2"]
-
-    mock_unit_2 = MagicMock()
-    mock_unit_2.location = "unit-loc-2"
-    mock_unit_2.display_name = "Test Unit 2"
-    mock_unit_2.category = "vertical"
-    mock_unit_2.children = ["block-2"]
+    mock_unit = make_block("unit-loc", "Test Unit", children=[make_block("block-1", category="html")])
+    mock_unit_2 = make_block("unit-loc-2", "Test Unit 2", children=[make_block("block-2", category="html")])
+    mock_sequence = make_block("seq-loc", "Test Sequence", "sequential", children=[mock_unit, mock_unit_2])
 
     mock_store = modulestore.return_value
     mock_store.get_parent_location.return_value = "seq-loc"
-
-    # Configure get_item to return different items based on key
-    def get_item_side_effect(key):
-        if key == "seq-loc":
-            return mock_sequence
-        if key == "unit-loc-2":
-            return mock_unit_2
-        return mock_unit
-
-    mock_store.get_item.side_effect = get_item_side_effect
+    mock_store.get_item.return_value = mock_sequence
 
     with patch.object(test_processor, '_extract_block') as mock_extract:
         mock_extract.side_effect = [
@@ -154,6 +150,7 @@ def test_get_location_content_sequence_mode_success(mock_edx_imports, mock_keys)
     assert len(result["units"]) == 2
     assert result["units"][0]["display_name"] == "Test Unit"
     assert result["units"][1]["display_name"] == "Test Unit 2"
+    assert result["units"][1]["blocks"] == [{"text": "Unit 2 Block"}]
 
 
 def test_get_location_content_up_to_current_unit_mode_success(mock_edx_imports, mock_keys):
@@ -165,32 +162,15 @@ def test_get_location_content_up_to_current_unit_mode_success(mock_edx_imports,
     config = {"OpenEdXProcessor": {"retrieval_mode": "up_to_current_unit"}}
     test_processor = OpenEdXProcessor(processor_config=config)
 
-    mock_unit = MagicMock()
-    mock_unit.location = "unit-loc"
-    mock_unit.display_name = "Test Unit"
-    mock_unit.category = "vertical"
-    mock_unit.children = ["block-1"]
-
-    mock_unit_2 = MagicMock()
-    mock_unit_2.location = "unit-loc-2"
-    mock_unit_2.display_name = "Test Unit 2"
-
-    mock_sequence = MagicMock()
-    mock_sequence.location = "seq-loc"
-    mock_sequence.display_name = "Test Sequence"
-    mock_sequence.children = ["unit-loc", "unit-loc-2", "unit-loc-3"]
+    mock_sequence = make_block("seq-loc", "Test Sequence", "sequential", children=[
+        make_block("unit-loc", "Test Unit", children=[make_block("block-1", category="html")]),
+        make_block("unit-loc-2", "Test Unit 2"),
+        make_block("unit-loc-3", "Test Unit 3"),
+    ])
 
     mock_store = modulestore.return_value
     mock_store.get_parent_location.return_value = "seq-loc"
-
-    def get_item_side_effect(key):
-        if key == "seq-loc":
-            return mock_sequence
-        if key == "unit-loc-2":
-            return mock_unit_2
-        return mock_unit
-
-    mock_store.get_item.side_effect = get_item_side_effect
+    mock_store.get_item.return_value = mock_sequence
 
     with patch.object(test_processor, '_extract_block', return_value={"text": "Block Content"}):
         # We search for unit-loc-2, so we expect unit-loc and unit-loc-2
@@ -202,6 +182,28 @@ def test_get_location_content_up_to_current_unit_mode_success(mock_edx_imports,
     assert result["units"][1]["display_name"] == "Test Unit 2"
 
 
+def test_get_location_content_up_to_current_unit_not_in_sequence(mock_edx_imports, mock_keys):
+    """Test that up_to_current_unit falls back to the unit when it is not among the sequence's children."""
+    # pylint: disable=unused-argument
+    # pylint: disable=import-error, import-outside-toplevel
+    from xmodule.modulestore.django import modulestore
+
+    config = {"OpenEdXProcessor": {"retrieval_mode": "up_to_current_unit"}}
+    test_processor = OpenEdXProcessor(processor_config=config)
+
+    mock_unit = make_block("orphan-unit", "Orphan Unit")
+    mock_sequence = make_block("seq-loc", "Test Sequence", "sequential", children=[make_block("unit-loc")])
+
+    mock_store = modulestore.return_value
+    mock_store.get_parent_location.return_value = "seq-loc"
+    mock_store.get_item.side_effect = lambda key, depth=0: mock_sequence if key == "seq-loc" else mock_unit
+
+    result = test_processor.get_location_content("orphan-unit")
+
+    assert "units" not in result
+    assert result["display_name"] == "Orphan Unit"
+
+
 def test_get_location_content_retrieval_mode_from_argument(mock_edx_imports, mock_keys):
     """Test that retrieval_mode from argument overrides config."""
     # pylint: disable=unused-argument
@@ -211,18 +213,11 @@ def test_get_location_content_retrieval_mode_from_argument(mock_edx_imports, moc
     config = {"OpenEdXProcessor": {"retrieval_mode": "unit"}}
     test_processor = OpenEdXProcessor(processor_config=config)
 
-    mock_unit = MagicMock()
-    mock_unit.location = "unit-loc"
-    mock_unit.display_name = "Test Unit"
-
-    mock_sequence = MagicMock()
-    mock_sequence.location = "seq-loc"
-    mock_sequence.display_name = "Test Sequence"
-    mock_sequence.children = ["unit-loc"]
+    mock_sequence = make_block("seq-loc", "Test Sequence", "sequential", children=[make_block("unit-loc")])
 
     mock_store = modulestore.return_value
     mock_store.get_parent_location.return_value = "seq-loc"
-    mock_store.get_item.side_effect = lambda key: mock_sequence if key == "seq-loc" else mock_unit
+    mock_store.get_item.return_value = mock_sequence
 
     with patch.object(test_processor, '_extract_block', return_value={"text": "Block Content"}):
         # Override 'unit' config with 'sequence' argument
@@ -241,11 +236,7 @@ def test_get_location_content_sequence_mode_no_parent(mock_edx_imports, mock_key
     config = {"OpenEdXProcessor": {"retrieval_mode": "sequence"}}
     test_processor = OpenEdXProcessor(processor_config=config)
 
-    mock_unit = MagicMock()
-    mock_unit.location = "unit-loc"
-    mock_unit.display_name = "Test Unit"
-    mock_unit.category = "vertical"
-    mock_unit.children = ["block-1"]
+    mock_unit = make_block("unit-loc", "Test Unit", children=[make_block("block-1", category="html")])
 
     mock_store = modulestore.return_value
     mock_store.get_parent_location.return_value = None
@@ -260,6 +251,48 @@ def test_get_location_content_sequence_mode_no_parent(mock_edx_imports, mock_key
     assert len(result["blocks"]) == 1
 
 
+@pytest.mark.parametrize("retrieval_mode, current_unit, expected_units", [
+    ("unit", "unit-5", None),
+    ("sequence", "unit-5", 10),
+    ("up_to_current_unit", "unit-5", 6),
+])
+def test_get_location_content_modulestore_query_count(mock_edx_imports, mock_keys, retrieval_mode, current_unit,
+                                                      expected_units):
+    """
+    Pin the modulestore round trips per retrieval mode: one depth=None get_item for the
+    whole subtree (plus the parent lookup for sequence modes), however many blocks it has.
+    """
+    # pylint: disable=unused-argument
+    # pylint: disable=import-error, import-outside-toplevel
+    from xmodule.modulestore.django import modulestore
+
+    units = [
+        make_block(f"unit-{u}", f"Unit {u}", children=[
+            make_block(f"html-{u}-{b}", category="html") for b in range(8)
+        ])
+        for u in range(10)
+    ]
+    sequence = make_block("seq-loc", "Sequence", "sequential", children=units)
+
+    mock_store = modulestore.return_value
+    mock_store.get_parent_location.return_value = "seq-loc"
+    mock_store.get_item.side_effect = lambda key, depth=0: sequence if key == "seq-loc" else units[5]
+
+    test_processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"retrieval_mode": retrieval_mode}})
+    with patch.object(test_processor, '_extract_block', return_value={"text": "Block"}) as mock_extract:
+        result = test_processor.get_location_content(current_unit)
+
+    if expected_units is None:
+        assert len(result["blocks"]) == 8
+        assert mock_store.get_parent_location.call_count == 0
+    else:
+        assert len(result["units"]) == expected_units
+        assert mock_store.get_parent_location.call_count == 1
+        assert mock_extract.call_count == expected_units * 8
+    assert mock_store.get_item.call_count == 1
+    assert all(call.kwargs == {"depth": None} for call in mock_store.get_item.call_args_list)
+
+
 def test_get_location_content_truncation(mock_edx_imports, mock_keys):
     """Test that text is truncated when char_limit is exceeded."""
     # pylint: disable=unused-argument
@@ -270,11 +303,7 @@ def test_get_location_content_truncation(mock_edx_imports, mock_keys):
     test_processor = OpenEdXProcessor(processor_config=config)
 
     mock_store = modulestore.return_value
-    mock_unit = MagicMock()
-    mock_unit.location = "loc"
-    mock_unit.display_name = "Unit"
-    mock_unit.category = "vertical"
-    mock_unit.children = ["b1", "b2"]
+    mock_unit = make_block("loc", "Unit", children=[make_block("b1"), make_block("b2")])
     mock_store.get_item.return_value = mock_unit
 
     with patch.object(test_processor, '_extract_block') as mock_extract:
@@ -374,23 +403,20 @@ def test_serialize_outline_filtering(processor, mock_block_structure, scenario,
 
 def test_extract_block_delegates_to_extractor(processor):
     """
-    Verify _extract_block retrieves the item and calls the matching extractor.
+    Verify _extract_block calls the extractor matching the loaded block's category.
     """
     # pylint: disable=protected-access
 
-    mock_store = MagicMock()
     mock_block = MagicMock()
     mock_block.category = "video"
-    mock_store.get_item.return_value = mock_block
 
     mock_video_extractor = MagicMock(return_value={"type": "video_data"})
 
     module_path = "openedx_ai_extensions.processors.openedx.openedx_processor"
 
     with patch(f"{module_path}.COMPONENT_EXTRACTORS", {"video": mock_video_extractor}):
-        result = processor._extract_block(mock_store, "block-key-123")
+        result = processor._extract_block(mock_block)
 
-        mock_store.get_item.assert_called_once_with("block-key-123")
         mock_video_extractor.assert_called_once_with(mock_block)
         assert result == {"type": "video_data"}
 
@@ -401,22 +427,35 @@ def test_extract_block_fallback_to_generic(processor):
     """
     # pylint: disable=protected-access
 
-    mock_store = MagicMock()
     mock_block = MagicMock()
     mock_block.category = "unknown_type"
-    mock_store.get_item.return_value = mock_block
 
     module_path = "openedx_ai_extensions.processors.openedx.openedx_processor"
 
     with patch(f"{module_path}.extract_generic_info") as mock_generic:
         mock_generic.return_value = {"text": "generic content"}
 
-        result = processor._extract_block(mock_store, "block-key-456")
+        result = processor._extract_block(mock_block)
 
         mock_generic.assert_called_once_with(mock_block)
         assert result == {"text": "generic content"}
 
 
+def test_extract_block_skips_broken_block(processor):
+    """
+    Verify that a block whose extractor fails is skipped instead of failing the unit.
+    """
+    # pylint: disable=protected-access
+
+    mock_block = MagicMock()
+    mock_block.category = "html"
+
+    module_path = "openedx_ai_extensions.processors.openedx.openedx_processor"
+
+    with patch(f"{module_path}.COMPONENT_EXTRACTORS", {"html": MagicMock(side_effect=ValueError("bad"))}):
+        assert processor._extract_block(mock_block) is None
+
+
 def test_serialize_block_structure_full_logic(processor):
     """
     Test _serialize_block_structure_outline with a complex hierarchy to verify:
@@ -8,7 +8,12 @@ and last user messages.
 """
 # pylint: disable=invalid-sequence-index
 
-from openedx_ai_extensions.processors.llm.providers import _apply_multi_turn_cache, adapt_to_provider, provider_supports
+from openedx_ai_extensions.processors.llm.providers import (
+    _apply_multi_turn_cache,
+    adapt_to_provider,
+    get_prompt_cache_tokens,
+    provider_supports,
+)
 
 
 def _make_session(remote_response_id=None, local_submission_id=None):
@@ -275,3 +280,26 @@ class TestAdaptToProviderOpenAIUnaffected:
         result = adapt_to_provider("openai", params)
         for msg in result["input"]:
             assert isinstance(msg["content"], str)
+
+
+class TestGetPromptCacheTokens:
+    """Tests for get_prompt_cache_tokens across provider usage formats."""
+
+    def test_anthropic_fields(self):
+        usage = {"cache_read_input_tokens": 900, "cache_creation_input_tokens": 100}
+        assert get_prompt_cache_tokens(usage) == (900, 100)
+
+    def test_openai_completion_details(self):
+        usage = {"prompt_tokens_details": {"cached_tokens": 512}}
+        assert get_prompt_cache_tokens(usage) == (512, None)
+
+    def test_responses_api_details(self):
+        usage = type("Usage", (), {"input_tokens_details": type("Details", (), {"cached_tokens": 256})()})()
+        assert get_prompt_cache_tokens(usage) == (256, None)
+
+    def test_not_reported(self):
+        assert get_prompt_cache_tokens({"prompt_tokens": 10}) == (None, None)
+
+    def test_non_integer_values_ignored(self):
+        usage = {"cache_read_input_tokens": "12", "prompt_tokens_details": "PromptTokensDetails(...)"}
+        assert get_prompt_cache_tokens(usage) == (None, None)
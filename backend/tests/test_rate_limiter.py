@@ -0,0 +1,230 @@
+"""
+Tests for the provider rate limiter and its priority lanes.
+"""
+# pylint: disable=protected-access,no-value-for-parameter
+from unittest.mock import Mock, patch
+
+import pytest
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from litellm.exceptions import RateLimitError
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.processors.llm import rate_limiter
+from openedx_ai_extensions.processors.llm.litellm_base_processor import LitellmProcessor
+from openedx_ai_extensions.processors.llm.rate_limiter import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    ProviderRateLimitedError,
+    acquire,
+    get_priority_lane,
+    get_rate_limit_usage,
+    priority_lane,
+    settle,
+)
+from openedx_ai_extensions.workflows.models import AIWorkflowProfile, AIWorkflowScope, AIWorkflowSession
+from openedx_ai_extensions.workflows.orchestrators.session_based_orchestrator import _execute_orchestrator_async
+
+User = get_user_model()
+
+PARAMS = {"model": "anthropic/claude-test", "messages": [{"role": "user", "content": "x" * 1200}]}
+
+
+@pytest.fixture(autouse=True)
+def limiter_enabled(settings):
+    """Enable the limiter with small limits and clean shared counters."""
+    settings.AI_EXTENSIONS_ENABLE_RATE_LIMITER = True
+    settings.AI_EXTENSIONS_RATE_LIMITER = {
+        "limits": {"default": {"requests_per_minute": 10, "tokens_per_minute": 1000}},
+        "bulk_share": 0.5,
+        "bulk_max_wait_s": 0,
+    }
+    settings.AI_EXTENSIONS = {"default": {"MODEL": "anthropic/claude-test", "API_KEY": "test-key"}}
+    cache.clear()
+    yield settings
+    cache.clear()
+
+
+def _usage(profile="default"):
+    return get_rate_limit_usage([profile])[0]
+
+
+def test_interactive_is_the_default_lane():
+    """Calls outside a priority_lane block are interactive."""
+    assert get_priority_lane() == LANE_INTERACTIVE
+    with priority_lane(LANE_BULK):
+        assert get_priority_lane() == LANE_BULK
+    assert get_priority_lane() == LANE_INTERACTIVE
+
+
+def test_requests_per_minute_limit():
+    """Interactive calls may use the whole request limit, then get a local 429."""
+    for _ in range(10):
+        acquire("default", {"model": "anthropic/claude-test", "messages": []})
+
+    with pytest.raises(ProviderRateLimitedError):
+        acquire("default", {"model": "anthropic/claude-test", "messages": []})
+    assert _usage()["requests"] == 10
+
+
+def test_bulk_lane_leaves_headroom_for_interactive():
+    """Bulk calls stop at bulk_share of the limit; interactive calls still get through."""
+    with priority_lane(LANE_BULK):
+        for _ in range(5):
+            acquire("default", {"model": "anthropic/claude-test", "messages": []})
+        with pytest.raises(ProviderRateLimitedError):
+            acquire("default", {"model": "anthropic/claude-test", "messages": []})
+
+    acquire("default", {"model": "anthropic/claude-test", "messages": []})
+    assert _usage()["requests"] == 6
+
+
+def test_tokens_per_minute_limit_rolls_back_request():
+    """A call refused for tokens does not keep its request slot either."""
+    acquire("default", PARAMS)
+    acquire("default", PARAMS)
+    tokens_used = _usage()["tokens"]
+
+    with priority_lane(LANE_BULK), pytest.raises(ProviderRateLimitedError):
+        acquire("default", PARAMS)
+    usage = _usage()
+    assert usage["requests"] == 2
+    assert usage["tokens"] == tokens_used
+
+
+def test_oversized_call_allowed_on_idle_window():
+    """A single call larger than the share is not starved forever."""
+    with priority_lane(LANE_BULK):
+        reservation = acquire("default", {**PARAMS, "max_tokens": 5000})
+    assert reservation.tokens > 1000
+
+
+def test_settle_replaces_estimate_with_reported_usage():
+    """Reported usage corrects the token estimate taken before the call."""
+    reservation = acquire("default", PARAMS)
+    settle(reservation, Mock(usage=Mock(total_tokens=30)))
+    assert _usage()["tokens"] == 30
+
+    settle(acquire("default", PARAMS), Mock(usage=None))
+    assert _usage()["tokens"] == 30 + reservation.tokens
+
+
+def test_bulk_waits_for_next_window(settings):
+    """Within bulk_max_wait_s, bulk calls back off and retry instead of failing."""
+    settings.AI_EXTENSIONS_RATE_LIMITER = {**settings.AI_EXTENSIONS_RATE_LIMITER, "bulk_max_wait_s": 5}
+    with priority_lane(LANE_BULK):
+        for _ in range(5):
+            acquire("default", {"messages": []})
+        with patch.object(rate_limiter, "_reserve", side_effect=[False, False, True]) as reserve, \
+                patch("openedx_ai_extensions.processors.llm.rate_limiter.time.sleep") as sleep:
+            assert acquire("default", {"messages": []}) is not None
+    assert reserve.call_count == 3
+    assert sleep.call_count == 2
+    assert all(0 <= call.args[0] <= 5 for call in sleep.call_args_list)
+
+
+def test_limiter_disabled_or_unconfigured(settings):
+    """Without the flag, or for profiles without limits, nothing is counted."""
+    assert acquire("other", PARAMS) is None
+    settings.AI_EXTENSIONS_ENABLE_RATE_LIMITER = False
+    assert acquire("default", PARAMS) is None
+    assert _usage()["requests"] == 0
+
+
+@pytest.mark.django_db
+def test_processor_rate_limited_without_calling_provider():
+    """LitellmProcessor raises the local RateLimitError before spending a provider call."""
+    processor = LitellmProcessor(config={})
+    api_call = Mock(return_value=Mock(usage=Mock(total_tokens=1)))
+    for _ in range(10):
+        processor._call_litellm(api_call, {"model": "anthropic/claude-test", "messages": []})
+
+    with pytest.raises(RateLimitError):
+        processor._call_litellm(api_call, {"model": "anthropic/claude-test", "messages": []})
+    assert api_call.call_count == 10
+
+
+# ============================================================================
+# Celery task
+# ============================================================================
+
+@pytest.fixture
+def session(db):  # pylint: disable=unused-argument
+    """An AI workflow session the async task can load."""
+    user = User.objects.create_user(username="bulk_user", email="bulk@example.com", password="password123")
+    profile = AIWorkflowProfile.objects.create(slug="bulk", base_filepath="experimental/fashcards.json")
+    scope = AIWorkflowScope.objects.create(service_variant="cms", profile=profile, enabled=True)
+    return AIWorkflowSession.objects.create(user=user, scope=scope, profile=profile, metadata={})
+
+
+def _patch_orchestrator(run):
+    orchestrator = Mock(run=run)
+    return patch(
+        "openedx_ai_extensions.workflows.orchestrators.session_based_orchestrator."
+        "BaseOrchestrator.get_orchestrator",
+        return_value=orchestrator,
+    )
+
+
+def test_async_task_runs_in_bulk_lane(session):  # pylint: disable=redefined-outer-name
+    """Orchestrator actions executed by Celery make their LLM calls in the bulk lane."""
+    with _patch_orchestrator(Mock(side_effect=lambda **kwargs: {"lane": get_priority_lane()})):
+        result = _execute_orchestrator_async(session_id=session.id, action="run", params={})
+
+    assert result == {"lane": LANE_BULK}
+    assert get_priority_lane() == LANE_INTERACTIVE
+
+
+def test_async_task_retries_with_jitter_on_rate_limit(session):  # pylint: disable=redefined-outer-name
+    """A rate-limited task is retried later instead of failing the session."""
+    error = ProviderRateLimitedError("default", "anthropic/claude-test")
+    with _patch_orchestrator(Mock(side_effect=error)), \
+            patch.object(_execute_orchestrator_async, "retry", side_effect=Retry()) as retry:
+        with pytest.raises(Retry):
+            _execute_orchestrator_async(session_id=session.id, action="run", params={})
+
+    assert retry.call_args.kwargs["exc"] is error
+    assert 60 <= retry.call_args.kwargs["countdown"] <= 90
+    session.refresh_from_db()
+    assert session.metadata.get("task_status") != "error"
+    assert session.metadata["task_status_message"] == "Waiting for AI provider capacity"
+
+
+def test_rate_limited_flashcards_task_is_retried(db, settings):  # pylint: disable=unused-argument
+    """A flashcard run whose bulk-lane LLM call hits the limiter retries the task without calling the provider."""
+    # The flashcards profile uses the "openai" provider profile.
+    settings.AI_EXTENSIONS = {"openai": {"MODEL": "openai/gpt-test", "API_KEY": "test-key"}}
+    settings.AI_EXTENSIONS_RATE_LIMITER = {
+        **settings.AI_EXTENSIONS_RATE_LIMITER, "limits": {"openai": {"requests_per_minute": 10}},
+    }
+    course_key = CourseKey.from_string("course-v1:edX+DemoX+Demo_Course")
+    user = User.objects.create_user(username="cards_user", email="cards@example.com", password="password123")
+    profile = AIWorkflowProfile.objects.create(slug="cards", base_filepath="experimental/flashcards.json")
+    scope = AIWorkflowScope.objects.create(
+        course_id=course_key, service_variant="cms", profile=profile, enabled=True
+    )
+    cards_session = AIWorkflowSession.objects.create(
+        user=user, scope=scope, profile=profile, course_id=course_key, metadata={}
+    )
+    lanes = []
+
+    def reserve(*_args):
+        lanes.append(get_priority_lane())
+        return False
+
+    with patch("openedx_ai_extensions.workflows.orchestrators.flashcards_orchestrator.OpenEdXProcessor") as openedx, \
+            patch.object(rate_limiter, "_reserve", side_effect=reserve), \
+            patch("openedx_ai_extensions.processors.llm.llm_processor.completion") as completion, \
+            patch.object(_execute_orchestrator_async, "retry", side_effect=Retry()) as retry:
+        openedx.return_value.process.return_value = {"display_name": "Unit", "blocks": []}
+        with pytest.raises(Retry):
+            _execute_orchestrator_async(
+                session_id=cards_session.id, action="run", params={"input_data": {"num_cards": 3}}
+            )
+
+    assert lanes == [LANE_BULK]
+    completion.assert_not_called()
+    assert isinstance(retry.call_args.kwargs["exc"], ProviderRateLimitedError)
+    cards_session.refresh_from_db()
+    assert "task_result" not in cards_session.metadata
@@ -0,0 +1,264 @@
+"""
+Tests for health-aware routing across AI_EXTENSIONS provider profiles.
+"""
+# pylint: disable=redefined-outer-name,protected-access
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from litellm.exceptions import BadRequestError, RateLimitError, ServiceUnavailableError, Timeout
+
+from openedx_ai_extensions.processors.llm import routing
+from openedx_ai_extensions.processors.llm.litellm_base_processor import LitellmProcessor
+from openedx_ai_extensions.processors.llm.llm_processor import LLMProcessor
+from openedx_ai_extensions.processors.llm.routing import (
+    call_with_routing,
+    get_provider_health,
+    get_provider_health_stats,
+    reset_provider_health,
+)
+
+AI_EXTENSIONS = {
+    "primary": {"MODEL": "anthropic/claude-primary", "API_KEY": "key-primary", "API_BASE": "https://primary"},
+    "backup": {"MODEL": "anthropic/claude-backup", "API_KEY": "key-backup"},
+    "other": {"MODEL": "openai/gpt-4o", "API_KEY": "key-other"},
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_health():
+    """Start every test without recorded provider health."""
+    reset_provider_health()
+    yield
+    reset_provider_health()
+
+
+@pytest.fixture
+def ai_extensions(settings):
+    """Configure several provider profiles."""
+    settings.AI_EXTENSIONS = AI_EXTENSIONS
+    return settings
+
+
+def _unavailable(name):
+    return ServiceUnavailableError(message="down", llm_provider="anthropic", model=name)
+
+
+def _timeout(name):
+    return Timeout(message="slow", model=name, llm_provider="anthropic")
+
+
+# ============================================================================
+# call_with_routing
+# ============================================================================
+
+def test_routing_fails_over_on_service_errors():
+    """A 503 from the first profile is retried on the next one."""
+    def call(_name, params):
+        if params["name"] == "a":
+            raise _unavailable("a")
+        return f"answer from {params['name']}"
+
+    result = call_with_routing(call, [("a", {"name": "a"}), ("b", {"name": "b"})])
+
+    assert result == "answer from b"
+    assert get_provider_health("a").failures == 1
+    assert get_provider_health("b").calls == 1
+
+
+def test_routing_fails_over_on_rate_limit_and_timeout():
+    """Rate limits and timeouts also move on; the last error is raised when all fail."""
+    errors = {
+        "a": RateLimitError(message="slow down", llm_provider="anthropic", model="a"),
+        "b": _timeout("b"),
+    }
+
+    def call(_name, params):
+        raise errors[params["name"]]
+
+    with pytest.raises(Timeout):
+        call_with_routing(call, [("a", {"name": "a"}), ("b", {"name": "b"})])
+
+
+def test_routing_does_not_fail_over_on_bad_request():
+    """Errors caused by the request itself are raised immediately."""
+    call = Mock(side_effect=BadRequestError(message="bad", model="a", llm_provider="anthropic"))
+
+    with pytest.raises(BadRequestError):
+        call_with_routing(call, [("a", {"name": "a"}), ("b", {"name": "b"})])
+    assert call.call_count == 1
+
+
+def test_unhealthy_profile_is_tried_last_until_cooldown():
+    """A profile with a high error rate is demoted, then probed again after the cooldown."""
+    for _ in range(5):
+        get_provider_health("a").record_failure()
+    call = Mock(side_effect=lambda name, params: name)
+
+    assert call_with_routing(call, [("a", {"name": "a"}), ("b", {"name": "b"})]) == "b"
+
+    with patch("openedx_ai_extensions.processors.llm.routing.time.monotonic", return_value=time.monotonic() + 60):
+        assert call_with_routing(call, [("a", {"name": "a"}), ("b", {"name": "b"})]) == "a"
+
+
+def test_health_tracks_latency_ewma_and_percentile():
+    """Successful calls feed the latency EWMA and percentile samples."""
+    health = get_provider_health("a")
+    for latency in (0.1, 0.2, 0.3, 0.4, 1.0):
+        health.record_success(latency)
+
+    assert health.latency_percentile(95) == 1.0
+    assert health.latency_percentile(50) == 0.3
+    [stats] = get_provider_health_stats()
+    assert stats["profile"] == "a"
+    assert stats["calls"] == 5
+    assert stats["latency_p95_ms"] == 1000
+    assert stats["error_rate_ewma"] == 0.0
+
+
+def test_hedged_request_returns_first_answer():
+    """A slow primary is hedged with the next profile and the faster answer wins."""
+    release_primary = threading.Event()
+
+    def call(_name, params):
+        if params["name"] == "a":
+            release_primary.wait(5)
+            return "slow"
+        return "fast"
+
+    start = time.monotonic()
+    result = call_with_routing(
+        call,
+        [("a", {"name": "a"}), ("b", {"name": "b"})],
+        {"hedge": True, "hedge_after_ms": 50},
+    )
+    release_primary.set()
+
+    assert result == "fast"
+    assert time.monotonic() - start < 2
+
+
+def test_hedge_not_sent_when_primary_is_fast():
+    """No second request is made when the primary answers within the hedge delay."""
+    call = Mock(side_effect=lambda name, params: name)
+
+    result = call_with_routing(
+        call,
+        [("a", {"name": "a"}), ("b", {"name": "b"})],
+        {"hedge": True, "hedge_after_ms": 2000},
+    )
+
+    assert result == "a"
+    assert call.call_count == 1
+
+
+def test_hedge_delay_uses_primary_percentile_when_sampled():
+    """Once enough samples exist, the hedge delay is the primary's p95 latency."""
+    config = {**routing.DEFAULT_ROUTING_CONFIG, "hedge_min_samples": 3}
+    assert routing._hedge_delay("a", config) == 2.0
+    for latency in (0.1, 0.2, 0.3):
+        get_provider_health("a").record_success(latency)
+    assert routing._hedge_delay("a", config) == 0.3
+
+
+def test_hedged_request_fails_over_on_error():
+    """With hedging enabled, a failing primary still fails over to the next profile."""
+    def call(_name, params):
+        if params["name"] == "a":
+            raise _unavailable("a")
+        return "b"
+
+    result = call_with_routing(
+        call, [("a", {"name": "a"}), ("b", {"name": "b"})], {"hedge": True, "hedge_after_ms": 1000},
+    )
+    assert result == "b"
+
+
+# ============================================================================
+# LitellmProcessor integration
+# ============================================================================
+
+@pytest.mark.django_db
+def test_processor_accepts_provider_list(ai_extensions):  # pylint: disable=unused-argument
+    """The first listed profile configures the processor; the rest are fallbacks."""
+    processor = LitellmProcessor(config={"LitellmProcessor": {"provider": ["primary", "backup"]}})
+
+    assert processor.config_profile == "primary"
+    assert processor.extra_params["model"] == "anthropic/claude-primary"
+    assert [name for name, _ in processor.provider_routes] == ["primary", "backup"]
+
+
+@pytest.mark.django_db
+def test_processor_rejects_mixed_providers(ai_extensions):  # pylint: disable=unused-argument
+    """Fallback profiles must use the same provider prefix as the primary."""
+    with pytest.raises(ValueError, match="must use the same provider"):
+        LitellmProcessor(config={"LitellmProcessor": {"provider": ["primary", "other"]}})
+
+
+@pytest.mark.django_db
+def test_processor_rejects_unknown_fallback(ai_extensions):  # pylint: disable=unused-argument
+    """Every listed profile must exist."""
+    with pytest.raises(ValueError, match="Unknown AI_EXTENSIONS profile 'missing'"):
+        LitellmProcessor(config={"LitellmProcessor": {"provider": ["primary", "missing"]}})
+
+
+@pytest.mark.django_db
+def test_processor_rejects_empty_provider_list(ai_extensions):  # pylint: disable=unused-argument
+    """An empty list is a configuration error."""
+    with pytest.raises(TypeError, match="`provider` must be a string"):
+        LitellmProcessor(config={"LitellmProcessor": {"provider": []}})
+
+
+@pytest.mark.django_db
+def test_route_params_swap_profile_settings(ai_extensions):  # pylint: disable=unused-argument
+    """Fallback calls use the fallback's model and credentials, keeping options and request keys."""
+    processor = LitellmProcessor(config={
+        "LitellmProcessor": {"provider": ["primary", "backup"], "options": {"temperature": 0.2}},
+    })
+    params = {**processor.extra_params, "messages": [{"role": "user", "content": "hi"}], "stream": False}
+
+    routed = processor._route_params(params, processor.provider_routes[1][1])
+
+    assert routed["model"] == "anthropic/claude-backup"
+    assert routed["api_key"] == "key-backup"
+    assert "api_base" not in routed
+    assert routed["temperature"] == 0.2
+    assert routed["messages"] == params["messages"]
+    assert params["model"] == "anthropic/claude-primary"
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_llm_processor_non_streaming_fails_over(mock_completion, ai_extensions):  # pylint: disable=unused-argument
+    """LLMProcessor non-streaming completions fail over to the backup profile."""
+    response = Mock()
+    response.choices = [Mock(message=Mock(content="from backup", tool_calls=None))]
+    response.usage = Mock(total_tokens=5, prompt_tokens=3, completion_tokens=2)
+    mock_completion.side_effect = [_unavailable("primary"), response]
+    processor = LLMProcessor(config={
+        "LLMProcessor": {"function": "summarize_content", "provider": ["primary", "backup"]},
+    })
+
+    result = processor.process(context="Some content")
+
+    assert result["response"] == "from backup"
+    models = [call.kwargs["model"] for call in mock_completion.call_args_list]
+    assert models == ["anthropic/claude-primary", "anthropic/claude-backup"]
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.llm.llm_processor.completion")
+def test_llm_processor_streaming_fails_over(mock_completion, ai_extensions):  # pylint: disable=unused-argument
+    """Opening a stream fails over too; chunks then come from the backup profile."""
+    chunk = Mock(usage=None, response=None)
+    chunk.choices = [Mock(delta=Mock(content="streamed", tool_calls=None))]
+    mock_completion.side_effect = [_timeout("primary"), iter([chunk])]
+    processor = LLMProcessor(config={
+        "LLMProcessor": {"function": "summarize_content", "provider": ["primary", "backup"], "stream": True},
+    })
+
+    output = b"".join(processor.process(context="Some content"))
+
+    assert output == b"streamed"
+    assert mock_completion.call_args_list[1].kwargs["model"] == "anthropic/claude-backup"
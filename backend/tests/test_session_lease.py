@@ -0,0 +1,97 @@
+"""
+Tests for the per-session lease serializing chat turns.
+"""
+# pylint: disable=redefined-outer-name
+import json
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpRequest
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_ai_extensions.decorators import handle_ai_errors
+from openedx_ai_extensions.workflows import session_lease
+from openedx_ai_extensions.workflows.models import AIWorkflowProfile, AIWorkflowScope
+from openedx_ai_extensions.workflows.orchestrators.threaded_orchestrator import ThreadedLLMResponse
+from openedx_ai_extensions.workflows.session_lease import SessionBusyError, acquire, get_session_lease_report, release
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def lease_settings(settings):
+    """Reject overlapping turns right away and clean shared state."""
+    settings.AI_EXTENSIONS_SESSION_LEASE = {"wait_s": 0}
+    cache.clear()
+    yield settings
+    cache.clear()
+
+
+@pytest.fixture
+def orchestrator(db):  # pylint: disable=unused-argument
+    """Return a ThreadedLLMResponse orchestrator of a new chat session."""
+    course_key = CourseKey.from_string("course-v1:edX+DemoX+Demo_Course")
+    profile = AIWorkflowProfile.objects.create(slug="chat", base_filepath="base/default.json", content_patch="{}")
+    scope = AIWorkflowScope.objects.create(
+        location_regex=".*", course_id=course_key, service_variant="lms", profile=profile, enabled=True
+    )
+    user = User.objects.create_user(username="lease", email="lease@example.com")
+    return ThreadedLLMResponse(workflow=scope, user=user, context={"course_id": str(course_key)})
+
+
+def test_overlapping_turn_is_rejected():
+    """A second turn of a busy session gets SessionBusyError; the session is free once released."""
+    lease = acquire("session-1", "chat")
+    with pytest.raises(SessionBusyError):
+        acquire("session-1", "chat")
+    assert acquire("session-2", "chat") is not None
+
+    release(lease)
+    release(acquire("session-1", "chat"))
+
+    row = get_session_lease_report(["chat"])[0]
+    assert (row["turns"], row["contended"], row["rejected"]) == (3, 0, 1)
+    assert row["contention_rate"] == 0.25
+
+
+def test_overlapping_turn_waits_for_the_running_one(settings):
+    """Within wait_s the turn waits for the lease and is counted as contended."""
+    settings.AI_EXTENSIONS_SESSION_LEASE = {"wait_s": 5, "poll_interval_s": 0.01}
+    running = acquire("session-1", "chat")
+
+    with patch.object(session_lease.time, "sleep", side_effect=lambda _: release(running)) as sleep:
+        lease = acquire("session-1", "chat")
+
+    sleep.assert_called_once()
+    assert lease.contended
+    assert get_session_lease_report(["chat"])[0]["contended"] == 1
+
+
+def test_stream_keeps_the_lease_until_consumed(orchestrator):
+    """A streamed turn holds the session lease until its generator is done."""
+    def stream():
+        yield b"partial"
+        yield b" answer"
+
+    with patch.object(orchestrator, "_run_turn", return_value=stream()):
+        response = orchestrator.run("Hello")
+    assert next(response) == b"partial"
+    with pytest.raises(SessionBusyError):
+        orchestrator.run("Hello again")
+
+    list(response)
+    with patch.object(orchestrator, "_run_turn", return_value={"status": "completed"}):
+        assert orchestrator.run("Hello again") == {"status": "completed"}
+
+
+def test_busy_session_is_a_409():
+    """API views report a busy session as a 409 with its own error code."""
+    @handle_ai_errors
+    def view(request):
+        raise SessionBusyError("session-1")
+
+    response = view(HttpRequest())
+    assert response.status_code == 409
+    assert json.loads(response.content)["error"]["code"] == "session_busy"
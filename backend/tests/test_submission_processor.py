@@ -4,20 +4,25 @@ Tests for the SubmissionProcessor module.
 
 import json
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from opaque_keys.edx.keys import CourseKey
 
 # Mock the submissions module before any imports that depend on it
 sys.modules["submissions"] = MagicMock()
 sys.modules["submissions.api"] = MagicMock()
 
+from openedx_ai_extensions.models import ContentBlob  # noqa: E402 pylint: disable=wrong-import-position
 from openedx_ai_extensions.processors.openedx.submission_processor import (  # noqa: E402 pylint: disable=wrong-import-position
     SubmissionProcessor,
 )
+from openedx_ai_extensions.processors.openedx.utils.content_blobs import (  # noqa: E402 pylint: disable=wrong-import-position
+    content_digest,
+)
 from openedx_ai_extensions.workflows.models import (  # noqa: E402 pylint: disable=wrong-import-position
     AIWorkflowProfile,
     AIWorkflowScope,
@@ -27,6 +32,14 @@ from openedx_ai_extensions.workflows.models import (  # noqa: E402 pylint: disab
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test without cached history tails."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user(db):  # pylint: disable=unused-argument
     """
@@ -590,11 +603,12 @@ def test_update_submission_creates_submission(
     data = [{"role": "user", "content": "Test message"}]
     submission_processor.update_submission(data)
 
-    # Verify create_submission was called with correct parameters
+    # Verify create_submission was called with correct parameters (the answer is compact JSON)
     mock_submissions_api.create_submission.assert_called_once_with(
         student_item_dict=submission_processor.student_item_dict,
-        answer=json.dumps(data),
+        answer=ANY,
     )
+    assert json.loads(mock_submissions_api.create_submission.call_args[1]["answer"]) == data
 
     # Verify session was updated with new submission ID
     submission_processor.user_session.refresh_from_db()
@@ -844,3 +858,285 @@ def test_get_full_thread_restores_student_item(
 
     # student_item_dict should be restored to original
     assert processor.student_item_dict == original_dict
+
+
+# ============================================================================
+# History tail
+# ============================================================================
+
+
+def chat_submission(uuid, user_text, assistant_text):
+    """Return a stored chat turn as the Submissions API serializes it."""
+    return {
+        "uuid": uuid,
+        "attempt_number": int(uuid[-2:]) + 1,
+        "answer": json.dumps([
+            {"role": "user", "content": user_text},
+            {"role": "assistant", "content": assistant_text},
+        ]),
+        "created_at": f"2025-01-01T00:00:{uuid[-2:]}Z",
+    }
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_history_tail_serves_recent_messages_after_cold_start(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """The first read rebuilds the tail from submissions; later reads and new turns don't load them."""
+    mock_submissions_api.get_submissions.return_value = [
+        chat_submission(f"sub-{index:02d}", f"q{index}", f"a{index}") for index in reversed(range(8))
+    ]
+    submission_processor.user_session.local_submission_id = "sub-07"
+    first = json.loads(submission_processor.get_chat_history(None)["response"])
+
+    mock_submissions_api.create_submission.return_value = chat_submission("sub-08", "q8", "a8")
+    submission_processor.update_chat_submission([
+        {"role": "system", "content": "You are a tutor"},
+        {"role": "user", "content": "q8"},
+        {"role": "assistant", "content": "a8"},
+    ])
+    second = json.loads(submission_processor.get_chat_history(None)["response"])
+
+    mock_submissions_api.get_submissions.assert_called_once()
+    assert [m["content"] for m in first["messages"]] == [f"{kind}{i}" for i in range(3, 8) for kind in "qa"]
+    assert [m["content"] for m in second["messages"]] == [f"{kind}{i}" for i in range(4, 9) for kind in "qa"]
+    assert second["metadata"]["has_more"] is True
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_history_tail_serves_older_pages_it_covers(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """Lazy loading of older messages uses the tail while it covers them."""
+    mock_submissions_api.get_submissions.return_value = [
+        chat_submission(f"sub-{index:02d}", f"q{index}", f"a{index}") for index in reversed(range(8))
+    ]
+    submission_processor.user_session.local_submission_id = "sub-07"
+    submission_processor.get_chat_history(None)
+
+    older = json.loads(submission_processor.get_previous_messages(10)["response"])
+
+    mock_submissions_api.get_submissions.assert_called_once()
+    assert [m["content"] for m in older["messages"]] == [f"{kind}{i}" for i in range(3) for kind in "qa"]
+    assert older["metadata"]["has_more"] is False
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_history_tail_is_rebuilt_when_stale(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """A tail that doesn't end at the session's latest submission is rebuilt from submissions."""
+    mock_submissions_api.get_submissions.return_value = [chat_submission("sub-00", "q0", "a0")]
+    submission_processor.user_session.local_submission_id = "sub-00"
+    submission_processor.get_chat_history(None)
+
+    mock_submissions_api.get_submissions.return_value = [
+        chat_submission("sub-01", "q1", "a1"), chat_submission("sub-00", "q0", "a0"),
+    ]
+    submission_processor.user_session.local_submission_id = "sub-01"
+    messages = json.loads(submission_processor.get_chat_history(None)["response"])["messages"]
+
+    assert mock_submissions_api.get_submissions.call_count == 2
+    assert [m["content"] for m in messages] == ["q0", "a0", "q1", "a1"]
+
+
+def submissions_store(count):
+    """Return a get_submissions stand-in over ``count`` chat turns that honors ``limit``."""
+    submissions = [chat_submission(f"sub-{index:02d}", f"q{index}", f"a{index}") for index in reversed(range(count))]
+
+    def get_submissions(_student_item_dict, limit=None):
+        return [dict(submission) for submission in submissions[:limit]]
+
+    return submissions, get_submissions
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_cursor_pages_are_stable_when_new_turns_arrive(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """Pages before a cursor don't shift when turns are saved while scrolling."""
+    submissions, mock_submissions_api.get_submissions.side_effect = submissions_store(12)
+    submission_processor.user_session.local_submission_id = "sub-11"
+    first = json.loads(submission_processor.get_chat_history(None)["response"])
+    assert first["metadata"]["cursor"] == "8:0"
+
+    submissions.insert(0, chat_submission("sub-12", "q12", "a12"))
+    submission_processor.user_session.local_submission_id = "sub-12"
+    with patch.object(settings, "AI_EXTENSIONS_ENABLE_HISTORY_TAIL", False, create=True):
+        older = json.loads(submission_processor.get_previous_messages(cursor=first["metadata"]["cursor"])["response"])
+
+    assert [m["content"] for m in older["messages"]] == [f"{kind}{i}" for i in range(2, 7) for kind in "qa"]
+    assert older["metadata"]["cursor"] == "3:0"
+    assert older["metadata"]["has_more"] is True
+    assert mock_submissions_api.get_submissions.call_args.kwargs["limit"] == 11
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_cursor_page_grows_the_request_and_reaches_the_start(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """Skipped newer submissions grow the request; the first page reports no more history."""
+    _, mock_submissions_api.get_submissions.side_effect = submissions_store(20)
+    submission_processor.user_session.local_submission_id = "sub-19"
+
+    with patch.object(settings, "AI_EXTENSIONS_ENABLE_HISTORY_TAIL", False, create=True):
+        older = json.loads(submission_processor.get_previous_messages(cursor="4:1")["response"])
+
+    assert [m["content"] for m in older["messages"]] == ["q0", "a0", "q1", "a1", "q2", "a2", "q3"]
+    assert older["metadata"]["has_more"] is False
+    assert [c.kwargs["limit"] for c in mock_submissions_api.get_submissions.call_args_list] == [11, 22]
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_cursor_page_is_served_from_the_history_tail(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """A cursor page inside the cached tail doesn't load submissions."""
+    _, mock_submissions_api.get_submissions.side_effect = submissions_store(8)
+    submission_processor.user_session.local_submission_id = "sub-07"
+    cursor = json.loads(submission_processor.get_chat_history(None)["response"])["metadata"]["cursor"]
+
+    older = json.loads(submission_processor.get_previous_messages(cursor=cursor)["response"])
+
+    mock_submissions_api.get_submissions.assert_called_once()
+    assert [m["content"] for m in older["messages"]] == [f"{kind}{i}" for i in range(3) for kind in "qa"]
+    assert older["metadata"] == {"has_more": False, "new_count": 6, "cursor": "1:0"}
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_large_system_messages_are_stored_once_as_content_blobs(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """Submissions reference large system messages; only the rebuild history resolves them."""
+    context = "Course context. " * 200
+    mock_submissions_api.create_submission.side_effect = lambda student_item_dict, answer: {
+        "uuid": "sub-00", "attempt_number": 1, "answer": answer,
+    }
+    for _ in range(2):
+        submission_processor.update_chat_submission([
+            {"role": "system", "content": "You are a tutor"},
+            {"role": "system", "content": context},
+            {"role": "user", "content": "q0"},
+            {"role": "assistant", "content": "a0"},
+        ])
+
+    stored = json.loads(mock_submissions_api.create_submission.call_args.kwargs["answer"])
+    assert stored[0] == {"role": "system", "content": "You are a tutor", "tokens": 7}
+    assert stored[1] == {"role": "system", "content_ref": content_digest(context), "tokens": 804}
+    assert ContentBlob.objects.count() == 1
+
+    mock_submissions_api.get_submissions.return_value = [
+        {"uuid": "sub-00", "attempt_number": 1, "answer": json.dumps(stored)}
+    ]
+    submission_processor.user_session.local_submission_id = "sub-00"
+    assert submission_processor.get_full_message_history() == [
+        {"role": "user", "content": "q0"}, {"role": "assistant", "content": "a0"},
+    ]
+    assert [m["content"] for m in submission_processor.get_thread_rebuild_history()] == [
+        "You are a tutor", context, "q0", "a0",
+    ]
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_messages_are_saved_with_token_counts(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """update_chat_submission stores an estimated token count with each message."""
+    mock_submissions_api.create_submission.return_value = {"uuid": "sub-00", "attempt_number": 1}
+
+    submission_processor.update_chat_submission([
+        {"role": "user", "content": "x" * 400},
+        {"role": "assistant", "content": "ok"},
+    ])
+
+    stored = json.loads(mock_submissions_api.create_submission.call_args.kwargs["answer"])
+    assert [msg["tokens"] for msg in stored] == [104, 4]
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_token_budget_window_uses_stored_counts(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """With max_context_tokens the newest messages fitting the stored counts are returned."""
+    counts = [500, 20, 30, 900, 40, 60]
+    mock_submissions_api.get_submissions.return_value = [{
+        "uuid": "sub-00",
+        "attempt_number": 1,
+        "answer": json.dumps([
+            {"role": "user" if index % 2 == 0 else "assistant", "content": f"m{index}", "tokens": tokens}
+            for index, tokens in enumerate(counts)
+        ]),
+    }]
+    submission_processor.user_session.local_submission_id = "sub-00"
+    submission_processor.max_context_tokens = 1000
+
+    history = submission_processor.get_full_message_history()
+
+    assert history == [
+        {"role": "assistant", "content": "m3"},
+        {"role": "user", "content": "m4"},
+        {"role": "assistant", "content": "m5"},
+    ]
+    assert len(submission_processor.get_full_message_history(max_tokens=0)) == 6
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_history_tail_serves_the_llm_history_within_the_token_budget(
+    mock_submissions_api, submission_processor, settings  # pylint: disable=redefined-outer-name
+):
+    """get_full_message_history reads the tail when the budget fills inside it, else loads every submission."""
+    settings.AI_EXTENSIONS_HISTORY_TAIL = {"size": 10}
+    submissions, mock_submissions_api.get_submissions.side_effect = submissions_store(8)
+    submission_processor.user_session.local_submission_id = "sub-07"
+    submission_processor.max_context_tokens = 20
+    submission_processor.get_full_message_history()
+
+    submissions.insert(0, chat_submission("sub-08", "q8", "a8"))
+    mock_submissions_api.create_submission.return_value = submissions[0]
+    submission_processor.update_chat_submission([
+        {"role": "user", "content": "q8"},
+        {"role": "assistant", "content": "a8"},
+    ])
+    history = submission_processor.get_full_message_history()
+
+    mock_submissions_api.get_submissions.assert_called_once()
+    assert [m["content"] for m in history] == ["a6", "q7", "a7", "q8", "a8"]
+    assert all(set(m) == {"role", "content"} for m in history)
+
+    assert len(submission_processor.get_full_message_history(max_tokens=1000)) == 18
+    assert mock_submissions_api.get_submissions.call_count == 2
+
+
+@pytest.mark.django_db
+@patch("openedx_ai_extensions.processors.openedx.submission_processor.submissions_api")
+def test_chat_history_responses_leave_out_token_counts(
+    mock_submissions_api, submission_processor  # pylint: disable=redefined-outer-name
+):
+    """Token counts saved with messages (and cached in the tail) are not sent to the frontend."""
+    submissions, mock_submissions_api.get_submissions.side_effect = submissions_store(12)
+    submission_processor.user_session.local_submission_id = "sub-11"
+    submission_processor.get_chat_history(None)
+    submissions.insert(0, chat_submission("sub-12", "q12", "a12"))
+    mock_submissions_api.create_submission.return_value = submissions[0]
+    submission_processor.update_chat_submission([
+        {"role": "user", "content": "q12"},
+        {"role": "assistant", "content": "a12"},
+    ])
+
+    recent = json.loads(submission_processor.get_chat_history(None)["response"])
+    older = json.loads(submission_processor.get_previous_messages(cursor=recent["metadata"]["cursor"])["response"])
+    counted = json.loads(submission_processor.get_previous_messages(10)["response"])
+
+    for response in (recent, older, counted):
+        assert response["messages"]
+        assert all("tokens" not in message for message in response["messages"])
@@ -0,0 +1,247 @@
+"""
+Tests for precomputed video transcript digests and the transcript_mode option.
+"""
+# pylint: disable=protected-access
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+
+from openedx_ai_extensions.models import TranscriptDigest
+from openedx_ai_extensions.processors.openedx.openedx_processor import OpenEdXProcessor
+from openedx_ai_extensions.processors.openedx.utils import content_indexing, transcript_digests
+from openedx_ai_extensions.processors.openedx.utils.transcript_digests import (
+    DIGEST_METHOD,
+    load_transcript_digests,
+    schedule_course_digests,
+    summarize_transcript,
+)
+
+MODIFIED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+COURSE_KEY = CourseKey.from_string("course-v1:edX+T+1")
+
+LECTURE = " ".join([
+    "Welcome back everyone.",
+    "Photosynthesis converts light energy into chemical energy in plants.",
+    "I had coffee this morning.",
+    "Chlorophyll absorbs light energy and drives photosynthesis in the chloroplast.",
+    "Anyway, let's move on.",
+    "The chemical energy of photosynthesis is stored as glucose in plants.",
+] * 3)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(settings):
+    """Start every test with digests on and an empty cache."""
+    settings.AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_video(name="a", video_id="vid-a"):
+    """Build a video block with an English transcript."""
+    block = MagicMock()
+    block.location = f"block-v1:edX+T+1+type@video+block@{name}"
+    block.category = "video"
+    block.display_name = name
+    block.edx_video_id = video_id
+    block.transcripts = {"en": f"{video_id}-en.srt"}
+    block.get_children.return_value = []
+    return block
+
+
+def edxval_api(text):
+    """Return a fake edxval.api module serving ``text`` as every transcript."""
+    api = MagicMock()
+    api.get_video_transcript_data.return_value = {"content": json.dumps({"text": [text]})}
+    return api
+
+
+# -------------------------------------------------------------------------
+# Summarization
+# -------------------------------------------------------------------------
+
+def test_short_transcripts_are_kept_whole():
+    """Transcripts under min_chars are not condensed."""
+    assert summarize_transcript("Just a short clip.", max_chars=100, ratio=0.1, min_chars=50) == "Just a short clip."
+
+
+def test_digest_keeps_key_sentences_in_order_within_budget():
+    """The highest-scoring sentences are kept, in transcript order."""
+    digest = summarize_transcript(LECTURE, max_chars=250, ratio=0.1, min_chars=0)
+
+    assert len(digest) <= 250
+    assert "coffee" not in digest
+    assert "photosynthesis" in digest.lower()
+    sentences = [sentence for sentence in LECTURE.split(". ") if sentence.rstrip(".") in digest]
+    assert [digest.index(sentence.rstrip(".")) for sentence in sentences] == sorted(
+        digest.index(sentence.rstrip(".")) for sentence in sentences
+    )
+
+
+def test_unpunctuated_transcripts_are_windowed():
+    """Auto-generated captions without punctuation are still condensed."""
+    text = " ".join(f"word{index % 7} energy plants" for index in range(400))
+    digest = summarize_transcript(text, max_chars=300, ratio=0.1, min_chars=0)
+    assert 0 < len(digest) <= 300
+
+
+# -------------------------------------------------------------------------
+# Loading
+# -------------------------------------------------------------------------
+
+@pytest.mark.django_db
+def test_stored_digest_is_served_without_downloading():
+    """A digest computed from the current transcript version is used as is."""
+    TranscriptDigest.objects.create(
+        edx_video_id="vid-a", language_code="en", transcript_modified=MODIFIED,
+        method=DIGEST_METHOD, digest="Stored digest",
+    )
+    block = make_video()
+
+    with patch.object(transcript_digests, "_transcript_versions", return_value={("vid-a", "en"): MODIFIED}), \
+            patch.object(transcript_digests, "load_transcripts") as load:
+        assert load_transcript_digests([block]) == {str(block.location): "Stored digest"}
+    load.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_outdated_digest_is_recomputed_and_stored():
+    """A digest whose transcript has since been modified is recomputed from the new transcript."""
+    TranscriptDigest.objects.create(
+        edx_video_id="vid-a", language_code="en", transcript_modified=MODIFIED,
+        method=DIGEST_METHOD, digest="Old digest",
+    )
+    updated = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    block = make_video()
+
+    with patch.object(transcript_digests, "_transcript_versions", return_value={("vid-a", "en"): updated}), \
+            patch.dict("sys.modules", {"edxval.api": edxval_api(LECTURE)}), \
+            patch("openedx_ai_extensions.processors.openedx.utils.transcripts._transcript_versions",
+                  return_value={("vid-a", "en"): updated}):
+        digest = load_transcript_digests([block])[str(block.location)]
+
+    stored = TranscriptDigest.objects.get(edx_video_id="vid-a", language_code="en")
+    assert digest == stored.digest == summarize_transcript(LECTURE)
+    assert stored.transcript_modified == updated
+    assert stored.source_chars == len(LECTURE)
+
+
+@pytest.mark.django_db
+def test_unversioned_transcripts_are_digested_but_not_stored():
+    """Without an edxval version the digest is computed for the request only."""
+    block = make_video()
+
+    with patch.object(transcript_digests, "_transcript_versions", return_value={}), \
+            patch.dict("sys.modules", {"edxval.api": edxval_api(LECTURE)}):
+        assert load_transcript_digests([block]) == {str(block.location): summarize_transcript(LECTURE)}
+    assert not TranscriptDigest.objects.exists()
+
+
+# -------------------------------------------------------------------------
+# Offline computation
+# -------------------------------------------------------------------------
+
+def test_publish_schedules_one_task_per_course():
+    """Publishing many blocks queues a single debounced digest task for the course."""
+    with patch.object(transcript_digests.compute_transcript_digests_task, "apply_async") as apply_async, \
+            patch.object(content_indexing, "schedule_course_index"):
+        for name in ("a", "b", "c"):
+            XBLOCK_PUBLISHED.send_event(xblock_info=XBlockData(
+                usage_key=UsageKey.from_string(f"block-v1:edX+T+1+type@vertical+block@{name}"),
+                block_type="vertical",
+            ))
+
+    apply_async.assert_called_once_with(args=[str(COURSE_KEY)], countdown=60)
+
+
+def test_publish_ignored_when_disabled(settings):
+    """AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS = False skips the digest task."""
+    settings.AI_EXTENSIONS_ENABLE_TRANSCRIPT_DIGESTS = False
+    with patch.object(transcript_digests, "schedule_course_digests") as schedule:
+        XBLOCK_PUBLISHED.send_event(xblock_info=XBlockData(
+            usage_key=UsageKey.from_string("block-v1:edX+T+1+type@vertical+block@a"), block_type="vertical",
+        ))
+    schedule.assert_not_called()
+
+
+def test_schedule_is_debounced():
+    """Only the first schedule call within publish_delay queues the task."""
+    with patch.object(transcript_digests.compute_transcript_digests_task, "apply_async") as apply_async:
+        assert schedule_course_digests(COURSE_KEY) is True
+        assert schedule_course_digests(COURSE_KEY) is False
+    assert apply_async.call_count == 1
+
+
+def test_task_digests_published_course_videos():
+    """The task loads the course's published videos and computes their digests."""
+    videos = [make_video("a", "vid-a"), make_video("b", "vid-b")]
+    store = MagicMock()
+    store.get_items.return_value = videos
+    xmodule = MagicMock()
+    xmodule.django.modulestore.return_value = store
+
+    with patch.dict("sys.modules", {
+        "xmodule": xmodule, "xmodule.modulestore": xmodule, "xmodule.modulestore.django": xmodule.django,
+    }), patch.object(transcript_digests, "load_transcript_digests") as load:
+        assert transcript_digests.compute_transcript_digests_task(str(COURSE_KEY)) == 2
+
+    store.get_items.assert_called_once_with(COURSE_KEY, qualifiers={"category": "video"})
+    load.assert_called_once_with(videos, max_workers=4)
+
+
+# -------------------------------------------------------------------------
+# transcript_mode
+# -------------------------------------------------------------------------
+
+def test_digest_mode_serves_digests():
+    """transcript_mode "digest" returns the digest instead of the full transcript."""
+    unit = make_video("unit")
+    unit.category = "vertical"
+    video = make_video()
+    unit.get_children.return_value = [video]
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"transcript_mode": "digest"}})
+
+    api = edxval_api(LECTURE)
+
+    with patch(
+        "openedx_ai_extensions.processors.openedx.openedx_processor.load_transcript_digests",
+        return_value={str(video.location): "The digest"},
+    ), patch.dict("sys.modules", {"edxval.api": api}):
+        block = processor._get_unit_data(unit)["blocks"][0]
+
+    assert block["transcript_digest"] == "The digest"
+    assert "transcript_text" not in block
+    api.get_video_transcript_data.assert_not_called()
+
+
+def test_none_mode_leaves_transcripts_out():
+    """transcript_mode "none" never loads transcripts."""
+    unit = make_video("unit")
+    unit.category = "vertical"
+    unit.get_children.return_value = [make_video()]
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"transcript_mode": "none"}})
+
+    api = edxval_api(LECTURE)
+
+    with patch.dict("sys.modules", {"edxval.api": api}):
+        block = processor._get_unit_data(unit)["blocks"][0]
+
+    assert "transcript_text" not in block and "transcript_digest" not in block
+    api.get_video_transcript_data.assert_not_called()
+
+
+def test_unknown_mode_is_rejected():
+    """An invalid transcript_mode is reported instead of silently loading full transcripts."""
+    unit = make_video("unit")
+    unit.get_children.return_value = [make_video()]
+    processor = OpenEdXProcessor(processor_config={"OpenEdXProcessor": {"transcript_mode": "short"}})
+
+    with pytest.raises(ValueError, match="transcript_mode"):
+        processor._get_unit_data(unit)
@@ -0,0 +1,149 @@
+"""
+Tests for batched transcript loading and the cleaned transcript cache.
+"""
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from openedx_ai_extensions.processors.openedx.utils import transcripts
+from openedx_ai_extensions.processors.openedx.utils.transcripts import (
+    clean_transcript,
+    load_transcripts,
+    prefetched_transcripts,
+)
+
+MODIFIED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test with an empty cache."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_video(name, video_id, languages=("en",)):
+    """Build a video block with transcripts in ``languages``."""
+    block = MagicMock()
+    block.location = f"block-v1:edX+T+1+type@video+block@{name}"
+    block.edx_video_id = video_id
+    block.transcripts = {language: f"{video_id}-{language}.srt" for language in languages}
+    return block
+
+
+def edxval_api(texts):
+    """Return a fake edxval.api module serving ``texts`` ({video_id: caption}) as SJSON."""
+    api = MagicMock()
+    api.get_video_transcript_data.side_effect = lambda video_id, language_code: {
+        "content": json.dumps({"start": [0], "end": [1], "text": [texts[video_id]]}),
+    }
+    return api
+
+
+# -------------------------------------------------------------------------
+# Cleaning
+# -------------------------------------------------------------------------
+
+def test_clean_sjson():
+    """SJSON captions are joined, with markup and rolling duplicates dropped."""
+    content = json.dumps({"start": [0, 1, 2], "end": [1, 2, 3], "text": ["<i>Hello</i>", "Hello", "world\n again"]})
+    assert clean_transcript(content.encode("utf-8")) == "Hello world again"
+
+
+def test_clean_srt():
+    """Cue numbers and timings are dropped from SRT."""
+    content = (
+        "\ufeff1\n00:00:01,000 --> 00:00:02,000\n{\\an8}First line\nsecond line\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\n42\n"
+    )
+    assert clean_transcript(content) == "First line second line 42"
+
+
+def test_clean_vtt():
+    """The WEBVTT header and cue timings are dropped from VTT."""
+    content = "WEBVTT\n\n00:00.000 --> 00:01.000\n<v Speaker>Hi</v>\n\n00:01.000 --> 00:02.000\nthere\n"
+    assert clean_transcript(content) == "Hi there"
+
+
+# -------------------------------------------------------------------------
+# Loading
+# -------------------------------------------------------------------------
+
+def test_load_batches_versions_and_cache_lookups():
+    """A sequence of videos costs one versions query and one cache round trip."""
+    blocks = [make_video("a", "vid-a"), make_video("b", "vid-b", ("fr", "es")), make_video("c", "vid-a")]
+    versions = {("vid-a", "en"): MODIFIED, ("vid-b", "fr"): MODIFIED}
+    api = edxval_api({"vid-a": "Alpha", "vid-b": "Bravo"})
+
+    with patch.object(transcripts, "_transcript_versions", return_value=versions) as versions_query, \
+            patch.object(transcripts, "cache", wraps=cache) as wrapped_cache, \
+            patch.dict("sys.modules", {"edxval.api": api}):
+        result = load_transcripts(blocks, max_workers=4)
+
+    assert result == {str(blocks[0].location): "Alpha", str(blocks[1].location): "Bravo",
+                      str(blocks[2].location): "Alpha"}
+    versions_query.assert_called_once_with(["vid-a", "vid-b"])
+    wrapped_cache.get_many.assert_called_once()
+    assert api.get_video_transcript_data.call_count == 2
+
+
+def test_cached_until_transcript_is_modified():
+    """Cleaned texts are served from the cache until the transcript's modified timestamp changes."""
+    block = make_video("a", "vid-a")
+    api = edxval_api({"vid-a": "Alpha"})
+
+    with patch.dict("sys.modules", {"edxval.api": api}):
+        with patch.object(transcripts, "_transcript_versions", return_value={("vid-a", "en"): MODIFIED}):
+            load_transcripts([block])
+            assert load_transcripts([block]) == {str(block.location): "Alpha"}
+        assert api.get_video_transcript_data.call_count == 1
+
+        updated = {("vid-a", "en"): datetime(2025, 2, 1, tzinfo=timezone.utc)}
+        with patch.object(transcripts, "_transcript_versions", return_value=updated):
+            load_transcripts([block])
+        assert api.get_video_transcript_data.call_count == 2
+
+
+def test_not_cached_when_disabled(settings):
+    """AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE = False fetches every time without querying versions."""
+    settings.AI_EXTENSIONS_ENABLE_TRANSCRIPT_CACHE = False
+    block = make_video("a", "vid-a")
+    api = edxval_api({"vid-a": "Alpha"})
+
+    with patch.object(transcripts, "_transcript_versions") as versions_query, \
+            patch.dict("sys.modules", {"edxval.api": api}):
+        load_transcripts([block])
+        load_transcripts([block])
+
+    versions_query.assert_not_called()
+    assert api.get_video_transcript_data.call_count == 2
+
+
+def test_failed_fetch_returns_none_and_is_not_cached():
+    """A transcript that can't be downloaded yields None and is retried on the next request."""
+    block = make_video("a", "vid-a")
+    api = MagicMock()
+    api.get_video_transcript_data.side_effect = Exception("edxval down")
+
+    with patch.object(transcripts, "_transcript_versions", return_value={("vid-a", "en"): MODIFIED}), \
+            patch.dict("sys.modules", {"edxval.api": api}):
+        assert load_transcripts([block]) == {str(block.location): None}
+        load_transcripts([block])
+
+    assert api.get_video_transcript_data.call_count == 2
+
+
+def test_prefetched_transcripts_are_served():
+    """Within prefetched_transcripts(), loaded texts are used without touching edxval."""
+    block = make_video("a", "vid-a")
+
+    with patch.object(transcripts, "_fetch_transcript") as fetch:
+        with prefetched_transcripts({str(block.location): "Prefetched"}):
+            assert load_transcripts([block]) == {str(block.location): "Prefetched"}
+        assert load_transcripts([block]) == {str(block.location): fetch.return_value}
+
+    fetch.assert_called_once_with("vid-a", "en")
@@ -8,6 +8,8 @@ from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import BlockUsageLocator
 
@@ -16,6 +18,7 @@ from openedx_ai_extensions.workflows.orchestrators import BaseOrchestrator
 from openedx_ai_extensions.workflows.orchestrators.direct_orchestrator import DirectLLMResponse
 from openedx_ai_extensions.workflows.orchestrators.mock_orchestrator import MockResponse, MockStreamResponse
 from openedx_ai_extensions.workflows.orchestrators.threaded_orchestrator import ThreadedLLMResponse
+from openedx_ai_extensions.workflows.session_resolver import resolve_session
 
 User = get_user_model()
 
@@ -271,6 +274,56 @@ def test_workflow_session_delete(
     assert not AIWorkflowSession.objects.filter(id=session_id).exists()
 
 
+@pytest.mark.django_db
+def test_resolve_session_reads_cached_id_by_primary_key(
+    user, course_key, workflow_scope, workflow_profile, django_assert_num_queries
+):  # pylint: disable=redefined-outer-name
+    """
+    Test resolve_session creates the session once, then reads it by its cached id.
+    """
+    cache.clear()
+    lookup = {"user": user, "scope": workflow_scope, "profile": workflow_profile, "course_id": course_key}
+
+    session = resolve_session(**lookup)
+    with django_assert_num_queries(1):
+        again = resolve_session(**lookup)
+
+    assert again.id == session.id
+    assert AIWorkflowSession.objects.filter(user=user).count() == 1
+
+    # A deleted session is recreated instead of being served from the cache.
+    session.delete()
+    recreated = resolve_session(**lookup)
+    assert recreated.id != session.id
+
+
+@pytest.mark.django_db
+def test_resolve_session_reads_row_inserted_by_concurrent_request(
+    user, course_key, workflow_scope, workflow_profile
+):  # pylint: disable=redefined-outer-name
+    """
+    Test resolve_session returns the other request's row when its insert loses the race.
+    """
+    cache.clear()
+    location = BlockUsageLocator(course_key, block_type="vertical", block_id="unit-123")
+    lookup = {
+        "user": user,
+        "scope": workflow_scope,
+        "profile": workflow_profile,
+        "course_id": course_key,
+        "location_id": location,
+    }
+    winner = AIWorkflowSession.objects.create(**lookup)
+
+    with patch.object(AIWorkflowSession.objects, "filter", wraps=AIWorkflowSession.objects.filter) as read, \
+            patch.object(AIWorkflowSession.objects, "create", side_effect=IntegrityError):
+        # The first indexed read happens before the concurrent insert commits.
+        read.side_effect = [AIWorkflowSession.objects.none(), AIWorkflowSession.objects.filter(id=winner.id)]
+        session = resolve_session(**lookup)
+
+    assert session.id == winner.id
+
+
 # ============================================================================
 # Orchestrators Tests
 # ============================================================================
@@ -554,6 +607,7 @@ def test_threaded_llm_response_orchestrator_new_session(
     # Mock SubmissionProcessor
     mock_submission = Mock()
     mock_submission.update_chat_submission = Mock()
+    mock_submission.get_full_message_history.return_value = []
     mock_submission_processor_class.return_value = mock_submission
 
     # Mock the workflow to have location_id and action attributes
@@ -88,6 +88,7 @@ const AISidebarResponse = ({
   const isDismissed = useRef(false);
   const didInitOpenSignal = useRef(false);
   const previousMessageCount = useRef(0);
+  const historyCursor = useRef<string | null>(null);
   const [textareaRows, setTextareaRows] = useState(1);
 
   // Allow parent to request reopening the sidebar (without starting a new request).
@@ -146,6 +147,7 @@ const AISidebarResponse = ({
           rawMessages = parsedData.messages;
           if (parsedData.metadata) {
             setHasMoreHistory(parsedData.metadata.has_more || false);
+            historyCursor.current = parsedData.metadata.cursor || null;
           }
         } else if (Array.isArray(parsedData)) {
           rawMessages = parsedData;
@@ -295,10 +297,10 @@ const AISidebarResponse = ({
       });
 
       // Make API call with lazy_load_chat_history action
-      // Pass current message count as user input
+      // Pass the cursor of the oldest loaded message (and the count as a fallback) as user input
       const data = await callWorkflowService({
         context: preparedContext,
-        userInput: JSON.stringify({ current_messages: currentMessageCount }),
+        userInput: JSON.stringify({ before: historyCursor.current, current_messages: currentMessageCount }),
         payload: {
           action: WORKFLOW_ACTIONS.LAZY_LOAD_CHAT_HISTORY,
           requestId: `ai-request-${Date.now()}`,
@@ -345,6 +347,7 @@ const AISidebarResponse = ({
       // If no messages were returned or metadata says no more, disable further loading
       if (parsed.metadata) {
         setHasMoreHistory(parsed.metadata.has_more || false);
+        historyCursor.current = parsed.metadata.cursor || historyCursor.current;
       } else if (olderMessages.length === 0) {
         // If no metadata and no messages returned, no more history
         setHasMoreHistory(false);